@@ -5,6 +5,7 @@ Executes AI agent actions by calling existing API endpoints/handlers.
 """
 
 import json
+import logging
 from typing import Dict, Any, Optional
 from decimal import Decimal
 
@@ -13,6 +14,8 @@ from django.core.cache import cache
 from rest_framework.test import APIRequestFactory
 from rest_framework.request import Request
 
+logger = logging.getLogger(__name__)
+
 
 class ActionExecutor:
     """
@@ -321,10 +324,37 @@ class ActionExecutor:
 
         return {"success": False, "message": "Unknown error", "data": None}
 
+    def _generate_fees_for_schools(self, school_ids, month, force_overwrite=False, missing_only=False):
+        """
+        Create month's fees for school_ids in one set-based pass
+        (students.fee_generation). Returns (results, errors, total_created).
+        """
+        from students import fee_generation
+
+        generated = fee_generation.generate_month_fees(
+            school_ids, month, force_overwrite=force_overwrite, missing_only=missing_only
+        )
+        results = []
+        errors = []
+        for school in generated['schools']:
+            if school['status'] in (fee_generation.CREATED, fee_generation.NO_STUDENTS, fee_generation.UP_TO_DATE):
+                results.append({
+                    'school_id': school['school_id'],
+                    'school_name': school['school_name'],
+                    'records_created': school['records'] if school['status'] == fee_generation.CREATED else 0,
+                    'success': True
+                })
+            else:
+                errors.append({
+                    'school_id': school['school_id'],
+                    'school_name': school.get('school_name', f"School #{school['school_id']}"),
+                    'error': school.get('error', 'Unknown error')
+                })
+        return results, errors, generated['records_created']
+
     def _execute_create_fees_all_schools(self, params: Dict) -> Dict:
         """Create monthly fees for ALL accessible schools."""
         from students.models import School
-        from students.views import create_new_month_fees
 
         month = params.get('month')
         force_overwrite = params.get('force_overwrite', False)
@@ -335,43 +365,13 @@ class ActionExecutor:
         if accessible_ids is not None:
             schools = schools.filter(id__in=accessible_ids)
 
-        results = []
-        total_created = 0
-        errors = []
-
-        for school in schools:
-            try:
-                request = self._make_request('post', '/api/fees/create/', {
-                    'school_id': school.id,
-                    'month': month,
-                    'force_overwrite': force_overwrite
-                })
-
-                response = create_new_month_fees(request)
-
-                if hasattr(response, 'data'):
-                    data = response.data
-                    if response.status_code in [200, 201]:
-                        created = data.get('records_created', 0)
-                        total_created += created
-                        results.append({
-                            'school_id': school.id,
-                            'school_name': school.name,
-                            'records_created': created,
-                            'success': True
-                        })
-                    else:
-                        errors.append({
-                            'school_id': school.id,
-                            'school_name': school.name,
-                            'error': data.get('error', 'Unknown error')
-                        })
-            except Exception as e:
-                errors.append({
-                    'school_id': school.id,
-                    'school_name': school.name,
-                    'error': str(e)
-                })
+        try:
+            results, errors, total_created = self._generate_fees_for_schools(
+                list(schools.values_list('id', flat=True)), month, force_overwrite=force_overwrite
+            )
+        except Exception as e:
+            logger.error(f"Fee generation for all schools failed: {str(e)}")
+            return {"success": False, "message": f"Failed to create fees: {str(e)}", "data": None}
 
         success_count = len(results)
         error_count = len(errors)
@@ -802,8 +802,9 @@ class ActionExecutor:
 
     def _execute_get_schools_without_fees(self, params: Dict) -> Dict:
         """Get schools that don't have fee records for a specific month, with recovery rate info."""
-        from students.models import School, Fee, Student
-        from django.db.models import Sum, Count
+        from students.models import School, Student
+        from students.fee_rollups import fee_rollup_totals
+        from django.db.models import Count
 
         month = params.get('month')
 
@@ -813,19 +814,14 @@ class ActionExecutor:
         if accessible_ids is not None:
             all_schools = all_schools.filter(id__in=accessible_ids)
 
-        # Get fee statistics per school for this month
-        # Fee model has direct school ForeignKey, not through student
-        fee_stats = Fee.objects.filter(month=month).values('school_id').annotate(
-            fee_count=Count('id'),
-            total_fee_sum=Sum('total_fee'),
-            paid_amount_sum=Sum('paid_amount'),
-            balance_due_sum=Sum('balance_due')
-        )
+        # Get fee statistics per school for this month (precomputed rollups)
+        fee_stats_dict = fee_rollup_totals(month)
 
-        # Create a lookup dict for fee stats
-        fee_stats_dict = {
-            stat['school_id']: stat for stat in fee_stats
-        }
+        # Active students per school in one grouped query
+        student_counts = dict(
+            Student.objects.filter(school__in=all_schools, status='Active')
+            .values('school_id').annotate(total=Count('id')).values_list('school_id', 'total')
+        )
 
         # Categorize schools
         schools_without_fees = []
@@ -834,16 +830,14 @@ class ActionExecutor:
         total_fee_amount = 0
 
         for school in all_schools:
-            # Count active students in this school
-            # Student model uses status='Active' not is_active
-            student_count = Student.objects.filter(school=school, status='Active').count()
+            student_count = student_counts.get(school.id, 0)
 
             if school.id in fee_stats_dict:
                 # School has fees - calculate recovery rate
                 stats = fee_stats_dict[school.id]
-                total_fee = float(stats['total_fee_sum'] or 0)
-                paid_amount = float(stats['paid_amount_sum'] or 0)
-                balance_due = float(stats['balance_due_sum'] or 0)
+                total_fee = float(stats['total_fee'])
+                paid_amount = float(stats['paid_amount'])
+                balance_due = float(stats['balance_due'])
                 recovery_rate = (paid_amount / total_fee * 100) if total_fee > 0 else 0
 
                 total_recovery += paid_amount
@@ -853,7 +847,7 @@ class ActionExecutor:
                     'id': school.id,
                     'name': school.name,
                     'student_count': student_count,
-                    'fee_records': stats['fee_count'],
+                    'fee_records': stats['record_count'],
                     'total_fee': total_fee,
                     'paid_amount': paid_amount,
                     'balance_due': balance_due,
@@ -935,8 +929,8 @@ class ActionExecutor:
         2. Students within schools that DO have fees but are missing their individual fee record
            (e.g., students added after monthly fees were created)
         """
-        from students.models import School, Fee, Student
-        from students.views import create_new_month_fees, create_single_fee
+        from students import fee_generation
+        from students.models import School
 
         month = params.get('month')
         school_id = params.get('school_id')  # Optional: filter to specific school
@@ -956,66 +950,30 @@ class ActionExecutor:
         if school_id:
             all_schools = all_schools.filter(id=school_id)
 
-        # Find which schools have fees for this month
-        schools_with_fees_ids = set(
-            Fee.objects.filter(month=month).values_list('school_id', flat=True).distinct()
-        )
-
-        # PART 1: Create fees for schools WITHOUT any fee records
-        schools_without_fees = [s for s in all_schools if s.id not in schools_with_fees_ids]
-
-        for school in schools_without_fees:
-            try:
-                request = self._make_request('post', '/api/fees/create/', {
-                    'school_id': school.id,
-                    'month': month,
-                    'force_overwrite': False
-                })
-                response = create_new_month_fees(request)
-
-                if hasattr(response, 'data') and response.status_code in [200, 201]:
-                    created = response.data.get('records_created', 0)
-                    total_school_records += created
-                    schools_created.append({
-                        'school_name': school.name,
-                        'records_created': created
-                    })
-            except Exception as e:
-                errors.append(f"School {school.name}: {str(e)}")
-
-        # PART 2: Find students WITHOUT fee records in schools that DO have fees
-        schools_with_fees = [s for s in all_schools if s.id in schools_with_fees_ids]
-
-        for school in schools_with_fees:
-            # Get all active students in this school
-            active_students = Student.objects.filter(school=school, status='Active')
-
-            # Get student IDs that already have fee records for this month in this school
-            students_with_fees = set(
-                Fee.objects.filter(school=school, month=month).values_list('student_id', flat=True)
+        # Schools without fees are generated in full; schools with fees only get
+        # rows for active students that are missing one (one set-based pass)
+        try:
+            generated = fee_generation.generate_month_fees(
+                list(all_schools.values_list('id', flat=True)), month, missing_only=True
             )
-
-            # Find students missing fee records
-            students_without_fees = [s for s in active_students if s.id not in students_with_fees]
-
-            for student in students_without_fees:
-                try:
-                    # Use the existing create_single_fee API
-                    request = self._make_request('post', '/api/fees/create-single/', {
-                        'student_id': student.id,
-                        'month': month,
-                        'paid_amount': 0
-                    })
-                    response = create_single_fee(request)
-
-                    if hasattr(response, 'data') and response.status_code in [200, 201]:
-                        total_student_records += 1
-                        students_created.append({
-                            'student_name': student.name,
-                            'school_name': school.name
-                        })
-                except Exception as e:
-                    errors.append(f"Student {student.name} ({school.name}): {str(e)}")
+        except Exception as e:
+            logger.error(f"Creating missing fees for {month} failed: {str(e)}")
+            return {"success": False, "message": f"Failed to create missing fees: {str(e)}", "data": None}
+
+        for school in generated['schools']:
+            if school['status'] == fee_generation.CREATED and school['existing_records']:
+                total_student_records += school['records']
+                students_created.extend(
+                    {'student_name': name, 'school_name': school['school_name']} for name in school['students_added']
+                )
+            elif school['status'] == fee_generation.CREATED:
+                total_school_records += school['records']
+                schools_created.append({
+                    'school_name': school['school_name'],
+                    'records_created': school['records']
+                })
+            elif school['status'] == fee_generation.INVALID_SUBSCRIPTION:
+                errors.append(f"School {school['school_name']}: {school['error']}")
 
         # Build response message
         total_created = total_school_records + total_student_records
@@ -1063,8 +1021,7 @@ class ActionExecutor:
 
     def _execute_create_fees_multiple_schools(self, params: Dict) -> Dict:
         """Create fees for multiple specific schools by name."""
-        from students.models import School, Fee
-        from students.views import create_new_month_fees
+        from students.models import School
         import difflib
 
         month = params.get('month')
@@ -1129,43 +1086,13 @@ class ActionExecutor:
             }
 
         # Create fees for matched schools
-        results = []
-        total_created = 0
-        errors = []
-
-        for school in matched_schools:
-            try:
-                request = self._make_request('post', '/api/fees/create/', {
-                    'school_id': school.id,
-                    'month': month,
-                    'force_overwrite': False
-                })
-
-                response = create_new_month_fees(request)
-
-                if hasattr(response, 'data'):
-                    data = response.data
-                    if response.status_code in [200, 201]:
-                        created = data.get('records_created', 0)
-                        total_created += created
-                        results.append({
-                            'school_id': school.id,
-                            'school_name': school.name,
-                            'records_created': created,
-                            'success': True
-                        })
-                    else:
-                        errors.append({
-                            'school_id': school.id,
-                            'school_name': school.name,
-                            'error': data.get('error', 'Unknown error')
-                        })
-            except Exception as e:
-                errors.append({
-                    'school_id': school.id,
-                    'school_name': school.name,
-                    'error': str(e)
-                })
+        try:
+            results, errors, total_created = self._generate_fees_for_schools(
+                [school.id for school in matched_schools], month
+            )
+        except Exception as e:
+            logger.error(f"Fee generation for {len(matched_schools)} schools failed: {str(e)}")
+            return {"success": False, "message": f"Failed to create fees: {str(e)}"}
 
         success_count = len(results)
         error_count = len(errors)
@@ -1193,8 +1120,9 @@ class ActionExecutor:
 
     def _execute_get_recovery_report(self, params: Dict) -> Dict:
         """Get detailed fee recovery report for all schools."""
-        from students.models import School, Fee, Student
-        from django.db.models import Sum, Count
+        from students.models import School, Student
+        from students.fee_rollups import fee_rollup_totals
+        from django.db.models import Count
 
         month = params.get('month')
 
@@ -1204,16 +1132,14 @@ class ActionExecutor:
         if accessible_ids is not None:
             all_schools = all_schools.filter(id__in=accessible_ids)
 
-        # Get fee statistics per school for this month
-        # Fee model has direct school ForeignKey
-        fee_stats = Fee.objects.filter(month=month).values('school_id').annotate(
-            fee_count=Count('id'),
-            total_fee_sum=Sum('total_fee'),
-            paid_amount_sum=Sum('paid_amount'),
-            balance_due_sum=Sum('balance_due')
-        )
+        # Get fee statistics per school for this month (precomputed rollups)
+        fee_stats_dict = fee_rollup_totals(month)
 
-        fee_stats_dict = {stat['school_id']: stat for stat in fee_stats}
+        # Active students per school in one grouped query
+        student_counts = dict(
+            Student.objects.filter(school__in=all_schools, status='Active')
+            .values('school_id').annotate(total=Count('id')).values_list('school_id', 'total')
+        )
 
         # Build report
         report = []
@@ -1224,14 +1150,13 @@ class ActionExecutor:
         schools_without_fees_count = 0
 
         for school in all_schools:
-            # Student model uses status='Active' not is_active
-            student_count = Student.objects.filter(school=school, status='Active').count()
+            student_count = student_counts.get(school.id, 0)
 
             if school.id in fee_stats_dict:
                 stats = fee_stats_dict[school.id]
-                total_fee = float(stats['total_fee_sum'] or 0)
-                paid_amount = float(stats['paid_amount_sum'] or 0)
-                balance_due = float(stats['balance_due_sum'] or 0)
+                total_fee = float(stats['total_fee'])
+                paid_amount = float(stats['paid_amount'])
+                balance_due = float(stats['balance_due'])
                 recovery_rate = (paid_amount / total_fee * 100) if total_fee > 0 else 0
 
                 total_fee_all += total_fee
@@ -1243,7 +1168,7 @@ class ActionExecutor:
                     'school_id': school.id,
                     'school_name': school.name,
                     'student_count': student_count,
-                    'fee_records': stats['fee_count'],
+                    'fee_records': stats['record_count'],
                     'total_fee': total_fee,
                     'collected': paid_amount,
                     'pending': balance_due,
@@ -1416,6 +1341,8 @@ class ActionExecutor:
         query_params = {'months': months}
         if school_id:
             query_params['school_id'] = school_id
+        if params.get('student_class'):
+            query_params['class'] = params['student_class']
 
         request = self._make_request('get', '/api/fees/defaulters/', query_params)
         response = get_fee_defaulters(request)
@@ -1426,7 +1353,7 @@ class ActionExecutor:
             if count == 0:
                 return {
                     "success": True,
-                    "message": f"No defaulters found! All students have paid within the last {months} month(s).",
+                    "message": f"No defaulters found! No student has {months} or more unpaid month(s).",
                     "data": data
                 }
 
@@ -1434,7 +1361,8 @@ class ActionExecutor:
             defaulters = data.get('defaulters', [])
             lines = []
             for d in defaulters[:15]:
-                lines.append(f"• {d['student_name']} ({d.get('student_class', '?')}) - {d.get('school__name', '?')} - {d['unpaid_months']} months - PKR {float(d['total_due']):,.0f} due")
+                since = f" (owing since {d['oldest_unpaid_month']})" if d.get('oldest_unpaid_month') else ""
+                lines.append(f"• {d['student_name']} ({d.get('student_class', '?')}) - {d.get('school__name', '?')} - {d['unpaid_months']} months - PKR {float(d['total_due']):,.0f} due{since}")
 
             message = f"Found {count} defaulter(s) with {months}+ months unpaid:\n" + "\n".join(lines)
             if count > 15:
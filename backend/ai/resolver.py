@@ -26,6 +26,16 @@ def fuzzy_match_score(s1: str, s2: str) -> float:
     return SequenceMatcher(None, s1, s2).ratio()
 
 
+def student_candidates(students, student_name: str):
+    """
+    The students worth fuzzy-scoring for student_name: narrowed in the
+    database by the student search index (students.search) instead of
+    scoring every active student in Python.
+    """
+    from students.search import matching_students
+    return matching_students(students, student_name)
+
+
 def resolve_school(params: Dict[str, Any], context: Dict[str, Any]) -> Tuple[Optional[int], Optional[str]]:
     """
     Resolve school_id from school_name if needed.
@@ -259,7 +269,7 @@ def resolve_fee_for_update(params: Dict[str, Any]) -> Tuple[Optional[int], Optio
 
         # Find matching students
         matches = []
-        for student in students:
+        for student in student_candidates(students, student_name):
             score = fuzzy_match_score(student_name, student.name)
             if score >= 0.6:
                 matches.append((student, score))
@@ -496,7 +506,7 @@ class ParameterResolver:
 
             # Fuzzy match on student name
             matches = []
-            for student in students:
+            for student in student_candidates(students, student_name):
                 score = fuzzy_match_score(student_name, student.name)
                 if score >= 0.6:
                     matches.append((student, score))
@@ -580,7 +590,7 @@ class ParameterResolver:
 
         # Fuzzy match on student name
         matches = []
-        for student in students:
+        for student in student_candidates(students, student_name):
             score = fuzzy_match_score(student_name, student.name)
             if score >= 0.6:
                 matches.append((student, score))
@@ -659,7 +669,7 @@ class ParameterResolver:
 
             # Fuzzy match on student name
             matches = []
-            for student in students:
+            for student in student_candidates(students, student_name):
                 score = fuzzy_match_score(student_name, student.name)
                 if score >= 0.6:
                     matches.append((student, score))
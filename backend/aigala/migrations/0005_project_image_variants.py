@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-16 20:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aigala', '0004_add_gallery_targeting'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='webp_url',
+            field=models.URLField(blank=True, help_text='1280px WebP for full-size views (generated after upload)', null=True),
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='thumbnail_url',
+            field=models.URLField(blank=True, help_text='600px JPEG for grids and PDFs (generated after upload)', null=True),
+        ),
+    ]
@@ -176,7 +176,8 @@ class Project(models.Model):
     title = models.CharField(max_length=200, help_text="e.g., 'Thunder Girl'")
     image_url = models.URLField(help_text="Supabase public URL")
     image_path = models.CharField(max_length=500, help_text="Supabase storage path for deletion")
-    thumbnail_url = models.URLField(blank=True, null=True, help_text="Optional smaller version")
+    thumbnail_url = models.URLField(blank=True, null=True, help_text="600px JPEG for grids and PDFs (generated after upload)")
+    webp_url = models.URLField(blank=True, null=True, help_text="1280px WebP for full-size views (generated after upload)")
 
     # Description / Story
     description = models.TextField(blank=True, help_text="Origin story, explanation, etc.")
@@ -64,7 +64,7 @@ class ProjectListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Project
         fields = [
-            'id', 'title', 'image_url', 'thumbnail_url',
+            'id', 'title', 'image_url', 'thumbnail_url', 'webp_url',
             'student_name', 'student_class', 'student_photo',
             'vote_count', 'comment_count',
             'is_winner', 'winner_rank', 'rank_title',
@@ -102,7 +102,7 @@ class ProjectDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Project
         fields = [
-            'id', 'title', 'image_url', 'thumbnail_url', 'description', 'metadata',
+            'id', 'title', 'image_url', 'thumbnail_url', 'webp_url', 'description', 'metadata',
             'student', 'vote_count', 'comment_count', 'view_count',
             'is_winner', 'winner_rank', 'rank_title',
             'has_voted', 'is_own_project',
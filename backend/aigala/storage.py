@@ -13,6 +13,8 @@ from datetime import datetime
 from supabase import create_client, Client
 from django.conf import settings
 
+from core.image_variants import VARIANTS, generate_variants, variant_path
+
 BUCKET_NAME = 'aigala-projects'
 
 
@@ -128,9 +130,43 @@ def upload_gallery_cover(file, gallery_id: int) -> dict:
     }
 
 
+def generate_project_image_variants(path: str) -> dict:
+    """
+    Store resized variants of an uploaded project image next to the original.
+
+    Args:
+        path: Storage path of the original image
+
+    Returns:
+        dict mapping variant name ('thumb', 'webp') to its public URL
+    """
+    bucket = get_supabase_client().storage.from_(BUCKET_NAME)
+
+    paths = generate_variants(
+        bucket.download(path),
+        path,
+        lambda target, data, content_type: bucket.upload(
+            path=target,
+            file=data,
+            file_options={"content-type": content_type, "upsert": "true"}
+        ),
+    )
+    return {name: bucket.get_public_url(target) for name, target in paths.items()}
+
+
+def queue_project_image_variants(project) -> None:
+    """Queue variant generation for a project image; never fails the caller."""
+    from .tasks import generate_project_image_variants_task
+
+    try:
+        generate_project_image_variants_task.delay(project.id)
+    except Exception as e:
+        print(f"Error queueing image variants for project {project.id}: {e}")
+
+
 def delete_image(path: str) -> bool:
     """
-    Delete an image from Supabase storage.
+    Delete an image (and its resized variants) from Supabase storage.
 
     Args:
         path: Storage path of the image
@@ -140,7 +176,7 @@ def delete_image(path: str) -> bool:
     """
     try:
         client = get_supabase_client()
-        client.storage.from_(BUCKET_NAME).remove([path])
+        client.storage.from_(BUCKET_NAME).remove([path] + [variant_path(path, name) for name in VARIANTS])
         return True
     except Exception as e:
         print(f"Error deleting image {path}: {e}")
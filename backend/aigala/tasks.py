@@ -1,6 +1,10 @@
+import logging
+
 from celery import shared_task
 from django.utils import timezone
 
+logger = logging.getLogger(__name__)
+
 
 @shared_task(name='aigala.tasks.auto_transition_galleries_task')
 def auto_transition_galleries_task():
@@ -9,3 +13,21 @@ def auto_transition_galleries_task():
 
     auto_transition_due_galleries(today=timezone.now().date())
     return {'status': 'ok'}
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def generate_project_image_variants_task(self, project_id):
+    """Async: store thumbnail/WebP variants of a project image and save their URLs."""
+    from .models import Project
+    from .storage import generate_project_image_variants
+
+    project = Project.objects.filter(id=project_id).only('id', 'image_path').first()
+    if not project or not project.image_path:
+        return {'status': 'skipped'}
+    try:
+        urls = generate_project_image_variants(project.image_path)
+        Project.objects.filter(id=project_id).update(thumbnail_url=urls['thumb'], webp_url=urls['webp'])
+    except Exception as exc:
+        logger.error(f"Variant generation failed for project {project_id}: {exc}")
+        self.retry(exc=exc)
+    return {'status': 'ok'}
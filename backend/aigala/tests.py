@@ -174,7 +174,8 @@ class ProjectUploadTests(AiGalaSeedDataMixin, TestCase):
         self.authenticate(self.student_user_1)
         image = SimpleUploadedFile('art.png', b'fake-image-bytes', content_type='image/png')
 
-        with patch('aigala.views.upload_project_image') as mock_upload:
+        with patch('aigala.views.upload_project_image') as mock_upload, \
+                patch('aigala.tasks.generate_project_image_variants_task.delay') as mock_delay:
             mock_upload.return_value = {
                 'url': 'https://example.com/uploaded.png',
                 'path': 'projects/1/1/uploaded.png',
@@ -191,6 +192,7 @@ class ProjectUploadTests(AiGalaSeedDataMixin, TestCase):
 
         self.assertEqual(response.status_code, 201)
         self.assertEqual(Project.objects.filter(gallery=gallery, student=self.student_1).count(), 1)
+        mock_delay.assert_called_once_with(response.data['id'])
 
     def test_upload_blocked_when_gallery_not_active(self):
         gallery = self.create_gallery(status='draft')
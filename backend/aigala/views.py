@@ -17,7 +17,7 @@ from .serializers import (
     ProjectListSerializer, ProjectDetailSerializer, ProjectCreateSerializer,
     CommentSerializer, CommentCreateSerializer,
 )
-from .storage import upload_project_image, upload_gallery_cover, delete_image
+from .storage import upload_project_image, upload_gallery_cover, delete_image, queue_project_image_variants
 from students.models import Badge, StudentBadge, Student
 
 
@@ -818,6 +818,7 @@ def upload_project(request, gallery_id):
         image_url=upload_result['url'],
         image_path=upload_result['path']
     )
+    queue_project_image_variants(project)
 
     return Response(
         ProjectDetailSerializer(project, context={'request': request}).data,
@@ -1365,6 +1366,7 @@ def admin_upload_project(request, gallery_id):
         image_url=upload_result['url'],
         image_path=upload_result['path']
     )
+    queue_project_image_variants(project)
 
     return Response(
         ProjectDetailSerializer(project, context={'request': request}).data,
@@ -1462,6 +1464,7 @@ def teacher_upload_project(request, gallery_id):
         image_url=upload_result['url'],
         image_path=upload_result['path']
     )
+    queue_project_image_variants(project)
 
     return Response(
         ProjectDetailSerializer(project, context={'request': request}).data,
@@ -1572,42 +1575,11 @@ def admin_gallery_stats(request, gallery_id):
 
 # ============== PDF GENERATION ENDPOINTS ==============
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def participation_report_pdf(request, gallery_id):
-    """
-    GET /api/aigala/admin/galleries/{id}/participation-report/
-    Generate and download participation report PDF for a gallery.
-    - Admin: Can download for any gallery
-    - Teacher: Can download for galleries they created or targeting their schools
-    """
-    if not is_admin_or_teacher(request.user):
-        return Response(
-            {'error': 'Only admins and teachers can download reports'},
-            status=status.HTTP_403_FORBIDDEN
-        )
-
-    from django.http import HttpResponse
-    from weasyprint import HTML
-    from io import BytesIO
+def build_participation_report_html(gallery):
+    """Build the participation report HTML for a gallery."""
     from django.db.models import Count
     from datetime import datetime
 
-    try:
-        gallery = Gallery.objects.get(id=gallery_id)
-    except Gallery.DoesNotExist:
-        return Response(
-            {'error': 'Gallery not found'},
-            status=status.HTTP_404_NOT_FOUND
-        )
-
-    # Check if user can manage this gallery
-    if not can_manage_gallery(request.user, gallery):
-        return Response(
-            {'error': 'You do not have permission to download this report'},
-            status=status.HTTP_403_FORBIDDEN
-        )
-
     # Get data
     projects = gallery.projects.filter(is_approved=True).select_related(
         'student', 'student__school'
@@ -1830,6 +1802,45 @@ def participation_report_pdf(request, gallery_id):
     </html>
     '''
 
+    return html_content
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def participation_report_pdf(request, gallery_id):
+    """
+    GET /api/aigala/admin/galleries/{id}/participation-report/
+    Generate and download participation report PDF for a gallery.
+    - Admin: Can download for any gallery
+    - Teacher: Can download for galleries they created or targeting their schools
+    """
+    if not is_admin_or_teacher(request.user):
+        return Response(
+            {'error': 'Only admins and teachers can download reports'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    from django.http import HttpResponse
+    from weasyprint import HTML
+    from io import BytesIO
+
+    try:
+        gallery = Gallery.objects.get(id=gallery_id)
+    except Gallery.DoesNotExist:
+        return Response(
+            {'error': 'Gallery not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    # Check if user can manage this gallery
+    if not can_manage_gallery(request.user, gallery):
+        return Response(
+            {'error': 'You do not have permission to download this report'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    html_content = build_participation_report_html(gallery)
+
     # Generate PDF
     buffer = BytesIO()
     HTML(string=html_content).write_pdf(buffer)
@@ -2124,6 +2135,100 @@ def download_certificate(request, project_id):
     return response
 
 
+def build_certificate_html(project, gallery):
+    """Build the certificate HTML used for bulk certificate downloads."""
+    from datetime import datetime
+
+    # Determine certificate type
+    if project.is_winner:
+        rank_titles = {1: 'Champion', 2: 'Innovator', 3: 'Creator'}
+        award_title = f"AI Gala {rank_titles.get(project.winner_rank, 'Winner')}"
+        award_subtitle = f"#{project.winner_rank} Place"
+        badge_color = {1: '#FFD700', 2: '#C0C0C0', 3: '#CD7F32'}.get(project.winner_rank, '#8B5CF6')
+    else:
+        award_title = "AI Gala Participant"
+        award_subtitle = "Certificate of Participation"
+        badge_color = '#8B5CF6'
+
+    # Generate certificate HTML (same template as single certificate)
+    html_content = f'''
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <style>
+            @page {{ size: A4 landscape; margin: 0; }}
+            body {{ font-family: 'Georgia', serif; margin: 0; padding: 0; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); height: 100vh; display: flex; justify-content: center; align-items: center; }}
+            .certificate {{ width: 277mm; height: 190mm; background: white; border-radius: 20px; box-shadow: 0 20px 60px rgba(0,0,0,0.3); position: relative; overflow: hidden; }}
+            .border-design {{ position: absolute; top: 10px; left: 10px; right: 10px; bottom: 10px; border: 3px solid {badge_color}; border-radius: 15px; }}
+            .inner-border {{ position: absolute; top: 20px; left: 20px; right: 20px; bottom: 20px; border: 1px solid #ddd; border-radius: 10px; }}
+            .content {{ position: relative; z-index: 10; padding: 30px 50px; text-align: center; height: 100%; box-sizing: border-box; }}
+            .logo {{ font-size: 18pt; font-weight: bold; color: #8B5CF6; letter-spacing: 3px; margin-bottom: 10px; }}
+            .title {{ font-size: 36pt; font-weight: bold; color: {badge_color}; margin: 15px 0; text-transform: uppercase; letter-spacing: 5px; }}
+            .subtitle {{ font-size: 14pt; color: #666; margin-bottom: 25px; font-style: italic; }}
+            .presented-to {{ font-size: 12pt; color: #888; margin-bottom: 5px; }}
+            .student-name {{ font-size: 28pt; font-weight: bold; color: #333; margin: 10px 0; border-bottom: 2px solid {badge_color}; padding-bottom: 10px; display: inline-block; }}
+            .school-name {{ font-size: 11pt; color: #666; margin-top: 5px; }}
+            .project-section {{ margin: 20px 0; padding: 15px; background: #f9f9f9; border-radius: 10px; }}
+            .project-label {{ font-size: 10pt; color: #888; }}
+            .project-title {{ font-size: 16pt; color: #333; font-weight: 600; margin-top: 5px; }}
+            .gallery-theme {{ font-size: 12pt; color: #8B5CF6; margin-top: 5px; }}
+            .stats {{ display: inline-block; margin-top: 10px; padding: 8px 20px; background: {badge_color}; color: white; border-radius: 20px; font-size: 11pt; font-weight: bold; }}
+            .footer {{ position: absolute; bottom: 35px; left: 50px; right: 50px; display: flex; justify-content: space-between; align-items: flex-end; }}
+            .signature {{ text-align: center; }}
+            .signature-line {{ width: 150px; border-bottom: 1px solid #333; margin-bottom: 5px; }}
+            .signature-text {{ font-size: 9pt; color: #666; }}
+            .date {{ text-align: center; }}
+            .date-text {{ font-size: 10pt; color: #333; }}
+            .corner-design {{ position: absolute; width: 80px; height: 80px; background: {badge_color}; opacity: 0.1; }}
+            .corner-tl {{ top: 0; left: 0; border-radius: 0 0 80px 0; }}
+            .corner-tr {{ top: 0; right: 0; border-radius: 0 0 0 80px; }}
+            .corner-bl {{ bottom: 0; left: 0; border-radius: 0 80px 0 0; }}
+            .corner-br {{ bottom: 0; right: 0; border-radius: 80px 0 0 0; }}
+        </style>
+    </head>
+    <body>
+        <div class="certificate">
+            <div class="corner-design corner-tl"></div>
+            <div class="corner-design corner-tr"></div>
+            <div class="corner-design corner-bl"></div>
+            <div class="corner-design corner-br"></div>
+            <div class="border-design"></div>
+            <div class="inner-border"></div>
+            <div class="content">
+                <div class="logo">KODER KIDS</div>
+                <div class="title">{award_title}</div>
+                <div class="subtitle">{award_subtitle}</div>
+                <div class="presented-to">This certificate is proudly presented to</div>
+                <div class="student-name">{project.student.name}</div>
+                <div class="school-name">{project.student.school.name if project.student.school else ''} • {project.student.student_class or ''}</div>
+                <div class="project-section">
+                    <div class="project-label">For the creative project</div>
+                    <div class="project-title">"{project.title}"</div>
+                    <div class="gallery-theme">{gallery.title} - {gallery.theme}</div>
+                    {f'<div class="stats">{project.vote_count} Votes</div>' if project.is_winner else ''}
+                </div>
+                <div class="footer">
+                    <div class="signature"><div class="signature-line"></div><div class="signature-text">Program Director</div></div>
+                    <div class="date"><div class="date-text">{gallery.month_label}</div><div class="signature-text">{datetime.now().strftime('%Y')}</div></div>
+                    <div class="signature"><div class="signature-line"></div><div class="signature-text">Koder Kids</div></div>
+                </div>
+            </div>
+        </div>
+    </body>
+    </html>
+    '''
+
+    return html_content
+
+
+def certificate_filename(project):
+    """File name of a project's certificate inside the certificates ZIP."""
+    safe_name = project.student.name.replace(' ', '_').replace('/', '_')
+    prefix = f"{project.winner_rank}_Winner_" if project.is_winner else "Participant_"
+    return f"{prefix}{safe_name}.pdf"
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def download_all_certificates(request, gallery_id):
@@ -2143,7 +2248,6 @@ def download_all_certificates(request, gallery_id):
     from weasyprint import HTML
     from io import BytesIO
     import zipfile
-    from datetime import datetime
 
     try:
         gallery = Gallery.objects.get(id=gallery_id)
@@ -2181,85 +2285,7 @@ def download_all_certificates(request, gallery_id):
 
     with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
         for project in projects:
-            # Determine certificate type
-            if project.is_winner:
-                rank_titles = {1: 'Champion', 2: 'Innovator', 3: 'Creator'}
-                award_title = f"AI Gala {rank_titles.get(project.winner_rank, 'Winner')}"
-                award_subtitle = f"#{project.winner_rank} Place"
-                badge_color = {1: '#FFD700', 2: '#C0C0C0', 3: '#CD7F32'}.get(project.winner_rank, '#8B5CF6')
-            else:
-                award_title = "AI Gala Participant"
-                award_subtitle = "Certificate of Participation"
-                badge_color = '#8B5CF6'
-
-            # Generate certificate HTML (same template as single certificate)
-            html_content = f'''
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <style>
-                    @page {{ size: A4 landscape; margin: 0; }}
-                    body {{ font-family: 'Georgia', serif; margin: 0; padding: 0; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); height: 100vh; display: flex; justify-content: center; align-items: center; }}
-                    .certificate {{ width: 277mm; height: 190mm; background: white; border-radius: 20px; box-shadow: 0 20px 60px rgba(0,0,0,0.3); position: relative; overflow: hidden; }}
-                    .border-design {{ position: absolute; top: 10px; left: 10px; right: 10px; bottom: 10px; border: 3px solid {badge_color}; border-radius: 15px; }}
-                    .inner-border {{ position: absolute; top: 20px; left: 20px; right: 20px; bottom: 20px; border: 1px solid #ddd; border-radius: 10px; }}
-                    .content {{ position: relative; z-index: 10; padding: 30px 50px; text-align: center; height: 100%; box-sizing: border-box; }}
-                    .logo {{ font-size: 18pt; font-weight: bold; color: #8B5CF6; letter-spacing: 3px; margin-bottom: 10px; }}
-                    .title {{ font-size: 36pt; font-weight: bold; color: {badge_color}; margin: 15px 0; text-transform: uppercase; letter-spacing: 5px; }}
-                    .subtitle {{ font-size: 14pt; color: #666; margin-bottom: 25px; font-style: italic; }}
-                    .presented-to {{ font-size: 12pt; color: #888; margin-bottom: 5px; }}
-                    .student-name {{ font-size: 28pt; font-weight: bold; color: #333; margin: 10px 0; border-bottom: 2px solid {badge_color}; padding-bottom: 10px; display: inline-block; }}
-                    .school-name {{ font-size: 11pt; color: #666; margin-top: 5px; }}
-                    .project-section {{ margin: 20px 0; padding: 15px; background: #f9f9f9; border-radius: 10px; }}
-                    .project-label {{ font-size: 10pt; color: #888; }}
-                    .project-title {{ font-size: 16pt; color: #333; font-weight: 600; margin-top: 5px; }}
-                    .gallery-theme {{ font-size: 12pt; color: #8B5CF6; margin-top: 5px; }}
-                    .stats {{ display: inline-block; margin-top: 10px; padding: 8px 20px; background: {badge_color}; color: white; border-radius: 20px; font-size: 11pt; font-weight: bold; }}
-                    .footer {{ position: absolute; bottom: 35px; left: 50px; right: 50px; display: flex; justify-content: space-between; align-items: flex-end; }}
-                    .signature {{ text-align: center; }}
-                    .signature-line {{ width: 150px; border-bottom: 1px solid #333; margin-bottom: 5px; }}
-                    .signature-text {{ font-size: 9pt; color: #666; }}
-                    .date {{ text-align: center; }}
-                    .date-text {{ font-size: 10pt; color: #333; }}
-                    .corner-design {{ position: absolute; width: 80px; height: 80px; background: {badge_color}; opacity: 0.1; }}
-                    .corner-tl {{ top: 0; left: 0; border-radius: 0 0 80px 0; }}
-                    .corner-tr {{ top: 0; right: 0; border-radius: 0 0 0 80px; }}
-                    .corner-bl {{ bottom: 0; left: 0; border-radius: 0 80px 0 0; }}
-                    .corner-br {{ bottom: 0; right: 0; border-radius: 80px 0 0 0; }}
-                </style>
-            </head>
-            <body>
-                <div class="certificate">
-                    <div class="corner-design corner-tl"></div>
-                    <div class="corner-design corner-tr"></div>
-                    <div class="corner-design corner-bl"></div>
-                    <div class="corner-design corner-br"></div>
-                    <div class="border-design"></div>
-                    <div class="inner-border"></div>
-                    <div class="content">
-                        <div class="logo">KODER KIDS</div>
-                        <div class="title">{award_title}</div>
-                        <div class="subtitle">{award_subtitle}</div>
-                        <div class="presented-to">This certificate is proudly presented to</div>
-                        <div class="student-name">{project.student.name}</div>
-                        <div class="school-name">{project.student.school.name if project.student.school else ''} • {project.student.student_class or ''}</div>
-                        <div class="project-section">
-                            <div class="project-label">For the creative project</div>
-                            <div class="project-title">"{project.title}"</div>
-                            <div class="gallery-theme">{gallery.title} - {gallery.theme}</div>
-                            {f'<div class="stats">{project.vote_count} Votes</div>' if project.is_winner else ''}
-                        </div>
-                        <div class="footer">
-                            <div class="signature"><div class="signature-line"></div><div class="signature-text">Program Director</div></div>
-                            <div class="date"><div class="date-text">{gallery.month_label}</div><div class="signature-text">{datetime.now().strftime('%Y')}</div></div>
-                            <div class="signature"><div class="signature-line"></div><div class="signature-text">Koder Kids</div></div>
-                        </div>
-                    </div>
-                </div>
-            </body>
-            </html>
-            '''
+            html_content = build_certificate_html(project, gallery)
 
             # Generate PDF
             pdf_buffer = BytesIO()
@@ -2267,10 +2293,7 @@ def download_all_certificates(request, gallery_id):
             pdf_buffer.seek(0)
 
             # Add to ZIP
-            safe_name = project.student.name.replace(' ', '_').replace('/', '_')
-            prefix = f"{project.winner_rank}_Winner_" if project.is_winner else "Participant_"
-            filename = f"{prefix}{safe_name}.pdf"
-            zip_file.writestr(filename, pdf_buffer.getvalue())
+            zip_file.writestr(certificate_filename(project), pdf_buffer.getvalue())
 
     zip_buffer.seek(0)
 
@@ -0,0 +1,143 @@
+"""
+Marking a session's attendance for many students at once.
+
+    mark_session(teacher, '2026-03-02', [{"student_id": 1, "status": "Present",
+                                          "achieved_topic": "..."}, ...])
+
+However many students are marked, the work is:
+
+    1. the students, in one query
+    2. the lesson plans of their classes for the date, in one query
+    3. one bulk_update of achieved topics (only when topics were sent)
+    4. one upsert (bulk_create with update_conflicts) on (student, session_date)
+    5. the saved rows, in one query, for the response
+
+Each record is matched to the lesson plan of its student's class and school
+on that date, and a record's achieved_topic is copied to that lesson plan,
+as mark_attendance has always done (the last record of a class wins).
+Nothing is written unless every student exists and is active.
+
+save_records does steps 2-4 for records spanning several dates and classes;
+the offline sync (attendance.sync) applies its batches through it.
+"""
+import logging
+from datetime import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from students.attendance_stats import schedule_stats_refresh
+from students.models import Attendance, LessonPlan, Student
+
+logger = logging.getLogger(__name__)
+
+UPSERT_FIELDS = ['status', 'teacher', 'achieved_topic', 'lesson_plan', 'updated_at', 'changed_at']
+
+
+class AttendanceError(ValueError):
+    """The batch cannot be saved (reported as a 400)."""
+
+
+def parse_session_date(value):
+    try:
+        return datetime.strptime(str(value), '%Y-%m-%d').date()
+    except ValueError:
+        raise AttendanceError(f"Invalid session_date: {value}. Use YYYY-MM-DD.")
+
+
+def lesson_plans_for(keys):
+    """
+    {(session_date, school_id, student_class): lesson plan} for keys, in one
+    query; the oldest plan when several teachers have one.
+    """
+    plans = {}
+    if not keys:
+        return plans
+    for plan in LessonPlan.objects.filter(
+        session_date__in={session_date for session_date, _, _ in keys},
+        school_id__in={school_id for _, school_id, _ in keys},
+        student_class__in={student_class for _, _, student_class in keys},
+    ).order_by('id'):
+        key = (plan.session_date, plan.school_id, plan.student_class)
+        if key in keys:
+            plans.setdefault(key, plan)
+    return plans
+
+
+def save_records(teacher, entries):
+    """
+    Upsert attendance for entries, a list of (student, session_date, record,
+    changed_at) with one entry per (student, session_date): link each row to
+    the lesson plan of the student's class that day and copy achieved topics
+    to the plans. changed_at is when the record was decided (stored on the
+    row for offline sync conflicts). A fixed number of queries, in one
+    transaction.
+    """
+    plans = lesson_plans_for({
+        (session_date, student.school_id, student.student_class) for student, session_date, _, _ in entries
+    })
+
+    rows, achieved = [], {}
+    for student, session_date, record, changed_at in entries:
+        lesson_plan = plans.get((session_date, student.school_id, student.student_class))
+        achieved_topic = record.get('achieved_topic', "")
+        if lesson_plan and achieved_topic:
+            achieved[lesson_plan.id] = (lesson_plan, achieved_topic)
+        rows.append(Attendance(
+            student_id=student.id,
+            session_date=session_date,
+            status=record.get('status', "N/A"),
+            teacher=teacher,
+            achieved_topic=achieved_topic,
+            lesson_plan=lesson_plan,
+            changed_at=changed_at,
+        ))
+
+    with transaction.atomic():
+        if achieved:
+            for lesson_plan, achieved_topic in achieved.values():
+                lesson_plan.achieved_topic = achieved_topic
+            LessonPlan.objects.bulk_update([plan for plan, _ in achieved.values()], ['achieved_topic'])
+        Attendance.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['student', 'session_date'],
+            update_fields=UPSERT_FIELDS,
+        )
+        # bulk_create skips the Attendance signals that keep the dashboard stats current
+        schedule_stats_refresh({student.id for student, _, _, _ in entries})
+    return rows
+
+
+def mark_session(teacher, session_date, records):
+    """
+    Save attendance records for session_date and return the saved
+    Attendance rows (student and teacher loaded), in record order.
+    Raises AttendanceError if a student is missing or inactive.
+    """
+    session_date = parse_session_date(session_date)
+
+    # One row per student; a student sent twice keeps the last record
+    by_student = {}
+    for record in records:
+        try:
+            student_id = int(record.get('student_id'))
+        except (TypeError, ValueError):
+            raise AttendanceError(f"Student ID {record.get('student_id')} not found or not active.")
+        by_student.pop(student_id, None)
+        by_student[student_id] = record
+
+    students = Student.objects.filter(id__in=by_student, status="Active").only('id', 'school_id', 'student_class').in_bulk()
+    missing = [student_id for student_id in by_student if student_id not in students]
+    if missing:
+        raise AttendanceError(f"Student ID {missing[0]} not found or not active.")
+
+    now = timezone.now()
+    rows = save_records(teacher, [
+        (students[student_id], session_date, record, now) for student_id, record in by_student.items()
+    ])
+
+    saved = Attendance.objects.filter(student_id__in=by_student, session_date=session_date).select_related('student', 'teacher')
+    order = {student_id: index for index, student_id in enumerate(by_student)}
+    logger.info(f"Marked attendance for {len(rows)} student(s) on {session_date} by {teacher.username}")
+    return sorted(saved, key=lambda attendance: order[attendance.student_id])
@@ -0,0 +1,152 @@
+"""
+A class's attendance for a month as a students x session dates grid.
+
+    attendance_matrix(school_id=3, student_class='Class 4', month='2026-03')
+
+    {"school_id": 3, "student_class": "Class 4", "month": "2026-03",
+     "dates": ["2026-03-02", "2026-03-09", ...],
+     "students": [{"student_id": 1, "name": "...", "reg_num": "...",
+                   "attendance": ["Present", "Absent", None, ...],    # one per date
+                   "present": 3, "absent": 1, "not_marked": 0, "percentage": 75.0}, ...]}
+
+The grid is a pivot done by the database in one conditional-aggregation
+query: a row per student with a column per session date (the status
+recorded that day) and the Present / Absent / N/A counts. The class's
+students come from one more query and are joined to the pivot through a
+dict, and the session dates (days anything was recorded for the class) from
+a third, so the work does not grow with students x records.
+
+export_csv / export_xlsx turn a matrix into a download.
+"""
+import csv
+import tempfile
+from datetime import date, timedelta
+
+from django.db.models import Case, CharField, Count, F, Max, Q, When
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.text import slugify
+
+from students.models import Attendance, Student
+
+from .marking import AttendanceError
+
+STATUS_TOTALS = {'present': 'Present', 'absent': 'Absent', 'not_marked': 'N/A'}
+
+
+def parse_month(value):
+    """(first day, last day) of a YYYY-MM month."""
+    try:
+        year, month = map(int, str(value).split('-'))
+        start = date(year, month, 1)
+    except ValueError:
+        raise AttendanceError("Invalid month format. Use YYYY-MM (e.g., 2025-03)")
+    end = (date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)) - timedelta(days=1)
+    return start, end
+
+
+def class_students(school_id, student_class):
+    return Student.objects.filter(school_id=school_id, student_class=student_class, status="Active")
+
+
+def pivot(students, start, end, dates=()):
+    """
+    {student_id: {"present": n, "absent": n, "not_marked": n, "d0": status, ...}}
+    for attendance between start and end, one query; "d<i>" is the status
+    recorded on dates[i].
+    """
+    columns = {
+        key: Count('id', filter=Q(status=status)) for key, status in STATUS_TOTALS.items()
+    }
+    for index, day in enumerate(dates):
+        columns[f"d{index}"] = Max(Case(When(session_date=day, then=F('status')), output_field=CharField()))
+    rows = Attendance.objects.filter(
+        student__in=students, session_date__range=[start, end],
+    ).values('student_id').annotate(**columns).order_by()
+    return {row['student_id']: row for row in rows}
+
+
+def session_dates(students, start, end):
+    return list(
+        Attendance.objects.filter(student__in=students, session_date__range=[start, end])
+        .values_list('session_date', flat=True).distinct().order_by('session_date')
+    )
+
+
+def _totals(counts):
+    totals = {key: counts.get(key, 0) for key in STATUS_TOTALS}
+    marked = totals['present'] + totals['absent']
+    totals['percentage'] = round(totals['present'] * 100 / marked, 1) if marked else None
+    return totals
+
+
+def attendance_matrix(school_id, student_class, month):
+    start, end = parse_month(month)
+    students = class_students(school_id, student_class)
+    dates = session_dates(students, start, end)
+    counts = pivot(students, start, end, dates)
+
+    rows = []
+    for student in students.order_by('name', 'id').values('id', 'name', 'reg_num'):
+        row = counts.get(student['id'], {})
+        rows.append({
+            'student_id': student['id'],
+            'name': student['name'],
+            'reg_num': student['reg_num'],
+            'attendance': [row.get(f"d{index}") for index in range(len(dates))],
+            **_totals(row),
+        })
+    return {
+        'school_id': int(school_id),
+        'student_class': student_class,
+        'month': start.strftime('%Y-%m'),
+        'dates': [day.isoformat() for day in dates],
+        'students': rows,
+    }
+
+
+def _table(matrix):
+    """Header then one list per student, for the exports."""
+    yield ['Reg No', 'Name', *matrix['dates'], 'Present', 'Absent', 'Not Marked', 'Percentage']
+    for row in matrix['students']:
+        yield [
+            row['reg_num'], row['name'], *[status or '' for status in row['attendance']],
+            row['present'], row['absent'], row['not_marked'],
+            '' if row['percentage'] is None else row['percentage'],
+        ]
+
+
+def _filename(matrix, extension):
+    return f"attendance_{matrix['school_id']}_{slugify(matrix['student_class'])}_{matrix['month']}.{extension}"
+
+
+class _Echo:
+    """The file-like object csv.writer writes to; hands each line back for streaming."""
+
+    def write(self, value):
+        return value
+
+
+def export_csv(matrix):
+    writer = csv.writer(_Echo())
+    response = StreamingHttpResponse((writer.writerow(row) for row in _table(matrix)), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{_filename(matrix, "csv")}"'
+    return response
+
+
+def export_xlsx(matrix):
+    from openpyxl import Workbook
+
+    # write_only keeps one row in memory at a time; the file is spooled to disk past 1 MB
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=matrix['month'])
+    for row in _table(matrix):
+        sheet.append(row)
+    output = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=_filename(matrix, 'xlsx'),
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
@@ -0,0 +1,222 @@
+"""
+Offline attendance sync for the mobile app.
+
+    POST /api/attendance/sync/
+    {
+      "since": "<sync_token of the last response, or null on first sync>",
+      "batches": [
+        {"batch_id": "<client-generated id, e.g. a UUID>",
+         "records": [{"student_id": 1, "session_date": "2026-03-02", "status": "Present",
+                      "achieved_topic": "...", "changed_at": "2026-03-02T09:15:00+05:00"}, ...]},
+        ...
+      ]
+    }
+
+The app queues batches while offline and sends them together when it can;
+one request replaces a POST per session, and a batch may cover any dates and
+classes in the teacher's schools.
+
+Idempotent: a batch_id is applied once. Its outcome is stored with it
+(AttendanceSyncBatch), and a batch sent again (a retry after a lost
+response) gets the stored outcome back with "duplicate": true.
+
+Conflicts are resolved by timestamp: a record is skipped as "stale" when the
+server's row holds a later change (Attendance.changed_at: the changed_at of
+the record it was synced from, or the time of an online edit) than the
+record's changed_at (a record without changed_at counts as changed now), and
+the winning row comes back in the delta. The rows, and the students of rows
+not yet created, are locked while a batch is checked and written, so two
+batches for the same row are decided one after the other. Within a batch the latest record of a student and date wins. Records
+for students outside the teacher's schools, or that cannot be read, are
+skipped rather than failing the batch, so one bad record cannot jam the
+queue on the device.
+
+The delta is every row in the teacher's schools (sessions within DELTA_DAYS)
+changed after the "since" token, oldest change first, at most DELTA_LIMIT per
+response ("has_more" asks the app to sync again). The token is the position
+of the last row sent; the final token steps back OVERLAP from the start of
+the request so rows committed late by concurrent writers are not missed.
+Rows may therefore repeat; the app upserts them by id.
+"""
+import base64
+import logging
+from datetime import datetime, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from students.models import Attendance, AttendanceSyncBatch, Student
+
+from .marking import AttendanceError, save_records
+
+logger = logging.getLogger(__name__)
+
+STATUSES = {'Present', 'Absent', 'N/A'}
+MAX_RECORDS = 2000  # Per request, over all batches
+DELTA_DAYS = 60
+DELTA_LIMIT = 500
+OVERLAP = timedelta(seconds=60)
+
+CHANGE_FIELDS = (
+    'id', 'student_id', 'session_date', 'status', 'achieved_topic', 'teacher_id', 'updated_at', 'changed_at',
+)
+
+
+def encode_token(updated_at, attendance_id):
+    return base64.urlsafe_b64encode(f"{updated_at.isoformat()}|{attendance_id}".encode()).decode()
+
+
+def decode_token(token):
+    """(updated_at, attendance_id) of a sync token."""
+    try:
+        updated_at, attendance_id = base64.urlsafe_b64decode(token.encode()).decode().split('|')
+        updated_at = datetime.fromisoformat(updated_at)
+        return updated_at, int(attendance_id)
+    except (ValueError, UnicodeError, AttributeError):
+        raise AttendanceError("Invalid sync token.")
+
+
+def _parse_record(record, now):
+    """(student_id, session_date, changed_at) of a record, or None if it cannot be read."""
+    try:
+        student_id = int(record.get('student_id'))
+        session_date = datetime.strptime(str(record.get('session_date')), '%Y-%m-%d').date()
+    except (TypeError, ValueError, AttributeError):
+        return None
+    if record.get('status', "N/A") not in STATUSES:
+        return None
+    changed_at = now
+    if record.get('changed_at'):
+        try:
+            changed_at = parse_datetime(str(record['changed_at']))
+        except ValueError:
+            changed_at = None
+        if changed_at is None:
+            return None
+        if timezone.is_naive(changed_at):
+            changed_at = timezone.make_aware(changed_at)
+    return student_id, session_date, changed_at
+
+
+def _skipped(record, reason):
+    if not isinstance(record, dict):
+        record = {}
+    return {'student_id': record.get('student_id'), 'session_date': record.get('session_date'), 'reason': reason}
+
+
+def apply_records(teacher, records, now=None):
+    """
+    Apply one batch's records; returns {"applied": n, "skipped": [...]}
+    with the reason ("invalid", "not_found" or "stale") of each skipped record.
+    """
+    now = now or timezone.now()
+    skipped, latest = [], {}
+    for record in records:
+        parsed = _parse_record(record, now) if isinstance(record, dict) else None
+        if parsed is None:
+            skipped.append(_skipped(record, 'invalid'))
+            continue
+        student_id, session_date, changed_at = parsed
+        key = (student_id, session_date)
+        if key in latest and latest[key][0] > changed_at:
+            continue
+        latest[key] = (changed_at, record)
+
+    with transaction.atomic():
+        # Locking the students also serializes batches creating the same new row
+        students = Student.objects.select_for_update().filter(
+            id__in={student_id for student_id, _ in latest},
+            status="Active",
+            school__in=teacher.assigned_schools.all(),
+        ).only('id', 'school_id', 'student_class').order_by('id').in_bulk()
+        current = {
+            # Rows written before changed_at was stored fall back to their write time
+            (student_id, session_date): stored_at or updated_at
+            for student_id, session_date, stored_at, updated_at in Attendance.objects.select_for_update().filter(
+                student_id__in=students, session_date__in={session_date for _, session_date in latest},
+            ).order_by('id').values_list('student_id', 'session_date', 'changed_at', 'updated_at')
+        }
+
+        entries = []
+        for (student_id, session_date), (changed_at, record) in latest.items():
+            if student_id not in students:
+                skipped.append(_skipped(record, 'not_found'))
+            elif current.get((student_id, session_date)) and current[(student_id, session_date)] > changed_at:
+                skipped.append(_skipped(record, 'stale'))
+            else:
+                entries.append((students[student_id], session_date, record, changed_at))
+
+        if entries:
+            save_records(teacher, entries)
+    return {'applied': len(entries), 'skipped': skipped}
+
+
+def apply_batches(teacher, batches):
+    """The outcome of each batch, in order; batches seen before are not applied again."""
+    batch_ids = []
+    for batch in batches:
+        batch_id = str(batch.get('batch_id') or '').strip() if isinstance(batch, dict) else ''
+        if not batch_id or len(batch_id) > 64:
+            raise AttendanceError("Each batch needs a batch_id of at most 64 characters.")
+        if not isinstance(batch.get('records'), list):
+            raise AttendanceError(f"Batch {batch_id} has no records list.")
+        batch_ids.append(batch_id)
+    if len(set(batch_ids)) != len(batch_ids):
+        raise AttendanceError("A batch_id is repeated in the request.")
+    if sum(len(batch['records']) for batch in batches) > MAX_RECORDS:
+        raise AttendanceError(f"At most {MAX_RECORDS} records can be synced at once.")
+
+    seen = AttendanceSyncBatch.objects.filter(batch_id__in=batch_ids).in_bulk(field_name='batch_id')
+    outcomes = []
+    for batch_id, batch in zip(batch_ids, batches):
+        if batch_id not in seen:
+            try:
+                with transaction.atomic():
+                    result = apply_records(teacher, batch['records'])
+                    AttendanceSyncBatch.objects.create(
+                        batch_id=batch_id, teacher=teacher, record_count=len(batch['records']), result=result,
+                    )
+                outcomes.append({'batch_id': batch_id, 'duplicate': False, **result})
+                continue
+            except IntegrityError:
+                # The same batch arrived on a concurrent request, which applied it
+                seen[batch_id] = AttendanceSyncBatch.objects.get(batch_id=batch_id)
+        if seen[batch_id].teacher_id != teacher.id:
+            raise AttendanceError(f"Batch {batch_id} belongs to another user.")
+        outcomes.append({'batch_id': batch_id, 'duplicate': True, **seen[batch_id].result})
+    return outcomes
+
+
+def changes_since(teacher, token, started):
+    """(rows changed after token, next token, has_more) in the teacher's schools."""
+    rows = Attendance.objects.filter(
+        student__school__in=teacher.assigned_schools.all(),
+        session_date__gte=timezone.localdate() - timedelta(days=DELTA_DAYS),
+    )
+    if token:
+        updated_at, attendance_id = decode_token(token)
+        rows = rows.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=attendance_id))
+    rows = list(rows.order_by('updated_at', 'id').values(*CHANGE_FIELDS)[:DELTA_LIMIT + 1])
+
+    has_more = len(rows) > DELTA_LIMIT
+    if has_more:
+        rows = rows[:DELTA_LIMIT]
+        return rows, encode_token(rows[-1]['updated_at'], rows[-1]['id']), True
+    return rows, encode_token(started - OVERLAP, 0), False
+
+
+def sync(teacher, batches, since=None):
+    """Apply queued batches, then return their outcomes and the changes since the token."""
+    started = timezone.now()
+    if not isinstance(batches, list):
+        raise AttendanceError("batches must be a list.")
+    outcomes = apply_batches(teacher, batches)
+    changes, token, has_more = changes_since(teacher, since, started)
+    logger.info(
+        f"Attendance sync by {teacher.username}: {len(outcomes)} batch(es), "
+        f"{sum(outcome['applied'] for outcome in outcomes if not outcome['duplicate'])} record(s) applied, "
+        f"{len(changes)} change(s) sent"
+    )
+    return {'batches': outcomes, 'changes': changes, 'sync_token': token, 'has_more': has_more}
@@ -1,3 +1,299 @@
+"""
+Tests for batch attendance marking (attendance.marking, POST /api/attendance/mark/)
+offline sync (attendance.sync, POST /api/attendance/sync/) and the monthly
+matrix (attendance.matrix, GET /api/attendance/matrix/).
+
+Run with:
+    python manage.py test attendance
+"""
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from students.models import Attendance, AttendanceSyncBatch, CustomUser, LessonPlan, School, Student
+
+
+class MarkAttendanceTest(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Attendance School")
+        self.teacher = CustomUser.objects.create_user(username='att_teacher', password='pass1234', role='Teacher')
+        self.teacher.assigned_schools.add(self.school)
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+        self.plan = LessonPlan.objects.create(
+            session_date=date(2026, 3, 2), teacher=self.teacher, school=self.school, student_class='Class 1',
+        )
+
+    def make_students(self, count, student_class='Class 1', prefix='ATT'):
+        return [
+            Student.objects.create(reg_num=f"{prefix}-{index}", name=f"Student {prefix}{index}", school=self.school,
+                                   student_class=student_class, status='Active')
+            for index in range(count)
+        ]
+
+    def mark(self, students, status='Present', topic=''):
+        return self.client.post('/api/attendance/mark/', {
+            'session_date': '2026-03-02',
+            'attendance': [{'student_id': s.id, 'status': status, 'achieved_topic': topic} for s in students],
+        }, format='json')
+
+    def test_query_count_does_not_grow_with_the_class(self):
+        counts = []
+        for size, prefix in ((3, 'SMALL'), (50, 'LARGE')):
+            students = self.make_students(size, prefix=prefix)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.mark(students, topic='Loops')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['data']), size)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(Attendance.objects.filter(status='Present', lesson_plan=self.plan).count(), 53)
+
+    def test_marking_again_updates_in_place_and_links_lesson_plans(self):
+        students = self.make_students(2)
+        other_class = self.make_students(1, student_class='Class 2', prefix='OTHER')
+        self.mark(students + other_class, 'Present')
+
+        response = self.mark(students, 'Absent', topic='Variables')
+
+        self.assertEqual(Attendance.objects.count(), 3)
+        self.assertEqual(
+            sorted(Attendance.objects.filter(student__in=students).values_list('status', 'lesson_plan_id', 'achieved_topic')),
+            [('Absent', self.plan.id, 'Variables')] * 2,
+        )
+        self.assertIsNone(Attendance.objects.get(student=other_class[0]).lesson_plan_id)
+        self.plan.refresh_from_db()
+        self.assertEqual(self.plan.achieved_topic, 'Variables')
+        self.assertEqual(response.data['data'][0], {
+            'id': Attendance.objects.get(student=students[0]).id, 'student': students[0].id,
+            'student_name': students[0].name, 'session_date': '2026-03-02', 'status': 'Absent',
+            'teacher': self.teacher.id, 'teacher_name': 'att_teacher',
+        })
+
+    def test_inactive_student_rejects_the_whole_batch(self):
+        students = self.make_students(2)
+        students[1].status = 'Left'
+        students[1].save()
+
+        response = self.mark(students)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(students[1].id), response.data['error'])
+        self.assertFalse(Attendance.objects.exists())
+
+
+class SyncAttendanceTest(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Sync School")
+        self.elsewhere = School.objects.create(name="Elsewhere School")
+        self.teacher = CustomUser.objects.create_user(username='sync_teacher', password='pass1234', role='Teacher')
+        self.teacher.assigned_schools.add(self.school)
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+        self.today = timezone.localdate()
+        self.students = [
+            Student.objects.create(reg_num=f"SYNC-{index}", name=f"Sync {index}", school=self.school,
+                                   student_class=f"Class {index % 2 + 1}", status='Active')
+            for index in range(4)
+        ]
+        self.outsider = Student.objects.create(reg_num='SYNC-OUT', name='Outsider', school=self.elsewhere,
+                                               student_class='Class 1', status='Active')
+        self.plan = LessonPlan.objects.create(
+            session_date=self.today, teacher=self.teacher, school=self.school, student_class='Class 1',
+        )
+
+    def record(self, student, days_ago=0, status='Present', **extra):
+        return {'student_id': student.id, 'session_date': str(self.today - timedelta(days=days_ago)),
+                'status': status, **extra}
+
+    def sync(self, batches, since=None):
+        return self.client.post('/api/attendance/sync/', {'since': since, 'batches': batches}, format='json')
+
+    def test_batches_cover_dates_and_classes_and_are_applied_once(self):
+        batch = {'batch_id': 'b-1', 'records': [
+            self.record(self.students[0], achieved_topic='Loops'),
+            self.record(self.students[1]),
+            self.record(self.students[0], days_ago=1, status='Absent'),
+            self.record(self.outsider),
+            {'student_id': 'x', 'session_date': 'yesterday'},
+        ]}
+        response = self.sync([batch])
+
+        self.assertEqual(response.status_code, 200)
+        outcome = response.data['batches'][0]
+        self.assertEqual((outcome['duplicate'], outcome['applied']), (False, 3))
+        self.assertEqual(sorted(item['reason'] for item in outcome['skipped']), ['invalid', 'not_found'])
+        self.assertEqual(Attendance.objects.count(), 3)
+        self.assertEqual(Attendance.objects.get(student=self.students[0], session_date=self.today).lesson_plan, self.plan)
+        self.plan.refresh_from_db()
+        self.assertEqual(self.plan.achieved_topic, 'Loops')
+
+        # A retry (say, after a lost response) changes nothing and gets the same outcome
+        Attendance.objects.filter(student=self.students[1]).update(status='Absent')
+        retry = self.sync([batch]).data['batches'][0]
+        self.assertEqual((retry['duplicate'], retry['applied']), (True, 3))
+        self.assertEqual(Attendance.objects.get(student=self.students[1]).status, 'Absent')
+        self.assertEqual(AttendanceSyncBatch.objects.count(), 1)
+
+    def test_older_offline_changes_lose_to_newer_server_changes(self):
+        made_offline = timezone.now() - timedelta(hours=1)
+        self.client.post('/api/attendance/mark/', {
+            'session_date': str(self.today), 'attendance': [{'student_id': self.students[0].id, 'status': 'Absent'}],
+        }, format='json')
+
+        response = self.sync([{'batch_id': 'b-2', 'records': [
+            self.record(self.students[0], changed_at=made_offline.isoformat()),
+            self.record(self.students[1], status='Absent', changed_at=made_offline.isoformat()),
+            self.record(self.students[1], status='Present', changed_at=(made_offline + timedelta(minutes=5)).isoformat()),
+        ]}])
+
+        outcome = response.data['batches'][0]
+        self.assertEqual(outcome['applied'], 1)
+        self.assertEqual([item['reason'] for item in outcome['skipped']], ['stale'])
+        self.assertEqual(Attendance.objects.get(student=self.students[0]).status, 'Absent')
+        self.assertEqual(Attendance.objects.get(student=self.students[1]).status, 'Present')
+
+    def test_the_later_edit_wins_whichever_device_syncs_first(self):
+        edited_on_a = timezone.now() - timedelta(hours=2)
+        edited_on_b = edited_on_a + timedelta(hours=1)
+
+        # Device A edited first but syncs first; its row is written now
+        first = self.sync([{'batch_id': 'device-a', 'records': [
+            self.record(self.students[0], status='Absent', changed_at=edited_on_a.isoformat()),
+        ]}]).data['batches'][0]
+        self.assertEqual(first['applied'], 1)
+        self.assertEqual(Attendance.objects.get(student=self.students[0]).changed_at, edited_on_a)
+
+        # Device B's later edit syncs second and still wins
+        second = self.sync([{'batch_id': 'device-b', 'records': [
+            self.record(self.students[0], status='Present', changed_at=edited_on_b.isoformat()),
+        ]}]).data['batches'][0]
+        self.assertEqual((second['applied'], second['skipped']), (1, []))
+        self.assertEqual(Attendance.objects.get(student=self.students[0]).status, 'Present')
+
+        # An edit older than the one stored is stale, even if the row was written before it
+        third = self.sync([{'batch_id': 'device-c', 'records': [
+            self.record(self.students[0], status='Absent', changed_at=(edited_on_a + timedelta(minutes=30)).isoformat()),
+        ]}]).data['batches'][0]
+        self.assertEqual([item['reason'] for item in third['skipped']], ['stale'])
+        self.assertEqual(Attendance.objects.get(student=self.students[0]).status, 'Present')
+
+    def test_delta_pages_from_the_sync_token(self):
+        other_teacher = CustomUser.objects.create_user(username='sync_other', password='pass1234', role='Teacher')
+        Attendance.objects.create(student=self.outsider, session_date=self.today, status='Present', teacher=other_teacher)
+        for student in self.students:
+            Attendance.objects.create(student=student, session_date=self.today, status='Present', teacher=other_teacher)
+
+        with patch('attendance.sync.DELTA_LIMIT', 3):
+            first = self.sync([]).data
+            second = self.sync([], since=first['sync_token']).data
+
+        self.assertTrue(first['has_more'])
+        self.assertFalse(second['has_more'])
+        ids = [row['id'] for row in first['changes'] + second['changes']]
+        self.assertEqual(sorted(ids), sorted(Attendance.objects.filter(student__school=self.school).values_list('id', flat=True)))
+        self.assertEqual(set(first['changes'][0]), {
+            'id', 'student_id', 'session_date', 'status', 'achieved_topic', 'teacher_id', 'updated_at', 'changed_at',
+        })
+        self.assertEqual(self.sync([], since='not-a-token').status_code, 400)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        counts = []
+        for index, students in enumerate((self.students[:1], self.students)):
+            records = [self.record(student, days_ago=days) for student in students for days in range(3)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.sync([{'batch_id': f"size-{index}", 'records': records}])
+            self.assertEqual(response.data['batches'][0]['applied'], len(records))
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_only_teachers_can_sync(self):
+        admin = CustomUser.objects.create_user(username='sync_admin', password='pass1234', role='Admin')
+        self.client.force_authenticate(admin)
+        self.assertEqual(self.sync([]).status_code, 403)
+
+
+class AttendanceMatrixTest(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Matrix School")
+        self.teacher = CustomUser.objects.create_user(username='matrix_teacher', password='pass1234', role='Teacher')
+        self.teacher.assigned_schools.add(self.school)
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+        self.bea = self.add_student('Bea')
+        self.ali = self.add_student('Ali')
+        self.add_student('Other Class', student_class='Class 2')
+        self.mark(self.ali, date(2026, 3, 2), 'Present')
+        self.mark(self.ali, date(2026, 3, 9), 'Absent')
+        self.mark(self.bea, date(2026, 3, 9), 'Present')
+        self.mark(self.bea, date(2026, 4, 6), 'Present')
+
+    def add_student(self, name, student_class='Class 1'):
+        return Student.objects.create(reg_num=f"MTX-{name}", name=name, school=self.school,
+                                      student_class=student_class, status='Active')
+
+    def mark(self, student, session_date, status):
+        Attendance.objects.create(student=student, session_date=session_date, status=status, teacher=self.teacher)
+
+    def get(self, **params):
+        return self.client.get('/api/attendance/matrix/', {
+            'school_id': self.school.id, 'student_class': 'Class 1', 'month': '2026-03', **params,
+        })
+
+    def test_grid_and_totals(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['dates'], ['2026-03-02', '2026-03-09'])
+        self.assertEqual(response.data['students'], [
+            {'student_id': self.ali.id, 'name': 'Ali', 'reg_num': 'MTX-Ali', 'attendance': ['Present', 'Absent'],
+             'present': 1, 'absent': 1, 'not_marked': 0, 'percentage': 50.0},
+            {'student_id': self.bea.id, 'name': 'Bea', 'reg_num': 'MTX-Bea', 'attendance': [None, 'Present'],
+             'present': 1, 'absent': 0, 'not_marked': 0, 'percentage': 100.0},
+        ])
+        self.assertEqual(self.get(month='2026-13').status_code, 400)
+
+    def test_query_count_does_not_grow_with_the_class(self):
+        counts = []
+        for extra in (0, 10):
+            for index in range(extra):
+                student = self.add_student(f"Extra {index}")
+                self.mark(student, date(2026, 3, 2 + index), 'Present')
+            with CaptureQueriesContext(connection) as queries:
+                self.get()
+                self.client.get('/api/attendance/student-counts/', {
+                    'school_id': self.school.id, 'student_class': 'Class 1', 'month': '2026-03',
+                })
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_student_counts_keep_their_shape(self):
+        response = self.client.get('/api/attendance/student-counts/', {
+            'school_id': self.school.id, 'student_class': 'Class 1', 'month': '2026-03',
+        })
+        self.assertEqual(sorted(response.data, key=lambda row: row['name']), [
+            {'student_id': self.ali.id, 'name': 'Ali', 'present': 1, 'absent': 1, 'not_marked': 0},
+            {'student_id': self.bea.id, 'name': 'Bea', 'present': 1, 'absent': 0, 'not_marked': 0},
+        ])
+
+    def test_exports(self):
+        response = self.get(export='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'Reg No,Name,2026-03-02,2026-03-09,Present,Absent,Not Marked,Percentage')
+        self.assertEqual(lines[1], 'MTX-Ali,Ali,Present,Absent,1,1,0,50.0')
+
+        response = self.get(export='xlsx')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attendance_', response['Content-Disposition'])
 
-# Create your tests here.
+    def test_teachers_need_the_school(self):
+        other = CustomUser.objects.create_user(username='matrix_other', password='pass1234', role='Teacher')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.get().status_code, 403)
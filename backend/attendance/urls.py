@@ -1,20 +1,24 @@
 from django.urls import path
 from .views import (
     mark_attendance,
+    sync_attendance,
     get_attendance,
     update_attendance,
     get_attendance_count,
     get_student_attendance_counts,
+    get_attendance_matrix,
 )
 
 urlpatterns = [
     # Mark/submit attendance
     path('mark/', mark_attendance, name='mark_attendance'),
+    path('sync/', sync_attendance, name='sync_attendance'),
     
     # Get attendance
     
     path('count/', get_attendance_count, name='get_attendance_count'),
     path('student-counts/', get_student_attendance_counts, name='get_student_attendance_counts'),
+    path('matrix/', get_attendance_matrix, name='get_attendance_matrix'),
     
     # Update attendance
     path('<int:attendance_id>/update/', update_attendance, name='update_attendance'),
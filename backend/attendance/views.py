@@ -1,13 +1,14 @@
 from django.shortcuts import render
 from students.models import Student, Attendance, LessonPlan, School
 from students.serializers import AttendanceSerializer
+from .marking import AttendanceError, mark_session
+from .matrix import attendance_matrix, class_students, export_csv, export_xlsx, parse_month, pivot
+from .sync import sync
 from django.http import JsonResponse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db import IntegrityError
-from datetime import datetime, timedelta
-from django.db.models import Count, Sum, Q, Case, When, IntegerField
+from django.db.models import Sum, Q, Case, When, IntegerField
 
 import logging
 
@@ -58,44 +59,29 @@ def mark_attendance(request):
     if not session_date or not attendance_records:
         return Response({"error": "Invalid data provided."}, status=400)
 
-    created_entries = []
-    for record in attendance_records:
-        student_id = record.get('student_id')
-        status = record.get('status', "N/A")
-        achieved_topic = record.get('achieved_topic', "")
+    # All records in a fixed number of queries (attendance.marking)
+    try:
+        saved = mark_session(teacher, session_date, attendance_records)
+    except AttendanceError as e:
+        return Response({"error": str(e)}, status=400)
 
-        try:
-            student = Student.objects.get(id=student_id, status="Active")  # Only active students
+    return Response({"message": "Attendance recorded successfully!", "data": AttendanceSerializer(saved, many=True).data})
 
-            # Fetch the correct lesson plan for this student
-            lesson_plan = LessonPlan.objects.filter(
-                session_date=session_date,
-                student_class=student.student_class,
-                school_id=student.school_id
-            ).first()
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def sync_attendance(request):
+    """Offline sync: apply the app's queued batches and return changes since its sync token (attendance.sync)"""
+    teacher = request.user
 
-            # Update the lesson plan's achieved_topic if it exists
-            if lesson_plan and achieved_topic:
-                lesson_plan.achieved_topic = achieved_topic
-                lesson_plan.save()
-
-            attendance, created = Attendance.objects.update_or_create(
-                student=student, session_date=session_date,
-                defaults={
-                    "status": status,
-                    "teacher": teacher,
-                    "achieved_topic": achieved_topic,
-                    "lesson_plan": lesson_plan if lesson_plan else None
-                }
-            )
-            created_entries.append(attendance)
-
-        except Student.DoesNotExist:
-            return Response({"error": f"Student ID {student_id} not found or not active."}, status=400)
-        except IntegrityError:
-            return Response({"error": "Duplicate attendance record detected."}, status=400)
-
-    return Response({"message": "Attendance recorded successfully!", "data": AttendanceSerializer(created_entries, many=True).data})
+    if teacher.role != 'Teacher':
+        return Response({"error": "Only teachers can sync attendance."}, status=403)
+
+    try:
+        result = sync(teacher, request.data.get('batches', []), request.data.get('since'))
+    except AttendanceError as e:
+        return Response({"error": str(e)}, status=400)
+
+    return Response(result)
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
@@ -202,17 +188,10 @@ def get_student_attendance_counts(request):
         return Response({"error": "month, school_id, and student_class are required"}, status=400)
 
     try:
-        # Parse month to get date range
-        year, month_num = map(int, month.split('-'))
-        start_date = datetime(year, month_num, 1).date()
-        end_date = (datetime(year, month_num + 1, 1) - timedelta(days=1)).date() if month_num < 12 else datetime(year, 12, 31).date()
+        start_date, end_date = parse_month(month)
 
         # Filter students by school and class
-        students = Student.objects.filter(
-            school_id=school_id,
-            student_class=student_class,
-            status="Active"
-        )
+        students = class_students(school_id, student_class)
 
         # Restrict to teacher's assigned schools if role is Teacher
         if user.role == "Teacher":
@@ -220,29 +199,63 @@ def get_student_attendance_counts(request):
             if int(school_id) not in assigned_schools:
                 return Response({"error": "Unauthorized access to this school"}, status=403)
 
-        # Fetch attendance records for the month
-        attendance_records = Attendance.objects.filter(
-            student__in=students,
-            session_date__range=[start_date, end_date]
-        ).values('student_id', 'status').annotate(count=Count('id'))
+        # Counts per student in one grouped query, joined by student id
+        counts = pivot(students, start_date, end_date)
 
         # Prepare response data
         student_data = []
-        for student in students:
-            student_attendance = {entry['status']: entry['count'] for entry in attendance_records if entry['student_id'] == student.id}
+        for student in students.values('id', 'name'):
+            student_attendance = counts.get(student['id'], {})
             student_data.append({
-                "student_id": student.id,
-                "name": student.name,
-                "present": student_attendance.get("Present", 0),
-                "absent": student_attendance.get("Absent", 0),
-                "not_marked": student_attendance.get("N/A", 0)
+                "student_id": student['id'],
+                "name": student['name'],
+                "present": student_attendance.get("present", 0),
+                "absent": student_attendance.get("absent", 0),
+                "not_marked": student_attendance.get("not_marked", 0)
             })
 
         return Response(student_data, status=200)
 
+    except AttendanceError as e:
+        return Response({"error": str(e)}, status=400)
     except ValueError:
         return Response({"error": "Invalid month format. Use YYYY-MM (e.g., 2025-03)"}, status=400)
     except Exception as e:
         logger.error(f"Error in get_student_attendance_counts: {str(e)}")
         return Response({"error": str(e)}, status=500)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_attendance_matrix(request):
+    """
+    A class's attendance for a month: students x session dates grid with
+    per-student totals (attendance.matrix). Parameters: month (YYYY-MM),
+    school_id, student_class; export=csv or export=xlsx to download it.
+    """
+    user = request.user
+    month = request.GET.get('month')
+    school_id = request.GET.get('school_id')
+    student_class = request.GET.get('student_class')
+    export = request.GET.get('export')
+
+    if user.role not in ['Admin', 'Teacher']:
+        return Response({"error": "Only admins and teachers can view attendance."}, status=403)
+    if not all([month, school_id, student_class]):
+        return Response({"error": "month, school_id, and student_class are required"}, status=400)
+    if not str(school_id).isdigit():
+        return Response({"error": "school_id must be a number"}, status=400)
+    if export not in (None, '', 'csv', 'xlsx'):
+        return Response({"error": "export must be csv or xlsx"}, status=400)
+    if user.role == "Teacher" and not user.assigned_schools.filter(id=school_id).exists():
+        return Response({"error": "Unauthorized access to this school"}, status=403)
+
+    try:
+        matrix = attendance_matrix(school_id, student_class, month)
+    except AttendanceError as e:
+        return Response({"error": str(e)}, status=400)
+
+    if export == 'csv':
+        return export_csv(matrix)
+    if export == 'xlsx':
+        return export_xlsx(matrix)
+    return Response(matrix)
@@ -0,0 +1,286 @@
+"""
+Login history (LoginEvent) and its hourly / daily rollups (LoginActivityRollup).
+
+Every successful sign-in appends a LoginEvent, written off the request by a
+Celery task (queue_login_event, called from CustomTokenObtainPairSerializer)
+so a slow or failing write never delays a login. In the same transaction the
+event is counted into the two rollup buckets it falls in, the hour and the
+day (local time):
+
+    for each role: logins (events) and users (distinct users)
+      - over all schools                 (school empty)
+      - per school: a student's school at login, a teacher's assigned schools
+
+Counting is incremental: logins += 1, and users += 1 when the event is the
+user's first in the bucket (an indexed exists query on the user's events).
+An event is keyed by (user, logged_in_at), so a retried task neither
+duplicates the event nor counts it twice.
+
+The login activity dashboard reads rollups only, one indexed range query:
+
+    login_activity(date(2026, 3, 1), date(2026, 3, 31))            daily series
+    login_activity(date(2026, 3, 2), date(2026, 3, 2), 'hour')     hourly series
+
+Rollups hold distinct users per bucket, so a user who logged in yesterday
+and today counts on both days (CustomUser.last_login only knew the latest).
+rebuild_login_rollups() recomputes them from the events.
+"""
+import ipaddress
+import logging
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import LoginActivityRollup, LoginEvent
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+# Longest range served per interval
+MAX_RANGE_DAYS = {'hour': 31, 'day': 366}
+UPDATE_FIELDS = ['school', 'logins', 'users']
+
+
+class LoginActivityError(ValueError):
+    """Bad login activity parameters (reported as a 400)."""
+
+
+def bucket_start(moment, period):
+    """Start of the local hour or day containing moment."""
+    local = timezone.localtime(moment)
+    if period == 'hour':
+        return local.replace(minute=0, second=0, microsecond=0)
+    return timezone.make_aware(datetime.combine(local.date(), time.min))
+
+
+def _bucket_end(start, period):
+    if period == 'hour':
+        return start + PERIODS['hour']
+    return timezone.make_aware(datetime.combine(start.date() + timedelta(days=1), time.min))
+
+
+# =============================================================================
+# WRITES
+# =============================================================================
+def client_ip(meta):
+    """The first X-Forwarded-For hop, else REMOTE_ADDR, if it is a valid IP address; otherwise None."""
+    forwarded = meta.get('HTTP_X_FORWARDED_FOR', '').split(',')[0].strip()
+    for candidate in (forwarded, meta.get('REMOTE_ADDR')):
+        try:
+            return str(ipaddress.ip_address(candidate))
+        except ValueError:
+            continue
+    return None
+
+
+def queue_login_event(user, request=None):
+    """Record a login in the background; never fails the login."""
+    from .tasks import record_login_task
+
+    school_id = None
+    if user.role == 'Student':
+        student = getattr(user, 'student_profile', None)
+        school_id = student.school_id if student else None
+    meta = request.META if request is not None else {}
+    args = (
+        user.id, user.role, school_id, timezone.now().isoformat(),
+        client_ip(meta), meta.get('HTTP_USER_AGENT', '')[:255],
+    )
+    try:
+        record_login_task.delay(*args)
+    except Exception as e:
+        logger.error(f"Failed to queue login event for user {user.id}, recording inline: {str(e)}")
+        try:
+            record_login(*args)
+        except Exception as e:
+            logger.error(f"Failed to record login event for user {user.id}: {str(e)}")
+
+
+def record_login(user_id, role, school_id, logged_in_at, ip_address=None, user_agent=''):
+    """
+    Append a LoginEvent (logged_in_at as ISO text) and count it into its hour
+    and day rollups. Recording the same login again is a no-op.
+    """
+    logged_in_at = parse_datetime(logged_in_at) if isinstance(logged_in_at, str) else logged_in_at
+    with transaction.atomic():
+        event, created = LoginEvent.objects.get_or_create(
+            user_id=user_id, logged_in_at=logged_in_at,
+            defaults={'role': role, 'school_id': school_id, 'ip_address': ip_address, 'user_agent': user_agent or ''},
+        )
+        if created:
+            _count_login(event)
+    return event
+
+
+def _count_login(event):
+    """Add event to the rollup rows of its hour and day."""
+    if event.school_id:
+        school_ids = [event.school_id]
+    else:
+        school_ids = [
+            school_id for school_id in get_user_model().objects.filter(id=event.user_id).values_list(
+                'assigned_schools', flat=True,
+            ) if school_id
+        ]
+    for period in PERIODS:
+        start = bucket_start(event.logged_in_at, period)
+        # Two logins of one user racing in a new bucket may both count as
+        # first; rebuild_login_rollups() recounts exactly
+        first = not LoginEvent.objects.filter(
+            user_id=event.user_id, logged_in_at__gte=start, logged_in_at__lt=_bucket_end(start, period),
+        ).exclude(id=event.id).exists()
+        for school_id in [None] + school_ids:
+            _increment(period, start, event.role, school_id, int(first))
+
+
+def _increment(period, start, role, school_id, users):
+    rollups = LoginActivityRollup.objects.filter(period=period, bucket_start=start, role=role, school_key=school_id or 0)
+    changes = {'logins': F('logins') + 1, 'users': F('users') + users}
+    if rollups.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            LoginActivityRollup.objects.create(
+                period=period, bucket_start=start, role=role, school_id=school_id, school_key=school_id or 0,
+                logins=1, users=users,
+            )
+    except IntegrityError:
+        # Another login created the row first
+        rollups.update(**changes)
+
+
+def _bucket_rows(period, start):
+    """LoginActivityRollup rows (unsaved) for one bucket, recounted from its events."""
+    events = LoginEvent.objects.filter(logged_in_at__gte=start, logged_in_at__lt=_bucket_end(start, period))
+    counts = {'logins': Count('id'), 'users': Count('user_id', distinct=True)}
+    groups = [
+        (row['role'], None, row) for row in events.values('role').annotate(**counts).order_by()
+    ] + [
+        (row['role'], row['school_id'], row)
+        for row in events.filter(school__isnull=False).values('role', 'school_id').annotate(**counts).order_by()
+    ] + [
+        (row['role'], row['assigned_school'], row)
+        for row in events.filter(school__isnull=True, user__assigned_schools__isnull=False).values(
+            'role', assigned_school=F('user__assigned_schools'),
+        ).annotate(**counts).order_by()
+    ]
+    rows = {}
+    for role, school_id, row in groups:
+        rows.setdefault((role, school_id or 0), LoginActivityRollup(
+            period=period, bucket_start=start, role=role, school_id=school_id, school_key=school_id or 0,
+            logins=row['logins'], users=row['users'],
+        ))
+    return list(rows.values())
+
+
+def refresh_login_rollups(buckets):
+    """Recompute the rollup rows of (period, bucket_start) buckets."""
+    for period, start in buckets:
+        rows = _bucket_rows(period, start)
+        with transaction.atomic():
+            # Rows no longer produced (a teacher moved off a school) go
+            stale = LoginActivityRollup.objects.filter(period=period, bucket_start=start)
+            keep = Q()
+            for row in rows:
+                keep |= Q(role=row.role, school_key=row.school_key)
+            (stale.exclude(keep) if rows else stale).delete()
+            if rows:
+                LoginActivityRollup.objects.bulk_create(
+                    rows,
+                    update_conflicts=True,
+                    unique_fields=['period', 'bucket_start', 'role', 'school_key'],
+                    update_fields=UPDATE_FIELDS,
+                )
+
+
+def rebuild_login_rollups(start=None):
+    """Recompute every rollup bucket with events (optionally from start on). Returns the number of buckets."""
+    events = LoginEvent.objects.all()
+    rollups = LoginActivityRollup.objects.all()
+    if start:
+        events = events.filter(logged_in_at__gte=start)
+        rollups = rollups.filter(bucket_start__gte=bucket_start(start, 'day'))
+    buckets = set()
+    for logged_in_at in events.values_list('logged_in_at', flat=True).iterator(chunk_size=2000):
+        buckets.update((period, bucket_start(logged_in_at, period)) for period in PERIODS)
+
+    with transaction.atomic():
+        rollups.delete()
+        refresh_login_rollups(buckets)
+    logger.info(f"Rebuilt {len(buckets)} login rollup buckets")
+    return len(buckets)
+
+
+# =============================================================================
+# READS
+# =============================================================================
+def parse_range(start, end, interval='day'):
+    """(first day, last day, interval) from YYYY-MM-DD strings; raises LoginActivityError."""
+    if interval not in PERIODS:
+        raise LoginActivityError(f"Invalid interval: {interval}. Use hour or day")
+    try:
+        start = datetime.strptime(start, '%Y-%m-%d').date()
+        end = datetime.strptime(end, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise LoginActivityError("start and end must be dates (YYYY-MM-DD)")
+    if end < start:
+        raise LoginActivityError("end must not be before start")
+    if (end - start).days >= MAX_RANGE_DAYS[interval]:
+        raise LoginActivityError(f"At most {MAX_RANGE_DAYS[interval]} days can be shown by {interval}")
+    return start, end, interval
+
+
+def _counts():
+    return {'student_logins': 0, 'teacher_logins': 0, 'total': 0, 'logins': 0, 'roles': {}}
+
+
+def login_activity(start, end, interval='day'):
+    """
+    Login activity from start to end (dates, inclusive) per hour or day:
+    {"series": [bucket, ...], "totals": {...}}. Each bucket has the distinct
+    users who logged in (student_logins, teacher_logins, total, and per role
+    in "roles"), the number of logins, and the same per active school in
+    "schools" (busiest first). Totals add the buckets up.
+    """
+    first = timezone.make_aware(datetime.combine(start, time.min))
+    last = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+    rows = LoginActivityRollup.objects.filter(
+        period=interval, bucket_start__gte=first, bucket_start__lt=last,
+    ).filter(Q(school__isnull=True) | Q(school__is_active=True)).values(
+        'bucket_start', 'role', 'school_id', 'school__name', 'logins', 'users',
+    ).order_by('bucket_start')
+
+    buckets = {}
+    for row in rows:
+        bucket = buckets.setdefault(row['bucket_start'], {**_counts(), 'schools': {}})
+        if row['school_id']:
+            target = bucket['schools'].setdefault(row['school_id'], {
+                'school_id': row['school_id'], 'school_name': row['school__name'], **_counts(),
+            })
+        else:
+            target = bucket
+        target['roles'][row['role']] = row['users']
+        target['logins'] += row['logins']
+        if row['role'] == 'Student':
+            target['student_logins'] = row['users']
+        elif row['role'] == 'Teacher':
+            target['teacher_logins'] = row['users']
+        target['total'] = target['student_logins'] + target['teacher_logins']
+
+    series = []
+    for moment, bucket in sorted(buckets.items()):
+        local = timezone.localtime(moment)
+        schools = sorted(bucket.pop('schools').values(), key=lambda school: school['total'], reverse=True)
+        series.append({
+            'start': local.isoformat(),
+            'date': local.date().isoformat(),
+            **bucket,
+            'schools': [school for school in schools if school['total']],
+        })
+
+    totals = {key: sum(bucket[key] for bucket in series) for key in ('student_logins', 'teacher_logins', 'total', 'logins')}
+    return {'start': start.isoformat(), 'end': end.isoformat(), 'interval': interval, 'series': series, 'totals': totals}
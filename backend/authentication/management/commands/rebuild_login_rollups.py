@@ -0,0 +1,34 @@
+"""
+Management command to recompute the hourly / daily login rollups
+(LoginActivityRollup) from the login event log.
+
+Rollups are maintained automatically as logins are recorded; run this after
+deleting or importing login events, or to repair drift.
+
+Usage:
+    python manage.py rebuild_login_rollups
+    python manage.py rebuild_login_rollups --since 2026-03-01
+"""
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from authentication.login_events import rebuild_login_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute login activity rollups from the LoginEvent table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=lambda value: datetime.strptime(value, '%Y-%m-%d').date(),
+            help='Only rebuild buckets from this date (YYYY-MM-DD) on'
+        )
+
+    def handle(self, *args, **options):
+        since = options['since']
+        start = timezone.make_aware(datetime.combine(since, time.min)) if since else None
+        buckets = rebuild_login_rollups(start=start)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {buckets} login rollup buckets'))
@@ -1,3 +1,49 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class LoginEvent(models.Model):
+    """
+    One successful sign-in. Append-only; written in the background at login
+    (see authentication.login_events).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='login_events')
+    role = models.CharField(max_length=50)  # The user's role at login
+    school = models.ForeignKey('students.School', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')  # A student's school at login
+    logged_in_at = models.DateTimeField()
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.CharField(max_length=255, blank=True, default='')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['logged_in_at'], name='login_event_time_idx'),
+            models.Index(fields=['user', 'logged_in_at'], name='login_event_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} ({self.role}) at {self.logged_in_at}"
+
+
+class LoginActivityRollup(models.Model):
+    """
+    Logins and distinct users per role in an hour or a day, over all schools
+    (school empty) or for one school. Recomputed from LoginEvent.
+    """
+    PERIOD_CHOICES = [('hour', 'Hour'), ('day', 'Day')]
+
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    bucket_start = models.DateTimeField()
+    role = models.CharField(max_length=50)
+    school = models.ForeignKey('students.School', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    school_key = models.PositiveIntegerField(default=0)  # school_id, or 0 for all schools; keeps the unique key non-null
+    logins = models.PositiveIntegerField(default=0)
+    users = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Also serves the dashboard's (period, bucket_start) range reads
+            models.UniqueConstraint(fields=['period', 'bucket_start', 'role', 'school_key'], name='login_rollup_bucket_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.bucket_start} {self.role} school {self.school_key}: {self.users} user(s)"
@@ -0,0 +1,21 @@
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def record_login_task(self, user_id, role, school_id, logged_in_at, ip_address=None, user_agent=''):
+    """
+    Async: append a login event and count it into its rollups
+    (authentication.login_events). Both are written in one transaction and a
+    login already recorded is skipped, so a retry never duplicates the event.
+    """
+    from .login_events import record_login
+
+    try:
+        record_login(user_id, role, school_id, logged_in_at, ip_address, user_agent)
+    except Exception as exc:
+        logger.error(f"Login event for user {user_id} failed: {exc}")
+        self.retry(exc=exc)
@@ -28,6 +28,7 @@ from .serializers import (
     SchoolAssignmentSerializer,
 )
 from .permissions import IsAdminUser
+from .login_events import queue_login_event
 
 # Import async email tasks
 from employees.email_tasks import (
@@ -109,6 +110,9 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         user.last_login = timezone.now()
         user.save(update_fields=['last_login'])
 
+        # Append to the login history off the request (authentication.login_events)
+        queue_login_event(user, self.context.get('request'))
+
         # Extract location from initial_data (not validated fields)
         # This avoids serializer validation issues with optional fields
         latitude = self.initial_data.get('latitude')
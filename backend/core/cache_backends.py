@@ -0,0 +1,412 @@
+"""
+Tiered cache backend.
+
+    L1: bounded per-process LRU (no network; values are kept pickled, so
+        callers never share a cached object, as with any other backend)
+    L2: a shared Django cache configured as another CACHES alias
+        (Redis in production; file, locmem or the old database table work too)
+
+Reads try L1 first and fall back to L2, copying hits into L1. Writes and
+deletes go to both. L1 entries live at most L1_TIMEOUT seconds, which bounds
+how long another process can serve a value that was changed or deleted
+elsewhere.
+
+Beyond the standard cache API the backend supports:
+
+    cache.delete_pattern('finance_dashboard_*')     glob over keys
+    cache.set(key, value, timeout, tags=['school:7'])
+    cache.invalidate_tags('school:7')               drops every entry tagged school:7
+    cache.stats()                                   hit rates per key namespace
+
+Tags are versioned rather than indexed: each tag has a token in L2, entries
+remember the tokens of their tags when stored, and a read whose tokens no
+longer match is a miss. Invalidating a tag is therefore one write no matter
+how many entries carry it.
+
+If L2 is unreachable the backend keeps serving from L1 (and logs), and
+retries L2 after L2_RETRY_AFTER seconds.
+
+Configuration:
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache_backends.TieredCache',
+            'OPTIONS': {'L2': 'shared', 'L1_MAX_ENTRIES': 2000, 'L1_TIMEOUT': 5},
+        },
+        'shared': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://...'},
+    }
+"""
+import fnmatch
+import logging
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+logger = logging.getLogger(__name__)
+
+TAG_KEY_PREFIX = 'cachetag:'
+
+_NAMESPACE_STOP = re.compile(r'\d')
+
+
+def key_namespace(key):
+    """
+    Namespace a key is counted under in stats(): the part before the first
+    ':' or, for underscore keys, up to two leading segments that contain no
+    digits ('classes_3' -> 'classes', 'finance_dashboard_2025-02' -> 'finance_dashboard').
+    """
+    if ':' in key:
+        return key.split(':', 1)[0]
+    segments = []
+    for segment in key.split('_'):
+        if not segment or _NAMESPACE_STOP.search(segment) or len(segments) == 2:
+            break
+        segments.append(segment)
+    return '_'.join(segments) or key
+
+
+class TaggedEntry:
+    """A value stored with the tokens of the tags it depends on."""
+    __slots__ = ('value', 'tags')
+
+    def __init__(self, value, tags):
+        self.value = value
+        self.tags = tags
+
+    def __getstate__(self):
+        return (self.value, self.tags)
+
+    def __setstate__(self, state):
+        self.value, self.tags = state
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l2_alias = options.get('L2') or location
+        self.l1_max_entries = int(options.get('L1_MAX_ENTRIES', 1000))
+        self.l1_timeout = float(options.get('L1_TIMEOUT', 5))
+        self.l2_retry_after = float(options.get('L2_RETRY_AFTER', 30))
+
+        # made key -> (expires_at, pickled value, original key)
+        self._l1 = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {'l1_hits': 0, 'l2_hits': 0, 'misses': 0, 'sets': 0, 'deletes': 0})
+        self._l2_down_until = 0
+
+    @property
+    def l2(self):
+        from django.core.cache import caches
+        return caches[self._l2_alias]
+
+    # -------------------------------------------------------------------------
+    # L1
+    # -------------------------------------------------------------------------
+    def _l1_get(self, made_key):
+        """(expires_at, value, original key), the value unpickled into a fresh object, or None."""
+        with self._lock:
+            entry = self._l1.get(made_key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._l1[made_key]
+                return None
+            self._l1.move_to_end(made_key)
+        return entry[0], pickle.loads(entry[1]), entry[2]
+
+    def _l1_set(self, made_key, key, value, timeout):
+        lifetime = self.l1_timeout
+        if timeout is not None:
+            lifetime = min(lifetime, timeout)
+        if lifetime <= 0:
+            self._l1_delete(made_key)
+            return
+        # Pickled so later changes to the caller's object do not reach the cache
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._l1[made_key] = (time.monotonic() + lifetime, pickled, key)
+            self._l1.move_to_end(made_key)
+            while len(self._l1) > self.l1_max_entries:
+                self._l1.popitem(last=False)
+
+    def _l1_delete(self, made_key):
+        with self._lock:
+            self._l1.pop(made_key, None)
+
+    # -------------------------------------------------------------------------
+    # L2 (errors are logged and treated as misses)
+    # -------------------------------------------------------------------------
+    def _l2_call(self, method, *args, default=None, **kwargs):
+        if self._l2_down_until > time.monotonic():
+            return default
+        try:
+            return getattr(self.l2, method)(*args, **kwargs)
+        except Exception as exc:
+            self._l2_down_until = time.monotonic() + self.l2_retry_after
+            logger.warning(f"Cache L2 '{self._l2_alias}' {method} failed, using L1 only for {self.l2_retry_after:.0f}s: {exc}")
+            return default
+
+    def _l2_timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    # -------------------------------------------------------------------------
+    # Tags
+    # -------------------------------------------------------------------------
+    def _tag_tokens(self, tags, create=False):
+        """Current token of each tag, from L1 or L2; missing tags get one when create is True."""
+        tokens = {}
+        missing = []
+        for tag in tags:
+            entry = self._l1_get(self.make_key(TAG_KEY_PREFIX + tag))
+            if entry is not None:
+                tokens[tag] = entry[1]
+            else:
+                missing.append(tag)
+
+        if missing:
+            stored = self._l2_call('get_many', [TAG_KEY_PREFIX + tag for tag in missing], default={})
+            for tag in missing:
+                token = stored.get(TAG_KEY_PREFIX + tag)
+                if token is None and create:
+                    token = time.time_ns()
+                    # add() so two processes creating the same tag agree on one token
+                    if not self._l2_call('add', TAG_KEY_PREFIX + tag, token, None, default=True):
+                        token = self._l2_call('get', TAG_KEY_PREFIX + tag, default=token)
+                if token is not None:
+                    self._l1_set(self.make_key(TAG_KEY_PREFIX + tag), TAG_KEY_PREFIX + tag, token, None)
+                tokens[tag] = token
+        return tokens
+
+    def _unwrap(self, value):
+        """Value of a stored entry, or the miss sentinel if one of its tags was invalidated."""
+        if not isinstance(value, TaggedEntry):
+            return value
+        current = self._tag_tokens(list(value.tags))
+        if any(current.get(tag) != token for tag, token in value.tags.items()):
+            return self._missing
+        return value.value
+
+    def invalidate_tags(self, *tags):
+        """Invalidate every entry stored with any of tags."""
+        tags = [tag for tag in tags if tag]
+        if not tags:
+            return
+        token = time.time_ns()
+        self._l2_call('set_many', {TAG_KEY_PREFIX + tag: token for tag in tags}, None)
+        for tag in tags:
+            self._l1_set(self.make_key(TAG_KEY_PREFIX + tag), TAG_KEY_PREFIX + tag, token, None)
+        logger.debug(f"Cache tags invalidated: {', '.join(tags)}")
+
+    # -------------------------------------------------------------------------
+    # Cache API
+    # -------------------------------------------------------------------------
+    _missing = object()
+
+    def _count(self, key, counter, amount=1):
+        with self._lock:
+            self._stats[key_namespace(key)][counter] += amount
+
+    def _wrap(self, value, tags):
+        if not tags:
+            return value
+        return TaggedEntry(value, self._tag_tokens(list(tags), create=True))
+
+    def get(self, key, default=None, version=None):
+        made_key = self.make_and_validate_key(key, version=version)
+        entry = self._l1_get(made_key)
+        if entry is not None:
+            value = self._unwrap(entry[1])
+            if value is not self._missing:
+                self._count(key, 'l1_hits')
+                return value
+            self._l1_delete(made_key)
+
+        stored = self._l2_call('get', key, self._missing, version=version, default=self._missing)
+        value = self._unwrap(stored) if stored is not self._missing else self._missing
+        if value is self._missing:
+            self._count(key, 'misses')
+            return default
+        self._count(key, 'l2_hits')
+        self._l1_set(made_key, key, stored, None)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        pending = {}
+        for key in keys:
+            made_key = self.make_and_validate_key(key, version=version)
+            entry = self._l1_get(made_key)
+            value = self._unwrap(entry[1]) if entry is not None else self._missing
+            if value is not self._missing:
+                self._count(key, 'l1_hits')
+                found[key] = value
+            else:
+                pending[key] = made_key
+
+        if pending:
+            stored = self._l2_call('get_many', list(pending), version=version, default={})
+            for key, made_key in pending.items():
+                value = self._unwrap(stored[key]) if key in stored else self._missing
+                if value is self._missing:
+                    self._count(key, 'misses')
+                    continue
+                self._count(key, 'l2_hits')
+                self._l1_set(made_key, key, stored[key], None)
+                found[key] = value
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None, tags=None):
+        made_key = self.make_and_validate_key(key, version=version)
+        timeout = self._l2_timeout(timeout)
+        stored = self._wrap(value, tags)
+        self._l2_call('set', key, stored, timeout, version=version)
+        self._l1_set(made_key, key, stored, timeout)
+        self._count(key, 'sets')
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None, tags=None):
+        timeout = self._l2_timeout(timeout)
+        stored = {key: self._wrap(value, tags) for key, value in data.items()}
+        failed = self._l2_call('set_many', stored, timeout, version=version, default=[])
+        for key, value in stored.items():
+            self._l1_set(self.make_and_validate_key(key, version=version), key, value, timeout)
+            self._count(key, 'sets')
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None, tags=None):
+        made_key = self.make_and_validate_key(key, version=version)
+        timeout = self._l2_timeout(timeout)
+        if self._l2_down_until > time.monotonic():
+            # L2 is down: fall back to process-local add semantics
+            if self._l1_get(made_key) is not None:
+                return False
+            self._l1_set(made_key, key, self._wrap(value, tags), timeout)
+            return True
+        stored = self._wrap(value, tags)
+        added = self._l2_call('add', key, stored, timeout, version=version, default=False)
+        if added:
+            self._l1_set(made_key, key, stored, timeout)
+            self._count(key, 'sets')
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._l1_delete(self.make_and_validate_key(key, version=version))
+        return self._l2_call('touch', key, self._l2_timeout(timeout), version=version, default=False)
+
+    def delete(self, key, version=None):
+        self._l1_delete(self.make_and_validate_key(key, version=version))
+        self._count(key, 'deletes')
+        return self._l2_call('delete', key, version=version, default=False)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        for key in keys:
+            self._l1_delete(self.make_and_validate_key(key, version=version))
+            self._count(key, 'deletes')
+        self._l2_call('delete_many', keys, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        # Counters live in L2 only; L1 would hand out stale values
+        self._l1_delete(self.make_and_validate_key(key, version=version))
+        return self.l2.incr(key, delta, version=version)
+
+    def clear(self):
+        with self._lock:
+            self._l1.clear()
+        self._l2_call('clear')
+
+    def close(self, **kwargs):
+        self._l2_call('close', **kwargs)
+
+    # -------------------------------------------------------------------------
+    # Pattern invalidation
+    # -------------------------------------------------------------------------
+    def delete_pattern(self, pattern, version=None):
+        """Delete every key matching the glob pattern from both levels. Returns the L2 count (-1 if unknown)."""
+        with self._lock:
+            matched = [made for made, entry in self._l1.items() if fnmatch.fnmatchcase(entry[2], pattern)]
+            for made_key in matched:
+                del self._l1[made_key]
+        self._count(pattern, 'deletes')
+        if self._l2_down_until > time.monotonic():
+            return -1
+        return self._l2_delete_pattern(pattern, version)
+
+    def _l2_delete_pattern(self, pattern, version):
+        from django.core.cache.backends.db import DatabaseCache
+        from django.core.cache.backends.locmem import LocMemCache
+
+        l2 = self.l2
+        made_pattern = l2.make_key(pattern, version=version)
+        try:
+            if hasattr(l2, 'delete_pattern'):
+                return l2.delete_pattern(pattern, version=version)
+            if hasattr(l2, '_cache') and hasattr(l2._cache, 'get_client'):
+                # django.core.cache.backends.redis.RedisCache
+                client = l2._cache.get_client(write=True)
+                deleted = 0
+                batch = []
+                for redis_key in client.scan_iter(match=made_pattern, count=500):
+                    batch.append(redis_key)
+                    if len(batch) == 500:
+                        deleted += client.delete(*batch)
+                        batch = []
+                if batch:
+                    deleted += client.delete(*batch)
+                return deleted
+            if isinstance(l2, LocMemCache):
+                with l2._lock:
+                    matched = [made for made in l2._cache if fnmatch.fnmatchcase(made, made_pattern)]
+                    for made_key in matched:
+                        del l2._cache[made_key]
+                        l2._expire_info.pop(made_key, None)
+                return len(matched)
+            if isinstance(l2, DatabaseCache):
+                return self._db_delete_pattern(l2, made_pattern)
+        except Exception as exc:
+            logger.warning(f"Cache L2 delete_pattern({pattern}) failed: {exc}")
+            return -1
+
+        # Backends that do not expose their keys (e.g. FileBasedCache): over-invalidate
+        logger.warning(f"Cache L2 '{self._l2_alias}' cannot match keys; clearing it for delete_pattern({pattern})")
+        l2.clear()
+        return -1
+
+    @staticmethod
+    def _db_delete_pattern(l2, made_pattern):
+        from django.db import connections, router
+
+        like = made_pattern.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_').replace('*', '%').replace('?', '_')
+        db = router.db_for_write(l2.cache_model_class)
+        connection = connections[db]
+        table = connection.ops.quote_name(l2._table)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE cache_key LIKE %s ESCAPE '\\'", [like])
+            return cursor.rowcount
+
+    # -------------------------------------------------------------------------
+    # Stats
+    # -------------------------------------------------------------------------
+    def stats(self):
+        """Per-namespace counters for this process plus L1 occupancy."""
+        with self._lock:
+            namespaces = {name: dict(counters) for name, counters in self._stats.items()}
+            l1_entries = len(self._l1)
+        for counters in namespaces.values():
+            lookups = counters['l1_hits'] + counters['l2_hits'] + counters['misses']
+            counters['hit_rate'] = round((counters['l1_hits'] + counters['l2_hits']) / lookups, 3) if lookups else 0.0
+        return {
+            'l1_entries': l1_entries,
+            'l1_max_entries': self.l1_max_entries,
+            'l2': f"{self._l2_alias} ({type(self.l2).__name__})",
+            'l2_available': self._l2_down_until <= time.monotonic(),
+            'namespaces': dict(sorted(namespaces.items())),
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
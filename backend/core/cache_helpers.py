@@ -1,9 +1,31 @@
 """
 Cache helper utilities for Phase 3 optimization.
 Provides consistent caching patterns across the application.
+
+Cached entries declare the tags they depend on and model signals
+(finance.signals, students.signals) bump those tags on save/delete, so an
+entry is dropped exactly when data it was built from changes:
+
+    schools                         School rows (names, payment modes, active flags)
+    school:<id>                     one school
+    students                        Student rows (counts, fees, statuses)
+    classes:<school_id|all>         class lists built from active students
+    categories                      CategoryEntry rows
+    accounts                        Account rows (names, types)
+    account_balances                balances, moved by every transaction
+    account:<id>                    one account, including its balance
+    transactions:<type>             every Income/Expense/Transfer transaction
+    transactions:<type>:school:<id> transactions of one school
+    fees:<month>                    Fee rows of a month, e.g. fees:Feb-2025
+    fees:school:<id>                Fee rows of a school
 """
 from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
 from functools import wraps
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+import hashlib
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,6 +42,57 @@ CACHE_TIMEOUTS = {
 }
 
 
+# =============================================================================
+# TAGS
+# =============================================================================
+def cache_set(cache_key, value, timeout, tags=()):
+    """cache.set that records tags when the backend supports them (core.cache_backends.TieredCache)."""
+    if tags and hasattr(cache, 'invalidate_tags'):
+        cache.set(cache_key, value, timeout, tags=list(tags))
+    else:
+        cache.set(cache_key, value, timeout)
+
+
+def invalidate_tags(*tags):
+    """
+    Drop every entry tagged with any of tags.
+
+    Tags are bumped immediately (so the rest of this request reads fresh data)
+    and again once the surrounding transaction commits, dropping anything a
+    concurrent request cached from the not-yet-committed state.
+    """
+    tags = sorted({tag for tag in tags if tag})
+    if not tags:
+        return
+    if not hasattr(cache, 'invalidate_tags'):
+        # Backends without tag support cannot tell entries apart; over-invalidate
+        logger.debug(f"Cache backend has no tag support, clearing it for: {', '.join(tags)}")
+        cache.clear()
+        return
+    cache.invalidate_tags(*tags)
+    transaction.on_commit(lambda: cache.invalidate_tags(*tags))
+
+
+def transaction_tags(transaction_type, school_id=None, from_account_id=None, to_account_id=None):
+    """Tags depending on one transaction's type, school and accounts."""
+    tags = [f'transactions:{transaction_type}', 'account_balances']
+    if school_id:
+        tags.append(f'transactions:{transaction_type}:school:{school_id}')
+    tags.extend(f'account:{account_id}' for account_id in (from_account_id, to_account_id) if account_id)
+    return tags
+
+
+def fee_tags(month, school_id=None):
+    """Tags depending on the fees of a month (and school)."""
+    tags = [f'fees:{month}']
+    if school_id:
+        tags.append(f'fees:school:{school_id}')
+    return tags
+
+
+# =============================================================================
+# REFERENCE DATA
+# =============================================================================
 def get_schools_cached():
     """
     Get all schools from cache or database.
@@ -35,7 +108,7 @@ def get_schools_cached():
             .values('id', 'name', 'location', 'payment_mode')
             .order_by('name')
         )
-        cache.set(cache_key, schools, CACHE_TIMEOUTS['schools_list'])
+        cache_set(cache_key, schools, CACHE_TIMEOUTS['schools_list'], tags=['schools'])
         logger.debug(f"Schools list cached: {len(schools)} schools")
 
     return schools
@@ -58,7 +131,7 @@ def get_categories_cached(category_type=None):
             queryset = queryset.filter(category_type=category_type)
 
         categories = list(queryset.values('id', 'name', 'category_type').order_by('name'))
-        cache.set(cache_key, categories, CACHE_TIMEOUTS['categories'])
+        cache_set(cache_key, categories, CACHE_TIMEOUTS['categories'], tags=['categories'])
         logger.debug(f"Categories cached: {len(categories)} categories")
 
     return categories
@@ -85,7 +158,7 @@ def get_classes_cached(school_id=None):
             .distinct()
             .order_by('student_class')
         )
-        cache.set(cache_key, classes, CACHE_TIMEOUTS['classes'])
+        cache_set(cache_key, classes, CACHE_TIMEOUTS['classes'], tags=[f'classes:{school_id or "all"}'])
         logger.debug(f"Classes cached: {len(classes)} classes")
 
     return classes
@@ -110,7 +183,7 @@ def get_accounts_cached():
         for acc in accounts:
             acc['current_balance'] = float(acc['current_balance'])
 
-        cache.set(cache_key, accounts, CACHE_TIMEOUTS['reference_data'])
+        cache_set(cache_key, accounts, CACHE_TIMEOUTS['reference_data'], tags=['accounts', 'account_balances'])
         logger.debug(f"Accounts cached: {len(accounts)} accounts")
 
     return accounts
@@ -118,70 +191,122 @@ def get_accounts_cached():
 
 def invalidate_school_cache():
     """Invalidate all school-related caches."""
-    cache.delete('schools_list_all')
-    cache.delete_pattern('classes_*') if hasattr(cache, 'delete_pattern') else None
-    cache.delete('transactions_page_reference_data')
+    invalidate_tags('schools', 'classes:all')
     logger.debug("School cache invalidated")
 
 
 def invalidate_category_cache():
     """Invalidate all category-related caches."""
-    cache.delete('categories_all')
-    cache.delete('categories_income')
-    cache.delete('categories_expense')
-    cache.delete('transactions_page_reference_data')
+    invalidate_tags('categories')
     logger.debug("Category cache invalidated")
 
 
 def invalidate_account_cache():
     """Invalidate all account-related caches."""
-    cache.delete('accounts_list_all')
-    cache.delete('transactions_page_reference_data')
-    cache.delete('finance_summary')
-    cache.delete('loan_summary')
+    invalidate_tags('accounts', 'account_balances')
     logger.debug("Account cache invalidated")
 
 
 def invalidate_finance_cache():
     """Invalidate all finance-related caches."""
-    cache.delete('finance_summary')
-    cache.delete('loan_summary')
-    # Also invalidate dashboard caches
+    invalidate_tags('account_balances', *(f'transactions:{t}' for t in ('Income', 'Expense', 'Transfer')))
+    # Dashboard caches are not tagged yet
     cache.delete_pattern('admin_dashboard_summary_*') if hasattr(cache, 'delete_pattern') else None
     cache.delete_pattern('finance_dashboard_*') if hasattr(cache, 'delete_pattern') else None
     logger.debug("Finance cache invalidated")
 
 
-def cached_view(cache_key_func, timeout=300):
+# =============================================================================
+# VIEW CACHING
+# =============================================================================
+def request_cache_scope(request, per_user=False):
+    """
+    Who may share a cached response: all admins share one entry, teachers
+    share by their set of assigned schools, everyone else gets their own.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return 'anonymous'
+    role = getattr(user, 'role', '') or 'none'
+    if per_user or role not in ('Admin', 'Teacher'):
+        return f'{role}:user:{user.pk}'
+    if role == 'Admin':
+        return role
+    school_ids = sorted(user.assigned_schools.values_list('id', flat=True))
+    return f"{role}:schools:{','.join(str(school_id) for school_id in school_ids)}"
+
+
+def view_cache_key(request, view_name, per_user=False, args=(), kwargs=None):
+    """Cache key for a GET of view_name: the view, the caller's scope and every query parameter."""
+    params = sorted((key, value) for key in request.GET for value in request.GET.getlist(key))
+    raw = f"{request_cache_scope(request, per_user)}|{args}|{sorted((kwargs or {}).items())}|{params}"
+    return f"view:{view_name}:{hashlib.md5(raw.encode('utf-8')).hexdigest()}"
+
+
+def _json_response(body, etag, status_code=200):
+    response = HttpResponse(body, content_type='application/json', status=status_code)
+    response['ETag'] = etag
+    # Let browsers keep the body but revalidate it with If-None-Match every time
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _not_modified(request, etag):
+    return etag in [tag.strip() for tag in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]
+
+
+def cached_view(timeout=300, tags=(), per_user=False):
     """
-    Decorator for caching view responses.
+    Decorator caching successful GET responses of a DRF function view as
+    rendered JSON bytes.
 
-    Usage:
-        @cached_view(lambda request: f"my_view_{request.GET.get('school')}", timeout=300)
+    Usage (below @api_view / @permission_classes):
+        @cached_view(timeout=300, tags=lambda request: [f"transactions:Income:school:{request.GET['school']}"])
         def my_view(request):
             ...
 
     Args:
-        cache_key_func: Function that takes request and returns cache key
         timeout: Cache timeout in seconds
+        tags: Cache tags (see module docstring), or a function of
+              (request, *args, **kwargs) returning them
+        per_user: Key on the user instead of role/school scope, for views
+                  whose data depends on who is asking beyond their schools
+
+    The key includes the caller's role and school scope and all query
+    parameters, so users never see each other's data. Responses carry an
+    ETag; a matching If-None-Match gets a 304 without re-sending the body.
     """
     def decorator(view_func):
+        view_name = f"{view_func.__module__}.{view_func.__name__}"
+
         @wraps(view_func)
         def wrapper(request, *args, **kwargs):
-            cache_key = cache_key_func(request)
-            cached_response = cache.get(cache_key)
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
 
-            if cached_response is not None:
+            cache_key = view_cache_key(request, view_name, per_user, args, kwargs)
+            cached = cache.get(cache_key)
+            if cached is not None:
                 logger.debug(f"Cache hit: {cache_key}")
-                return cached_response
+                body, etag = cached
+                if _not_modified(request, etag):
+                    return HttpResponseNotModified(headers={'ETag': etag})
+                return _json_response(body, etag)
 
             response = view_func(request, *args, **kwargs)
 
-            # Only cache successful responses
-            if hasattr(response, 'status_code') and 200 <= response.status_code < 300:
-                cache.set(cache_key, response, timeout)
-                logger.debug(f"Cache set: {cache_key}")
+            # Only cache successful DRF responses
+            if not isinstance(response, Response) or response.status_code != 200 or response.exception:
+                return response
+
+            body = JSONRenderer().render(response.data)
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+            entry_tags = tags(request, *args, **kwargs) if callable(tags) else tags
+            cache_set(cache_key, (body, etag), timeout, tags=entry_tags)
+            logger.debug(f"Cache set: {cache_key}")
 
-            return response
+            if _not_modified(request, etag):
+                return HttpResponseNotModified(headers={'ETag': etag})
+            return _json_response(body, etag)
         return wrapper
     return decorator
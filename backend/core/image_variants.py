@@ -0,0 +1,75 @@
+"""
+Resized variants of uploaded images.
+
+Phone photos and screenshots are uploaded at full resolution, but list views
+and PDFs only ever show them small. After an upload, a Celery task (one per
+app: students, courses, aigala) downloads the original once and stores
+these variants next to it:
+
+    thumb  600px JPEG   - list views, PDFs and emails (matches the report image size)
+    webp   1280px WebP  - full-size views in the browser
+
+Variants live in a "variants/" folder beside the original, so the original's
+folder listing is unchanged:
+
+    12/2026-03-02_ab12.jpg  ->  12/variants/2026-03-02_ab12_thumb.jpg
+                                12/variants/2026-03-02_ab12_webp.webp
+"""
+import logging
+import posixpath
+from io import BytesIO
+
+logger = logging.getLogger(__name__)
+
+VARIANTS = {
+    'thumb': {'max_size': (600, 600), 'format': 'JPEG', 'ext': 'jpg', 'content_type': 'image/jpeg', 'quality': 82},
+    'webp': {'max_size': (1280, 1280), 'format': 'WEBP', 'ext': 'webp', 'content_type': 'image/webp', 'quality': 80},
+}
+
+
+def variant_path(path, name):
+    """Storage path of variant `name` of the object at `path`."""
+    folder, filename = posixpath.split(path)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(folder, 'variants', f"{stem}_{name}.{VARIANTS[name]['ext']}")
+
+
+def render_variants(data, names=None):
+    """Return {name: bytes} for the variants in names (default: all) of the image in data."""
+    from PIL import Image as PILImage, ImageOps
+
+    with PILImage.open(BytesIO(data)) as original:
+        # Phone cameras store orientation in EXIF; bake it in before resizing
+        img = ImageOps.exif_transpose(original)
+        if img.mode in ('RGBA', 'LA', 'P'):
+            img = img.convert('RGBA')
+            background = PILImage.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        rendered = {}
+        for name in names or VARIANTS:
+            spec = VARIANTS[name]
+            variant = img.copy()
+            variant.thumbnail(spec['max_size'], PILImage.LANCZOS)
+            output = BytesIO()
+            variant.save(output, format=spec['format'], quality=spec['quality'], optimize=True)
+            rendered[name] = output.getvalue()
+        return rendered
+
+
+def generate_variants(data, path, upload, names=None):
+    """
+    Render the variants in names (default: all) of the image at `path` and
+    store each with upload(variant_path, bytes, content_type).
+    Returns {name: variant_path}.
+    """
+    paths = {}
+    for name, variant_data in render_variants(data, names).items():
+        target = variant_path(path, name)
+        upload(target, variant_data, VARIANTS[name]['content_type'])
+        paths[name] = target
+    logger.info(f"Generated {len(paths)} variants for {path}")
+    return paths
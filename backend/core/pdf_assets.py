@@ -0,0 +1,106 @@
+"""
+Shared static assets for WeasyPrint renderers.
+
+Report cards, self-service reports and inventory PDFs all put static/bg.png
+(or static/letterhead.png) behind every page. Inlining it as a base64 data
+URI meant reading and encoding the file on every render and making WeasyPrint
+tokenize (and decode) the whole image again for every PDF.
+
+Assets are now prepared once per process: RGBA images are flattened onto
+white (the page colour) into a plain RGB PNG under the system temp dir and
+referenced by file:// URL. Parsed weasyprint.CSS objects are cached as well,
+so stylesheets that never change are only parsed once.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Name -> file under static/
+PDF_ASSETS = {
+    'background': 'bg.png',
+    'letterhead': 'letterhead.png',
+}
+
+FULL_PAGE_BACKGROUND = "background: url('{url}') no-repeat top left / 210mm 297mm;"
+
+
+def _source_path(name):
+    return os.path.join(settings.BASE_DIR, 'static', PDF_ASSETS[name])
+
+
+def _prepare(source):
+    """Flatten source onto white and write it to the asset dir; return the prepared path."""
+    from PIL import Image as PILImage
+
+    stat = os.stat(source)
+    # Include size/mtime so replacing the file on disk gets picked up after a restart
+    digest = hashlib.sha1(f"{source}|{stat.st_size}|{stat.st_mtime_ns}".encode('utf-8')).hexdigest()[:16]
+    target_dir = os.path.join(tempfile.gettempdir(), 'pdf_assets')
+    target = os.path.join(target_dir, f"{digest}-{os.path.basename(source)}")
+    if os.path.exists(target):
+        return target
+
+    img = PILImage.open(source)
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        background = PILImage.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    os.makedirs(target_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=target_dir, suffix='.png')
+    with os.fdopen(fd, 'wb') as f:
+        img.save(f, format='PNG', optimize=True)
+    os.replace(tmp_path, target)
+    return target
+
+
+@lru_cache(maxsize=None)
+def get_asset_url(name):
+    """file:// URL of a prepared PDF asset, or None if it does not exist."""
+    source = _source_path(name)
+    if not os.path.exists(source):
+        return None
+    try:
+        path = _prepare(source)
+    except Exception as exc:
+        # Fall back to the original file rather than dropping the letterhead
+        logger.warning(f"Could not prepare PDF asset {source}: {exc}")
+        path = source
+    logger.info(f"PDF asset '{name}' loaded from {source}")
+    return Path(path).as_uri()
+
+
+def page_background_css(*names):
+    """
+    CSS declaration drawing the first available asset in names over the whole
+    A4 page, for use inside an @page rule. Returns '' if none exist.
+    """
+    for name in names:
+        url = get_asset_url(name)
+        if url:
+            return FULL_PAGE_BACKGROUND.format(url=url)
+    logger.warning(f"No PDF background found among {', '.join(PDF_ASSETS[n] for n in names)}")
+    return ''
+
+
+@lru_cache(maxsize=32)
+def get_stylesheet(css_text):
+    """Parsed weasyprint.CSS for css_text, shared by every render in this process."""
+    from weasyprint import CSS
+    return CSS(string=css_text)
+
+
+def clear_asset_cache():
+    """Forget prepared assets and parsed stylesheets (e.g. after replacing a file in static/)."""
+    get_asset_url.cache_clear()
+    get_stylesheet.cache_clear()
@@ -0,0 +1,96 @@
+"""
+Tests for the tiered cache backend (core.cache_backends).
+
+Run with:
+    python manage.py test core
+"""
+from unittest.mock import patch
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+
+from core.cache_backends import TieredCache, key_namespace
+
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.l2 = LocMemCache('tiered-tests', {})
+        self.l2.clear()
+        patcher = patch.object(TieredCache, 'l2', self.l2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = TieredCache('', {'OPTIONS': {'L1_MAX_ENTRIES': 3, 'L1_TIMEOUT': 60}})
+
+    def other_process(self):
+        """A second TieredCache sharing the same L2, like another worker."""
+        return TieredCache('', {'OPTIONS': {'L1_MAX_ENTRIES': 3, 'L1_TIMEOUT': 60}})
+
+    def test_reads_are_served_from_l1_after_the_first_l2_hit(self):
+        self.other_process().set('schools_list_all', ['A'], 60)
+
+        with patch.object(self.l2, 'get', wraps=self.l2.get) as l2_get:
+            self.assertEqual(self.cache.get('schools_list_all'), ['A'])
+            self.assertEqual(self.cache.get('schools_list_all'), ['A'])
+
+        l2_get.assert_called_once()
+        counters = self.cache.stats()['namespaces']['schools_list']
+        self.assertEqual((counters['l2_hits'], counters['l1_hits'], counters['hit_rate']), (1, 1, 1.0))
+
+    def test_l1_is_bounded(self):
+        for index in range(5):
+            self.cache.set(f'classes_{index}', index, 60)
+
+        self.assertEqual(self.cache.stats()['l1_entries'], 3)
+        # Evicted from L1 but still in L2
+        self.assertEqual(self.cache.get('classes_0'), 0)
+
+    def test_l1_hands_out_copies(self):
+        summary = {'total': 1, 'schools': ['A']}
+        self.cache.set('finance_summary', summary, 60)
+        summary['schools'].append('B')
+
+        cached = self.cache.get('finance_summary')
+        cached['total'] = 2
+
+        self.assertEqual(self.cache.get('finance_summary'), {'total': 1, 'schools': ['A']})
+        self.assertEqual(self.cache.get_many(['finance_summary']), {'finance_summary': {'total': 1, 'schools': ['A']}})
+
+    def test_delete_pattern_clears_both_levels(self):
+        self.cache.set('finance_dashboard_2025-01', 1, 60)
+        self.cache.set('finance_dashboard_2025-02', 2, 60)
+        self.cache.set('finance_summary', 3, 60)
+
+        self.assertEqual(self.cache.delete_pattern('finance_dashboard_*'), 2)
+
+        self.assertIsNone(self.cache.get('finance_dashboard_2025-01'))
+        self.assertIsNone(self.other_process().get('finance_dashboard_2025-02'))
+        self.assertEqual(self.cache.get('finance_summary'), 3)
+
+    def test_invalidating_a_tag_drops_tagged_entries_in_every_process(self):
+        self.cache.set('txn_list_a', 'a', 60, tags=['school:7'])
+        self.cache.set('txn_list_b', 'b', 60, tags=['school:8'])
+        other = self.other_process()
+        self.assertEqual(other.get('txn_list_a'), 'a')
+
+        other.invalidate_tags('school:7')
+
+        self.assertIsNone(other.get('txn_list_a'))
+        self.assertEqual(other.get('txn_list_b'), 'b')
+        # This process still holds the old tag token in L1 until it expires
+        self.cache._l1.clear()
+        self.assertIsNone(self.cache.get('txn_list_a'))
+        self.assertEqual(self.cache.get_many(['txn_list_a', 'txn_list_b']), {'txn_list_b': 'b'})
+
+    def test_unreachable_l2_degrades_to_l1(self):
+        self.cache.set('finance_summary', {'total': 1}, 60)
+
+        with patch.object(self.l2, 'get', side_effect=ConnectionError('down')):
+            self.assertEqual(self.cache.get('finance_summary'), {'total': 1})
+            self.assertIsNone(self.cache.get('loan_summary'))
+            self.assertFalse(self.cache.stats()['l2_available'])
+
+    def test_key_namespaces(self):
+        self.assertEqual(key_namespace('classes_3'), 'classes')
+        self.assertEqual(key_namespace('admin_dashboard_summary_2025'), 'admin_dashboard')
+        self.assertEqual(key_namespace('student_image_url:ab12'), 'student_image_url')
+        self.assertEqual(key_namespace('finance_summary'), 'finance_summary')
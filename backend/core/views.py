@@ -0,0 +1,30 @@
+"""
+Operational endpoints for shared infrastructure in core.
+"""
+import os
+
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def cache_stats(request):
+    """
+    GET /api/cache-stats/  (Admin only)
+    Hit rates per key namespace for the worker process that served the request.
+    ?reset=1 zeroes the counters after reading them.
+    """
+    if request.user.role != 'Admin':
+        return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
+
+    if not hasattr(cache, 'stats'):
+        return Response({'backend': type(cache).__name__, 'pid': os.getpid(), 'stats': None})
+
+    stats = cache.stats()
+    if request.query_params.get('reset') == '1':
+        cache.reset_stats()
+    return Response({'backend': type(cache).__name__, 'pid': os.getpid(), 'stats': stats})
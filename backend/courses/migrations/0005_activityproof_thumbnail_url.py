@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-16 20:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_validation_system_final'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activityproof',
+            name='thumbnail_url',
+            field=models.URLField(blank=True, help_text='Resized copy of the screenshot for list views (generated after upload)', max_length=500, null=True),
+        ),
+    ]
@@ -450,6 +450,12 @@ class ActivityProof(models.Model):
         max_length=500,
         help_text="Supabase storage URL for the screenshot"
     )
+    thumbnail_url = models.URLField(
+        max_length=500,
+        blank=True,
+        null=True,
+        help_text="Resized copy of the screenshot for list views (generated after upload)"
+    )
     software_used = models.CharField(
         max_length=20,
         choices=SOFTWARE_CHOICES,
@@ -73,6 +73,7 @@ class ActivityProofUploadSerializer(serializers.ModelSerializer):
                     "Proof already approved for this topic"
                 )
             existing.screenshot_url = validated_data['screenshot_url']
+            existing.thumbnail_url = None
             existing.software_used = validated_data.get('software_used', 'other')
             existing.student_notes = validated_data.get('student_notes', '')
             existing.status = 'pending'  # Reset to pending on re-upload
@@ -111,6 +112,7 @@ class ActivityProofStudentSerializer(serializers.ModelSerializer):
             'chapter_title',
             'course_title',
             'screenshot_url',
+            'thumbnail_url',
             'software_used',
             'student_notes',
             'uploaded_at',
@@ -160,6 +162,7 @@ class ActivityProofTeacherSerializer(serializers.ModelSerializer):
             'chapter_title',
             'course_title',
             'screenshot_url',
+            'thumbnail_url',
             'software_used',
             'student_notes',
             'uploaded_at',
@@ -173,7 +176,7 @@ class ActivityProofTeacherSerializer(serializers.ModelSerializer):
         read_only_fields = [
             'id', 'student_id', 'student_name', 'school_name', 'class_name',
             'topic', 'topic_title', 'chapter_title', 'course_title',
-            'screenshot_url', 'software_used', 'student_notes', 'uploaded_at',
+            'screenshot_url', 'thumbnail_url', 'software_used', 'student_notes', 'uploaded_at',
         ]
 
     def get_chapter_title(self, obj):
@@ -3,6 +3,8 @@
 # ============================================
 # Handles student screenshot uploads and teacher bulk approval
 
+import logging
+
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
@@ -20,6 +22,8 @@ from .proof_serializers import (
 )
 from students.access_policies import is_student_lms_enabled_user, get_student_from_user
 
+logger = logging.getLogger(__name__)
+
 
 # =============================================
 # Permission Helpers
@@ -34,6 +38,16 @@ def is_teacher_or_admin(user):
     """Check if user is a teacher or admin."""
     return user.role in ['Teacher', 'Admin']
 
+
+def queue_proof_thumbnail(proof):
+    """Queue thumbnail generation for a proof screenshot; never fails the upload."""
+    from .tasks import generate_proof_thumbnail_task
+
+    try:
+        generate_proof_thumbnail_task.delay(proof.id)
+    except Exception as e:
+        logger.error(f"Failed to queue thumbnail for activity proof {proof.id}: {str(e)}")
+
 # =============================================
 # Student Endpoints
 # =============================================
@@ -73,6 +87,7 @@ def upload_activity_proof(request):
 
     if serializer.is_valid():
         proof = serializer.save()
+        queue_proof_thumbnail(proof)
         return Response(
             {
                 'success': True,
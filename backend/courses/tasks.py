@@ -0,0 +1,54 @@
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+def parse_public_storage_url(url):
+    """(bucket, path) of a Supabase public object URL, or (None, None)."""
+    marker = '/storage/v1/object/public/'
+    if not url or marker not in url:
+        return None, None
+    bucket, _, path = url.split('?', 1)[0].split(marker, 1)[1].partition('/')
+    return (bucket, path) if path else (None, None)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def generate_proof_thumbnail_task(self, proof_id):
+    """
+    Async: store a thumbnail of an activity proof screenshot and save its URL.
+
+    Screenshots are uploaded to Supabase by the browser, so the worker reads
+    the original back through the storage API using the path in screenshot_url.
+    """
+    from django.conf import settings
+    from supabase import create_client
+    from core.image_variants import generate_variants
+    from .models import ActivityProof
+
+    proof = ActivityProof.objects.filter(id=proof_id).first()
+    if not proof:
+        return 'Proof not found'
+    bucket, path = parse_public_storage_url(proof.screenshot_url)
+    if not bucket:
+        return 'Not a Supabase storage URL'
+
+    screenshot_url = proof.screenshot_url
+    try:
+        storage = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY).storage.from_(bucket)
+        paths = generate_variants(
+            storage.download(path),
+            path,
+            lambda target, data, content_type: storage.upload(
+                target, data, file_options={"content-type": content_type, "upsert": "true"}
+            ),
+            names=['thumb'],
+        )
+        thumbnail_url = storage.get_public_url(paths['thumb'])
+        # Skip the write if the student re-uploaded while we were working
+        ActivityProof.objects.filter(id=proof_id, screenshot_url=screenshot_url).update(thumbnail_url=thumbnail_url)
+        return thumbnail_url
+    except Exception as exc:
+        logger.error(f"Thumbnail generation failed for activity proof {proof_id}: {exc}")
+        self.retry(exc=exc)
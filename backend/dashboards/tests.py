@@ -1,3 +1,130 @@
+"""
+Tests for the login event log and its rollups (authentication.login_events)
+behind GET /api/dashboards/login-activity/.
+
+Run with:
+    python manage.py test dashboards
+"""
+from datetime import datetime, time, timedelta
+from unittest.mock import patch
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication.login_events import client_ip, rebuild_login_rollups, record_login
+from authentication.models import LoginActivityRollup, LoginEvent
+from students.models import CustomUser, School, Student
+
+
+class LoginActivityTest(TestCase):
+    def setUp(self):
+        self.north = School.objects.create(name="North School")
+        self.south = School.objects.create(name="South School")
+        self.student_user = CustomUser.objects.create_user(username='login_student', password='pass1234', role='Student')
+        Student.objects.create(reg_num='LOGIN-1', name='Login Student', school=self.north, user=self.student_user)
+        self.teacher = CustomUser.objects.create_user(username='login_teacher', password='pass1234', role='Teacher')
+        self.teacher.assigned_schools.add(self.north, self.south)
+        self.admin = CustomUser.objects.create_user(username='login_admin', password='pass1234', role='Admin')
+        self.client = APIClient()
+        self.today = timezone.localdate()
+
+    def at(self, days_ago, hour=9):
+        return timezone.make_aware(datetime.combine(self.today - timedelta(days=days_ago), time(hour)))
+
+    def record(self, user, days_ago, hour=9):
+        school_id = user.student_profile.school_id if user.role == 'Student' else None
+        with self.captureOnCommitCallbacks(execute=True):
+            record_login(user.id, user.role, school_id, self.at(days_ago, hour).isoformat())
+
+    def rollups(self):
+        return sorted(LoginActivityRollup.objects.values_list(
+            'period', 'bucket_start', 'role', 'school_key', 'logins', 'users',
+        ))
+
+    def activity(self, **params):
+        self.client.force_authenticate(self.admin)
+        return self.client.get('/api/dashboards/login-activity/', params)
+
+    def test_login_appends_an_event_in_the_background(self):
+        with patch('authentication.tasks.record_login_task.delay', side_effect=record_login) as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/auth/token/', {'username': 'login_student', 'password': 'pass1234'},
+                                            format='json', HTTP_X_FORWARDED_FOR='spoofed, 10.0.0.1')
+
+        self.assertEqual(response.status_code, 200)
+        delay.assert_called_once()
+        event = LoginEvent.objects.get()
+        self.assertEqual((event.user, event.role, event.school), (self.student_user, 'Student', self.north))
+        # An X-Forwarded-For hop that is not an address falls back to REMOTE_ADDR
+        self.assertEqual(event.ip_address, '127.0.0.1')
+        self.assertEqual(
+            sorted(LoginActivityRollup.objects.filter(school=None).values_list('period', 'users')),
+            [('day', 1), ('hour', 1)],
+        )
+
+        # A broker outage does not fail the login; the event is written inline
+        with patch('authentication.tasks.record_login_task.delay', side_effect=OSError('broker down')):
+            response = self.client.post('/api/auth/token/', {'username': 'login_student', 'password': 'pass1234'},
+                                        format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(LoginEvent.objects.count(), 2)
+
+    def test_client_ip_is_validated(self):
+        self.assertEqual(client_ip({'HTTP_X_FORWARDED_FOR': '203.0.113.7, 10.0.0.1', 'REMOTE_ADDR': '10.0.0.2'}),
+                         '203.0.113.7')
+        self.assertEqual(client_ip({'HTTP_X_FORWARDED_FOR': '<script>', 'REMOTE_ADDR': '10.0.0.2'}), '10.0.0.2')
+        self.assertIsNone(client_ip({'HTTP_X_FORWARDED_FOR': 'unknown'}))
+
+    def test_rollups_count_incrementally_and_retries_are_idempotent(self):
+        self.record(self.teacher, 0)
+        self.record(self.teacher, 0, hour=15)
+        self.record(self.student_user, 0)
+        # A retried task records the same login again
+        self.record(self.student_user, 0)
+
+        self.assertEqual(LoginEvent.objects.count(), 3)
+        day = LoginActivityRollup.objects.get(period='day', role='Teacher', school=self.south)
+        self.assertEqual((day.logins, day.users), (2, 1))
+        counted = self.rollups()
+        rebuild_login_rollups()
+        self.assertEqual(self.rollups(), counted)
+
+        # One indexed exists query per bucket, not a re-aggregation of its events
+        with CaptureQueriesContext(connection) as queries:
+            self.record(self.student_user, 0, hour=16)
+        self.assertFalse(any('COUNT(' in query['sql'].upper() for query in queries.captured_queries))
+
+    def test_every_day_with_a_login_counts(self):
+        self.record(self.student_user, 1)
+        self.record(self.student_user, 0)
+        self.record(self.student_user, 0, hour=15)
+        self.record(self.teacher, 0)
+
+        data = self.activity().data
+        self.assertEqual((data['yesterday']['student_logins'], data['today']['student_logins']), (1, 1))
+        self.assertEqual(data['today']['teacher_logins'], 1)
+        self.assertEqual(data['totals'], {'student_logins': 2, 'teacher_logins': 1, 'total': 3})
+        schools = {school['school_name']: school for school in data['today']['schools']}
+        self.assertEqual((schools['North School']['student_logins'], schools['North School']['teacher_logins']), (1, 1))
+        self.assertEqual((schools['South School']['student_logins'], schools['South School']['teacher_logins']), (0, 1))
+
+        hourly = self.activity(start=self.today.isoformat(), interval='hour').data
+        self.assertEqual([bucket['logins'] for bucket in hourly['series']], [2, 1])
+        self.assertEqual(self.activity(start='2026-01-01', end='2025-01-01').status_code, 400)
+        self.assertEqual(self.activity(start=self.today.isoformat(), interval='week').status_code, 400)
 
-# Create your tests here.
+    def test_dashboard_query_count_does_not_grow_with_schools_or_days(self):
+        counts = []
+        for extra in (0, 10):
+            for index in range(extra):
+                school = School.objects.create(name=f"Extra {index}")
+                self.teacher.assigned_schools.add(school)
+                self.record(self.teacher, index % 3)
+            with CaptureQueriesContext(connection) as queries:
+                self.activity()
+                self.activity(start=(self.today - timedelta(days=30)).isoformat())
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
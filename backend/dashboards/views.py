@@ -8,10 +8,11 @@ from django.db.models import Count, Case, When, IntegerField, FloatField, Q
 from django.db.models.functions import Round
 from django.contrib.postgres.aggregates import ArrayAgg
 from datetime import datetime, timedelta
-from django.utils.timezone import now
+from django.utils.timezone import localdate, now
 import logging
 
-from students.models import LessonPlan, Student, StudentImage, School, CustomUser
+from authentication.login_events import LoginActivityError, login_activity, parse_range
+from students.models import LessonPlan, Student, StudentImage
 from students.serializers import (
     MonthlyLessonsSerializer, UpcomingLessonsSerializer,
     LessonStatusSerializer, SchoolLessonsSerializer, StudentEngagementSerializer
@@ -281,108 +282,40 @@ class TeacherStudentEngagement(APIView):
 @permission_classes([IsAuthenticated])
 def get_login_activity(request):
     """
-    Returns login counts for students and teachers for the last 3 days.
-    Returns separate counts for Today, Yesterday, and Day Before Yesterday.
-    Includes school-wise breakdown for each day.
-    Uses CustomUser.last_login field (auto-updated by Django on each login)
+    Login activity of students and teachers, with a school-wise breakdown,
+    read from the login rollups (authentication.login_events).
+
+    Without parameters: Today, Yesterday and Previous (day before yesterday)
+    plus their totals. With start and end (YYYY-MM-DD) and optional
+    interval (day or hour): the series over that range, for trends.
     """
-    today = now().date()
-    yesterday = today - timedelta(days=1)
-    day_before = today - timedelta(days=2)
-
-    # Get active schools
-    schools = School.objects.filter(is_active=True).order_by('name')
-
-    def get_logins_for_date(date):
-        """Get student and teacher login counts for a specific date, with school breakdown"""
-        # Overall counts
-        student_logins = CustomUser.objects.filter(
-            role='Student',
-            last_login__date=date,
-            is_active=True
-        ).count()
-
-        teacher_logins = CustomUser.objects.filter(
-            role='Teacher',
-            last_login__date=date,
-            is_active=True
-        ).count()
-
-        # School-wise breakdown
-        schools_data = []
-        for school in schools:
-            school_students = CustomUser.objects.filter(
-                role='Student',
-                student_profile__school=school,
-                last_login__date=date,
-                is_active=True
-            ).count()
-
-            school_teachers = CustomUser.objects.filter(
-                role='Teacher',
-                assigned_schools=school,
-                last_login__date=date,
-                is_active=True
-            ).count()
-
-            # Only include schools with activity
-            if school_students > 0 or school_teachers > 0:
-                schools_data.append({
-                    'school_id': school.id,
-                    'school_name': school.name,
-                    'student_logins': school_students,
-                    'teacher_logins': school_teachers,
-                    'total': school_students + school_teachers,
-                })
-
-        # Sort schools by total logins (highest first)
-        schools_data.sort(key=lambda x: x['total'], reverse=True)
-
-        return {
-            'student_logins': student_logins,
-            'teacher_logins': teacher_logins,
-            'total': student_logins + teacher_logins,
-            'schools': schools_data,
-        }
+    today = localdate()
+    params = request.query_params
 
-    # Get logins for each day
-    today_logins = get_logins_for_date(today)
-    yesterday_logins = get_logins_for_date(yesterday)
-    previous_logins = get_logins_for_date(day_before)
-
-    # Calculate totals across all 3 days
-    total_students = (
-        today_logins['student_logins'] +
-        yesterday_logins['student_logins'] +
-        previous_logins['student_logins']
-    )
-    total_teachers = (
-        today_logins['teacher_logins'] +
-        yesterday_logins['teacher_logins'] +
-        previous_logins['teacher_logins']
-    )
-
-    result = {
-        'today': {
-            'label': 'Today',
-            'date': today.isoformat(),
-            **today_logins,
-        },
-        'yesterday': {
-            'label': 'Yesterday',
-            'date': yesterday.isoformat(),
-            **yesterday_logins,
-        },
-        'previous': {
-            'label': 'Previous',
-            'date': day_before.isoformat(),
-            **previous_logins,
-        },
-        'totals': {
-            'student_logins': total_students,
-            'teacher_logins': total_teachers,
-            'total': total_students + total_teachers,
+    try:
+        if params.get('start') or params.get('end'):
+            start, end, interval = parse_range(
+                params.get('start'), params.get('end') or today.isoformat(), params.get('interval') or 'day',
+            )
+            return Response(login_activity(start, end, interval))
+        activity = login_activity(today - timedelta(days=2), today)
+    except LoginActivityError as e:
+        return Response({"error": str(e)}, status=400)
+
+    by_date = {bucket['date']: bucket for bucket in activity['series']}
+    empty = {'student_logins': 0, 'teacher_logins': 0, 'total': 0, 'logins': 0, 'roles': {}, 'schools': []}
+    result = {}
+    for key, label, days_ago in (('today', 'Today', 0), ('yesterday', 'Yesterday', 1), ('previous', 'Previous', 2)):
+        day = (today - timedelta(days=days_ago)).isoformat()
+        bucket = {**empty, **by_date.get(day, {})}
+        result[key] = {
+            'label': label,
+            'date': day,
+            'student_logins': bucket['student_logins'],
+            'teacher_logins': bucket['teacher_logins'],
+            'total': bucket['total'],
+            'schools': bucket['schools'],
         }
-    }
+    result['totals'] = {key: activity['totals'][key] for key in ('student_logins', 'teacher_logins', 'total')}
 
     return Response(result)
@@ -8,7 +8,6 @@ from django.db.models import Sum, F
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.cache import cache
 from decimal import Decimal
 
 
@@ -126,11 +125,6 @@ class Transaction(models.Model):
             self._update_account_balance(from_acc_id, -amt)
             self._update_account_balance(to_acc_id, amt)
 
-    def _invalidate_cache(self):
-        """Clear finance-related caches."""
-        cache.delete('finance_summary')
-        cache.delete('loan_summary')
-
     def save(self, *args, **kwargs):
         with transaction.atomic():
             # Fetch original for updates (to reverse old balance changes)
@@ -164,8 +158,6 @@ class Transaction(models.Model):
                 reverse=False
             )
 
-            self._invalidate_cache()
-
     def delete(self, *args, **kwargs):
         with transaction.atomic():
             # Store IDs before deletion
@@ -188,8 +180,6 @@ class Transaction(models.Model):
                 reverse=True
             )
 
-            self._invalidate_cache()
-
     def __str__(self):
         return f"{self.transaction_type}: {self.amount} ({self.category}) - {self.school.name if self.school else 'No School'}"
 
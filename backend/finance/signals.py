@@ -0,0 +1,46 @@
+"""
+Cache invalidation for finance models.
+
+Every save/delete bumps the cache tags (see core.cache_helpers) that the
+changed row feeds, so finance summaries, transaction lists and the cached
+reference data are refreshed exactly when their inputs change.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.cache_helpers import invalidate_tags, transaction_tags
+from .models import Account, CategoryEntry, Transaction
+
+
+def _tags_for(txn):
+    return transaction_tags(txn.transaction_type, txn.school_id, txn.from_account_id, txn.to_account_id)
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_previous_transaction(sender, instance, **kwargs):
+    """Keep the tags of the stored row so moving a transaction refreshes its old lists too."""
+    instance._previous_cache_tags = []
+    if instance.pk:
+        previous = Transaction.objects.filter(pk=instance.pk).values_list(
+            'transaction_type', 'school_id', 'from_account_id', 'to_account_id'
+        ).first()
+        if previous:
+            instance._previous_cache_tags = transaction_tags(*previous)
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def invalidate_transaction_caches(sender, instance, **kwargs):
+    invalidate_tags(*_tags_for(instance), *getattr(instance, '_previous_cache_tags', []))
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+def invalidate_account_caches(sender, instance, **kwargs):
+    invalidate_tags('accounts', 'account_balances', f'account:{instance.pk}')
+
+
+@receiver(post_save, sender=CategoryEntry)
+@receiver(post_delete, sender=CategoryEntry)
+def invalidate_category_caches(sender, instance, **kwargs):
+    invalidate_tags('categories')
@@ -1,3 +1,141 @@
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.cache_helpers import get_accounts_cached, get_classes_cached
+from finance.models import Account, Transaction
+from students.models import CustomUser, School, Student
+
+
+class FinanceCacheInvalidationTests(TestCase):
+    """Cached finance data is dropped by tag when the rows it was built from change."""
+
+    def setUp(self):
+        cache.clear()
+        self.school_a = School.objects.create(name='Cache School A')
+        self.school_b = School.objects.create(name='Cache School B')
+        self.bank = Account.objects.create(account_name='Cache Bank', account_type='Bank')
+        self.admin = CustomUser.objects.create_user(username='cache_admin', password='pass1234', role='Admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def income(self, school, amount='100.00'):
+        return Transaction.objects.create(
+            date=date(2026, 3, 1), transaction_type='Income', amount=Decimal(amount),
+            category='Fee', to_account=self.bank, school=school,
+        )
+
+    def list_income(self, school):
+        response = self.client.get('/api/income/', {'school': school.id})
+        self.assertEqual(response.status_code, 200)
+        return response.data['count']
+
+    def test_transaction_list_is_refreshed_only_for_the_affected_school(self):
+        self.income(self.school_a)
+        self.assertEqual(self.list_income(self.school_a), 1)
+        self.assertEqual(self.list_income(self.school_b), 0)
+
+        self.income(self.school_a)
+
+        with patch.object(Transaction.objects, 'filter', wraps=Transaction.objects.filter) as txn_filter:
+            self.assertEqual(self.list_income(self.school_b), 0)
+        # School B's page still came from the cache
+        txn_filter.assert_not_called()
+        self.assertEqual(self.list_income(self.school_a), 2)
+
+    def test_moving_a_transaction_refreshes_its_previous_list(self):
+        txn = self.income(self.school_a)
+        self.assertEqual(self.list_income(self.school_a), 1)
+
+        txn.school = self.school_b
+        txn.save()
+
+        self.assertEqual(self.list_income(self.school_a), 0)
+        self.assertEqual(self.list_income(self.school_b), 1)
+
+    def test_finance_summary_and_account_balances_follow_transactions(self):
+        self.assertEqual(self.client.get('/api/finance-summary/').data['income'], 0)
+        self.assertEqual(get_accounts_cached()[0]['current_balance'], 0.0)
+
+        txn = self.income(self.school_a, '250.00')
+
+        self.assertEqual(self.client.get('/api/finance-summary/').data['income'], Decimal('250.00'))
+        self.assertEqual(get_accounts_cached()[0]['current_balance'], 250.0)
+
+        txn.delete()
+        self.assertEqual(get_accounts_cached()[0]['current_balance'], 0.0)
+
+    def test_class_lists_follow_student_changes(self):
+        self.assertEqual(get_classes_cached(self.school_a.id), [])
+
+        Student.objects.create(reg_num='CACHE-1', name='Cache Kid', school=self.school_a, student_class='Class 2', status='Active')
+
+        self.assertEqual(get_classes_cached(self.school_a.id), ['Class 2'])
+        self.assertEqual(get_classes_cached(), ['Class 2'])
+
+
+class FinanceDashboardCacheTests(TestCase):
+    """Dashboard endpoints cache rendered JSON per role/school scope with ETags."""
+
+    def setUp(self):
+        cache.clear()
+        self.school = School.objects.create(name='Dashboard School')
+        self.bank = Account.objects.create(account_name='Dashboard Bank', account_type='Bank')
+        self.admin = CustomUser.objects.create_user(username='dash_admin', password='pass1234', role='Admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def add_income(self, amount):
+        Transaction.objects.create(
+            date=date.today(), transaction_type='Income', amount=Decimal(amount),
+            category='Fee', to_account=self.bank, school=self.school,
+        )
+
+    def test_repeat_requests_are_served_from_cache_until_a_transaction_changes(self):
+        self.add_income('100.00')
+        first = self.client.get('/api/dashboard/income-categories/')
+        self.assertEqual(first.status_code, 200)
+
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/dashboard/income-categories/')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+        self.add_income('50.00')
+
+        third = self.client.get('/api/dashboard/income-categories/')
+        self.assertEqual(third.json()['summary']['total_income'], 150.0)
+        self.assertNotEqual(third['ETag'], first['ETag'])
+
+    def test_matching_etag_gets_not_modified(self):
+        etag = self.client.get('/api/dashboard/monthly-trends/')['ETag']
+
+        response = self.client.get('/api/dashboard/monthly-trends/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_teachers_share_entries_only_with_the_same_schools(self):
+        other_school = School.objects.create(name='Other Dashboard School')
+        teachers = []
+        for username, school in [('dash_a', self.school), ('dash_a2', self.school), ('dash_b', other_school)]:
+            teacher = CustomUser.objects.create_user(username=username, password='pass1234', role='Teacher')
+            teacher.assigned_schools.add(school)
+            teachers.append(teacher)
+
+        query_counts = []
+        for teacher in teachers:
+            self.client.force_authenticate(teacher)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get('/api/dashboard/cash-flow/').status_code, 200)
+            query_counts.append(len(queries))
 
-# Create your tests here.
+        # Only the assigned-schools lookup for the second teacher of the same school
+        self.assertEqual(query_counts[1], 1)
+        self.assertGreater(query_counts[2], 1)
@@ -10,6 +10,7 @@ from rest_framework.decorators import api_view, action
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from django.core.cache import cache
+from core.cache_helpers import cache_set, cached_view
 from .models import CategoryEntry, Transaction, Loan, Account
 from .serializers import CategoryEntrySerializer, TransactionSerializer, LoanSerializer, AccountSerializer, BulkTransactionSerializer
 from dateutil.relativedelta import relativedelta
@@ -22,6 +23,25 @@ from django.db import transaction as db_transaction
 import hashlib
 
 
+# finance_summary / loan_summary are built from income, expenses and account balances
+SUMMARY_CACHE_TAGS = ['transactions:Income', 'transactions:Expense', 'accounts', 'account_balances']
+
+
+DASHBOARD_CACHE_TIMEOUT = 300
+
+
+def finance_dashboard_tags(request, *args, **kwargs):
+    """Dashboard responses depend on every transaction type, for one school or all of them."""
+    school_id = request.GET.get('school')
+    if school_id:
+        return [f'transactions:{t}:school:{school_id}' for t in ('Income', 'Expense', 'Transfer')]
+    return [f'transactions:{t}' for t in ('Income', 'Expense', 'Transfer')]
+
+
+def account_history_tags(request, *args, **kwargs):
+    return ['accounts', 'account_balances']
+
+
 # Custom pagination class for transaction APIs
 class StandardResultsSetPagination(LimitOffsetPagination):
     default_limit = 50  # Default to 50 transactions per page
@@ -85,7 +105,7 @@ class TransactionViewSetMixin:
         return queryset
 
     def list(self, request, *args, **kwargs):
-        """Cached list with ETag support."""
+        """Cached list; entries are dropped by finance.signals when a matching transaction changes."""
         cache_key = get_list_cache_key(self.transaction_type, request.query_params)
         cached_response = cache.get(cache_key)
 
@@ -93,32 +113,17 @@ class TransactionViewSetMixin:
             return Response(cached_response)
 
         response = super().list(request, *args, **kwargs)
-        cache.set(cache_key, response.data, self.cache_timeout)
+        cache_set(cache_key, response.data, self.cache_timeout, tags=self.get_list_cache_tags())
         return response
 
-    def create(self, request, *args, **kwargs):
-        """Create and invalidate cache."""
-        response = super().create(request, *args, **kwargs)
-        self._invalidate_list_cache()
-        return response
-
-    def update(self, request, *args, **kwargs):
-        """Update and invalidate cache."""
-        response = super().update(request, *args, **kwargs)
-        self._invalidate_list_cache()
-        return response
-
-    def destroy(self, request, *args, **kwargs):
-        """Delete and invalidate cache."""
-        response = super().destroy(request, *args, **kwargs)
-        self._invalidate_list_cache()
-        return response
-
-    def _invalidate_list_cache(self):
-        """Clear list caches for this transaction type."""
-        # Clear pattern-based caches (simplified - in production use cache.delete_pattern)
-        cache.delete('finance_summary')
-        cache.delete('loan_summary')
+    def get_list_cache_tags(self):
+        """Tags of the cached page: its transactions plus the account and school names it shows."""
+        school_id = self.request.query_params.get('school')
+        if school_id and school_id.lower() != 'all':
+            scope = f'transactions:{self.transaction_type}:school:{school_id}'
+        else:
+            scope = f'transactions:{self.transaction_type}'
+        return [scope, 'accounts', 'schools']
 
 
 # Income ViewSet
@@ -254,10 +259,6 @@ class UnifiedTransactionViewSet(ModelViewSet):
                     if errors:
                         raise Exception("Validation errors in bulk create")
 
-        # Invalidate caches
-        cache.delete('finance_summary')
-        cache.delete('loan_summary')
-
         return Response({
             "created": len(created),
             "transactions": created
@@ -315,8 +316,8 @@ def finance_summary(request):
             "loans": loans,
             "accounts": list(accounts),
         }
-        # Cache for 5 minutes
-        cache.set(cache_key, summary, 300)
+        # Cache for 5 minutes (or until a transaction/account changes)
+        cache_set(cache_key, summary, 300, tags=SUMMARY_CACHE_TAGS)
 
     return Response(summary)
 
@@ -387,8 +388,8 @@ def loan_summary(request):
                 "balance_outstanding": balance_outstanding
             })
 
-        # Cache for 5 minutes
-        cache.set(cache_key, summary_data, 300)
+        # Cache for 5 minutes (or until a transaction/account changes)
+        cache_set(cache_key, summary_data, 300, tags=SUMMARY_CACHE_TAGS)
 
     return Response(summary_data)
 
@@ -401,6 +402,7 @@ def loan_summary(request):
 # ============================================
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_view(timeout=DASHBOARD_CACHE_TIMEOUT, tags=finance_dashboard_tags)
 def monthly_trends(request):
     """
     Get monthly trends for income vs expenses.
@@ -524,6 +526,7 @@ def monthly_trends(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_view(timeout=DASHBOARD_CACHE_TIMEOUT, tags=finance_dashboard_tags)
 def income_categories(request):
     """
     Get income breakdown by category.
@@ -623,6 +626,7 @@ def income_categories(request):
 # ============================================
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_view(timeout=DASHBOARD_CACHE_TIMEOUT, tags=finance_dashboard_tags)
 def cash_flow(request):
     """
     Get cash flow analysis showing money in/out by month
@@ -746,6 +750,7 @@ def cash_flow(request):
 # ============================================
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_view(timeout=DASHBOARD_CACHE_TIMEOUT, tags=account_history_tags)
 def account_balance_history(request):
     """
     Get balance history for a specific account over time.
@@ -987,6 +992,7 @@ def group_by_week(transactions):
 # ============================================
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_view(timeout=DASHBOARD_CACHE_TIMEOUT, tags=finance_dashboard_tags)
 def expense_categories(request):
     """
     Get expense breakdown by category
@@ -6,6 +6,7 @@
 from django.db import models
 from django.utils.timezone import now
 from students.models import School
+from students.sequences import highest_suffix, reserve_ids
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -101,43 +102,56 @@ class InventoryItem(models.Model):
         verbose_name = "Inventory Item"
         verbose_name_plural = "Inventory Items"
 
-    def save(self, *args, **kwargs):
-        # Auto-generate unique_id if not set
-        if not self.unique_id and self.name:
-            year = (self.purchase_date or now().date()).year % 100
-            location_code = self.location.upper()[:3] if self.location else 'UNK'
-            
-            # School code
-            if self.school and self.school.name:
-                words = self.school.name.split()
-                if len(words) > 1:
-                    school_code = ''.join(word[0] for word in words).upper()
-                else:
-                    school_code = self.school.name.upper()[:3]
+    def unique_id_prefix(self):
+        """Prefix of generated unique_ids, e.g. "26-SCH-GVS-LAP" (year-location-school-item)."""
+        year = (self.purchase_date or now().date()).year % 100
+        location_code = self.location.upper()[:3] if self.location else 'UNK'
+
+        # School code
+        if self.school and self.school.name:
+            words = self.school.name.split()
+            if len(words) > 1:
+                school_code = ''.join(word[0] for word in words).upper()
             else:
-                school_code = 'GEN'
-            
-            # Item code from name
-            item_code = ''.join(filter(str.isalnum, self.name.upper()))[:3]
-            
-            base_prefix = f"{year}-{location_code}-{school_code}-{item_code}"
-            
-            # Find next sequence number
-            existing = InventoryItem.objects.filter(
-                unique_id__startswith=base_prefix
-            ).count() + 1
-            suffix = f"{existing:03d}"
-            
-            self.unique_id = f"{base_prefix}-{suffix}"
+                school_code = self.school.name.upper()[:3]
+        else:
+            school_code = 'GEN'
+
+        # Item code from name
+        item_code = ''.join(filter(str.isalnum, self.name.upper()))[:3]
+
+        return f"{year}-{location_code}-{school_code}-{item_code}"
+
+    @classmethod
+    def allocate_unique_ids(cls, prefix, count):
+        """
+        count new unique_ids under prefix, from its counter in students.sequences.
+        A block costs the same few queries however large it is.
+        """
+        prefix = f"{prefix}-"
+
+        def seed():
+            existing = list(cls.objects.filter(unique_id__startswith=prefix).values_list('unique_id', flat=True))
+            return max(highest_suffix(existing, prefix), len(existing))
 
+        return [f"{prefix}{number:03d}" for number in reserve_ids('inventory', prefix, count, seed)]
+
+    def apply_location_rules(self):
         # Auto-set status to 'Assigned' if assigned_to is set
-        if self.assigned_to and self.status == 'Available':
+        if self.assigned_to_id and self.status == 'Available':
             self.status = 'Assigned'
-        
+
         # Clear school if location is not 'School'
         if self.location != 'School':
             self.school = None
 
+    def save(self, *args, **kwargs):
+        # Auto-generate unique_id if not set
+        if not self.unique_id and self.name:
+            self.unique_id = self.allocate_unique_ids(self.unique_id_prefix(), 1)[0]
+
+        self.apply_location_rules()
+
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -4,22 +4,20 @@
 # ============================================
 
 import logging
-import os
-import base64
 from io import BytesIO
 from datetime import datetime
 from collections import defaultdict
 
 from django.http import HttpResponse
-from django.conf import settings
 from django.db.models import Sum, Count
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from weasyprint import HTML, CSS
+from weasyprint import HTML
 import html
 
+from core.pdf_assets import get_stylesheet, page_background_css
 from .models import InventoryItem, InventoryCategory
 from students.models import School, CustomUser
 from employees.models import TeacherProfile
@@ -65,24 +63,21 @@ def validate_school_access(user, school_id):
 # ============================================
 
 def get_background_css():
-    """Load bg.png and return CSS for @page background - fills entire A4 page."""
-    bg_path = os.path.join(settings.BASE_DIR, 'static', 'bg.png')
-    if os.path.exists(bg_path):
-        with open(bg_path, 'rb') as f:
-            bg_data = base64.b64encode(f.read()).decode('utf-8')
-        return CSS(string=f"""
+    """Return the (cached) CSS for @page background - bg.png fills entire A4 page."""
+    bg_image_css = page_background_css('background')
+    if bg_image_css:
+        return get_stylesheet(f"""
             @page {{
                 size: 210mm 297mm;
                 margin: 0;
-                background: url('data:image/png;base64,{bg_data}') no-repeat top left / 210mm 297mm;
+                {bg_image_css}
             }}
             body {{
                 margin: 0;
                 padding: 0;
             }}
         """)
-    logger.warning(f"Background image not found at {bg_path}")
-    return CSS(string="""
+    return get_stylesheet("""
         @page {
             size: 210mm 297mm;
             margin: 0;
@@ -14,6 +14,7 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.db.models import Count, Sum, Q
 
 from .models import InventoryCategory, InventoryItem
@@ -700,36 +701,30 @@ def bulk_create_items(request):
     if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-    # Create items
-    created_items = []
-    errors = []
-    
-    for i in range(quantity):
-        try:
-            item_serializer = InventoryItemSerializer(data=item_data)
-            if item_serializer.is_valid():
-                item = item_serializer.save()
-                created_items.append({
-                    "id": item.id,
-                    "unique_id": item.unique_id,
-                    "name": item.name,
-                })
-            else:
-                errors.append({"index": i, "errors": item_serializer.errors})
-        except Exception as e:
-            logger.error(f"Error creating item {i+1}: {str(e)}")
-            errors.append({"index": i, "error": str(e)})
-    
+    # One unique_id reservation and one INSERT for the whole batch
+    template = InventoryItem(**serializer.validated_data)
+    with transaction.atomic():
+        unique_ids = InventoryItem.allocate_unique_ids(template.unique_id_prefix(), quantity)
+        items = []
+        for unique_id in unique_ids:
+            item = InventoryItem(**serializer.validated_data, unique_id=unique_id)
+            item.apply_location_rules()
+            items.append(item)
+        items = InventoryItem.objects.bulk_create(items)
+
+    created_items = [
+        {
+            "id": item.id,
+            "unique_id": item.unique_id,
+            "name": item.name,
+        }
+        for item in items
+    ]
     response_data = {
         "created_count": len(created_items),
         "requested_count": quantity,
         "items": created_items,
     }
-    
-    if errors:
-        response_data["errors"] = errors
-        response_data["message"] = f"Created {len(created_items)} of {quantity} items"
-        return Response(response_data, status=status.HTTP_207_MULTI_STATUS)
-    
+
     logger.info(f"Successfully created {len(created_items)} items")
     return Response(response_data, status=status.HTTP_201_CREATED)
\ No newline at end of file
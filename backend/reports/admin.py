@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CustomReport, ReportTemplate, ReportRequest, RequestStatusLog, GeneratedReport
+from .models import CustomReport, ReportTemplate, ReportRequest, RequestStatusLog, GeneratedReport, ReportJob
 
 
 # =============================================================================
@@ -113,6 +113,18 @@ class RequestStatusLogAdmin(admin.ModelAdmin):
         return False
 
 
+# =============================================================================
+# REPORT JOB ADMIN
+# =============================================================================
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'job_type', 'status', 'completed', 'total', 'requested_by', 'created_at', 'finished_at']
+    list_filter = ['job_type', 'status', 'created_at']
+    search_fields = ['id', 'requested_by__username', 'artifact_name']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
+    ordering = ['-created_at']
+
+
 # =============================================================================
 # CUSTOM REPORT ADMIN (Existing)
 # =============================================================================
@@ -0,0 +1,167 @@
+"""
+Parallel rendering and ZIP streaming for bulk student reports.
+
+WeasyPrint rendering is CPU-bound and holds the GIL, so bulk report cards are
+rendered on a process pool (one per web worker process, created lazily) and the
+finished PDFs are written into a ZIP that is streamed to the client entry by
+entry instead of being assembled in memory first.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+
+def render_pdf_bytes(html_content):
+    """Render an HTML document to PDF bytes. Runs inside the render pool."""
+    from weasyprint import HTML
+    return HTML(string=html_content).write_pdf()
+
+
+def get_render_pool():
+    """Return the per-process PDF render pool, creating it on first use."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            # spawn (not fork): the web worker holds DB connections and threads
+            _render_pool = ProcessPoolExecutor(
+                max_workers=settings.REPORTS_PDF_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _render_pool
+
+
+def reset_render_pool():
+    """Drop a broken render pool so the next call to get_render_pool starts a fresh one."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+        _render_pool = None
+
+
+def _submit_render(html_content):
+    try:
+        return get_render_pool().submit(render_pdf_bytes, html_content)
+    except BrokenProcessPool:
+        logger.warning("PDF render pool was broken, restarting it")
+        reset_render_pool()
+        return get_render_pool().submit(render_pdf_bytes, html_content)
+
+
+def iter_rendered_pdfs(jobs, workers=None):
+    """
+    Render PDFs in parallel and yield them as they finish.
+
+    Args:
+        jobs: iterable of (key, build_html) pairs. build_html is called in the
+              calling thread right before the job is submitted, so expensive
+              inputs (e.g. images) are only held while the job is in flight.
+        workers: number of render processes; defaults to
+                 settings.REPORTS_PDF_RENDER_WORKERS. With 1 or fewer workers
+                 PDFs are rendered inline, in order.
+
+    Yields:
+        (key, pdf_bytes, error) tuples, in completion order. Exactly one of
+        pdf_bytes / error is None.
+    """
+    if workers is None:
+        workers = settings.REPORTS_PDF_RENDER_WORKERS
+
+    # Daemonic processes (e.g. Celery prefork workers) cannot start a pool
+    if workers <= 1 or multiprocessing.current_process().daemon:
+        for key, build_html in jobs:
+            try:
+                yield key, render_pdf_bytes(build_html()), None
+            except Exception as exc:
+                yield key, None, exc
+        return
+
+    # Keep a bounded number of documents in flight so memory stays flat
+    window = workers * 2
+    jobs = iter(jobs)
+    pending = {}
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < window:
+                try:
+                    key, build_html = next(jobs)
+                except StopIteration:
+                    exhausted = True
+                    break
+                try:
+                    html_content = build_html()
+                except Exception as exc:
+                    yield key, None, exc
+                    continue
+                pending[_submit_render(html_content)] = key
+
+            if not pending:
+                return
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = pending.pop(future)
+                try:
+                    yield key, future.result(), None
+                except BrokenProcessPool as exc:
+                    reset_render_pool()
+                    yield key, None, exc
+                except Exception as exc:
+                    yield key, None, exc
+    finally:
+        # Client went away or the caller stopped early
+        for future in pending:
+            future.cancel()
+
+
+class ZipStreamBuffer:
+    """
+    Write-only file object for ZipFile that hands written bytes back to a
+    streaming response. It has no seek/tell, so ZipFile writes entries with
+    data descriptors and never needs to rewind.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(entries):
+    """
+    Build a ZIP incrementally from (arcname, data) pairs and yield its bytes.
+
+    Each entry is yielded as soon as it has been compressed; the central
+    directory is yielded last.
+    """
+    buffer = ZipStreamBuffer()
+    with ZipFile(buffer, 'w', ZIP_DEFLATED) as zip_file:
+        for arcname, data in entries:
+            zip_file.writestr(arcname, data)
+            chunk = buffer.drain()
+            if chunk:
+                yield chunk
+    chunk = buffer.drain()
+    if chunk:
+        yield chunk
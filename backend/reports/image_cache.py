@@ -0,0 +1,300 @@
+"""
+Content-addressed cache of processed report images.
+
+Progress photos and AI Gala artwork embedded in PDFs are downloaded from
+Supabase, flattened to RGB, thumbnailed and re-encoded as JPEG. The result
+only depends on the storage object and the thumbnail size, so it is cached
+under a key derived from both:
+
+    L1: small in-process LRU (REPORTS_IMAGE_CACHE_MEMORY_ITEMS entries)
+    L2: files under REPORTS_IMAGE_CACHE_DIR, evicted least-recently-used
+        once the directory grows past REPORTS_IMAGE_CACHE_MAX_BYTES
+
+Signed URLs carry a fresh token on every request, so the query string is
+ignored when deriving the key.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from PIL import Image as PILImage
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+_stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+_disk_bytes = None
+_http = threading.local()
+
+
+def storage_key(url):
+    """Strip the host and signing token from an image URL, leaving the storage path."""
+    parts = urlsplit(url)
+    path = parts.path
+    # /storage/v1/object/{public|sign|authenticated}/<bucket>/<path>
+    for marker in ('/object/public/', '/object/sign/', '/object/authenticated/'):
+        if marker in path:
+            return path.split(marker, 1)[1]
+    return f"{parts.netloc}{path}"
+
+
+def cache_key(url, max_size):
+    size = f"{max_size[0]}x{max_size[1]}" if max_size else 'full'
+    return hashlib.sha256(f"{storage_key(url)}|{size}".encode('utf-8')).hexdigest()
+
+
+def _cache_path(key):
+    return os.path.join(settings.REPORTS_IMAGE_CACHE_DIR, key[:2], f"{key}.jpg")
+
+
+def _remember(key, data):
+    with _lock:
+        _memory[key] = data
+        _memory.move_to_end(key)
+        while len(_memory) > settings.REPORTS_IMAGE_CACHE_MEMORY_ITEMS:
+            _memory.popitem(last=False)
+
+
+def get(key):
+    """Return cached JPEG bytes for key, or None."""
+    with _lock:
+        data = _memory.get(key)
+        if data is not None:
+            _memory.move_to_end(key)
+            _stats['memory_hits'] += 1
+            return data
+
+    path = _cache_path(key)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        # Bump mtime so disk eviction sees the entry as recently used
+        os.utime(path)
+    except OSError:
+        with _lock:
+            _stats['misses'] += 1
+        return None
+
+    with _lock:
+        _stats['disk_hits'] += 1
+    _remember(key, data)
+    return data
+
+
+def put(key, data):
+    """Store JPEG bytes under key in both cache levels."""
+    global _disk_bytes
+    _remember(key, data)
+
+    path = _cache_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError as exc:
+        logger.warning(f"Could not write image cache entry {key}: {exc}")
+        return
+
+    with _lock:
+        _stats['stores'] += 1
+        if _disk_bytes is not None:
+            _disk_bytes += len(data)
+        over_limit = _disk_bytes is None or _disk_bytes > settings.REPORTS_IMAGE_CACHE_MAX_BYTES
+    if over_limit:
+        evict()
+
+
+def get_or_create(url, max_size, producer):
+    """
+    Return processed JPEG bytes for url, calling producer() on a miss.
+
+    producer returns the JPEG bytes or None; None results are not cached so a
+    transient download failure is retried next time.
+    """
+    key = cache_key(url, max_size)
+    data = get(key)
+    if data is not None:
+        return data
+    data = producer()
+    if data:
+        put(key, data)
+    return data
+
+
+def _disk_entries():
+    root = settings.REPORTS_IMAGE_CACHE_DIR
+    if not os.path.isdir(root):
+        return []
+    entries = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if not name.endswith('.jpg'):
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+    return entries
+
+
+def evict(max_bytes=None):
+    """Delete least-recently-used files until the disk cache fits in max_bytes."""
+    global _disk_bytes
+    if max_bytes is None:
+        max_bytes = settings.REPORTS_IMAGE_CACHE_MAX_BYTES
+
+    entries = _disk_entries()
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    if total > max_bytes:
+        # Trim to 90% so we don't rescan on every subsequent write
+        target = int(max_bytes * 0.9)
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+
+    with _lock:
+        _disk_bytes = total
+        _stats['evictions'] += removed
+    if removed:
+        logger.info(f"Image cache evicted {removed} entries, {total} bytes remain")
+    return removed
+
+
+def clear():
+    """Drop every cached image (both levels) and return the number of files removed."""
+    global _disk_bytes
+    with _lock:
+        _memory.clear()
+    removed = 0
+    for _, _, path in _disk_entries():
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    with _lock:
+        _disk_bytes = 0
+    return removed
+
+
+def stats(include_disk=True):
+    """Hit/miss counters for this process, plus the disk footprint unless include_disk is False."""
+    with _lock:
+        counters = dict(_stats)
+        counters['memory_entries'] = len(_memory)
+    lookups = counters['memory_hits'] + counters['disk_hits'] + counters['misses']
+    counters['hit_rate'] = round((counters['memory_hits'] + counters['disk_hits']) / lookups, 3) if lookups else 0.0
+    if include_disk:
+        entries = _disk_entries()
+        counters['disk_entries'] = len(entries)
+        counters['disk_bytes'] = sum(size for _, size, _ in entries)
+    return counters
+
+
+def reset_stats():
+    with _lock:
+        for name in _stats:
+            _stats[name] = 0
+
+
+# =============================================================================
+# DOWNLOAD + PROCESSING
+# =============================================================================
+def fetch_processed_image(url, timeout=8, max_size=(600, 600), retries=2):
+    """Return the image at url as JPEG bytes thumbnailed to max_size, using the cache."""
+    return get_or_create(
+        url, max_size, lambda: download_processed_image(url, timeout=timeout, max_size=max_size, retries=retries)
+    )
+
+
+
+def get_image_session(retries=2):
+    """Per-thread requests.Session with retries, reused across image downloads."""
+    session = getattr(_http, 'session', None)
+    if session is None:
+        session = requests.Session()
+        retry = Retry(total=retries, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(max_retries=retry)
+        session.mount('https://', adapter)
+        _http.session = session
+    return session
+
+
+def download_processed_image(url, timeout=8, max_size=(600, 600), retries=2):
+    """Download an image and return it as RGB JPEG bytes, or None on failure."""
+    logger.info(f"Fetching image from {url}")
+    try:
+        headers = {'User-Agent': 'Mozilla/5.0', 'Accept-Encoding': 'identity'}
+
+        response = get_image_session(retries).get(url, headers=headers, timeout=timeout, allow_redirects=True)
+        response.raise_for_status()
+
+        content = response.content
+        
+        # Detect actual image format from file signature, not extension
+        if content.startswith(b'\xff\xd8'):
+            actual_format = 'JPEG'
+            logger.info(f"Detected JPEG image from {url}")
+        elif content.startswith(b'\x89PNG'):
+            actual_format = 'PNG'
+            logger.info(f"Detected PNG image from {url}")
+        elif content.startswith(b'GIF87a') or content.startswith(b'GIF89a'):
+            actual_format = 'GIF'
+            logger.info(f"Detected GIF image from {url}")
+        elif content.startswith(b'RIFF') and content[8:12] == b'WEBP':
+            actual_format = 'WEBP'
+            logger.info(f"Detected WEBP image from {url}")
+        else:
+            logger.warning(f"Unsupported or unrecognized image format: {content[:12].hex()}")
+            return None
+
+        img = PILImage.open(BytesIO(content))
+        
+        # Convert RGBA/LA/P to RGB for PDF compatibility
+        if img.mode in ('RGBA', 'LA', 'P'):
+            background = PILImage.new('RGB', img.size, (255, 255, 255))
+            if img.mode == 'P':
+                img = img.convert('RGBA')
+            background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        if max_size:
+            img.thumbnail(max_size, PILImage.LANCZOS)
+
+        output_buffer = BytesIO()
+        # Always save as JPEG for PDF (better compression and compatibility)
+        img.save(output_buffer, format='JPEG', quality=85, optimize=True)
+
+        if output_buffer.getbuffer().nbytes > 3 * 1024 * 1024:
+            logger.warning(f"Image size too large: {output_buffer.getbuffer().nbytes} bytes")
+            return None
+
+        logger.info(f"Successfully fetched and converted image from {url} (format: {actual_format})")
+        return output_buffer.getvalue()
+    except Exception as e:
+        logger.error(f"Error fetching image from {url}: {str(e)}")
+        return None
@@ -0,0 +1,321 @@
+"""
+Asynchronous report jobs.
+
+Long-running renders (bulk student reports, AI Gala certificate ZIPs and
+participation PDFs) are recorded as ReportJob rows and executed by the
+reports.tasks.run_report_job Celery task instead of inside the HTTP request.
+
+Each job type has a validator (runs in the request, before the job is queued)
+and a runner (runs in the worker). A runner returns a JobOutput whose items
+are rendered one by one; the engine records progress after every item,
+packages the result (a single PDF or a ZIP) and stores the artifact on the
+local filesystem or in Supabase storage.
+"""
+import logging
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.exceptions import PermissionDenied, ValidationError
+
+from . import image_cache
+from .models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+
+class JobOutput:
+    """
+    What a job runner produces.
+
+    Args:
+        artifact_name: file name offered to the client on download
+        total: number of items that will be rendered (for progress)
+        items: iterator of (arcname, pdf_bytes, error) tuples
+        as_zip: package all items into a ZIP; otherwise the single item is
+                stored as-is
+    """
+
+    def __init__(self, artifact_name, total, items, as_zip=True):
+        self.artifact_name = artifact_name
+        self.total = total
+        self.items = items
+        self.as_zip = as_zip
+
+
+# =============================================================================
+# STUDENT REPORTS
+# =============================================================================
+def _validate_student_reports(user, params):
+    from .views import get_date_range
+
+    if not params.get('student_ids'):
+        raise ValidationError({'params': 'student_ids is required'})
+    if not params.get('school_id') or not params.get('student_class'):
+        raise ValidationError({'params': 'school_id and student_class are required'})
+    try:
+        get_date_range(params.get('mode'), params.get('month'), params.get('start_date'), params.get('end_date'))
+    except ValueError as exc:
+        raise ValidationError({'params': str(exc)})
+
+    if user.role == 'Teacher':
+        try:
+            school_id = int(params['school_id'])
+        except (TypeError, ValueError):
+            raise ValidationError({'params': 'Invalid school_id'})
+        if school_id not in user.assigned_schools.values_list('id', flat=True):
+            raise PermissionDenied('Unauthorized access to this school')
+
+
+def _run_student_reports(job):
+    from .views import (
+        _log_student_report_generation_event,
+        collect_student_report_data,
+        get_date_range,
+        iter_student_report_pdfs,
+        student_report_filename,
+    )
+
+    params = job.params
+    mode = params.get('mode')
+    month = params.get('month')
+    start_date, end_date, period = get_date_range(mode, month, params.get('start_date'), params.get('end_date'))
+    students = collect_student_report_data(
+        params['student_ids'], params['school_id'], params['student_class'], start_date, end_date
+    )
+
+    def items():
+        rendered = iter_student_report_pdfs(
+            students,
+            params.get('selectedImages') or {},
+            params.get('includeBackground') or {},
+            period,
+            start_date,
+            end_date,
+        )
+        for student, pdf_bytes, error in rendered:
+            if error is None:
+                _log_student_report_generation_event(
+                    event_type='bulk_pdf_item',
+                    user=job.requested_by,
+                    student=student,
+                    school=student.school,
+                    student_class=student.student_class,
+                    mode=mode,
+                    month=month,
+                    start_date=start_date,
+                    end_date=end_date,
+                    request_id=job.id,
+                )
+            yield student_report_filename(student), pdf_bytes, error
+
+    school_name = students[0][0].school.name if students else 'School'
+    artifact_name = f"{school_name}_{params['student_class']}_Reports_{period}_{timezone.now().strftime('%Y%m%d')}.zip"
+    return JobOutput(artifact_name, len(students), items())
+
+
+# =============================================================================
+# AI GALA
+# =============================================================================
+def _get_managed_gallery(user, params):
+    from aigala.models import Gallery
+    from aigala.views import can_manage_gallery, is_admin_or_teacher
+
+    if not is_admin_or_teacher(user):
+        raise PermissionDenied('Only admins and teachers can generate AI Gala reports')
+    try:
+        gallery = Gallery.objects.get(id=params.get('gallery_id'))
+    except (Gallery.DoesNotExist, TypeError, ValueError):
+        raise ValidationError({'params': 'Gallery not found'})
+    if not can_manage_gallery(user, gallery):
+        raise PermissionDenied('You do not have permission to generate reports for this gallery')
+    return gallery
+
+
+def _validate_gala_certificates(user, params):
+    gallery = _get_managed_gallery(user, params)
+    if gallery.status != 'closed':
+        raise ValidationError({'params': 'Certificates are only available after the gallery closes'})
+
+
+def _run_gala_certificates(job):
+    from aigala.models import Gallery
+    from aigala.views import build_certificate_html, certificate_filename
+    from .bulk import iter_rendered_pdfs
+
+    gallery = Gallery.objects.get(id=job.params['gallery_id'])
+    projects = list(
+        gallery.projects.filter(is_approved=True).select_related('student', 'student__school')
+    )
+
+    def items():
+        jobs = ((project, lambda project=project: build_certificate_html(project, gallery)) for project in projects)
+        for project, pdf_bytes, error in iter_rendered_pdfs(jobs):
+            yield certificate_filename(project), pdf_bytes, error
+
+    artifact_name = f"AI_Gala_Certificates_{gallery.month_label.replace(' ', '_')}.zip"
+    return JobOutput(artifact_name, len(projects), items())
+
+
+def _run_gala_participation(job):
+    from aigala.models import Gallery
+    from aigala.views import build_participation_report_html
+    from .bulk import render_pdf_bytes
+
+    gallery = Gallery.objects.get(id=job.params['gallery_id'])
+    artifact_name = f"AI_Gala_Report_{gallery.month_label.replace(' ', '_')}_{gallery.id}.pdf"
+
+    def items():
+        try:
+            yield artifact_name, render_pdf_bytes(build_participation_report_html(gallery)), None
+        except Exception as exc:
+            yield artifact_name, None, exc
+
+    return JobOutput(artifact_name, 1, items(), as_zip=False)
+
+
+# job_type -> (validator, runner)
+REPORT_JOB_TYPES = {
+    'student_reports_zip': (_validate_student_reports, _run_student_reports),
+    'gala_certificates_zip': (_validate_gala_certificates, _run_gala_certificates),
+    'gala_participation_pdf': (_get_managed_gallery, _run_gala_participation),
+}
+
+
+# =============================================================================
+# ENGINE
+# =============================================================================
+def validate_report_job(user, job_type, params):
+    """Raise ValidationError / PermissionDenied if the user cannot submit this job."""
+    if job_type not in REPORT_JOB_TYPES:
+        raise ValidationError({'job_type': f'Unknown job type: {job_type}'})
+    validator, _ = REPORT_JOB_TYPES[job_type]
+    validator(user, params)
+
+
+def execute_report_job(job):
+    """Run a queued job to completion, recording progress and the final artifact."""
+    if job.status not in ('QUEUED', 'RUNNING'):
+        logger.info(f"Report job {job.id} already {job.status}, skipping")
+        return job
+
+    job.status = 'RUNNING'
+    job.started_at = timezone.now()
+    job.completed = 0
+    job.failed = 0
+    job.save(update_fields=['status', 'started_at', 'completed', 'failed'])
+
+    _, runner = REPORT_JOB_TYPES[job.job_type]
+    tmp_path = None
+    try:
+        output = runner(job)
+        job.total = output.total
+        job.save(update_fields=['total'])
+
+        fd, tmp_path = tempfile.mkstemp(suffix=os.path.splitext(output.artifact_name)[1])
+        with os.fdopen(fd, 'wb') as tmp_file:
+            if output.as_zip:
+                with ZipFile(tmp_file, 'w', ZIP_DEFLATED) as zip_file:
+                    for arcname, pdf_bytes, error in output.items:
+                        if error is None:
+                            zip_file.writestr(arcname, pdf_bytes)
+                        _record_progress(job, arcname, error)
+            else:
+                for arcname, pdf_bytes, error in output.items:
+                    if error is None:
+                        tmp_file.write(pdf_bytes)
+                    _record_progress(job, arcname, error)
+
+        if job.total and job.failed == job.total:
+            raise RuntimeError('All items failed to render')
+
+        job.artifact_name = output.artifact_name
+        job.content_type = 'application/zip' if output.as_zip else 'application/pdf'
+        job.artifact_size = os.path.getsize(tmp_path)
+        _store_artifact(job, tmp_path)
+        job.status = 'COMPLETED'
+    except Exception as exc:
+        logger.exception(f"Report job {job.id} failed")
+        job.status = 'FAILED'
+        job.error = str(exc)
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    job.finished_at = timezone.now()
+    job.save()
+    logger.info(f"Report job {job.id} {job.status}; image cache: {image_cache.stats(include_disk=False)}")
+    return job
+
+
+def _record_progress(job, arcname, error):
+    if error is None:
+        job.completed += 1
+    else:
+        job.failed += 1
+        logger.error(f"Report job {job.id}: failed to render {arcname}: {error}")
+    ReportJob.objects.filter(pk=job.pk).update(completed=job.completed, failed=job.failed)
+
+
+# =============================================================================
+# ARTIFACT STORAGE
+# =============================================================================
+def _get_supabase_client():
+    from supabase import create_client
+    return create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+
+
+def _store_artifact(job, tmp_path):
+    if settings.REPORT_JOBS_STORAGE == 'supabase':
+        path = f"{job.id}/{job.artifact_name}"
+        with open(tmp_path, 'rb') as f:
+            _get_supabase_client().storage.from_(settings.REPORT_JOBS_BUCKET).upload(
+                path=path,
+                file=f.read(),
+                file_options={'content-type': job.content_type, 'upsert': 'true'},
+            )
+        job.artifact_storage = 'supabase'
+        job.artifact_path = path
+    else:
+        directory = os.path.join(settings.REPORT_JOBS_LOCAL_DIR, str(job.id))
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, job.artifact_name.replace('/', '_'))
+        shutil.copyfile(tmp_path, path)
+        job.artifact_storage = 'local'
+        job.artifact_path = path
+
+
+def get_artifact_url(job, expires_in=3600):
+    """Signed download URL for artifacts kept in Supabase storage."""
+    signed = _get_supabase_client().storage.from_(settings.REPORT_JOBS_BUCKET).create_signed_url(
+        job.artifact_path, expires_in
+    )
+    return signed.get('signedURL') or signed.get('signedUrl')
+
+
+def delete_artifact(job):
+    if not job.artifact_path:
+        return
+    try:
+        if job.artifact_storage == 'supabase':
+            _get_supabase_client().storage.from_(settings.REPORT_JOBS_BUCKET).remove([job.artifact_path])
+        else:
+            shutil.rmtree(os.path.dirname(job.artifact_path), ignore_errors=True)
+    except Exception as exc:
+        logger.warning(f"Failed to delete artifact of report job {job.id}: {exc}")
+
+
+def purge_expired_report_jobs():
+    """Delete jobs (and their artifacts) older than REPORT_JOBS_RETENTION_HOURS."""
+    cutoff = timezone.now() - timedelta(hours=settings.REPORT_JOBS_RETENTION_HOURS)
+    expired = ReportJob.objects.filter(created_at__lt=cutoff)
+    count = 0
+    for job in expired.iterator():
+        delete_artifact(job)
+        count += 1
+    expired.delete()
+    return count
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.6 on 2026-10-16 20:00
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_studentreportgenerationevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('job_type', models.CharField(choices=[('student_reports_zip', 'Student Reports ZIP'), ('gala_certificates_zip', 'AI Gala Certificates ZIP'), ('gala_participation_pdf', 'AI Gala Participation Report')], max_length=30)),
+                ('params', models.JSONField(blank=True, default=dict, help_text='Job input parameters')),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='QUEUED', max_length=10)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('artifact_storage', models.CharField(blank=True, choices=[('local', 'Local Filesystem'), ('supabase', 'Supabase Storage')], max_length=10)),
+                ('artifact_path', models.CharField(blank=True, max_length=500)),
+                ('artifact_name', models.CharField(blank=True, max_length=255)),
+                ('artifact_size', models.PositiveIntegerField(default=0)),
+                ('content_type', models.CharField(blank=True, max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Report Job',
+                'verbose_name_plural': 'Report Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['requested_by', 'created_at'], name='reports_rep_request_48d647_idx'), models.Index(fields=['status'], name='reports_rep_status_88356d_idx')],
+            },
+        ),
+    ]
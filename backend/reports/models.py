@@ -556,6 +556,79 @@ class StudentReportGenerationEvent(models.Model):
         return f'{self.event_type} by {actor} at {self.generated_at.isoformat()}'
 
 
+# =============================================================================
+# REPORT JOB MODEL (Asynchronous bulk rendering)
+# =============================================================================
+class ReportJob(models.Model):
+    """
+    A long-running report render (bulk student reports, certificate ZIPs,
+    participation PDFs) executed by Celery instead of inside the HTTP request.
+    Clients submit a job, poll its progress and download the finished artifact.
+    """
+    JOB_TYPE_CHOICES = [
+        ('student_reports_zip', 'Student Reports ZIP'),
+        ('gala_certificates_zip', 'AI Gala Certificates ZIP'),
+        ('gala_participation_pdf', 'AI Gala Participation Report'),
+    ]
+
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    STORAGE_CHOICES = [
+        ('local', 'Local Filesystem'),
+        ('supabase', 'Supabase Storage'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    job_type = models.CharField(max_length=30, choices=JOB_TYPE_CHOICES)
+    params = models.JSONField(default=dict, blank=True, help_text='Job input parameters')
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='report_jobs',
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='QUEUED')
+
+    # Progress: completed of total items rendered
+    total = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    # Finished artifact
+    artifact_storage = models.CharField(max_length=10, choices=STORAGE_CHOICES, blank=True)
+    artifact_path = models.CharField(max_length=500, blank=True)
+    artifact_name = models.CharField(max_length=255, blank=True)
+    artifact_size = models.PositiveIntegerField(default=0)
+    content_type = models.CharField(max_length=50, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Report Job'
+        verbose_name_plural = 'Report Jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['requested_by', 'created_at']),
+            models.Index(fields=['status']),
+        ]
+
+    def __str__(self):
+        return f'{self.job_type} ({self.status}) {self.completed}/{self.total}'
+
+    @property
+    def progress_percent(self):
+        if not self.total:
+            return 100 if self.status == 'COMPLETED' else 0
+        return round(self.completed * 100 / self.total)
+
+
 # =============================================================================
 # EXISTING MODEL (unchanged)
 # =============================================================================
@@ -11,6 +11,7 @@ from .models import (
     RequestStatusLog,
     GeneratedReport,
     StudentReportGenerationEvent,
+    ReportJob,
 )
 
 
@@ -483,3 +484,41 @@ class AdminMonitoringSerializer(serializers.Serializer):
     by_requester_role = serializers.ListField(child=serializers.DictField(), required=False)
     top_requesters = serializers.ListField(child=serializers.DictField(), required=False)
     generated_timeline = serializers.ListField(child=serializers.DictField(), required=False)
+
+
+# =============================================================================
+# REPORT JOB SERIALIZERS
+# =============================================================================
+class ReportJobSerializer(serializers.ModelSerializer):
+    """Serializer for polling report job progress."""
+    progress_percent = serializers.IntegerField(read_only=True)
+    is_ready = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportJob
+        fields = [
+            'id',
+            'job_type',
+            'status',
+            'total',
+            'completed',
+            'failed',
+            'progress_percent',
+            'is_ready',
+            'error',
+            'artifact_name',
+            'artifact_size',
+            'created_at',
+            'started_at',
+            'finished_at',
+        ]
+        read_only_fields = fields
+
+    def get_is_ready(self, obj):
+        return obj.status == 'COMPLETED'
+
+
+class ReportJobCreateSerializer(serializers.Serializer):
+    """Serializer for submitting a report job."""
+    job_type = serializers.ChoiceField(choices=ReportJob.JOB_TYPE_CHOICES)
+    params = serializers.DictField(required=False, default=dict)
@@ -5,3 +5,24 @@ from django.core.management import call_command
 @shared_task
 def purge_old_student_report_generation_events():
     call_command('purge_old_report_generation_events')
+
+
+@shared_task
+def run_report_job(job_id):
+    """Execute a queued ReportJob (see reports.jobs)."""
+    from .jobs import execute_report_job
+    from .models import ReportJob
+
+    try:
+        job = ReportJob.objects.select_related('requested_by').get(id=job_id)
+    except ReportJob.DoesNotExist:
+        return {'status': 'missing'}
+    job = execute_report_job(job)
+    return {'status': job.status, 'completed': job.completed, 'total': job.total}
+
+
+@shared_task
+def purge_expired_report_jobs():
+    from .jobs import purge_expired_report_jobs as purge
+
+    return {'deleted': purge()}
@@ -1,12 +1,25 @@
+import os
+import shutil
+import tempfile
+import threading
 from datetime import timedelta
 from io import BytesIO
-from unittest.mock import patch
+from unittest.mock import Mock, patch
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+from zipfile import ZipFile
 
+from PIL import Image as PILImage
 from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
 from django.utils import timezone
 from rest_framework.test import APITestCase
 
-from reports.models import ReportRequest, ReportTemplate, StudentReportGenerationEvent
+from core import pdf_assets
+from reports import image_cache
+from reports.bulk import iter_rendered_pdfs, stream_zip
+from reports.jobs import execute_report_job
+from reports.models import ReportJob, ReportRequest, ReportTemplate, StudentReportGenerationEvent
 from students.models import CustomUser, School, Student
 
 
@@ -105,6 +118,44 @@ class ReportAnalyticsTests(APITestCase):
         self.assertEqual(events.count(), 1)
         self.assertIsNotNone(events.first().request_id)
 
+    @override_settings(REPORTS_PDF_RENDER_WORKERS=1)
+    @patch('reports.bulk.render_pdf_bytes')
+    @patch('reports.views.fetch_image')
+    @patch('reports.views.fetch_student_images')
+    @patch('reports.views.fetch_student_data')
+    def test_streamed_bulk_pdf_zip(self, mock_fetch_student_data, mock_fetch_images, mock_fetch_image, mock_render):
+        self.client.force_authenticate(self.teacher)
+        mock_fetch_student_data.return_value = (
+            self.student,
+            {'present': 8, 'total_days': 10, 'percentage': 80.0},
+            [],
+        )
+        mock_fetch_images.return_value = ['https://example.com/a.jpg']
+        mock_fetch_image.return_value = BytesIO(b'jpeg-bytes')
+        mock_render.return_value = b'%PDF-1.4 streamed'
+
+        response = self.client.post(
+            '/reports/api/generate-bulk-pdf-zip/',
+            data={
+                'student_ids': [self.student.id],
+                'mode': 'month',
+                'month': '2026-04',
+                'school_id': self.school.id,
+                'student_class': self.student.student_class,
+                'stream': True,
+            },
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        archive = ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), ['RPT-001_Student_One.pdf'])
+        self.assertEqual(archive.read('RPT-001_Student_One.pdf'), b'%PDF-1.4 streamed')
+        mock_fetch_image.assert_called_once_with('https://example.com/a.jpg')
+        self.assertIn(b'data:image/jpeg;base64,', mock_render.call_args[0][0].encode())
+        self.assertEqual(StudentReportGenerationEvent.objects.filter(event_type='bulk_pdf_item').count(), 1)
+
     def test_teacher_scoped_analytics_endpoint(self):
         StudentReportGenerationEvent.objects.create(
             event_type='single_pdf',
@@ -241,3 +292,249 @@ class ReportAnalyticsTests(APITestCase):
 
         call_command('purge_old_report_generation_events')
         self.assertFalse(StudentReportGenerationEvent.objects.filter(id=old_event.id).exists())
+
+
+class BulkRenderTests(SimpleTestCase):
+    def test_stream_zip_yields_a_valid_archive(self):
+        chunks = list(stream_zip([('a.pdf', b'first'), ('b.pdf', b'second')]))
+
+        self.assertGreater(len(chunks), 1)
+        archive = ZipFile(BytesIO(b''.join(chunks)))
+        self.assertEqual(archive.read('a.pdf'), b'first')
+        self.assertEqual(archive.read('b.pdf'), b'second')
+
+    @patch('reports.bulk.render_pdf_bytes', side_effect=lambda html: html.encode())
+    def test_inline_render_reports_failures_per_job(self, mock_render):
+        def broken():
+            raise ValueError('bad student')
+
+        results = list(iter_rendered_pdfs([('ok', lambda: 'pdf'), ('bad', broken)], workers=1))
+
+        self.assertEqual(results[0], ('ok', b'pdf', None))
+        self.assertEqual(results[1][0], 'bad')
+        self.assertIsInstance(results[1][2], ValueError)
+
+    @override_settings(REPORTS_IMAGE_FETCH_WORKERS=2)
+    @patch('reports.views.build_report_html', return_value='html')
+    @patch('reports.bulk.render_pdf_bytes', return_value=b'pdf')
+    def test_image_fetches_stay_a_bounded_distance_ahead(self, mock_render, mock_build):
+        from reports.views import iter_student_report_pdfs
+
+        submitted, rendered, listed_on = [], [], set()
+
+        def listing(student_id, *args):
+            listed_on.add(threading.current_thread())
+            return [f"https://img/{student_id}.jpg"]
+
+        def collect(image_urls):
+            submitted.append(image_urls)
+            return []
+
+        students = [(Mock(id=index), {}, []) for index in range(20)]
+        with patch('reports.views.fetch_student_images', side_effect=listing), \
+                patch('reports.views._collect_progress_images', side_effect=collect):
+            for student, pdf_bytes, error in iter_student_report_pdfs(students, {}, {}, 'March', None, None, workers=1):
+                rendered.append(student.id)
+                self.assertLessEqual(len(submitted) - len(rendered), 4)
+
+        self.assertEqual(rendered, list(range(20)))
+        # Listings (database queries) stay off the download pool's threads
+        self.assertEqual(listed_on, {threading.current_thread()})
+
+
+class ReportJobTests(APITestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(
+            username='admin_jobs',
+            password='testpass123',
+            role='Admin',
+        )
+        self.teacher = CustomUser.objects.create_user(
+            username='teacher_jobs',
+            password='testpass123',
+            role='Teacher',
+        )
+        self.school = School.objects.create(name='Jobs School')
+        self.other_school = School.objects.create(name='Other School')
+        self.teacher.assigned_schools.add(self.school)
+        self.artifact_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.artifact_dir, ignore_errors=True)
+
+    def student_reports_params(self, school):
+        return {
+            'student_ids': [1],
+            'school_id': school.id,
+            'student_class': 'Class 1',
+            'mode': 'month',
+            'month': '2026-04',
+        }
+
+    @patch('reports.views.run_report_job')
+    def test_submit_job_queues_task(self, mock_task):
+        self.client.force_authenticate(self.teacher)
+
+        response = self.client.post(
+            '/api/reports/jobs/',
+            data={'job_type': 'student_reports_zip', 'params': self.student_reports_params(self.school)},
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, 202)
+        job = ReportJob.objects.get(id=response.data['id'])
+        self.assertEqual(job.status, 'QUEUED')
+        self.assertEqual(job.requested_by_id, self.teacher.id)
+        mock_task.delay.assert_called_once_with(str(job.id))
+
+    @patch('reports.views.run_report_job')
+    def test_teacher_cannot_submit_job_for_unassigned_school(self, mock_task):
+        self.client.force_authenticate(self.teacher)
+
+        response = self.client.post(
+            '/api/reports/jobs/',
+            data={'job_type': 'student_reports_zip', 'params': self.student_reports_params(self.other_school)},
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(ReportJob.objects.exists())
+        mock_task.delay.assert_not_called()
+
+    @patch('reports.bulk.render_pdf_bytes', return_value=b'%PDF-1.4 gala')
+    def test_execute_job_stores_local_artifact(self, mock_render):
+        from aigala.models import Gallery
+
+        today = timezone.now().date()
+        gallery = Gallery.objects.create(
+            title='Jobs Gala',
+            month_label='Jan 2026',
+            theme='Imagination',
+            status='closed',
+            created_by=self.admin,
+            class_date=today,
+            gallery_open_date=today,
+            voting_start_date=today,
+            voting_end_date=today + timedelta(days=2),
+        )
+        job = ReportJob.objects.create(
+            job_type='gala_participation_pdf',
+            params={'gallery_id': gallery.id},
+            requested_by=self.admin,
+        )
+
+        with override_settings(REPORT_JOBS_STORAGE='local', REPORT_JOBS_LOCAL_DIR=self.artifact_dir):
+            execute_report_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'COMPLETED')
+        self.assertEqual((job.total, job.completed, job.failed), (1, 1, 0))
+        self.assertEqual(job.content_type, 'application/pdf')
+        with open(job.artifact_path, 'rb') as f:
+            self.assertEqual(f.read(), b'%PDF-1.4 gala')
+
+    @patch('reports.bulk.render_pdf_bytes', side_effect=RuntimeError('render failed'))
+    def test_execute_job_fails_when_every_item_fails(self, mock_render):
+        from aigala.models import Gallery
+
+        today = timezone.now().date()
+        gallery = Gallery.objects.create(
+            title='Broken Gala',
+            month_label='Feb 2026',
+            theme='Imagination',
+            status='closed',
+            created_by=self.admin,
+            class_date=today,
+            gallery_open_date=today,
+            voting_start_date=today,
+            voting_end_date=today + timedelta(days=2),
+        )
+        job = ReportJob.objects.create(
+            job_type='gala_participation_pdf',
+            params={'gallery_id': gallery.id},
+            requested_by=self.admin,
+        )
+
+        with override_settings(REPORT_JOBS_STORAGE='local', REPORT_JOBS_LOCAL_DIR=self.artifact_dir):
+            execute_report_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'FAILED')
+        self.assertEqual(job.failed, 1)
+        self.assertEqual(job.artifact_path, '')
+
+
+class ReportImageCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        settings_override = override_settings(
+            REPORTS_IMAGE_CACHE_DIR=self.cache_dir,
+            REPORTS_IMAGE_CACHE_MAX_BYTES=1024,
+            REPORTS_IMAGE_CACHE_MEMORY_ITEMS=2,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        image_cache.clear()
+        image_cache.reset_stats()
+
+    def test_signed_urls_for_the_same_object_share_an_entry(self):
+        first = 'https://x.supabase.co/storage/v1/object/sign/student-images/1/a.jpg?token=one'
+        second = 'https://x.supabase.co/storage/v1/object/sign/student-images/1/a.jpg?token=two'
+        producer = Mock(return_value=b'jpeg-bytes')
+
+        self.assertEqual(image_cache.get_or_create(first, (600, 600), producer), b'jpeg-bytes')
+        self.assertEqual(image_cache.get_or_create(second, (600, 600), producer), b'jpeg-bytes')
+
+        producer.assert_called_once()
+        counters = image_cache.stats()
+        self.assertEqual((counters['misses'], counters['memory_hits']), (1, 1))
+        self.assertEqual(counters['disk_entries'], 1)
+
+    def test_thumbnail_size_is_part_of_the_key(self):
+        url = 'https://x.supabase.co/storage/v1/object/public/student-images/1/a.jpg'
+        self.assertNotEqual(image_cache.cache_key(url, (600, 600)), image_cache.cache_key(url, (400, 400)))
+
+    def test_entries_survive_the_memory_level(self):
+        url = 'https://x.supabase.co/storage/v1/object/public/student-images/1/a.jpg'
+        image_cache.get_or_create(url, (600, 600), lambda: b'jpeg-bytes')
+        image_cache._memory.clear()
+
+        self.assertEqual(image_cache.get_or_create(url, (600, 600), Mock()), b'jpeg-bytes')
+        self.assertEqual(image_cache.stats()['disk_hits'], 1)
+
+    def test_failed_downloads_are_not_cached(self):
+        url = 'https://x.supabase.co/storage/v1/object/public/student-images/1/a.jpg'
+        producer = Mock(side_effect=[None, b'jpeg-bytes'])
+
+        self.assertIsNone(image_cache.get_or_create(url, (600, 600), producer))
+        self.assertEqual(image_cache.get_or_create(url, (600, 600), producer), b'jpeg-bytes')
+
+    def test_least_recently_used_files_are_evicted(self):
+        for name in ('a', 'b', 'c'):
+            url = f'https://x.supabase.co/storage/v1/object/public/student-images/1/{name}.jpg'
+            image_cache.get_or_create(url, (600, 600), lambda: b'x' * 400)
+
+        counters = image_cache.stats()
+        self.assertGreaterEqual(counters['evictions'], 1)
+        self.assertLessEqual(counters['disk_bytes'], 1024)
+        newest = image_cache.cache_key('https://x.supabase.co/storage/v1/object/public/student-images/1/c.jpg', (600, 600))
+        self.assertTrue(os.path.exists(image_cache._cache_path(newest)))
+
+
+class PdfAssetTests(SimpleTestCase):
+    def setUp(self):
+        pdf_assets.clear_asset_cache()
+        self.addCleanup(pdf_assets.clear_asset_cache)
+
+    def test_background_is_referenced_by_file_url(self):
+        css = pdf_assets.page_background_css('background')
+
+        self.assertIn("url('file://", css)
+        self.assertNotIn('base64', css)
+        path = url2pathname(urlsplit(pdf_assets.get_asset_url('background')).path)
+        self.assertEqual(PILImage.open(path).mode, 'RGB')
+
+    def test_missing_letterhead_falls_back_to_background(self):
+        with patch.dict(pdf_assets.PDF_ASSETS, {'letterhead': 'missing-letterhead.png'}):
+            css = pdf_assets.page_background_css('letterhead', 'background')
+
+        self.assertEqual(css, pdf_assets.page_background_css('background'))
@@ -14,6 +14,7 @@ from .views import (
     CustomReportViewSet,
     ReportTemplateViewSet,
     ReportRequestViewSet,
+    ReportJobViewSet,
 )
 
 app_name = 'reports'
@@ -23,6 +24,7 @@ router = DefaultRouter()
 router.register(r'custom-reports', CustomReportViewSet, basename='custom-report')
 router.register(r'templates', ReportTemplateViewSet, basename='report-template')
 router.register(r'requests', ReportRequestViewSet, basename='report-request')
+router.register(r'jobs', ReportJobViewSet, basename='report-job')
 
 urlpatterns = [
     # Existing routes
@@ -68,5 +70,11 @@ urlpatterns = [
     #   GET    /requests/pending/         - list pending (admin only)
     #   GET    /requests/my-requests/     - list user's own requests
     #   GET    /requests/stats/           - statistics (admin only)
+    #
+    # Asynchronous Report Jobs:
+    #   POST   /jobs/                     - submit a job, returns job id
+    #   GET    /jobs/                     - list jobs
+    #   GET    /jobs/{id}/                - poll progress
+    #   GET    /jobs/{id}/download/       - download finished artifact
     path('', include(router.urls)),
 ]
@@ -2,10 +2,13 @@ import logging
 import re
 import os
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from zipfile import ZIP_DEFLATED, ZipFile
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
 from django.utils.timezone import now
-from rest_framework import status, viewsets
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -14,19 +17,16 @@ from django.db.models import Count, Max, Sum
 from django.db.models.functions import TruncDay
 from datetime import datetime, timedelta
 from weasyprint import HTML, CSS
-from supabase import create_client
 from django.conf import settings
-import requests
 from io import BytesIO
-from PIL import Image as PILImage
 import base64
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 import html
 
 from django.http import JsonResponse
 from datetime import datetime, timedelta
 
+from core.pdf_assets import page_background_css
+from students.image_storage import count_student_images, delete_student_images, get_student_images_with_urls
 from lessons.serializers import LessonPlanSerializer
 from .models import (
     CustomReport,
@@ -35,6 +35,7 @@ from .models import (
     RequestStatusLog,
     GeneratedReport,
     StudentReportGenerationEvent,
+    ReportJob,
 )
 from .serializers import (
     CustomReportSerializer,
@@ -54,6 +55,8 @@ from .serializers import (
     StudentReportTimelinePointSerializer,
     SchoolReportCardSerializer,
     AdminMonitoringSerializer,
+    ReportJobSerializer,
+    ReportJobCreateSerializer,
 )
 from authentication.permissions import (
     IsAdminUser,
@@ -61,10 +64,13 @@ from authentication.permissions import (
     IsRequestOwnerAndDraft,
 )
 from .utils import prefill_template, get_remaining_placeholders, get_template_required_fields
+from . import image_cache
+from .bulk import iter_rendered_pdfs, stream_zip
+from .jobs import get_artifact_url, validate_report_job
+from .tasks import run_report_job
 from employees.models import Notification
 
 logger = logging.getLogger(__name__)
-supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
 # Set up logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -113,19 +119,8 @@ def generate_report_pdf(
         'double': '2.0',
     }.get(line_spacing, '1.5')
 
-    # Load background/letterhead image
-    bg_image_css = ""
-    letterhead_path = os.path.join(settings.BASE_DIR, 'static', 'letterhead.png')
-    bg_path = os.path.join(settings.BASE_DIR, 'static', 'bg.png')
-
-    # Try letterhead first, then bg.png
-    image_path = letterhead_path if os.path.exists(letterhead_path) else (bg_path if os.path.exists(bg_path) else None)
-
-    if image_path and os.path.exists(image_path):
-        with open(image_path, 'rb') as f:
-            bg_data = base64.b64encode(f.read()).decode('utf-8')
-        bg_image_css = f"background: url('data:image/png;base64,{bg_data}') no-repeat top left / 210mm 297mm;"
-        logger.info(f"Letterhead/background loaded from {image_path}")
+    # Letterhead first, then bg.png
+    bg_image_css = page_background_css('letterhead', 'background')
 
     # Build footer text
     footer_parts = ['<span class="footer-brand">Koder Kids</span>']
@@ -312,75 +307,19 @@ def generate_report_pdf(
 
     return pdf_buffer
 
-# Initialize Supabase Client
-supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
-
 def fetch_image(url, timeout=8, max_size=(600, 600), retries=2):
-    """Fetch image from URL with robust error handling, resizing, and retries."""
-    logger.info(f"Fetching image from {url}")
+    """
+    Fetch image from URL as a JPEG buffer, resized for PDFs.
+
+    Processed images are served from reports.image_cache, so each storage
+    object is only downloaded and re-encoded once per thumbnail size.
+    """
     if not url:
         logger.warning("No URL provided for fetching image")
         return None
 
-    try:
-        headers = {'User-Agent': 'Mozilla/5.0', 'Accept-Encoding': 'identity'}
-
-        session = requests.Session()
-        retry = Retry(total=retries, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
-        adapter = HTTPAdapter(max_retries=retry)
-        session.mount('https://', adapter)
-
-        response = session.get(url, headers=headers, timeout=timeout, allow_redirects=True)
-        response.raise_for_status()
-
-        content = response.content
-        
-        # Detect actual image format from file signature, not extension
-        if content.startswith(b'\xff\xd8'):
-            actual_format = 'JPEG'
-            logger.info(f"Detected JPEG image from {url}")
-        elif content.startswith(b'\x89PNG'):
-            actual_format = 'PNG'
-            logger.info(f"Detected PNG image from {url}")
-        elif content.startswith(b'GIF87a') or content.startswith(b'GIF89a'):
-            actual_format = 'GIF'
-            logger.info(f"Detected GIF image from {url}")
-        elif content.startswith(b'RIFF') and content[8:12] == b'WEBP':
-            actual_format = 'WEBP'
-            logger.info(f"Detected WEBP image from {url}")
-        else:
-            logger.warning(f"Unsupported or unrecognized image format: {content[:12].hex()}")
-            return None
-
-        img = PILImage.open(BytesIO(content))
-        
-        # Convert RGBA/LA/P to RGB for PDF compatibility
-        if img.mode in ('RGBA', 'LA', 'P'):
-            background = PILImage.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'P':
-                img = img.convert('RGBA')
-            background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-            img = background
-        elif img.mode != 'RGB':
-            img = img.convert('RGB')
-
-        if max_size:
-            img.thumbnail(max_size, PILImage.LANCZOS)
-
-        output_buffer = BytesIO()
-        # Always save as JPEG for PDF (better compression and compatibility)
-        img.save(output_buffer, format='JPEG', quality=85, optimize=True)
-        output_buffer.seek(0)
-
-        if output_buffer.getbuffer().nbytes > 3 * 1024 * 1024:
-            logger.warning(f"Image size too large: {output_buffer.getbuffer().nbytes} bytes")
-            return None
-
-        logger.info(f"Successfully fetched and converted image from {url} (format: {actual_format})")
-        return output_buffer
-    except Exception as e:
-        logger.error(f"Error fetching image from {url}: {str(e)}")
-        return None
+    data = image_cache.fetch_processed_image(url, timeout=timeout, max_size=max_size, retries=retries)
+    return BytesIO(data) if data else None
 
 
 @api_view(['DELETE'])
@@ -405,9 +344,9 @@ def delete_student_image(request, student_id, filename):
     if not (is_owner or is_teacher):
         return Response({"message": "Permission denied"}, status=403)
 
-    # 4. Delete from Supabase - use correct bucket name "student-images"
+    # 4. Delete from the "student-images" bucket
     try:
-        result = supabase.storage.from_('student-images').remove([f"{student_id}/{filename}"])
+        result = delete_student_images([f"{student_id}/{filename}"])
         logger.info(f"Deleted {filename} for student {student_id}, result: {result}")
         return Response({"message": "Image deleted successfully"}, status=200)
     except Exception as e:
@@ -551,41 +490,149 @@ def fetch_student_data(student_id, school_id, student_class, start_date, end_dat
 def fetch_student_images(student_id, start_date, end_date):
     """Fetch up to 4 image URLs for a student within the date range."""
     logger.info(f"Fetching images for student {student_id}, from {start_date} to {end_date}")
-    folder_path = f"{student_id}/"
-    supabase_response = supabase.storage.from_(settings.SUPABASE_BUCKET).list(folder_path)
-    if "error" in supabase_response:
-        logger.error(f"Supabase error fetching images for student {student_id}: {supabase_response['error']['message']}")
+    try:
+        images = get_student_images_with_urls(student_id, start_date, end_date, limit=4)
+    except Exception as e:
+        logger.error(f"Error fetching images for student {student_id}: {str(e)}")
         return []
 
-    all_urls = []
-    for file in supabase_response:
-        name = file["name"]
-        if not re.match(r'^\d{4}-\d{2}-\d{2}_[a-zA-Z0-9]+\.jpg$', name):
-            continue
-        try:
-            date_str = name.split('_')[0]
-            parsed_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            if start_date <= parsed_date <= end_date:
-                signed_data = supabase.storage.from_(settings.SUPABASE_BUCKET).create_signed_url(f"{folder_path}{name}", 3600)
-                if 'signedURL' in signed_data:
-                    all_urls.append(signed_data['signedURL'])
-                else:
-                    logger.warning(f"Failed to sign URL for {name}")
-        except ValueError:
-            logger.warning(f"Invalid date in filename: {name}")
-            continue
-
-    # Sort descending by name (latest dates first) and take first 4
-    all_urls.sort(reverse=True)
-    image_urls = all_urls[:4]
+    # Newest dates first; the 600px thumbnail variant is all the PDF needs
+    image_urls = [image["thumbnail_url"] or image["url"] for image in images]
     logger.info(f"Fetched {len(image_urls)} image URLs: {image_urls}")
-    return image_urls# reports/views.py (add this function near generate_pdf)
+    return image_urls
+
+
+def collect_student_report_data(student_ids, school_id, student_class, start_date, end_date):
+    """Return (student, attendance_data, lessons_data) for every student that exists in the class."""
+    students = []
+    for student_id in student_ids:
+        student, attendance_data, lessons_data = fetch_student_data(
+            student_id, school_id, student_class, start_date, end_date
+        )
+        if student:
+            students.append((student, attendance_data, lessons_data))
+    return students
+
+
+def _collect_progress_images(image_urls):
+    """
+    Download and encode a student's progress images. Runs on the image fetch
+    pool, so it must not touch the database: each pool thread would open a
+    connection of its own and never close it.
+    """
+    return [encode_progress_image(fetch_image(url)) for url in image_urls[:4]]
+
+
+def _build_bulk_report_html(student, attendance_data, lessons_data, images_future, period, include_background):
+    return build_report_html(
+        student, attendance_data, lessons_data, images_future.result(), period, include_background=include_background
+    )
+
+
+def iter_student_report_pdfs(students, selected_images_dict, include_background_dict,
+                             period, start_date, end_date, workers=None):
+    """
+    Render report cards for many students in parallel.
+
+    Progress images are listed in the calling thread and downloaded
+    concurrently on a thread pool, at most 2 x REPORTS_IMAGE_FETCH_WORKERS
+    students ahead of rendering, and PDFs are rendered on the process pool
+    from reports.bulk.
+
+    Args:
+        students: list of (student, attendance_data, lessons_data) tuples as
+                  returned by fetch_student_data
+        selected_images_dict: {str(student_id): [url, ...]} manual image picks
+        include_background_dict: {str(student_id): bool}
+
+    Yields:
+        (student, pdf_bytes, error) tuples as each PDF finishes.
+    """
+    image_pool = ThreadPoolExecutor(max_workers=settings.REPORTS_IMAGE_FETCH_WORKERS)
+    # Fetch images a bounded distance ahead of rendering so memory stays flat
+    prefetch = settings.REPORTS_IMAGE_FETCH_WORKERS * 2
+    remaining = iter(students)
+    queued = deque()
+
+    def top_up():
+        while len(queued) < prefetch:
+            try:
+                student, attendance_data, lessons_data = next(remaining)
+            except StopIteration:
+                return
+            # Image listings query the database, so they are resolved here and the pool only downloads
+            image_urls = selected_images_dict.get(str(student.id)) or fetch_student_images(student.id, start_date, end_date)
+            queued.append((
+                student,
+                attendance_data,
+                lessons_data,
+                image_pool.submit(_collect_progress_images, image_urls),
+            ))
+
+    def jobs():
+        top_up()
+        while queued:
+            student, attendance_data, lessons_data, images_future = queued.popleft()
+            top_up()
+            include_background = include_background_dict.get(str(student.id), True)
+            yield student, partial(
+                _build_bulk_report_html,
+                student, attendance_data, lessons_data, images_future, period, include_background,
+            )
+
+    try:
+        yield from iter_rendered_pdfs(jobs(), workers=workers)
+    finally:
+        image_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _stream_bulk_pdf_zip(user, students, selected_images_dict, include_background_dict,
+                         period, mode, month, start_date, end_date):
+    """Yield the bytes of a bulk report ZIP, writing (and logging) each PDF as soon as it is ready."""
+    request_uuid = uuid.uuid4()
+
+    def entries():
+        rendered = iter_student_report_pdfs(
+            students, selected_images_dict, include_background_dict, period, start_date, end_date
+        )
+        for student, pdf_bytes, error in rendered:
+            if error is not None:
+                logger.error(f"Failed to generate PDF for student {student.id}: {error}")
+                continue  # don't break the whole ZIP if one student fails
+
+            _log_student_report_generation_event(
+                event_type='bulk_pdf_item',
+                user=user,
+                student=student,
+                school=student.school,
+                student_class=student.student_class,
+                mode=mode,
+                month=month,
+                start_date=start_date,
+                end_date=end_date,
+                request_id=request_uuid,
+            )
+            yield student_report_filename(student), pdf_bytes
+
+    yield from stream_zip(entries())
+    logger.info(f"Bulk ZIP streamed successfully – {len(students)} students")
+    logger.info(f"Report image cache: {image_cache.stats(include_disk=False)}")
+
+
+def student_report_filename(student):
+    """File name of a student's report card inside bulk ZIPs."""
+    return f"{student.reg_num}_{student.name.replace(' ', '_')}.pdf"
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def generate_bulk_pdf_zip(request):
     """
     Receives a list of student_ids + report parameters
     Returns a single ZIP file containing one PDF per student
+
+    Pass "stream": true to render PDFs in parallel and stream the ZIP as each
+    PDF finishes instead of building the whole archive in memory.
     """
     logger.info(f"Bulk ZIP request by {request.user.username} – payload: {request.data}")
 
@@ -605,6 +652,27 @@ def generate_bulk_pdf_zip(request):
         include_background_dict = request.data.get('includeBackground', {})  # {student_id: bool} – per student
 
         start_date_parsed, end_date_parsed, period = get_date_range(mode, month, start_date, end_date)
+
+        # Streamed mode: render on the process pool and send each PDF as it finishes
+        if request.data.get('stream'):
+            students = collect_student_report_data(
+                student_ids, school_id, student_class, start_date_parsed, end_date_parsed
+            )
+            if not students:
+                return Response({"error": "No matching students found"}, status=404)
+
+            response = StreamingHttpResponse(
+                _stream_bulk_pdf_zip(
+                    request.user, students, selected_images_dict, include_background_dict,
+                    period, mode, month, start_date_parsed, end_date_parsed,
+                ),
+                content_type='application/zip',
+            )
+            filename = f"{students[0][0].school.name}_{student_class}_Reports_{period}_{now().strftime('%Y%m%d')}.zip"
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            logger.info(f"Streaming bulk ZIP for {len(students)} students")
+            return response
+
         request_uuid = uuid.uuid4()
 
         # Create ZIP in memory
@@ -643,8 +711,7 @@ def generate_bulk_pdf_zip(request):
                         request_id=request_uuid,
                     )
 
-                    safe_name = f"{student.reg_num}_{student.name.replace(' ', '_')}.pdf"
-                    zip_file.writestr(safe_name, pdf_buffer.getvalue())
+                    zip_file.writestr(student_report_filename(student), pdf_buffer.getvalue())
 
                 except Exception as e:
                     logger.exception(f"Failed to generate PDF for student {student_id}: {e}")
@@ -805,24 +872,17 @@ def get_student_image_uploads_count(request):
             if int(school_id) not in assigned_schools:
                 return Response({"error": "Unauthorized access to this school"}, status=403)
 
+        # Image counts for the whole class in one query, filtered by month
+        month_start, month_end = _month_boundaries(month)
+        image_counts = count_student_images([student.id for student in students], month_start, month_end)
+
         # Prepare response data
         student_data = []
         for student in students:
-            # Fetch images from Supabase for this student
-            folder_path = f"{student.id}/"
-            response = supabase.storage.from_("student-images").list(folder_path)
-
-            if "error" in response:
-                logger.error(f"Error fetching images for student {student.id}: {response['error']['message']}")
-                continue
-
-            # Filter images by month (filename starts with YYYY-MM)
-            image_count = sum(1 for file in response if file['name'].startswith(month))
-
             student_data.append({
                 "student_id": student.id,
                 "name": student.name,
-                "images_uploaded": image_count
+                "images_uploaded": image_counts.get(student.id, 0)
             })
 
         return Response(student_data, status=200)
@@ -849,47 +909,20 @@ def get_student_progress_images(request):
         return JsonResponse({"error": "student_id and month are required"}, status=400)
 
     try:
-        # Define the folder path inside the Supabase bucket
-        folder_path = f"{student_id}/"
-
-        logger.info(f"Fetching progress images for student {student_id}, month {month}, path: {folder_path}")
-
-        # Fetch all files from the student's folder in Supabase
-        response = supabase.storage.from_("student-images").list(folder_path)
-
-        logger.info(f"Supabase list response type: {type(response)}, content: {response}")
+        logger.info(f"Fetching progress images for student {student_id}, month {month}")
 
-        # Handle error response - response is a list when successful, dict when error
-        if isinstance(response, dict) and "error" in response:
-            logger.error(f"Supabase error: {response}")
-            return JsonResponse({"error": "Failed to fetch files from Supabase"}, status=500)
+        month_start, month_end = _month_boundaries(month)
+        images = get_student_images_with_urls(student_id, month_start, month_end)
+        logger.info(f"Found {len(images)} images for month {month}")
 
-        # If response is empty list or None, return empty
-        if not response:
-            logger.info(f"No files found in folder {folder_path}")
-            return JsonResponse({"progress_images": [], "message": "No images found"}, status=200)
-
-        # Filter files that start with the requested month (YYYY-MM)
-        matching_files = [file for file in response if file.get("name", "").startswith(month)]
-        logger.info(f"Found {len(matching_files)} files matching month {month}")
-
-        if not matching_files:
+        if not images:
             return JsonResponse({"progress_images": [], "message": "No images found for this month"}, status=200)
 
-        # Generate signed URLs for matching files
-        matching_images = []
-        for file in matching_files:
-            try:
-                signed_url = supabase.storage.from_("student-images").create_signed_url(
-                    f"{folder_path}{file['name']}", 604800
-                )
-                matching_images.append(signed_url)
-            except Exception as url_error:
-                logger.error(f"Error creating signed URL for {file['name']}: {url_error}")
-
-        logger.info(f"Generated {len(matching_images)} signed URLs")
+        matching_images = [{"signedURL": image["url"], "signedUrl": image["url"]} for image in images]
         return JsonResponse({"progress_images": matching_images})
 
+    except ValueError:
+        return JsonResponse({"error": "Invalid student_id or month format. Use YYYY-MM"}, status=400)
     except Exception as e:
         logger.error(f"Error in get_student_progress_images: {str(e)}", exc_info=True)
         return JsonResponse({"error": str(e)}, status=500)
@@ -1154,33 +1187,50 @@ def generate_pdf(request):
 
 
 
+def encode_progress_image(img_buffer):
+    """Turn a buffer returned by fetch_image into the (base64, mime) pair used in report HTML."""
+    if not img_buffer:
+        return None
+    return base64.b64encode(img_buffer.read()).decode("utf-8"), "image/jpeg"
+
+
 def generate_pdf_content(student, attendance_data, lessons_data, image_urls, period, include_background=True):
     logger.info("Generating PDF content")
 
     progress_images = []
     for url in image_urls[:4]:
         logger.info(f"Fetching progress image: {url}")
-        img_buffer = fetch_image(url)
-        if img_buffer:
-            img_data = base64.b64encode(img_buffer.read()).decode("utf-8")
-            img_mime = "image/jpeg"
-            progress_images.append((img_data, img_mime))
+        progress_image = encode_progress_image(fetch_image(url))
+        progress_images.append(progress_image)
+        if progress_image:
             logger.info(f"Progress image fetched: {url}")
         else:
-            progress_images.append(None)
             logger.warning(f"Failed to fetch progress image: {url}")
 
-    # Load background image if enabled
-    bg_image_css = ""
-    if include_background:
-        bg_path = os.path.join(settings.BASE_DIR, 'static', 'bg.png')
-        if os.path.exists(bg_path):
-            with open(bg_path, 'rb') as f:
-                bg_data = base64.b64encode(f.read()).decode('utf-8')
-            bg_image_css = f"background: url('data:image/png;base64,{bg_data}') no-repeat top left / 210mm 297mm;"
-            logger.info(f"Background image loaded from {bg_path}")
-        else:
-            logger.warning(f"Background image not found at {bg_path}")
+    html_content = build_report_html(
+        student, attendance_data, lessons_data, progress_images, period, include_background=include_background
+    )
+
+    logger.info("Rendering PDF with WeasyPrint")
+    try:
+        buffer = BytesIO()
+        HTML(string=html_content).write_pdf(buffer)
+        buffer.seek(0)
+        logger.info("PDF rendered successfully")
+        return buffer
+    except Exception as e:
+        logger.exception(f"WeasyPrint rendering failed: {e}")
+        raise
+
+
+def build_report_html(student, attendance_data, lessons_data, progress_images, period, include_background=True):
+    """
+    Build the student progress report HTML.
+
+    progress_images is a list of (base64_data, mime) tuples (or None for images
+    that failed to load), as produced by encode_progress_image.
+    """
+    bg_image_css = page_background_css('background') if include_background else ""
 
     html_content = f"""
 <!DOCTYPE html>
@@ -1458,17 +1508,7 @@ def generate_pdf_content(student, attendance_data, lessons_data, image_urls, per
 </body>
 </html>
 """
-
-    logger.info("Rendering PDF with WeasyPrint")
-    try:
-        buffer = BytesIO()
-        HTML(string=html_content).write_pdf(buffer)
-        buffer.seek(0)
-        logger.info("PDF rendered successfully")
-        return buffer
-    except Exception as e:
-        logger.exception(f"WeasyPrint rendering failed: {e}")
-        raise
+    return html_content
 
 
 # ============================================
@@ -2388,4 +2428,92 @@ class ReportRequestViewSet(viewsets.ModelViewSet):
             return Response(
                 {'error': f'Failed to generate PDF: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+# ============================================
+# REPORT JOB VIEWSET (asynchronous bulk rendering)
+# ============================================
+
+class ReportJobViewSet(mixins.CreateModelMixin,
+                       mixins.RetrieveModelMixin,
+                       mixins.ListModelMixin,
+                       viewsets.GenericViewSet):
+    """
+    Submit long-running report renders to the Celery worker and poll them.
+
+    Endpoints:
+    - POST /api/reports/jobs/ - Submit a job {job_type, params}, returns the job (202)
+    - GET /api/reports/jobs/ - List own jobs (admins see all)
+    - GET /api/reports/jobs/{id}/ - Poll progress (completed of total)
+    - GET /api/reports/jobs/{id}/download/ - Download the finished artifact
+
+    Job types and their params:
+    - student_reports_zip: same payload as generate_bulk_pdf_zip
+    - gala_certificates_zip: {gallery_id}
+    - gala_participation_pdf: {gallery_id}
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = ReportJobSerializer
+
+    def get_queryset(self):
+        queryset = ReportJob.objects.all()
+        if self.request.user.role != 'Admin':
+            queryset = queryset.filter(requested_by=self.request.user)
+
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status__in=[s.strip() for s in status_filter.split(',')])
+
+        job_type = self.request.query_params.get('job_type')
+        if job_type:
+            queryset = queryset.filter(job_type=job_type)
+
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        serializer = ReportJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job_type = serializer.validated_data['job_type']
+        params = serializer.validated_data['params']
+
+        validate_report_job(request.user, job_type, params)
+        job = ReportJob.objects.create(job_type=job_type, params=params, requested_by=request.user)
+
+        try:
+            run_report_job.delay(str(job.id))
+        except Exception as e:
+            logger.error(f"Failed to queue report job {job.id}: {str(e)}")
+            job.status = 'FAILED'
+            job.error = 'Could not queue the job. Please try again later.'
+            job.finished_at = now()
+            job.save(update_fields=['status', 'error', 'finished_at'])
+            return Response(ReportJobSerializer(job).data, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        logger.info(f"Report job {job.id} ({job_type}) queued by {request.user.username}")
+        return Response(ReportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """
+        Download the artifact of a completed job.
+        GET /api/reports/jobs/{id}/download/
+        Local artifacts are streamed; Supabase artifacts redirect to a signed URL.
+        """
+        job = self.get_object()
+        if job.status != 'COMPLETED':
+            return Response(
+                {'error': f'Job is not finished yet ({job.status})'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        if job.artifact_storage == 'supabase':
+            return HttpResponseRedirect(get_artifact_url(job))
+
+        if not os.path.exists(job.artifact_path):
+            return Response({'error': 'Artifact has expired'}, status=status.HTTP_410_GONE)
+        return FileResponse(
+            open(job.artifact_path, 'rb'),
+            as_attachment=True,
+            filename=job.artifact_name,
+            content_type=job.content_type,
+        )
@@ -26,4 +26,8 @@ app.conf.beat_schedule = {
         'task': 'reports.tasks.purge_old_student_report_generation_events',
         'schedule': crontab(hour=2, minute=30),  # Daily at 2:30 AM
     },
+    'purge-expired-report-jobs': {
+        'task': 'reports.tasks.purge_expired_report_jobs',
+        'schedule': crontab(minute=15),  # Hourly
+    },
 }
@@ -35,15 +35,37 @@ DATABASES = {
         # Connection pooling settings for Supabase
         'CONN_MAX_AGE': 60,  # Keep connections alive for 60 seconds
         'CONN_HEALTH_CHECKS': True,  # Check connection health before use
+        # The transaction pooler (port 6543) cannot keep server-side cursors open
+        # across statements, so .iterator() uses ordinary client-side cursors
+        'DISABLE_SERVER_SIDE_CURSORS': True,
     }
 }
 
-# Caching Configuration (Django's built-in database cache)
+# Caching Configuration: per-process LRU (L1) in front of a shared cache (L2),
+# see core.cache_backends. CACHE_L2_BACKEND picks the shared store.
+CACHE_L2_BACKEND = os.getenv('CACHE_L2_BACKEND', 'redis')  # 'redis', 'file', 'locmem' or 'database'
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/1')
+CACHE_FILE_DIR = os.getenv('CACHE_FILE_DIR', os.path.join(BASE_DIR, 'media', 'cache'))
+CACHE_L2_OPTIONS = {
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_REDIS_URL,
+        'OPTIONS': {'socket_connect_timeout': 1, 'socket_timeout': 1},
+    },
+    'file': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': CACHE_FILE_DIR},
+    'locmem': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'},
+    'database': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache_table'},
+}
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
-        'LOCATION': 'cache_table',
-    }
+        'BACKEND': 'core.cache_backends.TieredCache',
+        'OPTIONS': {
+            'L2': 'shared',
+            'L1_MAX_ENTRIES': int(os.getenv('CACHE_L1_MAX_ENTRIES', '2000')),
+            'L1_TIMEOUT': float(os.getenv('CACHE_L1_TIMEOUT', '5')),  # max staleness across processes
+        },
+    },
+    'shared': CACHE_L2_OPTIONS[CACHE_L2_BACKEND],
 }
 
 # Static Files (CSS, JavaScript, etc.)
@@ -59,6 +81,12 @@ else:
 # Media Files (User Uploads)
 MEDIA_URL = '/media/'
 
+# Student progress images (students.image_storage): 'supabase' bucket or a
+# local directory stand-in for offline development and tests
+STUDENT_IMAGES_STORAGE = os.getenv('STUDENT_IMAGES_STORAGE', 'supabase')  # 'supabase' or 'local'
+STUDENT_IMAGES_LOCAL_DIR = os.getenv('STUDENT_IMAGES_LOCAL_DIR', os.path.join(BASE_DIR, 'media', 'student-images'))
+STUDENT_IMAGES_LOCAL_URL = MEDIA_URL + 'student-images/'
+
 # Allowed Hosts
 ALLOWED_HOSTS = [
     '127.0.0.1',
@@ -84,6 +112,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # trigram lookups for students.search
     'rest_framework',
     'corsheaders',
     'django_filters',
@@ -143,6 +172,28 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 
+# Bulk report generation
+# Processes used to render report PDFs in parallel (per web worker) and
+# threads used to download progress images concurrently
+REPORTS_PDF_RENDER_WORKERS = int(os.getenv('REPORTS_PDF_RENDER_WORKERS', str(os.cpu_count() or 1)))
+REPORTS_IMAGE_FETCH_WORKERS = int(os.getenv('REPORTS_IMAGE_FETCH_WORKERS', '8'))
+
+# Bulk student import (students.student_import)
+# Processes used to hash new students' passwords in parallel (per web worker)
+STUDENT_IMPORT_HASH_WORKERS = int(os.getenv('STUDENT_IMPORT_HASH_WORKERS', str(os.cpu_count() or 1)))
+
+# Asynchronous report jobs (reports.jobs)
+# Artifacts go to the local filesystem (must be shared by web and worker) or Supabase storage
+REPORT_JOBS_STORAGE = os.getenv('REPORT_JOBS_STORAGE', 'local')  # 'local' or 'supabase'
+REPORT_JOBS_LOCAL_DIR = os.getenv('REPORT_JOBS_LOCAL_DIR', os.path.join(BASE_DIR, 'media', 'report_jobs'))
+REPORT_JOBS_BUCKET = os.getenv('REPORT_JOBS_BUCKET', 'report-jobs')
+REPORT_JOBS_RETENTION_HOURS = int(os.getenv('REPORT_JOBS_RETENTION_HOURS', '24'))
+
+# Processed (thumbnailed, JPEG re-encoded) images embedded in PDFs (reports.image_cache)
+REPORTS_IMAGE_CACHE_DIR = os.getenv('REPORTS_IMAGE_CACHE_DIR', os.path.join(BASE_DIR, 'media', 'image_cache'))
+REPORTS_IMAGE_CACHE_MAX_BYTES = int(os.getenv('REPORTS_IMAGE_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+REPORTS_IMAGE_CACHE_MEMORY_ITEMS = int(os.getenv('REPORTS_IMAGE_CACHE_MEMORY_ITEMS', '64'))
+
 # URL Configuration
 ROOT_URLCONF = 'school_management.urls'
 
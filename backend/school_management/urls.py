@@ -12,7 +12,7 @@ from students.views import (
     FeeSummaryView, StudentProfileViewSet,  debug_cors,
 
     # Students Management
-    StudentViewSet, add_student,  get_students, get_student_details,
+    StudentViewSet, add_student,  get_students, student_list_v2, search_students_view, import_students, get_student_details,
     get_student_images,  students_per_school, new_registrations,
 
     # Schools and Classes
@@ -22,7 +22,7 @@ from students.views import (
 
     SchoolViewSet,    create_school,    update_school,  delete_school, get_school_stats, get_schools_overview,
     # Fee Management
-    get_fees, create_new_month_fees, update_fees, fee_received_per_month,
+    get_fees, create_new_month_fees, generate_fees, update_fees, fee_received_per_month,
 
     # Progress and Performance
      upload_student_image, get_class_image_count,
@@ -40,6 +40,7 @@ from students.views import (
 
 )
 from authentication.views import get_my_assigned_schools
+from core.views import cache_stats
 
 # Register ViewSet-based routes
 router = DefaultRouter()
@@ -82,6 +83,9 @@ urlpatterns = [
     path('api/students/', get_students, name='get_students'),
     path('api/students/<int:pk>/', StudentViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='student-detail'),
     path('api/students/add/', add_student, name='add_student'),
+    path('api/students/import/', import_students, name='import_students'),
+    path('api/v2/students/', student_list_v2, name='student_list_v2'),
+    path('api/students/search/', search_students_view, name='search_students'),
     #path('api/schools/', get_schools, name="schools_list"),
     path('api/students-per-school/', students_per_school, name='students_per_school'),
     path('api/new-registrations/', new_registrations, name='new_registrations'),
@@ -93,6 +97,7 @@ urlpatterns = [
     # Fees Management
     path('api/fees/', get_fees, name='get_fees'),
     path('api/fees/create/', create_new_month_fees, name='create_new_month_fees'),
+    path('api/fees/generate/', generate_fees, name='generate_fees'),
     path('api/fees/update/', update_fees, name='update_fees'),
     path('api/fee-per-month/', fee_received_per_month, name='fee_received_per_month'),
     path('api/fees/create-single/', create_single_fee, name='create-single-fee'),
@@ -119,6 +124,7 @@ urlpatterns = [
     path('api/class-image-count/', get_class_image_count, name='get_class_image_count'),
    
     path('api/fee-summary/', FeeSummaryView.as_view(), name='fee-summary'),
+    path('api/cache-stats/', cache_stats, name='cache-stats'),
     # Includes robot chat APIs
     path("api/", include("robotchat.urls")),
      path('api/students/profile/', StudentProfileViewSet.as_view({
@@ -158,4 +164,5 @@ urlpatterns = [
 # Remove the duplicate router and urlpatterns redefinition
 # Move static media handling outside urlpatterns
 if settings.DEBUG:
+    urlpatterns += static(settings.STUDENT_IMAGES_LOCAL_URL, document_root=settings.STUDENT_IMAGES_LOCAL_DIR)
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
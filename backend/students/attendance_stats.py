@@ -0,0 +1,238 @@
+"""
+Per-student attendance figures for the student dashboard (StudentAttendanceStats).
+
+The dashboard reads one row per student instead of counting and scanning
+the student's attendance history on every load:
+
+    stats = stats_for(student)
+    stats.learning_streak, stats.present_sessions, stats.total_sessions
+    monthly_percentage(stats)                           this month's attendance %
+    weekly_attendance(stats, school.assigned_days)      this week's grid
+    week_learning(stats, school.assigned_days)          this week's topics
+
+Rows are kept current from attendance writes the same way as the fee
+arrears: Attendance.save/delete and LessonPlan.save (students.signals) and
+the batch upsert in attendance.marking pass the student ids they touched to
+schedule_stats_refresh, and each student is re-aggregated once after the
+transaction commits, in a fixed number of queries for any number of students.
+
+The learning streak is the number of Present sessions since the student's
+latest Absent one (sessions marked N/A do not break it). The month and week
+figures are stored for the month and week of the last refresh; read on a
+later month or week they count as empty, which they are until the next
+attendance write refreshes the row. A student without a row gets one on
+first read; rebuild_attendance_stats() recomputes everything
+(manage.py rebuild_attendance_stats).
+"""
+import logging
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Count, DateField, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .fee_rollups import refresh_after_commit
+from .models import Attendance, Student, StudentAttendanceStats
+
+logger = logging.getLogger(__name__)
+
+DAY_NAMES = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+DEFAULT_SCHOOL_DAYS = [0, 1, 2, 3, 4]  # Mon-Fri
+REBUILD_BATCH_SIZE = 500
+UPDATE_FIELDS = (
+    'total_sessions', 'present_sessions', 'learning_streak', 'last_session_date', 'month_start',
+    'month_sessions', 'month_present', 'week_start', 'week', 'updated_at',
+)
+
+
+def _week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def _topic(planned_topic):
+    """First line of a lesson plan's planned topic, as the dashboard shows it."""
+    return planned_topic.split('\n')[0].strip()[:50] if planned_topic else None
+
+
+def _stats_rows(student_ids, today):
+    """StudentAttendanceStats rows (unsaved) for student_ids, in two queries."""
+    month_start = today.replace(day=1)
+    week_start = _week_start(today)
+    last_absent = Attendance.objects.filter(
+        student_id=OuterRef('student_id'), status='Absent',
+    ).order_by('-session_date').values('session_date')[:1]
+    in_month = Q(session_date__gte=month_start, session_date__lt=(month_start + timedelta(days=32)).replace(day=1))
+
+    aggregates = {
+        row['student_id']: row
+        for row in Attendance.objects.filter(student_id__in=student_ids).values('student_id').annotate(
+            total=Count('id'),
+            present=Count('id', filter=Q(status='Present')),
+            streak=Count('id', filter=Q(
+                status='Present',
+                session_date__gt=Coalesce(Subquery(last_absent, output_field=DateField()), Value(date.min)),
+            )),
+            last_date=Max('session_date'),
+            month_total=Count('id', filter=in_month),
+            month_present=Count('id', filter=in_month & Q(status='Present')),
+        ).order_by()
+    }
+    weeks = {}
+    for student_id, session_date, status, planned_topic in Attendance.objects.filter(
+        student_id__in=student_ids, session_date__range=[week_start, week_start + timedelta(days=6)],
+    ).values_list('student_id', 'session_date', 'status', 'lesson_plan__planned_topic'):
+        weeks.setdefault(student_id, {})[session_date.isoformat()] = [status, _topic(planned_topic)]
+
+    rows = []
+    for student_id in student_ids:
+        row = aggregates.get(student_id, {})
+        rows.append(StudentAttendanceStats(
+            student_id=student_id,
+            total_sessions=row.get('total', 0),
+            present_sessions=row.get('present', 0),
+            learning_streak=row.get('streak', 0),
+            last_session_date=row.get('last_date'),
+            month_start=month_start,
+            month_sessions=row.get('month_total', 0),
+            month_present=row.get('month_present', 0),
+            week_start=week_start,
+            week=weeks.get(student_id, {}),
+        ))
+    return rows
+
+
+def _upsert(rows):
+    if rows:
+        StudentAttendanceStats.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['student'],
+            update_fields=UPDATE_FIELDS,
+        )
+
+
+def refresh_attendance_stats(student_ids, today=None):
+    """Recompute the stats rows of student_ids. Returns the number of rows written."""
+    student_ids = {student_id for student_id in student_ids if student_id}
+    if not student_ids:
+        return 0
+    today = today or timezone.localdate()
+
+    with transaction.atomic():
+        # Serializes refreshes per student and skips students deleted since the write
+        student_ids = list(
+            Student.objects.select_for_update().filter(id__in=student_ids).order_by('id').values_list('id', flat=True)
+        )
+        rows = _stats_rows(student_ids, today)
+        _upsert(rows)
+    return len(rows)
+
+
+def schedule_stats_refresh(student_ids):
+    """Refresh the attendance stats of student_ids once the current transaction commits."""
+    student_ids = {student_id for student_id in student_ids if student_id}
+    if student_ids:
+        refresh_after_commit('attendance_stats', refresh_attendance_stats, student_ids)
+
+
+def rebuild_attendance_stats(school_id=None):
+    """Recompute the stats of every student (optionally of one school). Returns the number of rows written."""
+    students = Student.objects.order_by('id')
+    if school_id:
+        students = students.filter(school_id=school_id)
+    student_ids = list(students.values_list('id', flat=True))
+    today = timezone.localdate()
+
+    written = 0
+    for start in range(0, len(student_ids), REBUILD_BATCH_SIZE):
+        with transaction.atomic():
+            rows = _stats_rows(student_ids[start:start + REBUILD_BATCH_SIZE], today)
+            _upsert(rows)
+        written += len(rows)
+    logger.info(f"Rebuilt {written} attendance stats rows")
+    return written
+
+
+# =============================================================================
+# READS
+# =============================================================================
+def stats_for(student):
+    """The student's stats row, built on the spot if the student has none yet."""
+    try:
+        return StudentAttendanceStats.objects.get(student_id=student.id)
+    except StudentAttendanceStats.DoesNotExist:
+        refresh_attendance_stats([student.id])
+        return StudentAttendanceStats.objects.get(student_id=student.id)
+
+
+def monthly_percentage(stats, today=None):
+    """This month's attendance percentage (0-100)."""
+    today = today or timezone.localdate()
+    if stats.month_start != today.replace(day=1) or not stats.month_sessions:
+        return 0
+    return round(stats.month_present / stats.month_sessions * 100)
+
+
+def _week(stats, today):
+    """{date: [status, topic]} recorded this week."""
+    if stats.week_start != _week_start(today):
+        return {}
+    return {date.fromisoformat(day): value for day, value in stats.week.items()}
+
+
+def weekly_attendance(stats, assigned_days=None, today=None):
+    """
+    This week's attendance: days_attended, total_school_days (up to today),
+    percentage and a daily breakdown of the school days.
+    """
+    today = today or timezone.localdate()
+    assigned_days = assigned_days or DEFAULT_SCHOOL_DAYS
+    monday = _week_start(today)
+    week = _week(stats, today)
+
+    days_attended = sum(1 for day, (status, _) in week.items() if day <= today and status == 'Present')
+    total_school_days = sum(
+        1 for i in range(min((today - monday).days + 1, 7))
+        if (monday + timedelta(days=i)).weekday() in assigned_days
+    )
+    daily = []
+    for i in range(7):
+        day_date = monday + timedelta(days=i)
+        if day_date.weekday() in assigned_days:
+            status = week[day_date][0] if day_date in week else ('upcoming' if day_date > today else 'no_record')
+            daily.append({
+                'day': DAY_NAMES[i],
+                'date': day_date.isoformat(),
+                'status': status,
+                'is_school_day': True
+            })
+
+    return {
+        'days_attended': days_attended,
+        'total_school_days': total_school_days,
+        'percentage': round((days_attended / total_school_days * 100) if total_school_days > 0 else 0),
+        'daily': daily
+    }
+
+
+def week_learning(stats, assigned_days=None, today=None):
+    """The topic of each school day of this week up to today, and whether the student was present."""
+    today = today or timezone.localdate()
+    assigned_days = assigned_days or DEFAULT_SCHOOL_DAYS
+    monday = _week_start(today)
+    week = _week(stats, today)
+
+    learning = []
+    for i in range(7):
+        day_date = monday + timedelta(days=i)
+        if day_date <= today and day_date.weekday() in assigned_days:
+            status, topic = week.get(day_date, (None, None))
+            learning.append({
+                'day': DAY_NAMES[i],
+                'date': day_date.isoformat(),
+                'topic': topic,
+                'completed': status == 'Present'
+            })
+    return learning
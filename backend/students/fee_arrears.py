@@ -0,0 +1,203 @@
+"""
+Per-student fee arrears (FeeArrears).
+
+Defaulter lists read one row per student that owes money instead of
+grouping years of Fee rows on every request:
+
+    defaulters(school_id=3, min_months=3)             students 3+ months behind
+    defaulters(school_id=3, bucket='61-90')           oldest unpaid fee 61-90 days old
+    defaulters(min_months=3, since=date(2026, 4, 1))  3+ unpaid months from Apr-2026 on
+
+A fee counts as unpaid while its status is Pending or Overdue and it still
+has a balance. Rows are kept current from Fee writes the same way as the fee
+collection rollups: Fee.save/delete (students.signals) and the FeeQuerySet
+bulk paths pass the student ids they touched to schedule_arrears_refresh, and
+each student is re-aggregated once after the transaction commits (an indexed
+student_id scan).
+
+Days overdue and the aging bucket are computed when reading, from
+oldest_unpaid_period, so they move with the calendar without a nightly job.
+
+rebuild_fee_arrears() recomputes everything (manage.py rebuild_fee_arrears).
+"""
+import logging
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Case, CharField, Count, Max, Min, OuterRef, Q, Subquery, Sum, Value, When
+
+from .fee_rollups import refresh_after_commit
+from .models import Fee, FeeArrears, Student, fee_month_label
+
+logger = logging.getLogger(__name__)
+
+UNPAID = Q(status__in=['Pending', 'Overdue'], balance_due__gt=0)
+
+# Bucket -> (min days, max days) since the oldest unpaid month began
+AGING_BUCKETS = {
+    '0-30': (0, 30),
+    '31-60': (31, 60),
+    '61-90': (61, 90),
+    '90+': (91, None),
+}
+UPDATE_FIELDS = (
+    'student_name', 'student_class', 'school', 'total_outstanding', 'unpaid_months',
+    'oldest_unpaid_month', 'oldest_unpaid_period', 'latest_unpaid_period', 'updated_at',
+)
+
+
+def _arrears_rows(fees):
+    """FeeArrears rows (unsaved) for every student with unpaid fees in fees."""
+    aggregates = list(
+        fees.filter(UNPAID).values('student_id').annotate(
+            outstanding=Sum('balance_due'),
+            months=Count('month', distinct=True),
+            oldest=Min('period'),
+            latest=Max('period'),
+            # Fallbacks for fees whose student row is gone
+            fee_name=Max('student_name'),
+            fee_class=Max('student_class'),
+            fee_school=Max('school_id'),
+        ).order_by()
+    )
+    students = Student.objects.in_bulk([row['student_id'] for row in aggregates])
+    rows = []
+    for row in aggregates:
+        student = students.get(row['student_id'])
+        rows.append(FeeArrears(
+            student_id=row['student_id'],
+            student_name=student.name if student else row['fee_name'],
+            student_class=student.student_class if student else row['fee_class'],
+            school_id=(student.school_id if student else None) or row['fee_school'],
+            total_outstanding=row['outstanding'] or 0,
+            unpaid_months=row['months'],
+            oldest_unpaid_month=fee_month_label(row['oldest']) if row['oldest'] else '',
+            oldest_unpaid_period=row['oldest'],
+            latest_unpaid_period=row['latest'],
+        ))
+    return rows
+
+
+def _upsert(rows):
+    if rows:
+        FeeArrears.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['student_id'],
+            update_fields=UPDATE_FIELDS,
+        )
+
+
+def refresh_fee_arrears(student_ids):
+    """Recompute the arrears rows of student_ids. Returns the number of students still in arrears."""
+    student_ids = {student_id for student_id in student_ids if student_id}
+    if not student_ids:
+        return 0
+
+    with transaction.atomic():
+        # Serializes refreshes per student; the aggregate below then sees every committed write
+        list(Student.objects.select_for_update().filter(id__in=student_ids).order_by('id').values_list('id', flat=True))
+
+        rows = _arrears_rows(Fee.objects.filter(student_id__in=student_ids))
+        cleared = student_ids - {row.student_id for row in rows}
+        if cleared:
+            FeeArrears.objects.filter(student_id__in=cleared).delete()
+        _upsert(rows)
+    return len(rows)
+
+
+def schedule_arrears_refresh(student_ids):
+    """Refresh the arrears of student_ids once the current transaction commits."""
+    student_ids = {student_id for student_id in student_ids if student_id}
+    if student_ids:
+        refresh_after_commit('students', refresh_fee_arrears, student_ids)
+
+
+def rebuild_fee_arrears(school_id=None):
+    """Recompute arrears from scratch (optionally for one school). Returns the number of rows written."""
+    fees = Fee.objects.all()
+    arrears = FeeArrears.objects.all()
+    if school_id:
+        fees = fees.filter(school_id=school_id)
+        arrears = arrears.filter(school_id=school_id)
+
+    with transaction.atomic():
+        arrears.delete()
+        rows = _arrears_rows(fees)
+        if school_id:
+            # A student's fees may sit under more than one school; keep the whole picture
+            rows = _arrears_rows(Fee.objects.filter(student_id__in=[row.student_id for row in rows]))
+        _upsert(rows)
+    logger.info(f"Rebuilt {len(rows)} fee arrears rows")
+    return len(rows)
+
+
+# =============================================================================
+# READS
+# =============================================================================
+def _bucket_range(bucket, today):
+    """(earliest, latest) oldest_unpaid_period for bucket; None for an open end."""
+    low, high = AGING_BUCKETS[bucket]
+    earliest = today - timedelta(days=high) if high is not None else None
+    latest = today - timedelta(days=low) if low else None  # months billed ahead count as 0-30
+    return earliest, latest
+
+
+def defaulters(school_id=None, student_class=None, min_months=1, bucket=None, since=None, today=None):
+    """
+    FeeArrears rows (as dicts, largest balance first) for students with at
+    least min_months unpaid months, with days_overdue and aging_bucket.
+    With since (a period date), unpaid_months and total_outstanding count
+    only the fees from since up to the current month.
+    Raises ValueError for an unknown bucket.
+    """
+    today = today or date.today()
+    min_months = max(int(min_months), 1)
+    rows = FeeArrears.objects.filter(unpaid_months__gte=min_months)
+    if school_id:
+        rows = rows.filter(school_id=school_id)
+    if student_class:
+        rows = rows.filter(student_class=student_class)
+    if bucket:
+        if bucket not in AGING_BUCKETS:
+            raise ValueError(f"Invalid bucket: {bucket}. Use one of {', '.join(AGING_BUCKETS)}")
+        earliest, latest = _bucket_range(bucket, today)
+        if latest is not None:
+            rows = rows.filter(oldest_unpaid_period__lte=latest)
+        if earliest is not None:
+            rows = rows.filter(oldest_unpaid_period__gte=earliest)
+
+    outstanding, months = 'total_outstanding', 'unpaid_months'
+    if since:
+        # The index narrows the candidates; their unpaid fees in the window
+        # are then counted per student (Fee student_id/period index)
+        window = Fee.objects.filter(
+            UNPAID, student_id=OuterRef('student_id'), period__range=[since, today.replace(day=1)],
+        ).values('student_id').order_by()
+        rows = rows.filter(latest_unpaid_period__gte=since).annotate(
+            window_months=Subquery(window.annotate(n=Count('month', distinct=True)).values('n')),
+            window_outstanding=Subquery(window.annotate(total=Sum('balance_due')).values('total')),
+        ).filter(window_months__gte=min_months)
+        outstanding, months = 'window_outstanding', 'window_months'
+
+    whens = [
+        When(oldest_unpaid_period__gte=today - timedelta(days=high), then=Value(name))
+        for name, (_, high) in AGING_BUCKETS.items() if high is not None
+    ]
+    rows = rows.annotate(
+        aging=Case(*whens, default=Value('90+'), output_field=CharField()),
+    ).order_by(f'-{outstanding}', 'student_id')
+
+    results = []
+    for row in rows.values(
+        'student_id', 'student_name', 'student_class', 'school_id', 'school__name', outstanding,
+        months, 'oldest_unpaid_month', 'oldest_unpaid_period', 'aging',
+    ):
+        row['total_outstanding'] = row.pop(outstanding)
+        row['unpaid_months'] = row.pop(months)
+        oldest = row.pop('oldest_unpaid_period')
+        row['aging_bucket'] = row.pop('aging')
+        row['days_overdue'] = max((today - oldest).days, 0) if oldest else 0
+        results.append(row)
+    return results
@@ -0,0 +1,211 @@
+"""
+Monthly fee generation for one or many schools in a single pass.
+
+    generate_month_fees(school_ids, 'Mar-2026')                 create
+    generate_month_fees(school_ids, 'Mar-2026', dry_run=True)   preview only
+
+However many schools are involved, the work is:
+
+    1. the schools, in one query
+    2. the fees that already exist for the month, in one query
+    3. every active student of those schools, in one query
+    4. one bulk_create in batches (plus one delete when overwriting)
+
+Fees follow the school's payment mode, as create_new_month_fees always has:
+
+    per_student            each student's monthly_fee
+    monthly_subscription   the subscription split evenly, rounded to paisa;
+                           the rounding difference goes to the first student
+                           so the month adds up to the subscription exactly
+
+With missing_only, schools that already have fees for the month only get
+rows for active students that have none yet, priced at their monthly_fee
+(as create_single_fee does); schools without fees are generated in full.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+
+from core.cache_helpers import fee_tags, invalidate_tags
+from .fee_arrears import schedule_arrears_refresh
+from .fee_rollups import schedule_rollup_refresh
+from .models import Fee, School, Student
+from .signals import muted_fee_signals
+
+logger = logging.getLogger(__name__)
+
+# Per-school outcomes
+CREATED = 'created'
+PREVIEW = 'preview'
+EXISTS = 'exists'  # fees already exist and neither force_overwrite nor missing_only was given
+NO_STUDENTS = 'no_students'
+UP_TO_DATE = 'up_to_date'  # missing_only, and every active student already has a fee
+INVALID_SUBSCRIPTION = 'invalid_subscription'
+NOT_FOUND = 'not_found'
+
+BATCH_SIZE = 1000
+
+
+def subscription_split(amount, student_count):
+    """(fee per student, adjustment for the first student) for a subscription split evenly."""
+    amount = Decimal(str(amount))
+    fee_per_student = (amount / student_count).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    return fee_per_student, amount - fee_per_student * student_count
+
+
+class _SchoolStudents:
+    __slots__ = ('rows', 'existing_ids')
+
+    def __init__(self):
+        self.rows = []
+        self.existing_ids = set()
+
+
+def _school_plan(school, month, students, existing, force_overwrite, missing_only, payment_date):
+    plan = {
+        "school_id": school.id,
+        "school_name": school.name,
+        "payment_mode": school.payment_mode,
+        "existing_records": existing,
+        "records": 0,
+        "total_amount": Decimal('0.00'),
+        "fee_per_student": None,
+        "adjustment": Decimal('0.00'),
+        "overwrite": False,
+        "fees": [],
+    }
+    existing_students = set()
+    if existing and missing_only:
+        existing_students = students.existing_ids
+    elif existing and not force_overwrite:
+        return dict(plan, status=EXISTS, error=f"Records for {month} already exist.")
+
+    if not students.rows:
+        return dict(plan, status=NO_STUDENTS, error=f"No active students found for {school.name}.")
+
+    rows = [row for row in students.rows if row['id'] not in existing_students]
+    if not rows:
+        return dict(plan, status=UP_TO_DATE)
+    if existing and missing_only:
+        # Topping up a generated month: students are priced individually
+        amounts = [Decimal(str(row['monthly_fee'] or 0)) for row in rows]
+    elif school.payment_mode == 'monthly_subscription':
+        if not school.monthly_subscription_amount or school.monthly_subscription_amount <= 0:
+            return dict(
+                plan, status=INVALID_SUBSCRIPTION,
+                error="School is in Monthly Subscription mode but subscription amount is not set or invalid.",
+            )
+        fee_per_student, adjustment = subscription_split(school.monthly_subscription_amount, len(rows))
+        amounts = [fee_per_student] * len(rows)
+        if amounts and adjustment:
+            amounts[0] += adjustment
+        plan.update(fee_per_student=fee_per_student, adjustment=adjustment)
+    else:
+        amounts = [Decimal(str(row['monthly_fee'] or 0)) for row in rows]
+
+    plan["fees"] = [
+        Fee(
+            student_id=row['id'],
+            student_name=row['name'],
+            student_class=row['student_class'],
+            monthly_fee=amount,
+            month=month,
+            total_fee=amount,
+            paid_amount=Decimal('0.00'),
+            balance_due=amount,
+            payment_date=payment_date,
+            status="Pending",
+            school_id=school.id,
+        )
+        for row, amount in zip(rows, amounts)
+    ]
+    plan.update(
+        records=len(plan["fees"]),
+        total_amount=sum(amounts, Decimal('0.00')),
+        overwrite=bool(existing and force_overwrite and not missing_only),
+    )
+    return plan
+
+
+def plan_month_fees(school_ids, month, force_overwrite=False, missing_only=False):
+    """Per-school plans (with unsaved Fee rows under "fees"), in the order of school_ids."""
+    school_ids = list(dict.fromkeys(int(school_id) for school_id in school_ids))
+    schools = School.objects.in_bulk(school_ids)
+
+    existing = defaultdict(int)
+    students = defaultdict(_SchoolStudents)
+    for school_id, student_id in Fee.objects.filter(school_id__in=schools, month=month).values_list('school_id', 'student_id'):
+        existing[school_id] += 1
+        students[school_id].existing_ids.add(student_id)
+
+    active = Student.objects.filter(status="Active", school_id__in=schools).order_by('school_id', 'id')
+    for row in active.values('id', 'name', 'student_class', 'monthly_fee', 'school_id'):
+        students[row['school_id']].rows.append(row)
+
+    payment_date = datetime.now().strftime("%Y-%m-15")
+    plans = []
+    for school_id in school_ids:
+        school = schools.get(school_id)
+        if school is None:
+            plans.append({"school_id": school_id, "status": NOT_FOUND, "error": "Invalid school_id provided.", "fees": []})
+            continue
+        plans.append(_school_plan(
+            school, month, students[school_id], existing[school_id], force_overwrite, missing_only, payment_date,
+        ))
+    return plans
+
+
+def _public(plan):
+    result = {key: value for key, value in plan.items() if key not in ('fees', 'overwrite')}
+    if plan.get("existing_records") and plan["fees"] and not plan["overwrite"]:
+        # Top-up of a generated month: name the students that were missing
+        result["students_added"] = [fee.student_name for fee in plan["fees"]]
+    for key in ('total_amount', 'fee_per_student', 'adjustment'):
+        if result.get(key) is not None:
+            result[key] = str(result[key])
+    return result
+
+
+def generate_month_fees(school_ids, month, force_overwrite=False, missing_only=False, dry_run=False):
+    """
+    Create (or with dry_run, preview) month's fees for every school in school_ids.
+
+    Returns {"month", "dry_run", "schools": [per-school result], "records_created",
+    "total_amount"}. Schools that cannot be generated (fees exist, no active
+    students, subscription amount missing) are reported with a status and an
+    error and do not stop the others.
+    """
+    plans = plan_month_fees(school_ids, month, force_overwrite=force_overwrite, missing_only=missing_only)
+    ready = [plan for plan in plans if plan.get("fees")]
+
+    if not dry_run and ready:
+        new_fees = [fee for plan in ready for fee in plan["fees"]]
+        overwrite_ids = [plan["school_id"] for plan in ready if plan["overwrite"]]
+        with transaction.atomic():
+            # The whole set is invalidated below, not once per row
+            student_ids = {fee.student_id for fee in new_fees}
+            with muted_fee_signals():
+                if overwrite_ids:
+                    replaced = Fee.objects.filter(school_id__in=overwrite_ids, month=month)
+                    student_ids.update(replaced.values_list('student_id', flat=True))
+                    replaced.delete()
+                Fee.objects.bulk_create(new_fees, batch_size=BATCH_SIZE)
+            touched = [plan["school_id"] for plan in ready]
+            schedule_rollup_refresh((school_id, month) for school_id in touched)
+            schedule_arrears_refresh(student_ids)
+            invalidate_tags(*{tag for school_id in touched for tag in fee_tags(month, school_id)})
+        logger.info(f"Generated {len(new_fees)} fees for {month} across {len(ready)} school(s)")
+
+    for plan in ready:
+        plan["status"] = PREVIEW if dry_run else CREATED
+    return {
+        "month": month,
+        "dry_run": dry_run,
+        "schools": [_public(plan) for plan in plans],
+        "records_created": 0 if dry_run else sum(plan["records"] for plan in ready),
+        "records_planned": sum(plan["records"] for plan in ready),
+        "total_amount": str(sum((plan["total_amount"] for plan in ready), Decimal('0.00'))),
+    }
@@ -0,0 +1,219 @@
+"""
+Fee listing for GET /api/fees/.
+
+Rows are read with values() over only the requested columns (the school name
+is a join, not a query per row) and can be returned three ways:
+
+    ?school_id=3&month=Mar-2026                  the whole list (legacy shape)
+    ?...&page_size=100[&cursor=...]              one keyset page:
+                                                 {"results", "next_cursor", "count"}
+    ?...&stream=1                                the whole list streamed as a
+                                                 JSON array (exports)
+
+    fields=student_name,balance_due,status       column projection (default: all)
+    sort=-balance_due                            server-side sort, any SORT_FIELDS key
+
+Pages use keyset pagination: the cursor carries the sort value and id of the
+last row, so page N costs the same as page 1 (no OFFSET scan).
+"""
+import base64
+import json
+
+from django.db.models import F, Q
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Fee, Student, fee_period
+
+# Response key -> ORM path
+FIELDS = {
+    "id": "id",
+    "student_id": "student_id",
+    "student_name": "student_name",
+    "school": "school__name",
+    "school_id": "school_id",
+    "student_class": "student_class",
+    "monthly_fee": "monthly_fee",
+    "month": "month",
+    "period": "period",
+    "total_fee": "total_fee",
+    "paid_amount": "paid_amount",
+    "balance_due": "balance_due",
+    "payment_date": "payment_date",
+    "date_received": "date_received",
+    "status": "status",
+}
+DEFAULT_FIELDS = [
+    "id", "student_name", "school", "student_class", "monthly_fee", "month", "total_fee",
+    "paid_amount", "balance_due", "payment_date", "status", "student_id",
+]
+
+# Sort key -> column ("month" sorts chronologically)
+SORT_FIELDS = {
+    "id": "id",
+    "student_name": "student_name",
+    "student_class": "student_class",
+    "month": "period",
+    "total_fee": "total_fee",
+    "paid_amount": "paid_amount",
+    "balance_due": "balance_due",
+    "status": "status",
+    "payment_date": "payment_date",
+}
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+STREAM_CHUNK_SIZE = 2000
+
+
+class FeeListingError(ValueError):
+    """Invalid listing parameter (reported as a 400)."""
+
+
+def filter_fees(params):
+    """Fee queryset for the school_id / class / month / from_month / to_month / time_slot filters."""
+    fees = Fee.objects.all()
+    if params.get("school_id"):
+        fees = fees.filter(school_id=params["school_id"])
+    if params.get("class"):
+        fees = fees.filter(student_class=params["class"])
+    if params.get("month"):
+        fees = fees.filter(month=params["month"])
+    # Month range, e.g. ?from_month=Jan-2025&to_month=Jun-2025 (indexed on period)
+    if params.get("from_month") or params.get("to_month"):
+        fees = fees.for_period_range(params.get("from_month"), params.get("to_month"))
+    if params.get("time_slot"):
+        fees = fees.filter(student_id__in=Student.objects.filter(time_slot_id=params["time_slot"]).values('id'))
+    if params.get("status"):
+        fees = fees.filter(status=params["status"])
+    return fees
+
+
+def parse_fields(value):
+    if not value:
+        return list(DEFAULT_FIELDS)
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in FIELDS]
+    if unknown:
+        raise FeeListingError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(FIELDS)}")
+    return fields
+
+
+def parse_sort(value):
+    """(column, descending) for a sort parameter such as "-balance_due"."""
+    value = (value or "id").strip()
+    descending = value.startswith("-")
+    key = value.lstrip("-")
+    if key not in SORT_FIELDS:
+        raise FeeListingError(f"Cannot sort by '{key}'. Available: {', '.join(SORT_FIELDS)}")
+    return SORT_FIELDS[key], descending
+
+
+def _ordering(column, descending):
+    if column == "id":
+        return ["-id" if descending else "id"]
+    if descending:
+        return [F(column).desc(nulls_last=True), "-id"]
+    return [F(column).asc(nulls_first=True), "id"]
+
+
+def _after(column, descending, value, last_id):
+    """Rows that come after (value, last_id) in _ordering(column, descending)."""
+    if column == "id":
+        return Q(id__lt=last_id) if descending else Q(id__gt=last_id)
+    if descending:
+        if value is None:
+            return Q(**{f"{column}__isnull": True, "id__lt": last_id})
+        return (
+            Q(**{f"{column}__lt": value})
+            | Q(**{column: value, "id__lt": last_id})
+            | Q(**{f"{column}__isnull": True})
+        )
+    if value is None:
+        return Q(**{f"{column}__isnull": True, "id__gt": last_id}) | Q(**{f"{column}__isnull": False})
+    return Q(**{f"{column}__gt": value}) | Q(**{column: value, "id__gt": last_id})
+
+
+def encode_cursor(sort, value, last_id):
+    # str() keeps dates and decimals exact; the ORM converts them back when filtering
+    payload = json.dumps([sort, value, last_id], default=str).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor, sort):
+    try:
+        stored_sort, value, last_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise FeeListingError("Invalid cursor")
+    if stored_sort != sort:
+        raise FeeListingError("Cursor belongs to a different sort order")
+    return value, int(last_id)
+
+
+def _rows(fees, fields, column):
+    """values() over the projected columns (plus what the cursor needs), renamed to response keys."""
+    paths = {FIELDS[field] for field in fields} | {"id", column}
+    for row in fees.values(*paths).iterator(chunk_size=STREAM_CHUNK_SIZE):
+        item = {field: row[FIELDS[field]] for field in fields}
+        if "school" in item and item["school"] is None:
+            item["school"] = ""
+        yield row, item
+
+
+def list_fees(params):
+    """
+    The listing for query params (a QueryDict or dict). Returns the legacy list,
+    a page dict, or a StreamingHttpResponse; raises FeeListingError on bad input.
+    """
+    fields = parse_fields(params.get("fields"))
+    ranged = params.get("from_month") or params.get("to_month")
+    sort = params.get("sort") or ("month" if ranged else "id")
+    column, descending = parse_sort(sort)
+    for key in ("from_month", "to_month"):
+        if params.get(key) and fee_period(params[key]) is None:
+            raise FeeListingError(f"Invalid {key}: {params[key]}. Use e.g. Mar-2026")
+    fees = filter_fees(params).order_by(*_ordering(column, descending))
+
+    if params.get("stream") in ("1", "true", True):
+        return _stream(fees, fields, column)
+
+    if not params.get("page_size") and not params.get("cursor"):
+        return [item for _, item in _rows(fees, fields, column)]
+
+    try:
+        page_size = min(max(int(params.get("page_size") or DEFAULT_PAGE_SIZE), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        raise FeeListingError("page_size must be a number")
+
+    count = None
+    if params.get("cursor"):
+        value, last_id = decode_cursor(params["cursor"], sort)
+        page_fees = fees.filter(_after(column, descending, value, last_id))
+    else:
+        count = fees.count()
+        page_fees = fees
+
+    rows = list(_rows(page_fees[:page_size + 1], fields, column))
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1][0]
+        next_cursor = encode_cursor(sort, last[column], last["id"])
+    page = {"results": [item for _, item in rows], "next_cursor": next_cursor}
+    if count is not None:
+        page["count"] = count
+    return page
+
+
+def _stream(fees, fields, column):
+    encoder = JSONEncoder()
+
+    def chunks():
+        yield "["
+        for index, (_, item) in enumerate(_rows(fees, fields, column)):
+            yield ("," if index else "") + encoder.encode(item)
+        yield "]"
+
+    response = StreamingHttpResponse(chunks(), content_type="application/json")
+    response["Content-Disposition"] = 'attachment; filename="fees.json"'
+    return response
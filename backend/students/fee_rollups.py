@@ -0,0 +1,227 @@
+"""
+Fee collection rollups (FeeCollectionRollup).
+
+Collection reports (fee summary, month comparison, recovery reports) read one
+row per school/month/class instead of aggregating the Fee table on every
+request:
+
+    fee_rollup_totals('Feb-2025')                  {school_id: totals}
+    fee_rollup_summary('Feb-2025', school_id=3)    totals across schools
+
+Rows are kept current from Fee writes. Fee.save/delete (students.signals) and
+the FeeQuerySet bulk paths pass the (school_id, month) groups they touched to
+schedule_rollup_refresh; once the transaction commits, each group touched is
+re-aggregated once from Fee (an indexed school/month scan) and upserted. Refreshes
+lock the School rows involved, so two writers to the same school cannot leave
+a stale total behind.
+
+rebuild_fee_rollups() recomputes everything (manage.py rebuild_fee_rollups).
+"""
+import logging
+import threading
+
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+
+from .models import Fee, FeeCollectionRollup, School, Student, fee_period
+
+logger = logging.getLogger(__name__)
+
+TOTAL_FIELDS = (
+    'total_fee', 'paid_amount', 'balance_due',
+    'record_count', 'paid_count', 'pending_count', 'active_students',
+)
+UPDATE_FIELDS = ('period',) + TOTAL_FIELDS + ('updated_at',)
+
+
+def _fee_aggregates(fees):
+    return fees.exclude(school_id=None).values('school_id', 'month', 'student_class').annotate(
+        total_fee_sum=Sum('total_fee'),
+        paid_amount_sum=Sum('paid_amount'),
+        balance_due_sum=Sum('balance_due'),
+        records=Count('id'),
+        paid=Count('id', filter=Q(status='Paid')),
+        pending=Count('id', filter=Q(status__in=['Pending', 'Overdue'])),
+    ).order_by()
+
+
+def _active_counts(school_ids=None):
+    """{(school_id, student_class): active students} in one grouped query."""
+    students = Student.objects.filter(status='Active')
+    if school_ids is not None:
+        students = students.filter(school_id__in=school_ids)
+    rows = students.values('school_id', 'student_class').annotate(total=Count('id')).order_by()
+    return {(row['school_id'], row['student_class']): row['total'] for row in rows}
+
+
+def _rollup_rows(aggregates, active):
+    return [
+        FeeCollectionRollup(
+            school_id=row['school_id'],
+            month=row['month'],
+            period=fee_period(row['month']),
+            student_class=row['student_class'],
+            total_fee=row['total_fee_sum'] or 0,
+            paid_amount=row['paid_amount_sum'] or 0,
+            balance_due=row['balance_due_sum'] or 0,
+            record_count=row['records'],
+            paid_count=row['paid'],
+            pending_count=row['pending'],
+            active_students=active.get((row['school_id'], row['student_class']), 0),
+        )
+        for row in aggregates
+    ]
+
+
+def _groups_filter(groups):
+    condition = Q()
+    for school_id, month in groups:
+        condition |= Q(school_id=school_id, month=month)
+    return condition
+
+
+def refresh_fee_rollups(groups):
+    """Recompute the rollup rows of each (school_id, month) in groups. Returns the number of rows written."""
+    groups = {(school_id, month) for school_id, month in groups if school_id and month}
+    if not groups:
+        return 0
+    school_ids = {school_id for school_id, _ in groups}
+    condition = _groups_filter(groups)
+
+    with transaction.atomic():
+        # Serializes refreshes per school; the aggregate below then sees every committed write
+        list(School.objects.select_for_update().filter(id__in=school_ids).order_by('id').values_list('id', flat=True))
+
+        rows = _rollup_rows(_fee_aggregates(Fee.objects.filter(condition)), _active_counts(school_ids))
+        current = {(row.school_id, row.month, row.student_class) for row in rows}
+        stale = [
+            pk for pk, school_id, month, student_class
+            in FeeCollectionRollup.objects.filter(condition).values_list('id', 'school_id', 'month', 'student_class')
+            if (school_id, month, student_class) not in current
+        ]
+        if stale:
+            FeeCollectionRollup.objects.filter(id__in=stale).delete()
+        if rows:
+            FeeCollectionRollup.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['school', 'month', 'student_class'],
+                update_fields=UPDATE_FIELDS,
+            )
+    return len(rows)
+
+
+# Items waiting for the current transaction to commit, per refresh. Every
+# schedule call registers a flush, but the first flush after commit drains the
+# set, so a transaction touching thousands of fees refreshes each group once.
+# Items left behind by a rolled-back transaction are refreshed by the next commit.
+_pending = threading.local()
+
+
+def _pending_set(name):
+    if not hasattr(_pending, name):
+        setattr(_pending, name, set())
+    return getattr(_pending, name)
+
+
+def _flush(name, refresh):
+    pending = _pending_set(name)
+    items = set(pending)
+    pending.clear()
+    if not items:
+        return
+    try:
+        refresh(items)
+    except Exception as e:
+        # The write has already committed; the rebuild commands repair any gap
+        logger.error(f"Summary {refresh.__name__} failed for {sorted(items, key=str)}: {str(e)}")
+
+
+def refresh_after_commit(name, refresh, items):
+    """Call refresh(items) once the current transaction commits, merged with other calls for name."""
+    _pending_set(name).update(items)
+    transaction.on_commit(lambda: _flush(name, refresh))
+
+
+def schedule_rollup_refresh(groups):
+    """Refresh the rollups of (school_id, month) groups once the current transaction commits."""
+    groups = {(school_id, month) for school_id, month in groups if school_id and month}
+    if groups:
+        refresh_after_commit('groups', refresh_fee_rollups, groups)
+
+
+def schedule_active_students_refresh(school_ids):
+    """refresh_active_students(school_ids) once the current transaction commits."""
+    school_ids = {school_id for school_id in school_ids if school_id}
+    if school_ids:
+        refresh_after_commit('schools', refresh_active_students, school_ids)
+
+
+def refresh_active_students(school_ids):
+    """Update active_students on each school's latest rollup month after student changes."""
+    school_ids = {school_id for school_id in school_ids if school_id}
+    if not school_ids:
+        return
+    latest = (
+        FeeCollectionRollup.objects.filter(school_id__in=school_ids, period__isnull=False)
+        .values('school_id').annotate(latest=Max('period')).order_by()
+    )
+    condition = Q()
+    for row in latest:
+        condition |= Q(school_id=row['school_id'], period=row['latest'])
+    if not condition:
+        return
+    active = _active_counts(school_ids)
+    rows = list(FeeCollectionRollup.objects.filter(condition))
+    for row in rows:
+        row.active_students = active.get((row.school_id, row.student_class), 0)
+    FeeCollectionRollup.objects.bulk_update(rows, ['active_students'])
+
+
+def rebuild_fee_rollups(school_id=None, month=None):
+    """Recompute rollups from scratch (optionally for one school and/or month). Returns rows written."""
+    fees = Fee.objects.all()
+    rollups = FeeCollectionRollup.objects.all()
+    if school_id:
+        fees = fees.filter(school_id=school_id)
+        rollups = rollups.filter(school_id=school_id)
+    if month:
+        fees = fees.filter(month=month)
+        rollups = rollups.filter(month=month)
+
+    with transaction.atomic():
+        rollups.delete()
+        rows = _rollup_rows(_fee_aggregates(fees), _active_counts([school_id] if school_id else None))
+        FeeCollectionRollup.objects.bulk_create(rows, batch_size=1000)
+    logger.info(f"Rebuilt {len(rows)} fee rollup rows")
+    return len(rows)
+
+
+# =============================================================================
+# READS
+# =============================================================================
+def _rollups(month, school_ids=None):
+    rows = FeeCollectionRollup.objects.filter(month=month)
+    if school_ids is not None:
+        rows = rows.filter(school_id__in=school_ids)
+    return rows
+
+
+def _sums():
+    # Annotations may not reuse the model's field names
+    return {f'{field}_sum': Sum(field) for field in TOTAL_FIELDS}
+
+
+def _totals(row):
+    return {field: row[f'{field}_sum'] or 0 for field in TOTAL_FIELDS}
+
+
+def fee_rollup_totals(month, school_ids=None):
+    """{school_id: {total_fee, paid_amount, balance_due, record_count, ...}} for month, summed over classes."""
+    totals = _rollups(month, school_ids).values('school_id').annotate(**_sums()).order_by()
+    return {row['school_id']: _totals(row) for row in totals}
+
+
+def fee_rollup_summary(month, school_id=None):
+    """Totals for month across all schools (or one school); missing months give zeros."""
+    return _totals(_rollups(month, [school_id] if school_id else None).aggregate(**_sums()))
@@ -0,0 +1,157 @@
+"""
+Bulk fee updates (POST /api/fees/update/).
+
+A request carries any number of rows like
+{"id": 12, "paid_amount": "1500", "total_fee": "2000", "date_received": "2026-03-02"}.
+The whole batch is processed with a fixed number of queries:
+
+    1. every Fee row, in one query
+    2. the students behind them (for ONLINE time-slot checks), in one query
+    3. the caller's assigned schools / teacher profile, once
+    4. one bulk_update inside a single transaction
+
+Every row is validated before anything is written, so a batch is applied
+completely or not at all, and each row gets its own result entry.
+"""
+import logging
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from core.cache_helpers import fee_tags, invalidate_tags
+from .models import Fee, Student
+
+logger = logging.getLogger(__name__)
+
+UPDATED = 'updated'
+NOT_FOUND = 'not_found'
+FORBIDDEN = 'forbidden'
+INVALID = 'invalid'
+NOT_APPLIED = 'not_applied'  # valid, but the batch was rejected because of another row
+
+UPDATE_FIELDS = ['total_fee', 'paid_amount', 'balance_due', 'status', 'date_received']
+
+
+class FeeAccess:
+    """The caller's fee permissions, loaded once per batch."""
+
+    def __init__(self, user):
+        self.is_admin = user.role == 'Admin'
+        self.school_ids = set()
+        self.teacher_profile_id = None
+        if not self.is_admin and user.role == 'Teacher':
+            self.school_ids = set(user.assigned_schools.values_list('id', flat=True))
+            profile = getattr(user, 'teacher_profile', None)
+            self.teacher_profile_id = profile.pk if profile else None
+
+    def allows(self, fee, student):
+        """Same rules as check_school_access / check_timeslot_access, without per-row queries."""
+        if self.is_admin:
+            return True
+        if student is not None and student.student_subtype == 'ONLINE':
+            slot = student.time_slot
+            return bool(slot and self.teacher_profile_id and slot.teacher_id == self.teacher_profile_id)
+        return not fee.school_id or fee.school_id in self.school_ids
+
+
+def _decimal(value, field):
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Invalid {field}: {value}")
+
+
+def _apply(fee, row):
+    """Apply one row to fee in memory; raises ValueError if the row is invalid."""
+    if "total_fee" in row:
+        fee.total_fee = _decimal(row["total_fee"], "total_fee")
+        if fee.total_fee < 0:
+            raise ValueError(f"Total fee cannot be negative for fee ID {fee.id}")
+
+    paid_amount = _decimal(row.get("paid_amount", 0), "paid_amount")
+    if paid_amount < 0:
+        raise ValueError(f"Paid amount cannot be negative for fee ID {fee.id}")
+    if paid_amount > fee.total_fee:
+        raise ValueError(f"Paid amount {paid_amount} exceeds total fee {fee.total_fee} for fee ID {fee.id}")
+
+    if row.get("date_received"):
+        try:
+            fee.date_received = datetime.strptime(str(row["date_received"]), '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError(f"Invalid date_received: {row['date_received']}. Use YYYY-MM-DD")
+
+    fee.paid_amount = paid_amount
+    fee.balance_due = fee.total_fee - fee.paid_amount
+    fee.status = "Paid" if fee.balance_due == 0 else "Pending"
+
+
+def serialize_fee(fee):
+    return {
+        "id": fee.id,
+        "total_fee": str(fee.total_fee),
+        "paid_amount": str(fee.paid_amount),
+        "balance_due": str(fee.balance_due),
+        "status": fee.status,
+        "date_received": fee.date_received.isoformat() if fee.date_received else None,
+        "student_name": fee.student_name,
+        "student_class": fee.student_class,
+        "month": fee.month,
+        "school": fee.school.name if fee.school else "",
+    }
+
+
+def bulk_update_fees(user, rows):
+    """
+    Validate and apply fee update rows for user.
+
+    Returns (results, updated_fees): one result dict per input row
+    ({"index", "id", "status", "error"?}) and the serialized fees that were
+    saved. Unknown fee IDs are skipped; any forbidden or invalid row means
+    nothing is saved.
+    """
+    results = []
+    ids = []
+    for row in rows:
+        try:
+            ids.append(int(row["id"]))
+        except (KeyError, TypeError, ValueError):
+            ids.append(None)
+
+    fees = Fee.objects.select_related('school').in_bulk([fee_id for fee_id in ids if fee_id is not None])
+    students = Student.objects.select_related('time_slot').in_bulk({fee.student_id for fee in fees.values()})
+    access = FeeAccess(user)
+
+    changed = {}
+    for index, (row, fee_id) in enumerate(zip(rows, ids)):
+        result = {"index": index, "id": fee_id}
+        fee = fees.get(fee_id)
+        if fee_id is None:
+            result.update(status=INVALID, error="Missing or invalid fee id")
+        elif fee is None:
+            result.update(status=NOT_FOUND, error=f"Fee ID {fee_id} not found")
+        elif not access.allows(fee, students.get(fee.student_id)):
+            result.update(status=FORBIDDEN, error=f"You don't have permission to update fee ID {fee_id}")
+        else:
+            try:
+                _apply(fee, row)
+                changed[fee.id] = fee
+                result["status"] = UPDATED
+            except ValueError as e:
+                result.update(status=INVALID, error=str(e))
+        results.append(result)
+
+    if any(result["status"] in (FORBIDDEN, INVALID) for result in results):
+        for result in results:
+            if result["status"] == UPDATED:
+                result["status"] = NOT_APPLIED
+        return results, []
+
+    if changed:
+        with transaction.atomic():
+            Fee.objects.bulk_update(list(changed.values()), UPDATE_FIELDS, batch_size=500)
+        # bulk_update does not send post_save; bump the fee cache tags directly
+        invalidate_tags(*{tag for fee in changed.values() for tag in fee_tags(fee.month, fee.school_id)})
+        logger.info(f"Bulk fee update by {user.username}: {len(changed)} updated, {len(rows) - len(changed)} skipped")
+
+    return results, [serialize_fee(fee) for fee in changed.values()]
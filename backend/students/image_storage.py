@@ -0,0 +1,449 @@
+"""
+Storage access for student progress images.
+
+All reads and writes of the "student-images" bucket go through this module:
+
+    - every upload is recorded as a StudentImage row (path, date, size,
+      dimensions) and listings are indexed queries on that table; images
+      uploaded before the table existed are indexed by the
+      backfill_student_images management command, or on first listing for
+      students that have no rows yet,
+    - signed URLs are created in one create_signed_urls call per batch and
+      cached until shortly before they expire,
+    - STUDENT_IMAGES_STORAGE = 'local' swaps Supabase for a directory on disk
+      so uploads, listings and signing work offline and in tests.
+
+Objects are stored as "<student_id>/<YYYY-MM-DD>_<uuid><ext>".
+"""
+import hashlib
+import logging
+import os
+import re
+import time
+from datetime import datetime
+from io import BytesIO
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+STUDENT_IMAGES_BUCKET = "student-images"
+SIGNED_URL_EXPIRY = 604800  # 7 days in seconds
+
+# Signed URLs are served from cache until this many seconds before they expire
+SIGNED_URL_CACHE_MARGIN = 600
+
+# A student with no StudentImage rows has their folder listed at most this often
+UNINDEXED_LISTING_INTERVAL = 86400
+
+FILENAME_RE = re.compile(r'^(\d{4}-\d{2}-\d{2})_[a-zA-Z0-9]+\.[a-zA-Z0-9]+$')
+
+
+def parse_image_date(filename):
+    """Session date encoded in an image filename, or None."""
+    match = FILENAME_RE.match(filename)
+    if not match:
+        return None
+    try:
+        return datetime.strptime(match.group(1), '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def path_from_url(url):
+    """Storage path of a (signed or public) student-images URL."""
+    if not url:
+        return None
+    path = url.split('?', 1)[0]
+    for marker in (f'/object/sign/{STUDENT_IMAGES_BUCKET}/', f'/object/public/{STUDENT_IMAGES_BUCKET}/'):
+        if marker in path:
+            return path.split(marker, 1)[1]
+    return None
+
+
+# =============================================================================
+# BACKENDS
+# =============================================================================
+class SupabaseImageStorage:
+    """student-images bucket in Supabase storage."""
+
+    def __init__(self, bucket=STUDENT_IMAGES_BUCKET):
+        from supabase import create_client
+        self.bucket = bucket
+        self._client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+
+    def _bucket(self):
+        return self._client.storage.from_(self.bucket)
+
+    def upload(self, path, data, content_type=None, upsert=False):
+        options = {"content-type": content_type} if content_type else {}
+        if upsert:
+            options["upsert"] = "true"
+        if options:
+            return self._bucket().upload(path, data, file_options=options)
+        return self._bucket().upload(path, data)
+
+    def download(self, path):
+        return self._bucket().download(path)
+
+    def remove(self, paths):
+        return self._bucket().remove(list(paths))
+
+    def list(self, folder):
+        """Every file in folder (paged; the API returns at most `limit` entries per call)."""
+        files = []
+        offset = 0
+        while True:
+            page = self._bucket().list(folder, {"limit": 1000, "offset": offset, "sortBy": {"column": "name", "order": "asc"}})
+            if isinstance(page, dict) and "error" in page:
+                raise RuntimeError(page["error"].get("message", "Failed to list files"))
+            files.extend(page or [])
+            if not page or len(page) < 1000:
+                return files
+            offset += len(page)
+
+    def create_signed_urls(self, paths, expires_in):
+        """Return {path: signed_url} for paths, signed in a single request."""
+        if not paths:
+            return {}
+        signed = self._bucket().create_signed_urls(list(paths), expires_in)
+        urls = {}
+        for item in signed:
+            url = item.get('signedURL') or item.get('signedUrl')
+            if item.get('error') or not url:
+                logger.warning(f"Failed to sign {item.get('path')}: {item.get('error')}")
+                continue
+            urls[item['path']] = url
+        return urls
+
+
+class LocalImageStorage:
+    """
+    Directory-backed stand-in for the bucket (STUDENT_IMAGES_STORAGE = 'local').
+
+    "Signed" URLs point at STUDENT_IMAGES_LOCAL_URL and carry an expiry and a
+    token derived from SECRET_KEY, mirroring the shape of Supabase URLs.
+    """
+
+    def __init__(self, root=None, base_url=None):
+        self.bucket = STUDENT_IMAGES_BUCKET
+        self.root = root or settings.STUDENT_IMAGES_LOCAL_DIR
+        self.base_url = base_url or settings.STUDENT_IMAGES_LOCAL_URL
+
+    def _full_path(self, path):
+        full = os.path.normpath(os.path.join(self.root, path))
+        if not full.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Invalid storage path: {path}")
+        return full
+
+    def upload(self, path, data, content_type=None, upsert=False):
+        full = self._full_path(path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, 'wb') as f:
+            f.write(data)
+        return {"path": path}
+
+    def download(self, path):
+        with open(self._full_path(path), 'rb') as f:
+            return f.read()
+
+    def remove(self, paths):
+        removed = []
+        for path in paths:
+            try:
+                os.remove(self._full_path(path))
+                removed.append({"name": path})
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def list(self, folder):
+        directory = self._full_path(folder.rstrip('/') + '/.')
+        if not os.path.isdir(directory):
+            return []
+        return [
+            {"name": name, "metadata": {"size": os.path.getsize(os.path.join(directory, name))}}
+            for name in sorted(os.listdir(directory))
+            if os.path.isfile(os.path.join(directory, name))
+        ]
+
+    def create_signed_urls(self, paths, expires_in):
+        expires = int(time.time()) + expires_in
+        urls = {}
+        for path in paths:
+            if not os.path.exists(self._full_path(path)):
+                continue
+            token = hashlib.sha256(f"{settings.SECRET_KEY}|{path}|{expires}".encode('utf-8')).hexdigest()[:32]
+            urls[path] = f"{self.base_url}{quote(path)}?token={token}&expires={expires}"
+        return urls
+
+
+_storage = None
+
+
+def get_image_storage():
+    """The configured backend (created once per process)."""
+    global _storage
+    if _storage is None:
+        if settings.STUDENT_IMAGES_STORAGE == 'local':
+            _storage = LocalImageStorage()
+        else:
+            _storage = SupabaseImageStorage()
+    return _storage
+
+
+def reset_image_storage():
+    """Forget the backend so the next call re-reads settings (used by tests)."""
+    global _storage
+    _storage = None
+
+
+# =============================================================================
+# SIGNED URLS
+# =============================================================================
+def _signed_url_cache_key(path):
+    return f"student_image_url:{hashlib.md5(path.encode('utf-8')).hexdigest()}"
+
+
+def sign_paths(paths):
+    """
+    Return {path: signed_url}, creating URLs only for paths not already cached.
+    Paths that could not be signed are left out.
+    """
+    paths = list(dict.fromkeys(p for p in paths if p))
+    if not paths:
+        return {}
+
+    keys = {_signed_url_cache_key(path): path for path in paths}
+    cached = cache.get_many(list(keys))
+    urls = {keys[key]: url for key, url in cached.items()}
+
+    missing = [path for path in paths if path not in urls]
+    if missing:
+        fresh = get_image_storage().create_signed_urls(missing, SIGNED_URL_EXPIRY)
+        urls.update(fresh)
+        cache.set_many(
+            {_signed_url_cache_key(path): url for path, url in fresh.items()},
+            SIGNED_URL_EXPIRY - SIGNED_URL_CACHE_MARGIN,
+        )
+        logger.debug(f"Signed {len(fresh)} student image URLs ({len(urls) - len(fresh)} from cache)")
+    return urls
+
+
+def sign_path(path):
+    return sign_paths([path]).get(path)
+
+
+def forget_signed_urls(paths):
+    """Drop cached URLs of deleted objects."""
+    cache.delete_many([_signed_url_cache_key(path) for path in paths])
+
+
+# =============================================================================
+# METADATA
+# =============================================================================
+def image_dimensions(data):
+    """(width, height) of image bytes, or (None, None) if they cannot be read."""
+    from PIL import Image as PILImage
+    try:
+        with PILImage.open(BytesIO(data)) as img:
+            return img.size
+    except Exception:
+        return None, None
+
+
+def record_student_image(student_id, path, session_date, data=None, file_size=None):
+    """Create or refresh the StudentImage row for an uploaded object."""
+    from .models import StudentImage
+
+    width, height = image_dimensions(data) if data is not None else (None, None)
+    image, _ = StudentImage.objects.update_or_create(
+        storage_path=path,
+        defaults={
+            "student_id": student_id,
+            "session_date": session_date,
+            "file_size": len(data) if data is not None else file_size,
+            "width": width,
+            "height": height,
+        },
+    )
+    return image
+
+
+def bucket_image_rows(student_id, files, known=()):
+    """Unsaved StudentImage rows for the files of a student's folder listing whose path is not in known."""
+    from .models import StudentImage
+
+    rows = []
+    for file in files:
+        name = file.get('name', '')
+        session_date = parse_image_date(name)
+        path = f"{student_id}/{name}"
+        if session_date and path not in known:
+            rows.append(StudentImage(
+                student_id=student_id,
+                session_date=session_date,
+                storage_path=path,
+                file_size=(file.get('metadata') or {}).get('size'),
+            ))
+    return rows
+
+
+def generate_student_image_variants(image):
+    """Render and store the thumbnail/WebP variants of a StudentImage (runs on a worker)."""
+    from core.image_variants import generate_variants
+
+    storage = get_image_storage()
+    data = storage.download(image.storage_path)
+    paths = generate_variants(
+        data,
+        image.storage_path,
+        lambda path, variant_data, content_type: storage.upload(path, variant_data, content_type, upsert=True),
+    )
+    image.thumbnail_path = paths['thumb']
+    if image.width is None:
+        image.width, image.height = image_dimensions(data)
+    image.save(update_fields=['thumbnail_path', 'width', 'height'])
+    return paths
+
+
+def queue_student_image_variants(image):
+    """Queue variant generation for a StudentImage; never fails the caller."""
+    from .tasks import generate_student_image_variants_task
+
+    try:
+        generate_student_image_variants_task.delay(image.id)
+    except Exception as e:
+        logger.error(f"Failed to queue variants for student image {image.id}: {str(e)}")
+
+
+def delete_student_images(paths):
+    """Remove objects (and their variants) from storage along with their rows and cached URLs."""
+    from core.image_variants import VARIANTS, variant_path
+    from .models import StudentImage
+
+    variant_paths = [variant_path(path, name) for path in paths for name in VARIANTS]
+    result = get_image_storage().remove(list(paths) + variant_paths)
+    StudentImage.objects.filter(storage_path__in=paths).delete()
+    forget_signed_urls(list(paths) + variant_paths)
+    return result
+
+
+# =============================================================================
+# LISTINGS
+# =============================================================================
+def _bucket_listed_cache_key(student_id):
+    return f"student_images_bucket_listed:{student_id}"
+
+
+def index_unindexed_students(student_ids):
+    """
+    Index the bucket contents of students that have no StudentImage rows
+    yet, so photos uploaded before uploads were recorded keep showing until
+    backfill_student_images has run. Students with rows are never listed;
+    the others at most once per UNINDEXED_LISTING_INTERVAL.
+    """
+    from .models import StudentImage
+
+    indexed = set(
+        StudentImage.objects.filter(student_id__in=student_ids, storage_path__isnull=False)
+        .values_list('student_id', flat=True).distinct()
+    )
+    keys = {_bucket_listed_cache_key(student_id): student_id for student_id in student_ids if student_id not in indexed}
+    if not keys:
+        return 0
+    listed = cache.get_many(list(keys))
+
+    rows = []
+    done = {}
+    for key, student_id in keys.items():
+        if key in listed:
+            continue
+        try:
+            files = get_image_storage().list(f"{student_id}/")
+        except Exception as e:
+            logger.warning(f"Error listing images for student {student_id}: {str(e)}")
+            continue
+        rows.extend(bucket_image_rows(student_id, files))
+        done[key] = True
+
+    if rows:
+        StudentImage.objects.bulk_create(rows, ignore_conflicts=True)
+        logger.info(f"Indexed {len(rows)} student images found in the bucket")
+    cache.set_many(done, UNINDEXED_LISTING_INTERVAL)
+    return len(rows)
+
+
+def _image_queryset(student_ids, start_date=None, end_date=None):
+    from .models import StudentImage
+
+    images = StudentImage.objects.filter(student_id__in=student_ids, storage_path__isnull=False)
+    if start_date:
+        images = images.filter(session_date__gte=start_date)
+    if end_date:
+        images = images.filter(session_date__lte=end_date)
+    return images
+
+
+def list_student_images(student_ids, start_date=None, end_date=None):
+    """
+    Return {student_id: [{"path", "filename", "date", "thumbnail_path"}, ...]}
+    newest first, optionally limited to start_date..end_date (inclusive).
+    """
+    student_ids = [int(student_id) for student_id in student_ids]
+    index_unindexed_students(student_ids)
+    listings = {student_id: [] for student_id in student_ids}
+    rows = _image_queryset(student_ids, start_date, end_date).order_by('-session_date', '-storage_path').values_list(
+        'student_id', 'session_date', 'storage_path', 'thumbnail_path'
+    )
+    for student_id, session_date, path, thumbnail_path in rows:
+        listings[student_id].append({
+            "path": path,
+            "filename": path.rsplit('/', 1)[-1],
+            "date": session_date,
+            "thumbnail_path": thumbnail_path,
+        })
+    return listings
+
+
+def count_student_images(student_ids, start_date=None, end_date=None):
+    """Return {student_id: number of images} in a single grouped query."""
+    from django.db.models import Count
+
+    student_ids = [int(student_id) for student_id in student_ids]
+    index_unindexed_students(student_ids)
+    counts = _image_queryset(student_ids, start_date, end_date).values('student_id').annotate(total=Count('id'))
+    return {row['student_id']: row['total'] for row in counts}
+
+
+def get_student_images_with_urls(student_id, start_date=None, end_date=None, limit=None):
+    """
+    One student's images (newest first) with signed URLs on each entry:
+    "url" (original) plus "thumbnail_url" and "webp_url" once the variants
+    have been generated (None until then). All URLs are signed in one batch.
+    """
+    from core.image_variants import variant_path
+
+    student_id = int(student_id)
+    images = list_student_images([student_id], start_date, end_date)[student_id]
+    if limit:
+        images = images[:limit]
+
+    for image in images:
+        image["webp_path"] = variant_path(image["path"], 'webp') if image["thumbnail_path"] else None
+    urls = sign_paths(
+        [image["path"] for image in images]
+        + [image[key] for image in images for key in ("thumbnail_path", "webp_path") if image[key]]
+    )
+    return [
+        dict(
+            image,
+            url=urls[image["path"]],
+            thumbnail_url=urls.get(image["thumbnail_path"]),
+            webp_url=urls.get(image["webp_path"]),
+        )
+        for image in images
+        if image["path"] in urls
+    ]
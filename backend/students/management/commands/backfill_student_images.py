@@ -0,0 +1,101 @@
+"""
+Management command to index existing progress photos into StudentImage.
+
+Uploads made through upload_student_image are recorded automatically; this
+command covers files that were uploaded before, and fills storage_path on
+legacy rows that only stored a signed URL. Until it has run, listings index
+the folder of each student without rows on first read
+(image_storage.index_unindexed_students).
+
+Usage:
+    python manage.py backfill_student_images
+    python manage.py backfill_student_images --dry-run
+    python manage.py backfill_student_images --school-id 5
+    python manage.py backfill_student_images --with-dimensions
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand
+
+from students.image_storage import (
+    bucket_image_rows,
+    get_image_storage,
+    image_dimensions,
+    path_from_url,
+)
+from students.models import Student, StudentImage
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Index existing student progress images (student-images bucket) into StudentImage'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would be indexed without making changes'
+        )
+        parser.add_argument(
+            '--school-id',
+            type=int,
+            help='Only index students from this school ID'
+        )
+        parser.add_argument(
+            '--with-dimensions',
+            action='store_true',
+            help='Download each new image to record its width and height (slow)'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        storage = get_image_storage()
+
+        # 1. Legacy rows: derive storage_path from the stored signed URL
+        fixed = 0
+        for image in StudentImage.objects.filter(storage_path__isnull=True).exclude(image_url=''):
+            path = path_from_url(image.image_url)
+            if not path or StudentImage.objects.filter(storage_path=path).exists():
+                continue
+            fixed += 1
+            if not dry_run:
+                image.storage_path = path
+                image.save(update_fields=['storage_path'])
+
+        # 2. Bucket contents that have no row yet
+        students = Student.objects.all()
+        if options['school_id']:
+            students = students.filter(school_id=options['school_id'])
+
+        known = set(StudentImage.objects.exclude(storage_path__isnull=True).values_list('storage_path', flat=True))
+        created = 0
+        errors = 0
+        for student_id in students.values_list('id', flat=True).iterator():
+            try:
+                files = storage.list(f"{student_id}/")
+            except Exception as e:
+                errors += 1
+                self.stderr.write(f"Failed to list images for student {student_id}: {e}")
+                continue
+
+            new_images = bucket_image_rows(student_id, files, known)
+            if options['with_dimensions'] and not dry_run:
+                for image in new_images:
+                    try:
+                        image.width, image.height = image_dimensions(storage.download(image.storage_path))
+                    except Exception as e:
+                        logger.warning(f"Could not download {image.storage_path}: {e}")
+
+            created += len(new_images)
+            if new_images and not dry_run:
+                StudentImage.objects.bulk_create(new_images, ignore_conflicts=True)
+
+        prefix = '[DRY RUN] Would index' if dry_run else 'Indexed'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{prefix} {created} images, linked {fixed} legacy rows to their storage path '
+                f'({errors} students could not be listed)'
+            )
+        )
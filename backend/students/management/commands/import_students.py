@@ -0,0 +1,77 @@
+"""
+Management command to import students from a CSV or Excel (.xlsx) file.
+
+Same pipeline as POST /api/students/import/ (students.student_import):
+rows are validated in batches, invalid rows are reported and skipped.
+
+Usage:
+    python manage.py import_students students.xlsx --school-id 5 --password Welcome123
+    python manage.py import_students students.csv --dry-run --report errors.csv
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from students.models import School
+from students.student_import import StudentImportError, error_report_csv, import_students
+
+
+class Command(BaseCommand):
+    help = 'Import students (with their logins) from a CSV or .xlsx file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or .xlsx file to import')
+        parser.add_argument(
+            '--school-id',
+            type=int,
+            help='School of rows without a school column'
+        )
+        parser.add_argument(
+            '--password',
+            help='Password of rows without a password column'
+        )
+        parser.add_argument(
+            '--allow-duplicates',
+            action='store_true',
+            help='Import rows matching an existing student (same school, name and class)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the file without creating anything'
+        )
+        parser.add_argument(
+            '--report',
+            help='Write the row errors to this CSV file'
+        )
+
+    def handle(self, *args, **options):
+        default_school = None
+        if options['school_id']:
+            default_school = School.objects.filter(pk=options['school_id']).first()
+            if default_school is None:
+                raise CommandError(f"School {options['school_id']} does not exist")
+
+        try:
+            with open(options['path'], 'rb') as upload:
+                report = import_students(
+                    upload,
+                    default_school=default_school,
+                    default_password=options['password'],
+                    allow_duplicates=options['allow_duplicates'],
+                    dry_run=options['dry_run'],
+                    filename=options['path'],
+                )
+        except (OSError, StudentImportError) as e:
+            raise CommandError(str(e))
+
+        for error in report['errors']:
+            messages = '; '.join(f"{field}: {message}" for field, message in error['errors'].items())
+            self.stdout.write(self.style.WARNING(f"Row {error['row']}: {messages}"))
+        if options['report']:
+            with open(options['report'], 'w', newline='') as report_file:
+                report_file.write(error_report_csv(report))
+
+        verb = 'valid' if options['dry_run'] else 'imported'
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['created']} of {report['rows']} row(s) {verb}, {report['failed']} failed"
+        ))
@@ -0,0 +1,31 @@
+"""
+Management command to recompute the per-student attendance stats
+(StudentAttendanceStats) behind the student dashboard.
+
+Stats are maintained automatically from attendance writes and built on first
+read; run this after bulk data fixes made outside the ORM, or to fill every
+row ahead of time.
+
+Usage:
+    python manage.py rebuild_attendance_stats
+    python manage.py rebuild_attendance_stats --school-id 5
+"""
+
+from django.core.management.base import BaseCommand
+
+from students.attendance_stats import rebuild_attendance_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-student attendance stats from the Attendance table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--school-id',
+            type=int,
+            help='Only rebuild stats of students in this school ID'
+        )
+
+    def handle(self, *args, **options):
+        rows = rebuild_attendance_stats(school_id=options['school_id'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} attendance stats rows'))
@@ -0,0 +1,29 @@
+"""
+Management command to recompute the per-student fee arrears (FeeArrears).
+
+Arrears are maintained automatically from fee writes; run this after bulk
+data fixes made outside the ORM, or to repair drift.
+
+Usage:
+    python manage.py rebuild_fee_arrears
+    python manage.py rebuild_fee_arrears --school-id 5
+"""
+
+from django.core.management.base import BaseCommand
+
+from students.fee_arrears import rebuild_fee_arrears
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-student fee arrears from the Fee table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--school-id',
+            type=int,
+            help='Only rebuild arrears of students with fees in this school ID'
+        )
+
+    def handle(self, *args, **options):
+        rows = rebuild_fee_arrears(school_id=options['school_id'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} fee arrears rows'))
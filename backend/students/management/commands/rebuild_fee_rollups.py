@@ -0,0 +1,34 @@
+"""
+Management command to recompute the fee collection rollups (FeeCollectionRollup).
+
+Rollups are maintained automatically from fee writes; run this after bulk
+data fixes made outside the ORM, or to repair drift.
+
+Usage:
+    python manage.py rebuild_fee_rollups
+    python manage.py rebuild_fee_rollups --school-id 5
+    python manage.py rebuild_fee_rollups --month Feb-2026
+"""
+
+from django.core.management.base import BaseCommand
+
+from students.fee_rollups import rebuild_fee_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute fee collection rollups per school/month/class from the Fee table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--school-id',
+            type=int,
+            help='Only rebuild rollups of this school ID'
+        )
+        parser.add_argument(
+            '--month',
+            help='Only rebuild rollups of this month label (e.g. Feb-2026)'
+        )
+
+    def handle(self, *args, **options):
+        rows = rebuild_fee_rollups(school_id=options['school_id'], month=options['month'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} fee rollup rows'))
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.6 on 2026-10-16 20:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0029_add_timeslot_model'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentimage',
+            name='file_size',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentimage',
+            name='storage_path',
+            field=models.CharField(blank=True, max_length=500, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='studentimage',
+            name='thumbnail_path',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='studentimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='studentimage',
+            name='image_url',
+            field=models.URLField(blank=True, max_length=1000),
+        ),
+        migrations.AddIndex(
+            model_name='studentimage',
+            index=models.Index(fields=['student', 'session_date'], name='students_st_student_bdbc50_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentimage',
+            index=models.Index(fields=['session_date'], name='students_st_session_ca50d7_idx'),
+        ),
+    ]
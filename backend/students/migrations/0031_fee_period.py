@@ -0,0 +1,54 @@
+# Generated by Django 5.1.6 on 2026-10-16 20:48
+
+from datetime import datetime
+
+from django.db import migrations, models
+
+
+def backfill_fee_period(apps, schema_editor):
+    """Set period from the month label; one UPDATE per distinct label."""
+    Fee = apps.get_model('students', 'Fee')
+    for month in Fee.objects.values_list('month', flat=True).distinct():
+        for fmt in ("%b-%Y", "%B-%Y", "%Y-%m"):
+            try:
+                period = datetime.strptime((month or '').strip(), fmt).date()
+            except ValueError:
+                continue
+            Fee.objects.filter(month=month).update(period=period)
+            break
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0030_student_image_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fee',
+            name='period',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_fee_period, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='fee',
+            index=models.Index(fields=['school', 'period'], name='students_fe_school__d1c14a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fee',
+            index=models.Index(fields=['student_id', 'period'], name='students_fe_student_7a3b61_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fee',
+            index=models.Index(fields=['period', 'status'], name='students_fe_period_1fd1ed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fee',
+            index=models.Index(fields=['school', 'month'], name='students_fe_school__0a107c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fee',
+            index=models.Index(fields=['student_id', 'month'], name='students_fe_student_b29a28_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.1.6 on 2026-10-16 20:51
+
+from datetime import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def build_fee_rollups(apps, schema_editor):
+    """Initial rollups; later changes are maintained by students.fee_rollups."""
+    Fee = apps.get_model('students', 'Fee')
+    Student = apps.get_model('students', 'Student')
+    FeeCollectionRollup = apps.get_model('students', 'FeeCollectionRollup')
+
+    active = {
+        (row['school_id'], row['student_class']): row['total']
+        for row in Student.objects.filter(status='Active').values('school_id', 'student_class')
+        .annotate(total=Count('id')).order_by()
+    }
+    groups = Fee.objects.exclude(school_id=None).values('school_id', 'month', 'student_class').annotate(
+        total_fee_sum=Sum('total_fee'),
+        paid_amount_sum=Sum('paid_amount'),
+        balance_due_sum=Sum('balance_due'),
+        records=Count('id'),
+        paid=Count('id', filter=Q(status='Paid')),
+        pending=Count('id', filter=Q(status__in=['Pending', 'Overdue'])),
+    ).order_by()
+
+    rows = []
+    for row in groups:
+        period = None
+        for fmt in ("%b-%Y", "%B-%Y", "%Y-%m"):
+            try:
+                period = datetime.strptime(row['month'].strip(), fmt).date()
+                break
+            except ValueError:
+                continue
+        rows.append(FeeCollectionRollup(
+            school_id=row['school_id'],
+            month=row['month'],
+            period=period,
+            student_class=row['student_class'],
+            total_fee=row['total_fee_sum'] or 0,
+            paid_amount=row['paid_amount_sum'] or 0,
+            balance_due=row['balance_due_sum'] or 0,
+            record_count=row['records'],
+            paid_count=row['paid'],
+            pending_count=row['pending'],
+            active_students=active.get((row['school_id'], row['student_class']), 0),
+        ))
+    FeeCollectionRollup.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0031_fee_period'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeeCollectionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.CharField(max_length=10)),
+                ('period', models.DateField(blank=True, null=True)),
+                ('student_class', models.CharField(max_length=50)),
+                ('total_fee', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('balance_due', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('record_count', models.PositiveIntegerField(default=0)),
+                ('paid_count', models.PositiveIntegerField(default=0)),
+                ('pending_count', models.PositiveIntegerField(default=0)),
+                ('active_students', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fee_rollups', to='students.school')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month', 'school'], name='students_fe_month_bd83c0_idx'), models.Index(fields=['school', 'period'], name='students_fe_school__ed348b_idx')],
+                'constraints': [models.UniqueConstraint(fields=('school', 'month', 'student_class'), name='unique_fee_rollup_group')],
+            },
+        ),
+        migrations.RunPython(build_fee_rollups, migrations.RunPython.noop),
+    ]
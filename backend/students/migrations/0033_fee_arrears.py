@@ -0,0 +1,70 @@
+# Generated by Django 5.1.6 on 2026-10-16 21:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+
+
+def build_fee_arrears(apps, schema_editor):
+    """Initial arrears; later changes are maintained by students.fee_arrears."""
+    Fee = apps.get_model('students', 'Fee')
+    Student = apps.get_model('students', 'Student')
+    FeeArrears = apps.get_model('students', 'FeeArrears')
+
+    aggregates = list(
+        Fee.objects.filter(status__in=['Pending', 'Overdue'], balance_due__gt=0).values('student_id').annotate(
+            outstanding=Sum('balance_due'),
+            months=Count('month', distinct=True),
+            oldest=Min('period'),
+            latest=Max('period'),
+            fee_name=Max('student_name'),
+            fee_class=Max('student_class'),
+            fee_school=Max('school_id'),
+        ).order_by()
+    )
+    students = Student.objects.in_bulk([row['student_id'] for row in aggregates])
+    rows = []
+    for row in aggregates:
+        student = students.get(row['student_id'])
+        rows.append(FeeArrears(
+            student_id=row['student_id'],
+            student_name=student.name if student else row['fee_name'],
+            student_class=student.student_class if student else row['fee_class'],
+            school_id=(student.school_id if student else None) or row['fee_school'],
+            total_outstanding=row['outstanding'] or 0,
+            unpaid_months=row['months'],
+            oldest_unpaid_month=row['oldest'].strftime('%b-%Y') if row['oldest'] else '',
+            oldest_unpaid_period=row['oldest'],
+            latest_unpaid_period=row['latest'],
+        ))
+    FeeArrears.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0032_fee_collection_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeeArrears',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_id', models.BigIntegerField(unique=True)),
+                ('student_name', models.CharField(max_length=100)),
+                ('student_class', models.CharField(max_length=50)),
+                ('total_outstanding', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('unpaid_months', models.PositiveIntegerField(default=0)),
+                ('oldest_unpaid_month', models.CharField(blank=True, max_length=10)),
+                ('oldest_unpaid_period', models.DateField(blank=True, null=True)),
+                ('latest_unpaid_period', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('school', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='fee_arrears', to='students.school')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['school', 'student_class'], name='students_fe_school__560793_idx'), models.Index(fields=['school', 'oldest_unpaid_period'], name='students_fe_school__6f65ad_idx'), models.Index(fields=['oldest_unpaid_period'], name='students_fe_oldest__4907a5_idx'), models.Index(fields=['unpaid_months'], name='students_fe_unpaid__2a3985_idx')],
+            },
+        ),
+        migrations.RunPython(build_fee_arrears, migrations.RunPython.noop),
+    ]
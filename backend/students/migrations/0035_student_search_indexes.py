@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-16 22:00
+
+from django.db import migrations
+
+# Trigram indexes behind students.search. Plain substring matches
+# (icontains) compare UPPER(column), so those get expression indexes.
+INDEXES = {
+    'students_student_name_trgm': 'name gin_trgm_ops',
+    'students_student_name_upper_trgm': 'UPPER(name) gin_trgm_ops',
+    'students_student_reg_num_upper_trgm': 'UPPER(reg_num) gin_trgm_ops',
+    'students_student_phone_trgm': 'phone gin_trgm_ops',
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    """PostgreSQL only; other databases fall back to unindexed matching."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, expression in INDEXES.items():
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON students_student USING gin ({expression})')
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0034_idsequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-16 23:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0036_attendance_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentAttendanceStats',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='attendance_stats', serialize=False, to='students.student')),
+                ('total_sessions', models.PositiveIntegerField(default=0)),
+                ('present_sessions', models.PositiveIntegerField(default=0)),
+                ('learning_streak', models.PositiveIntegerField(default=0)),
+                ('last_session_date', models.DateField(blank=True, null=True)),
+                ('month_start', models.DateField(blank=True, null=True)),
+                ('month_sessions', models.PositiveIntegerField(default=0)),
+                ('month_present', models.PositiveIntegerField(default=0)),
+                ('week_start', models.DateField(blank=True, null=True)),
+                ('week', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-17 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0037_studentattendancestats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,6 +1,9 @@
+from datetime import datetime
+
 from django.db import models
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ObjectDoesNotExist
+from django.utils import timezone
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
@@ -303,6 +306,87 @@ class Student(models.Model):
         return self.user.profile_photo_url if self.user else None
 
     
+FEE_MONTH_FORMATS = ("%b-%Y", "%B-%Y", "%Y-%m")
+
+
+def fee_period(month):
+    """First day of the month named by a Fee.month label ("Feb-2025"), or None if it cannot be parsed."""
+    if not month:
+        return None
+    for fmt in FEE_MONTH_FORMATS:
+        try:
+            return datetime.strptime(month.strip(), fmt).date().replace(day=1)
+        except ValueError:
+            continue
+    return None
+
+
+def fee_month_label(period):
+    """Fee.month label ("Feb-2025") of a period date."""
+    return period.strftime("%b-%Y")
+
+
+class FeeQuerySet(models.QuerySet):
+    """
+    Keeps Fee.period in step with Fee.month, and the fee collection rollups
+    (students.fee_rollups) and arrears (students.fee_arrears) up to date, on
+    the bulk paths that skip save().
+    """
+
+    @staticmethod
+    def _fees_changed(groups, student_ids):
+        from .fee_arrears import schedule_arrears_refresh
+        from .fee_rollups import schedule_rollup_refresh
+
+        schedule_rollup_refresh(groups)
+        schedule_arrears_refresh(student_ids)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for fee in objs:
+            fee.sync_period()
+        created = super().bulk_create(objs, *args, **kwargs)
+        self._fees_changed({(fee.school_id, fee.month) for fee in objs}, {fee.student_id for fee in objs})
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        if 'month' in fields and 'period' not in fields:
+            for fee in objs:
+                fee.sync_period()
+            fields = list(fields) + ['period']
+        updated = super().bulk_update(objs, fields, *args, **kwargs)
+        self._fees_changed({(fee.school_id, fee.month) for fee in objs}, {fee.student_id for fee in objs})
+        return updated
+
+    def update(self, **kwargs):
+        if 'month' in kwargs and 'period' not in kwargs:
+            kwargs['period'] = fee_period(kwargs['month'])
+        touched = set(self.values_list('school_id', 'month', 'student_id').distinct().order_by())
+        updated = super().update(**kwargs)
+        if 'school' in kwargs:
+            kwargs['school_id'] = getattr(kwargs['school'], 'pk', kwargs['school'])
+        groups = {(school_id, month) for school_id, month, _ in touched}
+        self._fees_changed(
+            groups | {(kwargs.get('school_id', school_id), kwargs.get('month', month)) for school_id, month in groups},
+            {student_id for _, _, student_id in touched},
+        )
+        return updated
+
+    def for_period_range(self, start=None, end=None):
+        """Fees whose period lies in start..end (dates or "Feb-2025" labels, inclusive)."""
+        qs = self
+        if isinstance(start, str):
+            start = fee_period(start)
+        if isinstance(end, str):
+            end = fee_period(end)
+        if start:
+            qs = qs.filter(period__gte=start)
+        if end:
+            qs = qs.filter(period__lte=end)
+        return qs
+
+
 class Fee(models.Model):
     student_id = models.BigIntegerField()  # Keep student ID
     student_name = models.CharField(max_length=100, default="Unknown")  # New Field
@@ -313,6 +397,7 @@ class Fee(models.Model):
 
 
     month = models.CharField(max_length=10)  # E.g., "Feb-2025"
+    period = models.DateField(null=True, blank=True)  # First day of `month`; kept in sync on save
     total_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     paid_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     balance_due = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
@@ -325,9 +410,109 @@ class Fee(models.Model):
     ]
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Pending')
 
+    objects = FeeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['school', 'period']),
+            models.Index(fields=['student_id', 'period']),
+            models.Index(fields=['period', 'status']),
+            models.Index(fields=['school', 'month']),
+            models.Index(fields=['student_id', 'month']),
+        ]
+
     def __str__(self):
         return f"{self.student_name} - {self.month}"
 
+    def sync_period(self):
+        self.period = fee_period(self.month)
+
+    def save(self, *args, **kwargs):
+        self.sync_period()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'month' in update_fields and 'period' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['period']
+        super().save(*args, **kwargs)
+
+
+class FeeCollectionRollup(models.Model):
+    """
+    Fee totals per school, month and class, maintained from Fee writes by
+    students.fee_rollups (rebuild with `manage.py rebuild_fee_rollups`).
+
+    Collection reports read these rows instead of aggregating Fee. Fees
+    without a school are not rolled up.
+    """
+    school = models.ForeignKey("students.School", on_delete=models.CASCADE, related_name='fee_rollups')
+    month = models.CharField(max_length=10)  # Fee.month label, e.g. "Feb-2025"
+    period = models.DateField(null=True, blank=True)
+    student_class = models.CharField(max_length=50)
+    total_fee = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    paid_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    balance_due = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    record_count = models.PositiveIntegerField(default=0)
+    paid_count = models.PositiveIntegerField(default=0)
+    pending_count = models.PositiveIntegerField(default=0)  # Pending or Overdue
+    active_students = models.PositiveIntegerField(default=0)  # Active students in the class when last refreshed
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['school', 'month', 'student_class'], name='unique_fee_rollup_group'),
+        ]
+        indexes = [
+            models.Index(fields=['month', 'school']),
+            models.Index(fields=['school', 'period']),
+        ]
+
+    def __str__(self):
+        return f"{self.school_id} {self.month} {self.student_class}"
+
+
+class FeeArrears(models.Model):
+    """
+    What one student owes across all months, maintained from Fee writes by
+    students.fee_arrears (rebuild with `manage.py rebuild_fee_arrears`).
+
+    A row exists only while the student has unpaid (Pending/Overdue) fees.
+    Aging is derived from oldest_unpaid_period at read time, so buckets
+    never go stale.
+    """
+    student_id = models.BigIntegerField(unique=True)  # Fee.student_id
+    student_name = models.CharField(max_length=100)
+    student_class = models.CharField(max_length=50)
+    school = models.ForeignKey("students.School", on_delete=models.CASCADE, null=True, blank=True, related_name='fee_arrears')
+    total_outstanding = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    unpaid_months = models.PositiveIntegerField(default=0)
+    oldest_unpaid_month = models.CharField(max_length=10, blank=True)  # Fee.month label
+    oldest_unpaid_period = models.DateField(null=True, blank=True)
+    latest_unpaid_period = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['school', 'student_class']),
+            models.Index(fields=['school', 'oldest_unpaid_period']),
+            models.Index(fields=['oldest_unpaid_period']),
+            models.Index(fields=['unpaid_months']),
+        ]
+
+    def __str__(self):
+        return f"{self.student_name}: {self.total_outstanding} over {self.unpaid_months} month(s)"
+
+
+class IdSequence(models.Model):
+    """
+    Counter behind generated identifiers such as Student.reg_num and
+    InventoryItem.unique_id, one row per "scope:prefix" (see students.sequences).
+    """
+    name = models.CharField(max_length=120, unique=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} = {self.last_value}"
+
+
 class Attendance(models.Model):
     student = models.ForeignKey('students.Student', on_delete=models.CASCADE)
     session_date = models.DateField()
@@ -337,10 +522,69 @@ class Attendance(models.Model):
     achieved_topic = models.TextField(null=True, blank=True)  # ✅ This must exist
 
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True)  # When the server wrote the row
+    # When the status held was decided: the device's time for offline sync,
+    # else the time of the write; offline conflicts are resolved on it (attendance.sync)
+    changed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         unique_together = ('student', 'session_date')  # Prevent duplicate attendance records
+        indexes = [
+            # Offline sync deltas (attendance.sync) read rows changed since a token
+            models.Index(fields=['updated_at', 'id'], name='attendance_updated_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Single-row edits are made now; the batch upserts in attendance.marking set changed_at themselves
+        self.changed_at = timezone.now()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'changed_at' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['changed_at']
+        super().save(*args, **kwargs)
+
+
+class StudentAttendanceStats(models.Model):
+    """
+    Attendance figures shown on the student dashboard, one row per student,
+    refreshed from attendance writes (see students.attendance_stats).
+    """
+    student = models.OneToOneField(
+        'students.Student', on_delete=models.CASCADE, primary_key=True, related_name='attendance_stats'
+    )
+    total_sessions = models.PositiveIntegerField(default=0)
+    present_sessions = models.PositiveIntegerField(default=0)
+    learning_streak = models.PositiveIntegerField(default=0)  # Present sessions since the latest Absent
+    last_session_date = models.DateField(null=True, blank=True)
+
+    # Counts for the month starting month_start
+    month_start = models.DateField(null=True, blank=True)
+    month_sessions = models.PositiveIntegerField(default=0)
+    month_present = models.PositiveIntegerField(default=0)
+
+    # {"2026-03-02": ["Present", "Loops"], ...} for the week starting week_start (a Monday)
+    week_start = models.DateField(null=True, blank=True)
+    week = models.JSONField(default=dict)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.student_id}: {self.present_sessions}/{self.total_sessions} present, streak {self.learning_streak}"
+
+
+class AttendanceSyncBatch(models.Model):
+    """
+    A batch of attendance records queued offline and sent by the mobile app,
+    kept by its client-generated batch_id so a retried batch is applied only
+    once (see attendance.sync).
+    """
+    batch_id = models.CharField(max_length=64, unique=True)
+    teacher = models.ForeignKey('students.CustomUser', on_delete=models.CASCADE, related_name='attendance_sync_batches')
+    record_count = models.PositiveIntegerField(default=0)
+    result = models.JSONField(default=dict)  # The outcome returned to the client
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.batch_id} ({self.record_count} record(s))"
 
 
 class LessonPlan(models.Model):
@@ -410,11 +654,25 @@ class LessonPlan(models.Model):
 
 
 class StudentImage(models.Model):
+    """
+    Progress photo stored in the "student-images" bucket.
+    Source of truth for image listings (see students.image_storage).
+    """
     student = models.ForeignKey(Student, on_delete=models.CASCADE)  # Links image to a student
     session_date = models.DateField()  # Date when the image was uploaded
-    image_url = models.URLField()  # Stores the image URL
+    image_url = models.URLField(max_length=1000, blank=True)  # Legacy: signed URL at upload time
+    storage_path = models.CharField(max_length=500, unique=True, null=True, blank=True)  # "<student_id>/<date>_<uuid>.jpg"
+    thumbnail_path = models.CharField(max_length=500, blank=True)
+    file_size = models.PositiveIntegerField(null=True, blank=True)  # Bytes
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', 'session_date']),
+            models.Index(fields=['session_date']),
+        ]
 
     def __str__(self):
         return f"Image for {self.student.name} on {self.session_date}"
@@ -0,0 +1,83 @@
+"""
+Password hashing for bulk user creation.
+
+Each password hash (PBKDF2 by default) is deliberately slow, so creating
+hundreds of users one create_user() at a time spends most of its time
+hashing on one core. hash_passwords() hashes them on a process pool (one
+per web worker process, created lazily) with the project's default hasher.
+
+Pool workers only import the hasher class, never the app registry, so they
+start quickly and hold no database connections.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+
+# Passwords sent to a worker at a time
+CHUNK_SIZE = 32
+
+
+def encode_passwords(hasher_path, passwords):
+    """Hash passwords with the hasher class at hasher_path. Runs inside the hash pool."""
+    hasher = import_string(hasher_path)()
+    return [hasher.encode(password, hasher.salt()) for password in passwords]
+
+
+def get_hash_pool():
+    """Return the per-process password hash pool, creating it on first use."""
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            # spawn (not fork): the web worker holds DB connections and threads
+            _hash_pool = ProcessPoolExecutor(
+                max_workers=settings.STUDENT_IMPORT_HASH_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _hash_pool
+
+
+def reset_hash_pool():
+    """Drop a broken hash pool so the next call to get_hash_pool starts a fresh one."""
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is not None:
+            _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Encoded passwords (as make_password() would store them), in input order.
+
+    workers defaults to settings.STUDENT_IMPORT_HASH_WORKERS; with 1 or fewer
+    workers, or inside a daemonic process (e.g. a Celery prefork worker),
+    passwords are hashed inline.
+    """
+    passwords = list(passwords)
+    hasher = get_hasher('default')
+    hasher_path = f"{type(hasher).__module__}.{type(hasher).__qualname__}"
+    if workers is None:
+        workers = settings.STUDENT_IMPORT_HASH_WORKERS
+
+    if workers <= 1 or len(passwords) <= CHUNK_SIZE or multiprocessing.current_process().daemon:
+        return encode_passwords(hasher_path, passwords)
+
+    chunks = [passwords[start:start + CHUNK_SIZE] for start in range(0, len(passwords), CHUNK_SIZE)]
+    try:
+        results = get_hash_pool().map(encode_passwords, [hasher_path] * len(chunks), chunks)
+        return [encoded for chunk in results for encoded in chunk]
+    except BrokenProcessPool:
+        logger.warning("Password hash pool was broken, hashing inline")
+        reset_hash_pool()
+        return encode_passwords(hasher_path, passwords)
@@ -0,0 +1,60 @@
+"""
+Student registration numbers ("26-KK-GS-014").
+
+A reg number is the two-digit year, "KK", the initials of the school's name
+and a counter. The counter comes from students.sequences, one per prefix,
+so any number of reg numbers is handed out in one reservation and
+concurrent requests never collide. The first reservation under a prefix
+starts after the highest number already in use, or after the school's
+student count (as reg numbers always have) when that is higher.
+
+Reg numbers typed in by hand can still land ahead of the counter, and the
+student's login username is the reg number, so reserved numbers are
+checked against both in one lookup and replaced if taken.
+"""
+from datetime import datetime
+
+from .models import CustomUser, Student
+from .sequences import highest_suffix, reserve_ids
+
+SCOPE = 'reg_num'
+
+
+def school_code(school):
+    """Initials of the school's name ("Green School" -> "GS")."""
+    return ''.join(word[0].upper() for word in school.name.strip().split())
+
+
+def reg_num_prefix(school, year=None):
+    year = (year or datetime.now().year) % 100
+    return f"{year:02d}-KK-{school_code(school)}-"
+
+
+def _taken(reg_nums):
+    taken = set(Student.objects.filter(reg_num__in=reg_nums).values_list('reg_num', flat=True))
+    taken.update(CustomUser.objects.filter(username__in=reg_nums).values_list('username', flat=True))
+    return taken
+
+
+def allocate_reg_nums(school, count, year=None):
+    """
+    The next count unused reg numbers of school, in order.
+
+    Call inside transaction.atomic() together with the inserts: the counter
+    stays locked until then, and a rollback returns the numbers.
+    """
+    if count <= 0:
+        return []
+    prefix = reg_num_prefix(school, year)
+
+    def seed():
+        in_use = list(Student.objects.filter(reg_num__startswith=prefix).values_list('reg_num', flat=True))
+        in_use += CustomUser.objects.filter(username__startswith=prefix).values_list('username', flat=True)
+        return max(highest_suffix(in_use, prefix), Student.objects.filter(school=school).count())
+
+    reg_nums = []
+    while len(reg_nums) < count:
+        candidates = [f"{prefix}{number:03d}" for number in reserve_ids(SCOPE, prefix, count - len(reg_nums), seed)]
+        taken = _taken(candidates)
+        reg_nums += [reg_num for reg_num in candidates if reg_num not in taken]
+    return reg_nums
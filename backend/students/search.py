@@ -0,0 +1,121 @@
+"""
+Student search by partial name, reg number or phone.
+
+    search_students(Student.objects.filter(school_id=3), 'muhamad al')   ranked rows
+    matching_students(students, 'muhamad al')                             queryset
+
+On PostgreSQL, names are matched with pg_trgm (trigram similarity, which
+tolerates typos and partial words) and names, reg numbers and phones with
+substring matches; both are served by the GIN trigram indexes created in
+migration 0035, so a search does not scan the student table. Results are
+ranked in SQL: exact reg number, then name prefix, then substring matches,
+then trigram similarity.
+
+Other databases (SQLite in local tests) fall back to substring matches per
+word, ranked in Python with the same order.
+"""
+import re
+from difflib import SequenceMatcher
+
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+
+MAX_LIMIT = 50
+# Rows ranked in Python by the fallback
+FALLBACK_CANDIDATES = 200
+
+# Rank of each kind of match (trigram similarity fills in below 0.8)
+EXACT_REG_NUM = 1.0
+NAME_PREFIX = 0.95
+NAME_CONTAINS = 0.9
+OTHER_CONTAINS = 0.85
+
+ROW_FIELDS = ('id', 'name', 'reg_num', 'student_class', 'school_id', 'school__name', 'phone', 'status')
+
+
+def _digits(query):
+    digits = re.sub(r'\D', '', query)
+    return digits if len(digits) >= 3 else ''
+
+
+def _uses_trigrams():
+    return connection.vendor == 'postgresql'
+
+
+def _match(query):
+    match = Q(name__icontains=query) | Q(reg_num__icontains=query)
+    if _digits(query):
+        match |= Q(phone__contains=_digits(query))
+    if _uses_trigrams():
+        match |= Q(name__trigram_similar=query) | Q(name__trigram_word_similar=query)
+    else:
+        for word in query.split():
+            match |= Q(name__icontains=word)
+    return match
+
+
+def matching_students(students, query):
+    """students narrowed to those matching query (unranked)."""
+    query = (query or '').strip()
+    if not query:
+        return students.none()
+    return students.filter(_match(query))
+
+
+def score(query, row):
+    """Rank of a values() row for query (the Python twin of the SQL ranking)."""
+    query = query.lower()
+    name = (row['name'] or '').lower()
+    if (row['reg_num'] or '').lower() == query:
+        return EXACT_REG_NUM
+    if name.startswith(query):
+        return NAME_PREFIX
+    if query in name:
+        return NAME_CONTAINS
+    digits = _digits(query)
+    if query in (row['reg_num'] or '').lower() or (digits and digits in (row['phone'] or '')):
+        return OTHER_CONTAINS
+    return round(min(SequenceMatcher(None, query, name).ratio(), 0.8), 3)
+
+
+def search_students(students, query, limit=20):
+    """
+    Up to limit best matches for query within the students queryset, as
+    dicts with ROW_FIELDS (school__name as "school") and a "score" (0-1).
+    """
+    query = (query or '').strip()
+    limit = min(max(int(limit), 1), MAX_LIMIT)
+    if not query:
+        return []
+    students = matching_students(students, query)
+
+    if _uses_trigrams():
+        from django.contrib.postgres.search import TrigramSimilarity, TrigramWordSimilarity
+
+        whens = [
+            When(reg_num__iexact=query, then=Value(EXACT_REG_NUM)),
+            When(name__istartswith=query, then=Value(NAME_PREFIX)),
+            When(name__icontains=query, then=Value(NAME_CONTAINS)),
+            When(reg_num__icontains=query, then=Value(OTHER_CONTAINS)),
+        ]
+        if _digits(query):
+            whens.append(When(phone__contains=_digits(query), then=Value(OTHER_CONTAINS)))
+        rows = list(
+            students.annotate(
+                similarity=Greatest(TrigramSimilarity('name', query), TrigramWordSimilarity(query, 'name')),
+                score=Case(*whens, default=F('similarity') * Value(0.8), output_field=FloatField()),
+            ).order_by('-score', 'name', 'id').values(*ROW_FIELDS, 'score')[:limit]
+        )
+        for row in rows:
+            row['score'] = round(row['score'], 3)
+    else:
+        rows = list(students.order_by('name', 'id').values(*ROW_FIELDS)[:FALLBACK_CANDIDATES])
+        for row in rows:
+            row['score'] = score(query, row)
+        rows.sort(key=lambda row: (-row['score'], row['name'], row['id']))
+        rows = rows[:limit]
+
+    for row in rows:
+        row['school'] = row.pop('school__name')
+    return rows
@@ -0,0 +1,51 @@
+"""
+Counters for human-readable identifiers (IdSequence).
+
+    reserve_ids('reg_num', '26-KK-GS-', 3, seed=...)      -> range(15, 18)
+
+Each (scope, prefix) has one counter row. A reservation bumps the counter
+by count with a single UPDATE, which row-locks the counter until the
+surrounding transaction ends: concurrent callers for the same prefix queue
+up instead of handing out the same number, and a rolled-back transaction
+rolls its numbers back too. Reserving 500 numbers costs the same as one.
+
+The first reservation under a prefix creates its row, starting from
+seed() when given (the highest number already in use, so counters can be
+introduced on top of existing data).
+
+Callers: students.reg_numbers (Student.reg_num) and InventoryItem.unique_id.
+"""
+from django.db import transaction
+from django.db.models import F
+
+from .models import IdSequence
+
+
+def reserve_ids(scope, prefix, count=1, seed=None):
+    """
+    range of count consecutive unused numbers under (scope, prefix).
+
+    seed is called (at most once per prefix, ever) to get the number to
+    start after when the counter does not exist yet.
+    """
+    if count <= 0:
+        return range(0)
+    name = f"{scope}:{prefix}"
+    with transaction.atomic():
+        updated = IdSequence.objects.filter(name=name).update(last_value=F('last_value') + count)
+        if not updated:
+            # get_or_create recovers if a concurrent request created the row first
+            IdSequence.objects.get_or_create(name=name, defaults={'last_value': seed() if seed else 0})
+            IdSequence.objects.filter(name=name).update(last_value=F('last_value') + count)
+        last_value = IdSequence.objects.filter(name=name).values_list('last_value', flat=True).get()
+    return range(last_value - count + 1, last_value + 1)
+
+
+def highest_suffix(values, prefix):
+    """Highest number following prefix in values (e.g. existing IDs), or 0."""
+    highest = 0
+    for value in values:
+        suffix = value[len(prefix):]
+        if value.startswith(prefix) and suffix.isdigit():
+            highest = max(highest, int(suffix))
+    return highest
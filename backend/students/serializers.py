@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.db import transaction
+from django.db.models import F
 from .models import Student, Fee, School, Attendance, LessonPlan, TimeSlot
 
 from .models import LessonPlan, StudentImage
@@ -248,7 +249,7 @@ class StudentProfileDetailSerializer(StudentProfileSerializer):
     def get_fees(self, obj):
         """Get recent fee records"""
         from .models import Fee
-        fees = Fee.objects.filter(student_id=obj.id).order_by('-month')[:10]
+        fees = Fee.objects.filter(student_id=obj.id).order_by(F('period').desc(nulls_last=True), '-id')[:10]
         return [
             {
                 'month': fee.month,
@@ -348,7 +349,7 @@ class SchoolSerializer(serializers.ModelSerializer):
         from .models import Fee
 
         # Find the latest month that has fee records for this school
-        latest_month = Fee.objects.filter(school_id=obj.id).order_by('-id').values_list('month', flat=True).first()
+        latest_month = Fee.objects.filter(school_id=obj.id).order_by(F('period').desc(nulls_last=True), '-id').values_list('month', flat=True).first()
 
         if not latest_month:
             return 0.0
@@ -405,7 +406,7 @@ class SchoolStatsSerializer(serializers.ModelSerializer):
         from .models import Fee
 
         # Find the latest month that has fee records for this school
-        latest_month = Fee.objects.filter(school_id=obj.id).order_by('-id').values_list('month', flat=True).first()
+        latest_month = Fee.objects.filter(school_id=obj.id).order_by(F('period').desc(nulls_last=True), '-id').values_list('month', flat=True).first()
 
         if not latest_month:
             return 0.0
@@ -428,8 +429,8 @@ class SchoolStatsSerializer(serializers.ModelSerializer):
         """Helper: Find latest month with fee records for a school"""
         from .models import Fee
 
-        # Get the latest month directly from database (by most recent record ID)
-        return Fee.objects.filter(school_id=school_id).order_by('-id').values_list('month', flat=True).first()
+        # Latest month chronologically (indexed on school, period)
+        return Fee.objects.filter(school_id=school_id).order_by(F('period').desc(nulls_last=True), '-id').values_list('month', flat=True).first()
 
     def get_class_breakdown(self, obj):
         """Returns list of classes with student count and revenue from Fee records"""
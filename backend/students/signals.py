@@ -0,0 +1,108 @@
+"""
+Cache invalidation and fee rollup upkeep for school, student and fee rows.
+
+Save/delete bumps the cache tags (see core.cache_helpers) that the changed
+row feeds: school lists, per-school class lists and fee caches. Fee and
+student changes also refresh the fee collection rollups (students.fee_rollups)
+and fee changes the student's arrears (students.fee_arrears). Attendance
+changes refresh the student's dashboard stats (students.attendance_stats).
+"""
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.cache_helpers import fee_tags, invalidate_tags
+from .attendance_stats import schedule_stats_refresh
+from .fee_arrears import schedule_arrears_refresh
+from .fee_rollups import schedule_active_students_refresh, schedule_rollup_refresh
+from .models import Attendance, Fee, LessonPlan, School, Student
+
+_muted = threading.local()
+
+
+@contextmanager
+def muted_fee_signals():
+    """
+    Skip the per-row Fee handlers inside the block. For set-based writes
+    (e.g. students.fee_generation) that invalidate caches and rollups for
+    the whole set themselves.
+    """
+    previous = getattr(_muted, 'fees', False)
+    _muted.fees = True
+    try:
+        yield
+    finally:
+        _muted.fees = previous
+
+
+@receiver(post_save, sender=School)
+@receiver(post_delete, sender=School)
+def invalidate_school_caches(sender, instance, **kwargs):
+    invalidate_tags('schools', f'school:{instance.pk}', f'classes:{instance.pk}', 'classes:all')
+
+
+@receiver(pre_save, sender=Student)
+def remember_previous_school(sender, instance, **kwargs):
+    """Keep the stored school, status and class so changes refresh both class lists and rollups."""
+    instance._previous_school_id = None
+    instance._previous_state = None
+    if instance.pk:
+        instance._previous_state = (
+            Student.objects.filter(pk=instance.pk).values_list('school_id', 'status', 'student_class').first()
+        )
+        if instance._previous_state:
+            instance._previous_school_id = instance._previous_state[0]
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def invalidate_student_caches(sender, instance, **kwargs):
+    school_ids = {instance.school_id, getattr(instance, '_previous_school_id', None)}
+    invalidate_tags('students', 'classes:all', *(f'classes:{school_id}' for school_id in school_ids if school_id))
+
+    # Active-student counts on the rollups only move when school, status or class do
+    if getattr(instance, '_previous_state', None) != (instance.school_id, instance.status, instance.student_class):
+        schedule_active_students_refresh(school_ids)
+
+
+@receiver(pre_save, sender=Fee)
+def remember_previous_fee_group(sender, instance, **kwargs):
+    """Keep the stored school, month and student so a fee that moves refreshes its old rollup and arrears too."""
+    instance._previous_group = None
+    if instance.pk and not getattr(_muted, 'fees', False):
+        instance._previous_group = (
+            Fee.objects.filter(pk=instance.pk).values_list('school_id', 'month', 'student_id').first()
+        )
+
+
+@receiver(post_save, sender=Fee)
+@receiver(post_delete, sender=Fee)
+def invalidate_fee_caches(sender, instance, **kwargs):
+    if getattr(_muted, 'fees', False):
+        return
+    invalidate_tags(*fee_tags(instance.month, instance.school_id))
+    previous_school_id, previous_month, previous_student_id = getattr(instance, '_previous_group', None) or (None, None, None)
+    schedule_rollup_refresh({(instance.school_id, instance.month), (previous_school_id, previous_month)})
+    schedule_arrears_refresh({instance.student_id, previous_student_id})
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def refresh_attendance_stats_on_change(sender, instance, **kwargs):
+    schedule_stats_refresh({instance.student_id})
+
+
+@receiver(post_save, sender=LessonPlan)
+def refresh_week_topics(sender, instance, created, **kwargs):
+    """The stats keep this week's topics; a plan edited this week refreshes its students."""
+    if created:
+        return
+    today = timezone.localdate()
+    monday = today - timedelta(days=today.weekday())
+    session_date = sender._meta.get_field('session_date').to_python(instance.session_date)
+    if session_date and monday <= session_date <= monday + timedelta(days=6):
+        schedule_stats_refresh(set(Attendance.objects.filter(lesson_plan=instance).values_list('student_id', flat=True)))
@@ -0,0 +1,387 @@
+"""
+Bulk student import from a CSV or Excel (.xlsx) file.
+
+    import_students(upload, default_school=school, default_password='...')
+    import_students(upload, dry_run=True)          validate and report only
+
+The file is read row by row (openpyxl read-only mode for Excel) and handled
+in batches of BATCH_SIZE rows. Per batch the work is:
+
+    1. one lookup of students that already exist (same school, name, class)
+    2. per school, one reg number allocation (students.reg_numbers)
+    3. password hashing on a process pool (students.passwords)
+    4. one bulk_create of users and one of students
+
+Each student gets a login exactly as get_students POST creates it: a
+Student-role user whose username is the reg number.
+
+Rows that fail validation are skipped and reported with their row number
+(as shown in Excel: the header is row 1) and one message per field; the
+other rows are imported. Problems with the file itself (unreadable, no
+name column, ...) raise StudentImportError.
+
+Columns (header names are case-insensitive, spaces allowed):
+
+    name                  required
+    school                school ID or exact name; optional with default_school
+    student_class         required (alias: class)
+    monthly_fee           default 0 (alias: fee)
+    phone, address
+    gender                Male / Female / Other, default Male
+    date_of_birth         YYYY-MM-DD, DD/MM/YYYY or an Excel date (alias: dob)
+    student_subtype       ONSITE / ONLINE / HYBRID (alias: subtype)
+    password              optional with default_password
+
+Other columns are ignored and listed in the report.
+"""
+import codecs
+import csv
+import io
+import logging
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+
+from core.cache_helpers import invalidate_tags
+from .fee_rollups import schedule_active_students_refresh
+from .models import CustomUser, School, Student
+from .passwords import hash_passwords
+from .reg_numbers import allocate_reg_nums
+from .subtypes import DEFAULT_STUDENT_SUBTYPE, StudentSubtype
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+COLUMNS = {
+    'name': 'name',
+    'student_name': 'name',
+    'school': 'school',
+    'school_id': 'school',
+    'school_name': 'school',
+    'student_class': 'student_class',
+    'class': 'student_class',
+    'monthly_fee': 'monthly_fee',
+    'fee': 'monthly_fee',
+    'phone': 'phone',
+    'address': 'address',
+    'gender': 'gender',
+    'date_of_birth': 'date_of_birth',
+    'dob': 'date_of_birth',
+    'student_subtype': 'student_subtype',
+    'subtype': 'student_subtype',
+    'password': 'password',
+}
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y')
+GENDERS = {value.lower(): value for value, _ in Student.GENDER_CHOICES}
+SUBTYPES = {value for value, _ in StudentSubtype.choices}
+
+
+class StudentImportError(ValueError):
+    """The file as a whole cannot be imported (reported as a 400)."""
+
+
+# =============================================================================
+# READING
+# =============================================================================
+def _header(cells):
+    return [str(cell or '').strip().lower().replace(' ', '_').replace('-', '_') for cell in cells]
+
+
+def _csv_rows(upload):
+    yield from csv.reader(codecs.iterdecode(upload, 'utf-8-sig'))
+
+
+def _xlsx_rows(upload):
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(upload, read_only=True, data_only=True)
+    except Exception as e:
+        raise StudentImportError(f"Could not read the Excel file: {str(e)}")
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def read_rows(upload, filename=None):
+    """
+    (ignored column names, iterator of (row_number, {column: value})) for the
+    non-empty data rows of a CSV or .xlsx upload. Rows are read lazily.
+    """
+    filename = (filename or getattr(upload, 'name', '') or '').lower()
+    if filename.endswith('.xlsx'):
+        rows = _xlsx_rows(upload)
+    elif filename.endswith('.csv'):
+        rows = _csv_rows(upload)
+    else:
+        raise StudentImportError("Upload a .csv or .xlsx file.")
+
+    try:
+        header = _header(next(rows))
+    except StopIteration:
+        raise StudentImportError("The file is empty.")
+    except UnicodeDecodeError:
+        raise StudentImportError("CSV files must be UTF-8 encoded.")
+    columns = [COLUMNS.get(name) for name in header]
+    if 'name' not in columns:
+        raise StudentImportError("The file needs a 'name' column.")
+    ignored = sorted({name for name, column in zip(header, columns) if name and not column})
+
+    def data_rows():
+        try:
+            for row_number, cells in enumerate(rows, start=2):
+                values = {
+                    column: value for column, value in zip(columns, cells)
+                    if column and value not in (None, '')
+                }
+                if values:
+                    yield row_number, values
+        except UnicodeDecodeError:
+            raise StudentImportError("CSV files must be UTF-8 encoded.")
+
+    return ignored, data_rows()
+
+
+# =============================================================================
+# VALIDATION
+# =============================================================================
+def _text(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # Excel stores phone numbers and class numbers as floats
+    return str(value).strip()
+
+
+def _date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(_text(value), fmt).date()
+        except ValueError:
+            continue
+    raise ValueError
+
+
+def _field_length(name):
+    return Student._meta.get_field(name).max_length
+
+
+def clean_row(values, schools, default_school=None, default_password=None):
+    """(cleaned fields, {field: error}) for one row; schools maps IDs and lower-case names to schools."""
+    cleaned, errors = {}, {}
+
+    name = _text(values.get('name', ''))
+    if not name:
+        errors['name'] = "Name is required."
+    elif len(name) > _field_length('name'):
+        errors['name'] = f"Name is longer than {_field_length('name')} characters."
+    cleaned['name'] = name
+
+    if 'school' in values:
+        school = schools.get(_text(values['school']).lower())
+        if school is None:
+            errors['school'] = f"Unknown school: {_text(values['school'])}."
+    else:
+        school = default_school
+        if school is None:
+            errors['school'] = "School is required."
+    cleaned['school'] = school
+
+    student_class = _text(values.get('student_class', ''))
+    if not student_class:
+        errors['student_class'] = "Class is required."
+    elif len(student_class) > _field_length('student_class'):
+        errors['student_class'] = f"Class is longer than {_field_length('student_class')} characters."
+    cleaned['student_class'] = student_class
+
+    try:
+        monthly_fee = Decimal(_text(values.get('monthly_fee', 0)).replace(',', ''))
+        if not monthly_fee.is_finite() or monthly_fee < 0:
+            raise InvalidOperation
+        cleaned['monthly_fee'] = monthly_fee.quantize(Decimal('0.01'))
+        if len(cleaned['monthly_fee'].as_tuple().digits) > Student._meta.get_field('monthly_fee').max_digits:
+            raise InvalidOperation
+    except InvalidOperation:
+        errors['monthly_fee'] = f"Invalid monthly fee: {_text(values['monthly_fee'])}."
+
+    gender = _text(values.get('gender', 'Male'))
+    cleaned['gender'] = GENDERS.get(gender.lower())
+    if cleaned['gender'] is None:
+        errors['gender'] = f"Gender must be one of {', '.join(GENDERS.values())}."
+
+    phone = _text(values['phone']) if 'phone' in values else None
+    if phone and len(phone) > _field_length('phone'):
+        errors['phone'] = f"Phone is longer than {_field_length('phone')} characters."
+    cleaned['phone'] = phone
+    cleaned['address'] = _text(values['address']) if 'address' in values else None
+
+    cleaned['date_of_birth'] = None
+    if 'date_of_birth' in values:
+        try:
+            cleaned['date_of_birth'] = _date(values['date_of_birth'])
+        except ValueError:
+            errors['date_of_birth'] = f"Invalid date of birth: {_text(values['date_of_birth'])} (use YYYY-MM-DD)."
+
+    subtype = _text(values.get('student_subtype', DEFAULT_STUDENT_SUBTYPE)).upper()
+    if subtype not in SUBTYPES:
+        errors['student_subtype'] = f"Subtype must be one of {', '.join(sorted(SUBTYPES))}."
+    cleaned['student_subtype'] = subtype
+
+    password = _text(values['password']) if 'password' in values else default_password
+    if not password:
+        errors['password'] = "Password is required."
+    cleaned['password'] = password
+
+    return cleaned, errors
+
+
+def _existing_students(rows):
+    """(school_id, name, class) of rows that match a student already on file."""
+    keys = {(row['school'].id, row['name'], row['student_class']) for row in rows}
+    return set(
+        Student.objects.filter(
+            school_id__in={key[0] for key in keys}, name__in={key[1] for key in keys},
+        ).values_list('school_id', 'name', 'student_class')
+    ) & keys
+
+
+# =============================================================================
+# IMPORT
+# =============================================================================
+def _create_students(rows):
+    """Create users and students for cleaned rows (row_number, fields); returns the students in order."""
+    by_school = {}
+    for _, fields in rows:
+        by_school.setdefault(fields['school'].id, []).append(fields)
+    for fields_list in by_school.values():
+        reg_nums = allocate_reg_nums(fields_list[0]['school'], len(fields_list))
+        for fields, reg_num in zip(fields_list, reg_nums):
+            fields['reg_num'] = reg_num
+
+    encoded = hash_passwords(fields['password'] for _, fields in rows)
+    users = CustomUser.objects.bulk_create([
+        CustomUser(
+            username=fields['reg_num'],
+            first_name=fields['name'].split(maxsplit=1)[0],
+            role='Student',
+            password=password,
+        )
+        for (_, fields), password in zip(rows, encoded)
+    ])
+    return Student.objects.bulk_create([
+        Student(
+            name=fields['name'],
+            reg_num=fields['reg_num'],
+            school=fields['school'],
+            student_class=fields['student_class'],
+            student_subtype=fields['student_subtype'],
+            monthly_fee=fields['monthly_fee'],
+            phone=fields['phone'],
+            address=fields['address'],
+            gender=fields['gender'],
+            date_of_birth=fields['date_of_birth'],
+            user=user,
+        )
+        for (_, fields), user in zip(rows, users)
+    ])
+
+
+def import_students(upload, schools=None, default_school=None, default_password=None,
+                    allow_duplicates=False, dry_run=False, filename=None):
+    """
+    Validate and import every row of upload. Returns the report:
+
+        {"dry_run", "rows", "created", "failed",
+         "students": [{"row", "id", "reg_num", "username", "name", "school_id"}],
+         "errors": [{"row", "errors": {field: message}}],
+         "ignored_columns": [...]}
+
+    schools limits the schools rows may name (default: all); a row matching
+    an existing student (same school, name and class) is reported unless
+    allow_duplicates. Each batch is imported in its own transaction.
+    """
+    schools = list(schools if schools is not None else School.objects.all())
+    school_lookup = {str(school.id): school for school in schools}
+    school_lookup.update({school.name.strip().lower(): school for school in schools})
+
+    report = {
+        "dry_run": dry_run, "rows": 0, "created": 0, "failed": 0,
+        "students": [], "errors": [], "ignored_columns": [],
+    }
+    report["ignored_columns"], rows = read_rows(upload, filename)
+    seen = set()
+    while True:
+        batch = list(islice(rows, BATCH_SIZE))
+        if not batch:
+            break
+        report["rows"] += len(batch)
+
+        valid = []
+        for row_number, values in batch:
+            fields, errors = clean_row(values, school_lookup, default_school, default_password)
+            if not errors:
+                key = (fields['school'].id, fields['name'], fields['student_class'])
+                if key in seen and not allow_duplicates:
+                    errors['name'] = "Same student appears earlier in the file."
+                seen.add(key)
+            if errors:
+                report["errors"].append({"row": row_number, "errors": errors})
+            else:
+                valid.append((row_number, fields))
+
+        if valid and not allow_duplicates:
+            existing = _existing_students([fields for _, fields in valid])
+            if existing:
+                kept = []
+                for row_number, fields in valid:
+                    if (fields['school'].id, fields['name'], fields['student_class']) in existing:
+                        report["errors"].append({"row": row_number, "errors": {
+                            "name": f"{fields['name']} is already a student of this school and class."
+                        }})
+                    else:
+                        kept.append((row_number, fields))
+                valid = kept
+
+        if valid and not dry_run:
+            with transaction.atomic():
+                students = _create_students(valid)
+                school_ids = {student.school_id for student in students}
+                invalidate_tags('students', 'classes:all', *(f'classes:{school_id}' for school_id in school_ids))
+                schedule_active_students_refresh(school_ids)
+            report["students"].extend(
+                {
+                    "row": row_number,
+                    "id": student.id,
+                    "reg_num": student.reg_num,
+                    "username": student.reg_num,
+                    "name": student.name,
+                    "school_id": student.school_id,
+                }
+                for (row_number, _), student in zip(valid, students)
+            )
+        report["created"] += len(valid)
+
+    report["errors"].sort(key=lambda error: error["row"])
+    report["failed"] = len(report["errors"])
+    logger.info(
+        f"Student import{' (dry run)' if dry_run else ''}: {report['created']} of {report['rows']} row(s) "
+        f"{'valid' if dry_run else 'imported'}, {report['failed']} failed"
+    )
+    return report
+
+
+def error_report_csv(report):
+    """The report's row errors as CSV text (row, field, message), for fixing the file."""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['row', 'field', 'message'])
+    for error in report["errors"]:
+        for field, message in error["errors"].items():
+            writer.writerow([error["row"], field, message])
+    return output.getvalue()
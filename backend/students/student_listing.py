@@ -0,0 +1,146 @@
+"""
+Student listing for GET /api/v2/students/ (and the row shape of the legacy
+GET /api/students/).
+
+Rows are read with values() over only the requested columns; the school
+name and login come from joins, not from model instances:
+
+    ?school_id=3&class=Class 1                    first page (cursor pagination)
+    ?...&cursor=...                               next page, from "next"
+    ?...&shape=compact                            id, name, reg_num, class (dropdowns)
+    ?...&fields=name,reg_num,monthly_fee          column projection (default: full shape)
+    ?...&sort=name                                any SORTS key
+
+    filters: school_id, school (name), class, subtype, status
+             (default Active; "all" for every status)
+
+Pages come from core.pagination.StudentCursorPagination: the cursor
+encodes a position in the sort order, so page N costs the same as page 1.
+Teachers only see their assigned schools.
+"""
+from core.pagination import StudentCursorPagination
+from .models import Student
+
+# Response key -> ORM path
+FIELDS = {
+    "id": "id",
+    "reg_num": "reg_num",
+    "name": "name",
+    "school": "school__name",
+    "school_id": "school_id",
+    "student_class": "student_class",
+    "student_subtype": "student_subtype",
+    "monthly_fee": "monthly_fee",
+    "phone": "phone",
+    "status": "status",
+    "gender": "gender",
+    "date_of_birth": "date_of_birth",
+    "date_of_registration": "date_of_registration",
+    "address": "address",
+    "time_slot_id": "time_slot_id",
+    "user_id": "user_id",
+    "username": "user__username",
+    "email": "user__email",
+    "created_at": "created_at",
+}
+# The shape get_students has always returned
+DEFAULT_FIELDS = [
+    "id", "reg_num", "name", "school", "student_class", "monthly_fee", "phone", "status", "gender",
+    "date_of_birth", "date_of_registration", "address", "user_id", "username", "email",
+]
+COMPACT_FIELDS = ["id", "name", "reg_num", "student_class"]
+
+# Sort key -> ordering (the first column positions the cursor)
+SORTS = {
+    "name": ("name", "id"),
+    "-name": ("-name", "-id"),
+    "reg_num": ("reg_num",),
+    "-reg_num": ("-reg_num",),
+    "created_at": ("created_at", "id"),
+    "-created_at": ("-created_at", "-id"),
+}
+DEFAULT_SORT = "name"
+
+
+class StudentListingError(ValueError):
+    """Invalid listing parameter (reported as a 400)."""
+
+
+def parse_fields(params):
+    if params.get("shape") == "compact":
+        return list(COMPACT_FIELDS)
+    if not params.get("fields"):
+        return list(DEFAULT_FIELDS)
+    fields = [field.strip() for field in params["fields"].split(",") if field.strip()]
+    unknown = [field for field in fields if field not in FIELDS]
+    if unknown:
+        raise StudentListingError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(FIELDS)}")
+    return fields
+
+
+def visible_students(user):
+    """Students user may list: every student for admins, assigned schools for teachers, else None."""
+    if user.role == "Admin":
+        return Student.objects.all()
+    if user.role == "Teacher":
+        return Student.objects.filter(school_id__in=user.assigned_schools.values("id"))
+    return None
+
+
+def filter_students(students, params):
+    """Apply the school_id / school / class / subtype / status filters."""
+    if params.get("school_id"):
+        students = students.filter(school_id=params["school_id"])
+    if params.get("school"):
+        students = students.filter(school__name=params["school"])
+    if params.get("class"):
+        students = students.filter(student_class=params["class"])
+    if params.get("subtype"):
+        students = students.filter(student_subtype=params["subtype"].upper())
+    status = params.get("status") or "Active"
+    if status != "all":
+        students = students.filter(status=status)
+    return students
+
+
+def project(students, fields=DEFAULT_FIELDS, extra=()):
+    """values() queryset over the ORM paths of fields (plus extra paths)."""
+    return students.values(*({FIELDS[field] for field in fields} | set(extra)))
+
+
+def as_items(rows, fields=DEFAULT_FIELDS):
+    """values() rows renamed to the response keys of fields."""
+    return [{field: row[FIELDS[field]] for field in fields} for row in rows]
+
+
+def as_legacy_items(rows):
+    """as_items for GET /api/students/, which reports a student without a school as "Unknown"."""
+    items = as_items(rows)
+    for item in items:
+        if item["school"] is None:
+            item["school"] = "Unknown"
+    return items
+
+
+def list_students(request):
+    """
+    The paginated response for a DRF request; raises StudentListingError on
+    bad input and PermissionError for roles without access.
+    """
+    params = request.query_params
+    students = visible_students(request.user)
+    if students is None:
+        raise PermissionError("Unauthorized")
+    fields = parse_fields(params)
+    sort = params.get("sort") or DEFAULT_SORT
+    if sort not in SORTS:
+        raise StudentListingError(f"Cannot sort by '{sort}'. Available: {', '.join(SORTS)}")
+    ordering = SORTS[sort]
+
+    # The paginator reads the cursor position from the first ordering column
+    rows = project(filter_students(students, params), fields, extra={"id", ordering[0].lstrip("-")})
+
+    paginator = StudentCursorPagination()
+    paginator.ordering = ordering
+    page = paginator.paginate_queryset(rows, request)
+    return paginator.get_paginated_response(as_items(page, fields))
@@ -0,0 +1,21 @@
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def generate_student_image_variants_task(self, image_id):
+    """Async: store thumbnail/WebP variants of an uploaded progress image."""
+    from .image_storage import generate_student_image_variants
+    from .models import StudentImage
+
+    image = StudentImage.objects.filter(id=image_id).first()
+    if not image or not image.storage_path:
+        return 'Image not found'
+    try:
+        generate_student_image_variants(image)
+    except Exception as exc:
+        logger.error(f"Variant generation failed for student image {image_id}: {exc}")
+        self.retry(exc=exc)
@@ -0,0 +1,113 @@
+"""
+Tests for the per-student attendance stats (students.attendance_stats) behind
+the student dashboard (GET /api/students/my-data/).
+
+Run with:
+    python manage.py test students.tests_attendance_stats
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from attendance.marking import mark_session
+from students.attendance_stats import monthly_percentage, weekly_attendance
+from students.models import Attendance, CustomUser, LessonPlan, School, Student, StudentAttendanceStats
+
+
+class AttendanceStatsTest(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Stats School", assigned_days=[0, 1, 2, 3, 4, 5, 6])
+        self.user = CustomUser.objects.create_user(username='stats_student', password='pass1234', role='Student')
+        self.student = Student.objects.create(reg_num='STATS-1', name='Stat Student', school=self.school,
+                                              student_class='Class 1', status='Active', user=self.user)
+        self.teacher = CustomUser.objects.create_user(username='stats_teacher', password='pass1234', role='Teacher')
+        self.today = timezone.localdate()
+        self.monday = self.today - timedelta(days=self.today.weekday())
+
+    def mark(self, days_ago, status='Present'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Attendance.objects.update_or_create(
+                student=self.student, session_date=self.today - timedelta(days=days_ago),
+                defaults={'status': status, 'teacher': self.teacher},
+            )[0]
+
+    def stats(self):
+        return StudentAttendanceStats.objects.get(student=self.student)
+
+    def test_stats_follow_every_write_path(self):
+        for days_ago, status in ((40, 'Present'), (30, 'Absent'), (20, 'Present'), (10, 'N/A'), (0, 'Present')):
+            self.mark(days_ago, status)
+        stats = self.stats()
+        self.assertEqual((stats.total_sessions, stats.present_sessions, stats.learning_streak), (5, 3, 2))
+        self.assertEqual(stats.last_session_date, self.today)
+
+        # The batch upsert in attendance.marking skips signals but refreshes the stats itself
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_session(self.teacher, str(self.today), [{'student_id': self.student.id, 'status': 'Absent'}])
+        self.assertEqual((self.stats().present_sessions, self.stats().learning_streak), (2, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.get(student=self.student, session_date=self.today).delete()
+        self.assertEqual((self.stats().total_sessions, self.stats().learning_streak), (4, 1))
+
+    def test_week_and_month_figures(self):
+        plan = LessonPlan.objects.create(session_date=self.monday, teacher=self.teacher, school=self.school,
+                                         student_class='Class 1', planned_topic='Loops\nand more')
+        attendance = self.mark(self.today.weekday())
+        with self.captureOnCommitCallbacks(execute=True):
+            attendance.lesson_plan = plan
+            attendance.save()
+
+        stats = self.stats()
+        week = weekly_attendance(stats, self.school.assigned_days, today=self.today)
+        self.assertEqual(week['days_attended'], 1)
+        self.assertEqual(week['daily'][0], {'day': 'Mon', 'date': self.monday.isoformat(), 'status': 'Present',
+                                            'is_school_day': True})
+        self.assertEqual(stats.week[self.monday.isoformat()], ['Present', 'Loops'])
+        if self.monday.month == self.today.month:
+            self.assertEqual(monthly_percentage(stats, today=self.today), 100)
+
+        # Editing this week's plan refreshes the topic
+        with self.captureOnCommitCallbacks(execute=True):
+            plan.planned_topic = 'Functions'
+            plan.save()
+        self.assertEqual(self.stats().week[self.monday.isoformat()], ['Present', 'Functions'])
+
+        # Read in a later week, the stored week is empty
+        next_week = self.monday + timedelta(days=7)
+        self.assertEqual(weekly_attendance(stats, today=next_week)['days_attended'], 0)
+
+    def test_dashboard_reads_one_stats_row(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.mark(0)
+        counts = []
+        for history in (0, 30):
+            for days_ago in range(1, history + 1):
+                self.mark(days_ago)
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get('/api/students/my-data/')
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual((response.data['learning_streak'], response.data['activities_completed']), (31, 31))
+
+    def test_missing_rows_are_built_on_read_and_by_the_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(student=self.student, session_date=self.today, status='Present', teacher=self.teacher)
+        StudentAttendanceStats.objects.all().delete()
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get('/api/students/my-data/').data['total_activities'], 1)
+
+        StudentAttendanceStats.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_attendance_stats', stdout=out)
+        self.assertIn('Rebuilt 1 attendance stats rows', out.getvalue())
+        self.assertEqual(self.stats().present_sessions, 1)
@@ -0,0 +1,169 @@
+"""
+Tests for the per-student fee arrears index (students.fee_arrears).
+
+Run with:
+    python manage.py test students.tests_fee_arrears
+"""
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from dateutil.relativedelta import relativedelta
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from students.fee_arrears import defaulters
+from students.fee_generation import generate_month_fees
+from students.models import CustomUser, Fee, FeeArrears, School, Student, fee_month_label
+
+
+class FeeArrearsTest(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Arrears School")
+        self.student = Student.objects.create(
+            reg_num='ARR-1', name='Late Payer', school=self.school, student_class='Class 1',
+            status='Active', monthly_fee=Decimal('1000'),
+        )
+        self.admin = CustomUser.objects.create_user(username='arrears_admin', password='pass1234', role='Admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.this_month = date.today().replace(day=1)
+
+    def month(self, months_ago):
+        return fee_month_label(self.this_month - relativedelta(months=months_ago))
+
+    def make_fee(self, months_ago, total='1000', paid='0', student=None):
+        student = student or self.student
+        return Fee(
+            student_id=student.id, student_name=student.name, school=self.school, student_class=student.student_class,
+            month=self.month(months_ago), total_fee=Decimal(total), paid_amount=Decimal(paid),
+            balance_due=Decimal(total) - Decimal(paid), status='Paid' if paid == total else 'Pending',
+        )
+
+    def arrears(self):
+        return FeeArrears.objects.get(student_id=self.student.id)
+
+    def snapshot(self):
+        return sorted(FeeArrears.objects.values_list(
+            'student_id', 'student_name', 'school_id', 'total_outstanding', 'unpaid_months',
+            'oldest_unpaid_month', 'oldest_unpaid_period', 'latest_unpaid_period',
+        ))
+
+    def test_arrears_follow_every_write_path(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Fee.objects.bulk_create([self.make_fee(4), self.make_fee(2, paid='1000'), self.make_fee(1, paid='400')])
+        arrears = self.arrears()
+        self.assertEqual((arrears.total_outstanding, arrears.unpaid_months), (Decimal('1600'), 2))
+        self.assertEqual(arrears.oldest_unpaid_month, self.month(4))
+
+        oldest = Fee.objects.get(month=self.month(4))
+        with self.captureOnCommitCallbacks(execute=True):
+            oldest.paid_amount, oldest.balance_due, oldest.status = Decimal('1000'), Decimal('0'), 'Paid'
+            oldest.save()
+        arrears = self.arrears()
+        self.assertEqual((arrears.total_outstanding, arrears.unpaid_months), (Decimal('600'), 1))
+        self.assertEqual(arrears.oldest_unpaid_month, self.month(1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Fee.objects.filter(month=self.month(1)).update(balance_due=Decimal('0'), status='Paid')
+        self.assertFalse(FeeArrears.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fee = Fee.objects.create(**{
+                field: getattr(self.make_fee(0), field)
+                for field in ('student_id', 'student_name', 'school', 'student_class', 'month', 'total_fee',
+                              'paid_amount', 'balance_due', 'status')
+            })
+        self.assertEqual(self.arrears().total_outstanding, Decimal('1000'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fee.delete()
+        self.assertFalse(FeeArrears.objects.exists())
+
+    def test_fee_moved_to_another_student_refreshes_both(self):
+        other = Student.objects.create(reg_num='ARR-2', name='Other', school=self.school, student_class='Class 1', status='Active')
+        with self.captureOnCommitCallbacks(execute=True):
+            Fee.objects.bulk_create([self.make_fee(1)])
+        fee = Fee.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            fee.student_id = other.id
+            fee.save()
+        self.assertEqual(list(FeeArrears.objects.values_list('student_id', flat=True)), [other.id])
+
+    def test_generation_overwrite_refreshes_arrears(self):
+        month = self.month(0)
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_month_fees([self.school.id], month)
+        self.assertEqual(self.arrears().total_outstanding, Decimal('1000'))
+
+        self.student.monthly_fee = Decimal('1500')
+        self.student.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_month_fees([self.school.id], month, force_overwrite=True)
+        arrears = self.arrears()
+        self.assertEqual((arrears.total_outstanding, arrears.unpaid_months), (Decimal('1500'), 1))
+
+    def test_aging_buckets_and_filters(self):
+        today = date(2026, 6, 15)
+        recent = Student.objects.create(reg_num='ARR-3', name='Recent', school=self.school, student_class='Class 2', status='Active')
+        FeeArrears.objects.bulk_create([
+            FeeArrears(student_id=self.student.id, student_name='Late Payer', student_class='Class 1', school=self.school,
+                       total_outstanding=Decimal('5000'), unpaid_months=5, oldest_unpaid_month='Jan-2026',
+                       oldest_unpaid_period=date(2026, 1, 1)),
+            FeeArrears(student_id=recent.id, student_name='Recent', student_class='Class 2', school=self.school,
+                       total_outstanding=Decimal('1000'), unpaid_months=1, oldest_unpaid_month='Jun-2026',
+                       oldest_unpaid_period=date(2026, 6, 1)),
+        ])
+
+        rows = defaulters(school_id=self.school.id, today=today)
+        self.assertEqual([row['student_id'] for row in rows], [self.student.id, recent.id])
+        self.assertEqual([(row['aging_bucket'], row['days_overdue']) for row in rows], [('90+', 165), ('0-30', 14)])
+
+        self.assertEqual([row['student_id'] for row in defaulters(min_months=3, today=today)], [self.student.id])
+        self.assertEqual([row['student_id'] for row in defaulters(bucket='0-30', today=today)], [recent.id])
+        self.assertEqual(defaulters(bucket='31-60', today=today), [])
+        self.assertEqual([row['student_id'] for row in defaulters(student_class='Class 2', today=today)], [recent.id])
+        with self.assertRaises(ValueError):
+            defaulters(bucket='soon')
+
+    def test_defaulters_endpoint_reads_the_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Fee.objects.bulk_create([self.make_fee(months_ago) for months_ago in range(4)])
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/fees/defaulters/', {'months': 3, 'school_id': self.school.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        row = response.data['defaulters'][0]
+        # Counted over the months checked; the oldest unpaid month covers all arrears
+        self.assertEqual((row['student_name'], row['school__name'], row['unpaid_months']), ('Late Payer', 'Arrears School', 3))
+        self.assertEqual(row['total_due'], Decimal('3000'))
+        self.assertEqual((row['oldest_unpaid_month'], row['aging_bucket']), (self.month(3), '90+'))
+        self.assertEqual((response.data['months_checked'], response.data['months']),
+                         (3, [self.month(0), self.month(1), self.month(2)]))
+
+        response = self.client.get('/api/fees/defaulters/', {'months': 5})
+        self.assertEqual(response.data['count'], 0)
+
+        # Paying one month inside the window drops the student, as the window is no longer all unpaid
+        with self.captureOnCommitCallbacks(execute=True):
+            Fee.objects.filter(month=self.month(1)).update(paid_amount=Decimal('1000'), balance_due=0, status='Paid')
+        self.assertEqual(self.client.get('/api/fees/defaulters/', {'months': 3}).data['count'], 0)
+        self.assertEqual(self.client.get('/api/fees/defaulters/', {'months': 1}).data['count'], 1)
+        response = self.client.get('/api/fees/defaulters/', {'bucket': 'later'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_rebuild_command_matches_incremental_upkeep(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Fee.objects.bulk_create([self.make_fee(3), self.make_fee(1, paid='250'), self.make_fee(0, paid='1000')])
+        maintained = self.snapshot()
+        FeeArrears.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_fee_arrears', stdout=out)
+        self.assertIn('Rebuilt 1 fee arrears rows', out.getvalue())
+        self.assertEqual(self.snapshot(), maintained)
+
+        call_command('rebuild_fee_arrears', school_id=self.school.id, stdout=StringIO())
+        self.assertEqual(self.snapshot(), maintained)
@@ -0,0 +1,99 @@
+"""
+Tests for set-based monthly fee generation (students.fee_generation).
+
+Run with:
+    python manage.py test students.tests_fee_generation
+"""
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from students import fee_generation
+from students.models import CustomUser, Fee, School, Student
+
+
+class FeeGenerationTest(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(username='gen_admin', password='pass1234', role='Admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def make_school(self, name, students=3, **kwargs):
+        school = School.objects.create(name=name, **kwargs)
+        for index in range(students):
+            Student.objects.create(
+                reg_num=f"GEN-{school.id}-{index}", name=f"{name} Student {index}", school=school,
+                student_class='Class 1', status='Active', monthly_fee=Decimal('1500'),
+            )
+        return school
+
+    def test_queries_do_not_grow_with_schools(self):
+        counts = []
+        for size in (2, 8):
+            schools = [self.make_school(f"Batch {size}-{index}") for index in range(size)]
+            with CaptureQueriesContext(connection) as queries:
+                result = fee_generation.generate_month_fees([school.id for school in schools], 'Mar-2026')
+            self.assertEqual(result['records_created'], size * 3)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(Fee.objects.filter(month='Mar-2026', total_fee=Decimal('1500')).count(), 30)
+
+    def test_subscription_rounding_adds_up_to_the_subscription(self):
+        school = self.make_school(
+            "Subscription School", payment_mode='monthly_subscription', monthly_subscription_amount=Decimal('1000'),
+        )
+
+        result = fee_generation.generate_month_fees([school.id], 'Mar-2026')
+
+        summary = result['schools'][0]
+        self.assertEqual((summary['fee_per_student'], summary['adjustment']), ('333.33', '0.01'))
+        amounts = sorted(Fee.objects.filter(school=school).values_list('total_fee', flat=True))
+        self.assertEqual(amounts, [Decimal('333.33'), Decimal('333.33'), Decimal('333.34')])
+
+    def test_dry_run_previews_per_school_totals_without_writing(self):
+        ready = self.make_school("Ready School")
+        empty = self.make_school("Empty School", students=0)
+        broken = self.make_school("Broken School", payment_mode='monthly_subscription')
+
+        response = self.client.post('/api/fees/generate/', {'month': 'Mar-2026', 'dry_run': True}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        by_school = {school['school_id']: school for school in response.data['schools']}
+        self.assertEqual((by_school[ready.id]['status'], by_school[ready.id]['total_amount']), ('preview', '4500.00'))
+        self.assertEqual(by_school[empty.id]['status'], fee_generation.NO_STUDENTS)
+        self.assertEqual(by_school[broken.id]['status'], fee_generation.INVALID_SUBSCRIPTION)
+        self.assertEqual(response.data['records_planned'], 3)
+        self.assertFalse(Fee.objects.exists())
+
+    def test_existing_months_are_kept_replaced_or_topped_up(self):
+        school = self.make_school("Existing School", students=2)
+        fee_generation.generate_month_fees([school.id], 'Mar-2026')
+        Fee.objects.filter(school=school).update(paid_amount=Decimal('100'))
+
+        result = fee_generation.generate_month_fees([school.id], 'Mar-2026')
+        self.assertEqual(result['schools'][0]['status'], fee_generation.EXISTS)
+
+        Student.objects.create(
+            reg_num='GEN-LATE', name='Late Joiner', school=school, student_class='Class 1',
+            status='Active', monthly_fee=Decimal('900'),
+        )
+        result = fee_generation.generate_month_fees([school.id], 'Mar-2026', missing_only=True)
+        self.assertEqual(result['schools'][0]['students_added'], ['Late Joiner'])
+        self.assertEqual(Fee.objects.filter(school=school, paid_amount=Decimal('100')).count(), 2)
+
+        fee_generation.generate_month_fees([school.id], 'Mar-2026', force_overwrite=True)
+        self.assertEqual(Fee.objects.filter(school=school).count(), 3)
+        self.assertFalse(Fee.objects.filter(school=school, paid_amount=Decimal('100')).exists())
+
+    def test_single_school_endpoint_keeps_its_contract(self):
+        school = self.make_school("Endpoint School")
+
+        response = self.client.post('/api/fees/create/', {'school_id': school.id, 'month': 'Mar-2026'}, format='json')
+        self.assertEqual((response.status_code, response.data['records_created']), (201, 3))
+
+        response = self.client.post('/api/fees/create/', {'school_id': school.id, 'month': 'Mar-2026'}, format='json')
+        self.assertEqual(response.status_code, 409)
@@ -0,0 +1,70 @@
+"""
+Tests for the fee listing API (students.fee_listing, GET /api/fees/).
+
+Run with:
+    python manage.py test students.tests_fee_listing
+"""
+import json
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from students.models import CustomUser, Fee, School
+
+
+class FeeListingTest(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Listing School")
+        self.admin = CustomUser.objects.create_user(username='listing_admin', password='pass1234', role='Admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        Fee.objects.bulk_create([
+            Fee(
+                student_id=index, student_name=f"Student {index:02d}", school=self.school,
+                student_class=f"Class {index % 3}", month='Mar-2026',
+                total_fee=Decimal('1000'), balance_due=Decimal(str((index % 4) * 250)),
+            )
+            for index in range(25)
+        ])
+
+    def test_list_is_one_query_with_school_names(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/fees/', {'school_id': self.school.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 25)
+        self.assertEqual(response.data[0]['school'], 'Listing School')
+        self.assertEqual(set(response.data[0]), {
+            'id', 'student_name', 'school', 'student_class', 'monthly_fee', 'month', 'total_fee',
+            'paid_amount', 'balance_due', 'payment_date', 'status', 'student_id',
+        })
+
+    def test_keyset_pages_cover_every_row_once_in_sort_order(self):
+        seen = []
+        params = {'page_size': 10, 'sort': '-balance_due', 'fields': 'id,balance_due'}
+        response = self.client.get('/api/fees/', params)
+        self.assertEqual(response.data['count'], 25)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(set(response.data['results'][0]), {'id', 'balance_due'})
+            seen.extend(response.data['results'])
+            if not response.data['next_cursor']:
+                break
+            response = self.client.get('/api/fees/', dict(params, cursor=response.data['next_cursor']))
+
+        expected = sorted(Fee.objects.values_list('balance_due', 'id'), key=lambda row: (-row[0], -row[1]))
+        self.assertEqual([(row['balance_due'], row['id']) for row in seen], expected)
+
+    def test_stream_returns_a_json_array(self):
+        response = self.client.get('/api/fees/', {'stream': '1', 'fields': 'student_name', 'sort': 'student_name'})
+
+        self.assertEqual(response.status_code, 200)
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(rows), 25)
+        self.assertEqual(rows[0], {'student_name': 'Student 00'})
+
+    def test_bad_parameters_are_rejected(self):
+        self.assertEqual(self.client.get('/api/fees/', {'sort': 'password'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/fees/', {'fields': 'id,secret'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/fees/', {'page_size': 5, 'cursor': 'nonsense'}).status_code, 400)
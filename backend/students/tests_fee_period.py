@@ -0,0 +1,74 @@
+"""
+Tests for the normalized Fee.period column.
+
+Run with:
+    python manage.py test students.tests_fee_period
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from students.models import CustomUser, Fee, School, Student, fee_period
+
+
+class FeePeriodTest(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Period School")
+        self.student = Student.objects.create(
+            reg_num='PER-001', name='Period Student', school=self.school, student_class='Class 1',
+            status='Active', monthly_fee=Decimal('1500'),
+        )
+        self.admin = CustomUser.objects.create_user(username='period_admin', password='pass1234', role='Admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def make_fee(self, month, **kwargs):
+        return Fee(
+            student_id=self.student.id, student_name=self.student.name, school=self.school,
+            student_class='Class 1', month=month, total_fee=Decimal('1500'), balance_due=Decimal('1500'), **kwargs
+        )
+
+    def test_fee_period_parses_month_labels(self):
+        self.assertEqual(fee_period('Feb-2025'), date(2025, 2, 1))
+        self.assertEqual(fee_period('February-2025'), date(2025, 2, 1))
+        self.assertEqual(fee_period('2025-02'), date(2025, 2, 1))
+        self.assertIsNone(fee_period('sometime'))
+
+    def test_period_follows_month_on_every_write_path(self):
+        fee = self.make_fee('Jan-2026')
+        fee.save()
+        self.assertEqual(Fee.objects.get(id=fee.id).period, date(2026, 1, 1))
+
+        fee.month = 'Feb-2026'
+        fee.save(update_fields=['month'])
+        self.assertEqual(Fee.objects.get(id=fee.id).period, date(2026, 2, 1))
+
+        Fee.objects.bulk_create([self.make_fee('Mar-2026')])
+        self.assertTrue(Fee.objects.filter(month='Mar-2026', period=date(2026, 3, 1)).exists())
+
+        Fee.objects.filter(id=fee.id).update(month='Apr-2026')
+        self.assertEqual(Fee.objects.get(id=fee.id).period, date(2026, 4, 1))
+
+        fee = Fee.objects.get(id=fee.id)
+        fee.month = 'May-2026'
+        Fee.objects.bulk_update([fee], ['month'])
+        self.assertEqual(Fee.objects.get(id=fee.id).period, date(2026, 5, 1))
+
+    def test_range_filter_is_chronological(self):
+        Fee.objects.bulk_create([self.make_fee(month) for month in ('Nov-2025', 'Dec-2025', 'Jan-2026', 'Apr-2026')])
+
+        response = self.client.get('/api/fees/', {'from_month': 'Dec-2025', 'to_month': 'Mar-2026'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([fee['month'] for fee in response.data], ['Dec-2025', 'Jan-2026'])
+
+    def test_next_month_follows_latest_period_across_years(self):
+        Fee.objects.bulk_create([self.make_fee('Dec-2025'), self.make_fee('Nov-2025')])
+
+        response = self.client.post('/api/fees/create/', {'school_id': self.school.id}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['month'], 'Jan-2026')
+        self.assertEqual(Fee.objects.get(month='Jan-2026').period, date(2026, 1, 1))
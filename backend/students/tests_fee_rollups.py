@@ -0,0 +1,96 @@
+"""
+Tests for the fee collection rollups (students.fee_rollups).
+
+Run with:
+    python manage.py test students.tests_fee_rollups
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from students.models import CustomUser, Fee, FeeCollectionRollup, School, Student
+
+
+class FeeRollupTest(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Rollup School")
+        self.admin = CustomUser.objects.create_user(username='rollup_admin', password='pass1234', role='Admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def make_fee(self, month='Mar-2026', student_class='Class 1', total='1000', paid='0', school=None):
+        return Fee(
+            student_id=1, student_name='Rollup Student', school=school or self.school, student_class=student_class,
+            month=month, total_fee=Decimal(total), paid_amount=Decimal(paid),
+            balance_due=Decimal(total) - Decimal(paid), status='Paid' if paid == total else 'Pending',
+        )
+
+    def rollup(self, month='Mar-2026', student_class='Class 1'):
+        return FeeCollectionRollup.objects.get(school=self.school, month=month, student_class=student_class)
+
+    def snapshot(self):
+        return sorted(FeeCollectionRollup.objects.values_list(
+            'school_id', 'month', 'student_class', 'total_fee', 'paid_amount', 'balance_due',
+            'record_count', 'paid_count', 'pending_count', 'active_students',
+        ))
+
+    def test_rollups_follow_every_write_path(self):
+        Student.objects.create(reg_num='ROL-1', name='Active One', school=self.school, student_class='Class 1', status='Active')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Fee.objects.bulk_create([self.make_fee(), self.make_fee(paid='1000'), self.make_fee(student_class='Class 2')])
+        rollup = self.rollup()
+        self.assertEqual((rollup.total_fee, rollup.paid_amount, rollup.record_count), (Decimal('2000'), Decimal('1000'), 2))
+        self.assertEqual((rollup.paid_count, rollup.pending_count, rollup.active_students), (1, 1, 1))
+
+        fee = Fee.objects.filter(student_class='Class 1', status='Pending').first()
+        with self.captureOnCommitCallbacks(execute=True):
+            fee.paid_amount, fee.balance_due, fee.status = Decimal('1000'), Decimal('0'), 'Paid'
+            fee.save()
+        self.assertEqual((self.rollup().paid_amount, self.rollup().paid_count), (Decimal('2000'), 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Fee.objects.filter(student_class='Class 2').update(month='Apr-2026')
+        self.assertFalse(FeeCollectionRollup.objects.filter(month='Mar-2026', student_class='Class 2').exists())
+        self.assertEqual(self.rollup('Apr-2026', 'Class 2').record_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Fee.objects.filter(month='Apr-2026').delete()
+        self.assertFalse(FeeCollectionRollup.objects.filter(month='Apr-2026').exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Student.objects.create(reg_num='ROL-2', name='Active Two', school=self.school, student_class='Class 1', status='Active')
+        self.assertEqual(self.rollup().active_students, 2)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        other = School.objects.create(name="Other Rollup School")
+        with self.captureOnCommitCallbacks(execute=True):
+            Fee.objects.bulk_create([
+                self.make_fee(), self.make_fee(paid='1000'), self.make_fee(month='Feb-2026'),
+                self.make_fee(school=other, total='500'),
+            ])
+        incremental = self.snapshot()
+
+        FeeCollectionRollup.objects.all().delete()
+        call_command('rebuild_fee_rollups', stdout=StringIO())
+
+        self.assertEqual(self.snapshot(), incremental)
+        self.assertEqual(len(incremental), 3)
+
+    def test_reports_read_rollups_not_fees(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Fee.objects.bulk_create([self.make_fee(month='Feb-2026')] + [self.make_fee(paid='1000') for _ in range(30)])
+
+        with self.assertNumQueries(2):  # one rollup read per month
+            response = self.client.get('/api/fees/compare/', {'month1': 'Feb-2026', 'month2': 'Mar-2026'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['month2']['total_records'], 30)
+        self.assertEqual(response.data['month2']['recovery_rate'], 100.0)
+        self.assertEqual(response.data['comparison']['student_change'], 29)
+
+        response = self.client.get('/api/fee-summary/', {'month': 'Mar-2026'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(float(response.data[0]['total_fee']), 30000.0)
@@ -0,0 +1,94 @@
+"""
+Tests for bulk fee updates (students.fee_updates, POST /api/fees/update/).
+
+Run with:
+    python manage.py test students.tests_fee_updates
+"""
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from students.models import CustomUser, Fee, School, Student
+
+
+class BulkFeeUpdateTest(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Fee School")
+        self.other_school = School.objects.create(name="Other Fee School")
+        self.admin = CustomUser.objects.create_user(username='fee_admin', password='pass1234', role='Admin')
+        self.teacher = CustomUser.objects.create_user(username='fee_teacher', password='pass1234', role='Teacher')
+        self.teacher.assigned_schools.add(self.school)
+        self.client = APIClient()
+
+    def make_fees(self, count, school=None):
+        school = school or self.school
+        fees = []
+        for index in range(count):
+            student = Student.objects.create(
+                reg_num=f"FEE-{school.id}-{index}", name=f"Fee Student {index}", school=school,
+                student_class='Class 1', status='Active',
+            )
+            fees.append(Fee.objects.create(
+                student_id=student.id, student_name=student.name, school=school, student_class='Class 1',
+                month='Mar-2026', total_fee=Decimal('2000'), balance_due=Decimal('2000'),
+            ))
+        return fees
+
+    def post(self, user, rows):
+        self.client.force_authenticate(user)
+        return self.client.post('/api/fees/update/', {'fees': rows}, format='json')
+
+    def test_query_count_does_not_grow_with_rows(self):
+        counts = []
+        for size in (5, 60):
+            fees = self.make_fees(size, School.objects.create(name=f"Size {size}"))
+            rows = [{'id': fee.id, 'paid_amount': '2000', 'date_received': '2026-03-02'} for fee in fees]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post(self.admin, rows)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['updated'], size)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+        fee = Fee.objects.get(id=fees[0].id)
+        self.assertEqual((fee.status, fee.balance_due, str(fee.date_received)), ('Paid', Decimal('0'), '2026-03-02'))
+
+    def test_invalid_row_rolls_back_the_whole_batch(self):
+        first, second = self.make_fees(2)
+
+        response = self.post(self.admin, [
+            {'id': first.id, 'paid_amount': '500'},
+            {'id': second.id, 'paid_amount': '5000'},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('exceeds total fee', response.data['error'])
+        self.assertEqual([r['status'] for r in response.data['results']], ['not_applied', 'invalid'])
+        first.refresh_from_db()
+        self.assertEqual(first.paid_amount, Decimal('0'))
+
+    def test_teacher_cannot_touch_fees_of_unassigned_school(self):
+        own = self.make_fees(1)[0]
+        foreign = self.make_fees(1, self.other_school)[0]
+
+        response = self.post(self.teacher, [
+            {'id': own.id, 'paid_amount': '100'},
+            {'id': foreign.id, 'paid_amount': '100'},
+        ])
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['results'][1]['status'], 'forbidden')
+        own.refresh_from_db()
+        self.assertEqual(own.paid_amount, Decimal('0'))
+
+    def test_unknown_ids_are_reported_and_skipped(self):
+        fee = self.make_fees(1)[0]
+
+        response = self.post(self.teacher, [{'id': fee.id, 'paid_amount': '800'}, {'id': 999999, 'paid_amount': '1'}])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['status'] for r in response.data['results']], ['updated', 'not_found'])
+        self.assertEqual(response.data['fees'][0]['balance_due'], '1200.00')
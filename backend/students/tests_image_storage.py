@@ -0,0 +1,166 @@
+"""
+Tests for student progress image storage (students.image_storage).
+
+Run with:
+    python manage.py test students.tests_image_storage
+"""
+import shutil
+import tempfile
+from datetime import date
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image as PILImage
+from rest_framework.test import APIClient
+
+from students import image_storage
+from students.models import CustomUser, School, Student, StudentImage
+
+
+class LocalImageStorageTest(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        settings_override = override_settings(STUDENT_IMAGES_STORAGE='local', STUDENT_IMAGES_LOCAL_DIR=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        image_storage.reset_image_storage()
+        self.addCleanup(image_storage.reset_image_storage)
+        cache.clear()
+
+        self.school = School.objects.create(name="Storage School")
+        self.student = Student.objects.create(
+            reg_num='IMG-001', name='Image Student', school=self.school, student_class='Class 1', status='Active'
+        )
+        self.storage = image_storage.get_image_storage()
+
+    def upload(self, filename):
+        self.storage.upload(f"{self.student.id}/{filename}", b'jpeg-bytes')
+
+    def test_backfill_indexes_bucket_contents(self):
+        self.upload('2026-03-02_aaa.jpg')
+        self.upload('2026-03-20_bbb.jpg')
+        self.upload('2026-04-01_ccc.jpg')
+        self.upload('notes.txt')
+        legacy = StudentImage.objects.create(
+            student=self.student,
+            session_date=date(2026, 2, 1),
+            image_url=f"https://x.supabase.co/storage/v1/object/sign/student-images/{self.student.id}/2026-02-01_old.jpg?token=t",
+        )
+
+        call_command('backfill_student_images', stdout=StringIO())
+        call_command('backfill_student_images', stdout=StringIO())
+
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.storage_path, f"{self.student.id}/2026-02-01_old.jpg")
+        self.assertEqual(StudentImage.objects.filter(student=self.student).count(), 4)
+        self.assertEqual(StudentImage.objects.get(storage_path=f"{self.student.id}/2026-03-20_bbb.jpg").file_size, 10)
+
+        images = image_storage.get_student_images_with_urls(self.student.id, date(2026, 3, 1), date(2026, 3, 31))
+
+        self.assertEqual([image['filename'] for image in images], ['2026-03-20_bbb.jpg', '2026-03-02_aaa.jpg'])
+        self.assertEqual(images[0]['date'], date(2026, 3, 20))
+        self.assertTrue(images[0]['url'].startswith(f"/media/student-images/{self.student.id}/2026-03-20_bbb.jpg?token="))
+
+    def test_listing_and_counts_come_from_student_image_table(self):
+        self.upload('2026-03-02_aaa.jpg')
+        self.upload('2026-03-05_bbb.jpg')
+        image_storage.record_student_image(self.student.id, f"{self.student.id}/2026-03-05_bbb.jpg", '2026-03-05', b'x')
+
+        with patch.object(self.storage, 'list') as mock_list:
+            listing = image_storage.list_student_images([self.student.id])
+            counts = image_storage.count_student_images([self.student.id], date(2026, 3, 1), date(2026, 3, 31))
+
+        mock_list.assert_not_called()
+        self.assertEqual([image['path'] for image in listing[self.student.id]], [f"{self.student.id}/2026-03-05_bbb.jpg"])
+        self.assertEqual(counts, {self.student.id: 1})
+
+    def test_students_without_rows_are_indexed_on_first_listing(self):
+        self.upload('2026-03-02_aaa.jpg')
+        self.upload('2026-03-05_bbb.jpg')
+
+        with patch.object(self.storage, 'list', wraps=self.storage.list) as mock_list:
+            counts = image_storage.count_student_images([self.student.id], date(2026, 3, 1), date(2026, 3, 31))
+            listing = image_storage.list_student_images([self.student.id])
+
+        mock_list.assert_called_once_with(f"{self.student.id}/")
+        self.assertEqual(counts, {self.student.id: 2})
+        self.assertEqual([image['filename'] for image in listing[self.student.id]],
+                         ['2026-03-05_bbb.jpg', '2026-03-02_aaa.jpg'])
+        self.assertEqual(StudentImage.objects.filter(student=self.student).count(), 2)
+
+    def test_signed_urls_are_created_in_one_batch_and_cached(self):
+        paths = [f"{self.student.id}/2026-03-0{day}_img.jpg" for day in range(1, 4)]
+        for path in paths:
+            self.storage.upload(path, b'jpeg-bytes')
+
+        with patch.object(self.storage, 'create_signed_urls', wraps=self.storage.create_signed_urls) as mock_sign:
+            first = image_storage.sign_paths(paths)
+            second = image_storage.sign_paths(paths)
+
+        mock_sign.assert_called_once_with(paths, image_storage.SIGNED_URL_EXPIRY)
+        self.assertEqual(first, second)
+        self.assertEqual(set(first), set(paths))
+
+    def test_upload_endpoint_uses_configured_storage(self):
+        user = CustomUser.objects.create_user(username='img_teacher', password='pass1234', role='Teacher')
+        client = APIClient()
+        client.force_authenticate(user)
+
+        photo = BytesIO()
+        PILImage.new('RGB', (40, 30), 'white').save(photo, format='JPEG')
+
+        with patch('students.tasks.generate_student_image_variants_task.delay') as mock_delay:
+            response = client.post('/api/upload-student-image/', {
+                'image': SimpleUploadedFile('photo.jpg', photo.getvalue(), content_type='image/jpeg'),
+                'student_id': self.student.id,
+                'session_date': '2026-03-02',
+            })
+
+        self.assertEqual(response.status_code, 201)
+        listing = self.storage.list(f"{self.student.id}/")
+        self.assertEqual(len(listing), 1)
+        self.assertTrue(listing[0]['name'].startswith('2026-03-02_'))
+        image = StudentImage.objects.get(student=self.student)
+        self.assertEqual(image.storage_path, f"{self.student.id}/{listing[0]['name']}")
+        self.assertEqual((image.width, image.height), (40, 30))
+        self.assertEqual(image.file_size, len(photo.getvalue()))
+        mock_delay.assert_called_once_with(image.id)
+
+        response = client.get('/api/student-images/', {'student_id': self.student.id, 'month': '2026-03'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['monthly_images']), 1)
+        self.assertEqual(response.data['monthly_images'][0]['date'], '2026-03-02')
+
+    def test_variants_are_stored_beside_the_original(self):
+        photo = BytesIO()
+        PILImage.new('RGB', (2000, 1500), 'blue').save(photo, format='JPEG')
+        path = f"{self.student.id}/2026-03-02_aaa.jpg"
+        self.storage.upload(path, photo.getvalue())
+        image = image_storage.record_student_image(self.student.id, path, '2026-03-02', photo.getvalue())
+
+        images = image_storage.get_student_images_with_urls(self.student.id)
+        self.assertIsNone(images[0]['thumbnail_url'])
+
+        paths = image_storage.generate_student_image_variants(image)
+
+        self.assertEqual(paths['thumb'], f"{self.student.id}/variants/2026-03-02_aaa_thumb.jpg")
+        with PILImage.open(BytesIO(self.storage.download(paths['thumb']))) as thumb:
+            self.assertEqual(thumb.size, (600, 450))
+        with PILImage.open(BytesIO(self.storage.download(paths['webp']))) as webp:
+            self.assertEqual((webp.format, webp.size), ('WEBP', (1280, 960)))
+        image.refresh_from_db()
+        self.assertEqual(image.thumbnail_path, paths['thumb'])
+        # Variants are not listed as images of their own
+        self.assertEqual([entry['name'] for entry in self.storage.list(f"{self.student.id}/")], ['2026-03-02_aaa.jpg'])
+
+        images = image_storage.get_student_images_with_urls(self.student.id)
+        self.assertTrue(images[0]['thumbnail_url'].startswith(f"/media/student-images/{paths['thumb']}?token="))
+        self.assertTrue(images[0]['webp_url'].startswith(f"/media/student-images/{paths['webp']}?token="))
+
+        image_storage.delete_student_images([path])
+        self.assertEqual(self.storage.list(f"{self.student.id}/variants/"), [])
@@ -0,0 +1,66 @@
+"""
+Tests for student search (students.search, GET /api/students/search/).
+
+Run with:
+    python manage.py test students.tests_search
+"""
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from ai.resolver import student_candidates
+from students.models import CustomUser, School, Student
+from students.search import search_students
+
+
+class StudentSearchTest(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Search School")
+        self.other = School.objects.create(name="Other School")
+        self.ali = Student.objects.create(reg_num='26-KK-SS-001', name='Muhammad Ali', school=self.school,
+                                          student_class='Class 1', phone='0300-1234567')
+        self.alina = Student.objects.create(reg_num='26-KK-SS-002', name='Alina Khan', school=self.school,
+                                            student_class='Class 2')
+        self.sara = Student.objects.create(reg_num='26-KK-OS-001', name='Sara Ali', school=self.other,
+                                           student_class='Class 1', phone='03219876543')
+        Student.objects.create(reg_num='26-KK-SS-003', name='Ali Left', school=self.school, status='Left')
+        self.admin = CustomUser.objects.create_user(username='search_admin', password='pass1234', role='Admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def ids(self, query, students=None, **kwargs):
+        return [row['id'] for row in search_students(students or Student.objects.filter(status='Active'), query, **kwargs)]
+
+    def test_ranking_prefers_prefix_then_substring_matches(self):
+        self.assertEqual(self.ids('Ali')[:1], [self.alina.id])
+        self.assertEqual(set(self.ids('Ali')), {self.ali.id, self.alina.id, self.sara.id})
+        self.assertEqual(self.ids('26-KK-SS-001')[0], self.ali.id)
+        self.assertEqual(self.ids('1234567'), [self.ali.id])
+        self.assertEqual(self.ids('Ali', limit=1), [self.alina.id])
+        self.assertEqual(self.ids('zzzz'), [])
+
+    @skipUnless(connection.vendor == 'postgresql', 'trigram matching needs pg_trgm')
+    def test_typos_match_by_trigram_similarity(self):
+        self.assertIn(self.ali.id, self.ids('Muhamad Ali'))
+
+    def test_endpoint_scopes_to_accessible_schools(self):
+        response = self.client.get('/api/students/search/', {'q': 'ali'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 3)
+        row = next(row for row in response.data['results'] if row['id'] == self.ali.id)
+        self.assertEqual((row['school'], row['reg_num'], row['student_class']), ('Search School', '26-KK-SS-001', 'Class 1'))
+
+        self.assertEqual(self.client.get('/api/students/search/', {'q': 'ali', 'status': 'all'}).data['count'], 4)
+        self.assertEqual(self.client.get('/api/students/search/', {'q': 'a'}).status_code, 400)
+
+        teacher = CustomUser.objects.create_user(username='search_teacher', password='pass1234', role='Teacher')
+        teacher.assigned_schools.add(self.other)
+        self.client.force_authenticate(teacher)
+        response = self.client.get('/api/students/search/', {'q': 'ali'})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.sara.id])
+
+    def test_ai_resolver_candidates_come_from_the_index(self):
+        candidates = student_candidates(Student.objects.filter(school=self.school, status='Active'), 'alina')
+        self.assertEqual(list(candidates), [self.alina])
@@ -0,0 +1,94 @@
+"""
+Tests for the identifier counters (students.sequences) behind reg numbers
+and inventory unique_ids.
+
+Run with:
+    python manage.py test students.tests_sequences
+"""
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from inventory.models import InventoryItem
+from students.models import CustomUser, IdSequence, School, Student
+from students.reg_numbers import allocate_reg_nums, reg_num_prefix
+from students.sequences import reserve_ids
+
+
+class IdSequenceTest(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Green Valley School")
+
+    def test_reservations_are_consecutive_and_seeded_once(self):
+        seeds = []
+
+        def seed():
+            seeds.append(1)
+            return 41
+
+        self.assertEqual(list(reserve_ids('test', 'A-', 3, seed)), [42, 43, 44])
+        self.assertEqual(list(reserve_ids('test', 'A-', 1, seed)), [45])
+        self.assertEqual(list(reserve_ids('test', 'B-')), [1])
+        self.assertEqual(seeds, [1])
+        self.assertEqual(IdSequence.objects.get(name='test:A-').last_value, 45)
+
+    def test_block_size_does_not_change_the_query_count(self):
+        reserve_ids('test', 'A-')
+        counts = []
+        for count in (1, 500):
+            with CaptureQueriesContext(connection) as queries:
+                reserve_ids('test', 'A-', count)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_rolled_back_reservation_is_handed_out_again(self):
+        reserve_ids('test', 'A-')
+        try:
+            with transaction.atomic():
+                self.assertEqual(list(reserve_ids('test', 'A-', 2)), [2, 3])
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(list(reserve_ids('test', 'A-')), [2])
+
+    def test_reg_nums_continue_after_existing_and_skip_hand_typed_ones(self):
+        prefix = reg_num_prefix(self.school)
+        for number in (1, 2, 7):
+            Student.objects.create(reg_num=f"{prefix}{number:03d}", name=f"Student {number}", school=self.school)
+
+        self.assertEqual(allocate_reg_nums(self.school, 2), [f"{prefix}008", f"{prefix}009"])
+
+        Student.objects.create(reg_num=f"{prefix}010", name='Typed In', school=self.school)
+        CustomUser.objects.create_user(username=f"{prefix}011", password='x', role='Student')
+        self.assertEqual(allocate_reg_nums(self.school, 2), [f"{prefix}012", f"{prefix}013"])
+
+    def test_inventory_ids_come_from_the_counter(self):
+        first = InventoryItem.objects.create(name='Laptop', school=self.school, purchase_value=Decimal('100'))
+        prefix = first.unique_id.rsplit('-', 1)[0]
+        self.assertTrue(first.unique_id.endswith('-001'))
+
+        # Deleting an item no longer makes the next one reuse a live ID
+        second = InventoryItem.objects.create(name='Laptop', school=self.school, purchase_value=Decimal('100'))
+        first.delete()
+        third = InventoryItem.objects.create(name='Laptop', school=self.school, purchase_value=Decimal('100'))
+        self.assertEqual((second.unique_id, third.unique_id), (f"{prefix}-002", f"{prefix}-003"))
+
+    def test_inventory_bulk_create_reserves_one_block(self):
+        admin = CustomUser.objects.create_user(username='seq_admin', password='pass1234', role='Admin')
+        client = APIClient()
+        client.force_authenticate(admin)
+        InventoryItem.objects.create(name='Chair', school=self.school, purchase_value=Decimal('10'))
+
+        response = client.post('/api/inventory/bulk-create/', {
+            'name': 'Chair', 'location': 'School', 'school': self.school.id,
+            'purchase_value': '10.00', 'quantity': 25,
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        unique_ids = [item['unique_id'] for item in response.data['items']]
+        self.assertEqual(len(set(unique_ids)), 25)
+        self.assertTrue(unique_ids[0].endswith('-002') and unique_ids[-1].endswith('-026'))
+        self.assertEqual(InventoryItem.objects.filter(name='Chair').count(), 26)
@@ -0,0 +1,161 @@
+"""
+Tests for the bulk student import (students.student_import) and reg number
+allocation (students.reg_numbers).
+
+Run with:
+    python manage.py test students.tests_student_import
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from io import BytesIO
+
+from django.contrib.auth.hashers import check_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from openpyxl import Workbook
+from rest_framework.test import APIClient
+
+from students.models import CustomUser, School, Student
+from students.passwords import hash_passwords
+from students.reg_numbers import allocate_reg_nums, reg_num_prefix
+from students.student_import import import_students
+
+
+def csv_upload(text, name='students.csv'):
+    return SimpleUploadedFile(name, text.encode('utf-8'), content_type='text/csv')
+
+
+@override_settings(STUDENT_IMPORT_HASH_WORKERS=1)
+class StudentImportTest(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Green Valley School")
+        self.other = School.objects.create(name="Blue Hill")
+        self.prefix = reg_num_prefix(self.school)
+        self.admin = CustomUser.objects.create_user(username='import_admin', password='pass1234', role='Admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_reg_nums_skip_taken_numbers_without_probing(self):
+        Student.objects.create(reg_num=f"{self.prefix}002", name='Existing', school=self.school)
+        CustomUser.objects.create_user(username=f"{self.prefix}003", password='x', role='Student')
+
+        self.assertEqual(allocate_reg_nums(self.school, 3), [f"{self.prefix}00{n}" for n in (4, 5, 6)])
+
+        counts = []
+        for count in (1, 50):
+            with CaptureQueriesContext(connection) as queries:
+                allocate_reg_nums(self.school, count)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_import_creates_students_and_logins(self):
+        upload = csv_upload(
+            "Name,Class,Fee,Phone,Gender,DOB,Password,Roll\n"
+            "Ali Khan,Class 3,\"1,500\",03001234567,male,2015-04-02,secret1,7\n"
+            "Sara,Class 3,1200,,Female,02/05/2016,,8\n"
+        )
+
+        report = import_students(upload, default_school=self.school, default_password='welcome1')
+
+        self.assertEqual((report['rows'], report['created'], report['failed']), (2, 2, 0))
+        self.assertEqual(report['ignored_columns'], ['roll'])
+        ali = Student.objects.get(name='Ali Khan')
+        self.assertEqual(
+            (ali.reg_num, ali.user.username, ali.user.role, ali.user.first_name),
+            (report['students'][0]['reg_num'], ali.reg_num, 'Student', 'Ali'),
+        )
+        self.assertEqual((ali.monthly_fee, ali.gender, ali.date_of_birth), (Decimal('1500'), 'Male', date(2015, 4, 2)))
+        self.assertTrue(check_password('secret1', ali.user.password))
+        sara = Student.objects.get(name='Sara')
+        self.assertEqual(sara.date_of_birth, date(2016, 5, 2))
+        self.assertTrue(check_password('welcome1', sara.user.password))
+
+    def test_invalid_rows_are_reported_and_the_rest_imported(self):
+        Student.objects.create(reg_num='EXISTING-1', name='Already Here', school=self.school, student_class='Class 1')
+        upload = csv_upload(
+            "name,school,student_class,monthly_fee,gender,date_of_birth\n"
+            "Good One,Blue Hill,Class 1,1000,,\n"
+            ",Blue Hill,Class 1,1000,,\n"
+            "Bad Fee,Nowhere,Class 1,-5,Robot,31-31-2015\n"
+            "Already Here,Green Valley School,Class 1,1000,,\n"
+            "Good One,Blue Hill,Class 1,1000,,\n"
+        )
+
+        report = import_students(upload, default_password='welcome1')
+
+        self.assertEqual((report['rows'], report['created'], report['failed']), (5, 1, 4))
+        errors = {error['row']: error['errors'] for error in report['errors']}
+        self.assertEqual(sorted(errors), [3, 4, 5, 6])
+        self.assertEqual(set(errors[4]), {'school', 'monthly_fee', 'gender', 'date_of_birth'})
+        self.assertIn('already a student', errors[5]['name'])
+        self.assertIn('earlier in the file', errors[6]['name'])
+        self.assertEqual(list(Student.objects.filter(school=self.other).values_list('name', flat=True)), ['Good One'])
+
+    def test_dry_run_writes_nothing(self):
+        report = import_students(csv_upload("name,class\nAli,Class 1\n"), default_school=self.school,
+                                 default_password='welcome1', dry_run=True)
+
+        self.assertEqual((report['created'], report['students']), (1, []))
+        self.assertFalse(Student.objects.exists())
+
+    def test_query_count_does_not_grow_with_rows(self):
+        allocate_reg_nums(self.school, 1)  # creates the school's reg number counter
+        counts = []
+        for size in (5, 40):
+            rows = ''.join(f"Student {size}-{index},Class 1\n" for index in range(size))
+            with CaptureQueriesContext(connection) as queries:
+                report = import_students(csv_upload("name,class\n" + rows), default_school=self.school,
+                                         default_password='welcome1')
+            self.assertEqual(report['created'], size)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(len(set(Student.objects.values_list('reg_num', flat=True))), 45)
+
+    def test_excel_upload_through_the_endpoint(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['Name', 'Class', 'Phone', 'Date of Birth'])
+        sheet.append(['Excel Kid', 5, 3001234567, datetime(2014, 1, 9)])
+        buffer = BytesIO()
+        workbook.save(buffer)
+        upload = SimpleUploadedFile('students.xlsx', buffer.getvalue())
+
+        response = self.client.post('/api/students/import/', {
+            'file': upload, 'school': self.school.id, 'password': 'welcome1',
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        student = Student.objects.get(name='Excel Kid')
+        self.assertEqual((student.student_class, student.phone), ('5', '3001234567'))
+        self.assertEqual(student.date_of_birth, date(2014, 1, 9))
+
+    def test_endpoint_rejects_bad_files_and_other_schools(self):
+        response = self.client.post('/api/students/import/', {
+            'file': SimpleUploadedFile('students.txt', b'name\nAli\n'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+        teacher = CustomUser.objects.create_user(username='import_teacher', password='pass1234', role='Teacher')
+        teacher.assigned_schools.add(self.other)
+        self.client.force_authenticate(teacher)
+        response = self.client.post('/api/students/import/', {
+            'file': csv_upload("name,class\nAli,Class 1\n"), 'school': self.school.id, 'password': 'welcome1',
+        }, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/students/import/', {
+            'file': csv_upload("name,school,class\nAli,Green Valley School,Class 1\n"), 'password': 'welcome1',
+            'report': 'csv',
+        }, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Unknown school', response.content)
+        self.assertFalse(Student.objects.exists())
+
+    def test_pool_hashes_match_inline_hashes(self):
+        passwords = [f"password{index}" for index in range(40)]
+        with override_settings(STUDENT_IMPORT_HASH_WORKERS=2):
+            encoded = hash_passwords(passwords)
+        self.assertTrue(all(check_password(password, hashed) for password, hashed in zip(passwords, encoded)))
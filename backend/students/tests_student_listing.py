@@ -0,0 +1,98 @@
+"""
+Tests for the projected student listing (students.student_listing):
+GET /api/v2/students/ and the legacy GET /api/students/.
+
+Run with:
+    python manage.py test students.tests_student_listing
+"""
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from students.models import CustomUser, School, Student
+from students.student_listing import FIELDS, as_legacy_items
+
+
+class StudentListingTest(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Listing School")
+        self.other = School.objects.create(name="Other School")
+        for index, name in enumerate(['Eve', 'Ali', 'Dan', 'Bea', 'Cal']):
+            user = CustomUser.objects.create_user(username=f"LST-{index}", password='x', role='Student')
+            Student.objects.create(
+                reg_num=f"LST-{index}", name=name, school=self.school, student_class='Class 1' if index % 2 else 'Class 2',
+                monthly_fee=Decimal('1000'), user=user,
+            )
+        Student.objects.create(reg_num='LST-OTHER', name='Zed', school=self.other, student_class='Class 1')
+        Student.objects.create(reg_num='LST-LEFT', name='Ann', school=self.school, student_class='Class 1', status='Left')
+        self.admin = CustomUser.objects.create_user(username='list_admin', password='pass1234', role='Admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_cursor_pages_walk_the_whole_list_in_name_order(self):
+        names, url, params = [], '/api/v2/students/', {'school_id': self.school.id, 'page_size': 2}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            names += [row['name'] for row in response.data['results']]
+            url, params = response.data['next'], None
+
+        self.assertEqual(names, ['Ali', 'Bea', 'Cal', 'Dan', 'Eve'])
+
+    def test_projection_compact_shape_and_filters(self):
+        response = self.client.get('/api/v2/students/', {'shape': 'compact', 'class': 'Class 1', 'school_id': self.school.id})
+        self.assertEqual(response.data['results'], [
+            {'id': student.id, 'name': student.name, 'reg_num': student.reg_num, 'student_class': 'Class 1'}
+            for student in Student.objects.filter(school=self.school, student_class='Class 1', status='Active').order_by('name')
+        ])
+
+        response = self.client.get('/api/v2/students/', {'fields': 'name,school,username', 'status': 'all', 'sort': '-name'})
+        self.assertEqual(response.data['results'][0], {'name': 'Zed', 'school': 'Other School', 'username': None})
+        self.assertIn('Ann', [row['name'] for row in response.data['results']])
+
+        self.assertEqual(self.client.get('/api/v2/students/', {'fields': 'password'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/v2/students/', {'sort': 'phone'}).status_code, 400)
+
+    def test_teachers_only_see_assigned_schools(self):
+        teacher = CustomUser.objects.create_user(username='list_teacher', password='pass1234', role='Teacher')
+        teacher.assigned_schools.add(self.other)
+        self.client.force_authenticate(teacher)
+
+        response = self.client.get('/api/v2/students/')
+        self.assertEqual([row['name'] for row in response.data['results']], ['Zed'])
+
+        student_user = CustomUser.objects.get(username='LST-0')
+        self.client.force_authenticate(student_user)
+        self.assertEqual(self.client.get('/api/v2/students/').status_code, 403)
+
+    def test_query_count_does_not_grow_with_students(self):
+        counts = []
+        for extra in (0, 20):
+            for index in range(extra):
+                Student.objects.create(reg_num=f"LST-X{index}", name=f"Extra {index}", school=self.school)
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get('/api/v2/students/', {'page_size': 50})
+                self.client.get('/api/students/')
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_legacy_list_keeps_its_shape(self):
+        response = self.client.get('/api/students/')
+        self.assertEqual(len(response.data), 6)
+        row = next(row for row in response.data if row['name'] == 'Ali')
+        student = Student.objects.get(name='Ali')
+        self.assertEqual(row['school'], 'Listing School')
+        self.assertEqual((row['user_id'], row['username']), (student.user_id, student.user.username))
+        self.assertEqual(set(row), {
+            'id', 'reg_num', 'name', 'school', 'student_class', 'monthly_fee', 'phone', 'status', 'gender',
+            'date_of_birth', 'date_of_registration', 'address', 'user_id', 'username', 'email',
+        })
+
+        response = self.client.get('/api/students/', {'page': 2, 'page_size': 4})
+        self.assertEqual((response.data['count'], response.data['total_pages'], len(response.data['results'])), (6, 2, 2))
+
+        # Rows without a school name keep the old "Unknown" placeholder
+        self.assertEqual(as_legacy_items([dict.fromkeys(FIELDS.values())])[0]['school'], 'Unknown')
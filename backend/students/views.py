@@ -1,17 +1,27 @@
 from datetime import datetime, timedelta
-from decimal import Decimal
 import os
-from django.http import JsonResponse
+from dateutil.relativedelta import relativedelta
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.utils.timezone import now
-from django.db.models import Sum, Count, Q
+from django.db.models import F, Sum, Count, Q
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from supabase import create_client
 from django.contrib.auth import get_user_model
-from .models import Student, Fee, School, Attendance, CustomUser, LessonPlan, Badge, StudentBadge, TimeSlot
+from .models import Student, Fee, School, Attendance, LessonPlan, Badge, StudentBadge, TimeSlot, fee_month_label, fee_period
+from .attendance_stats import monthly_percentage, stats_for, week_learning, weekly_attendance
+from .fee_arrears import defaulters as fee_defaulters
+from .fee_rollups import fee_rollup_summary, fee_rollup_totals
+from . import fee_generation
+from .fee_generation import generate_month_fees
+from .fee_listing import FeeListingError, list_fees
+from .reg_numbers import allocate_reg_nums
+from .search import search_students
+from .student_listing import StudentListingError, as_legacy_items, filter_students, list_students, project, visible_students
+from .student_import import StudentImportError, error_report_csv, import_students as run_student_import
 from .subtypes import StudentSubtype, DEFAULT_STUDENT_SUBTYPE
 from .serializers import StudentSerializer, SchoolSerializer,  FeeSummarySerializer, StudentProfileSerializer, StudentProfileDetailSerializer, TimeSlotSerializer
 from django.shortcuts import render
@@ -19,7 +29,6 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from decimal import Decimal, ROUND_HALF_UP
 from django.db import transaction
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
@@ -41,6 +50,14 @@ from students.models import StudentImage, LessonPlan
 from rest_framework.views import APIView
 from datetime import datetime, timedelta
 from .models import StudentImage
+from core.cache_helpers import cached_view
+from .image_storage import (
+    get_image_storage,
+    get_student_images_with_urls,
+    queue_student_image_variants,
+    record_student_image,
+    sign_path,
+)
 from employees.email_tasks import send_student_progress_email_task
 
 logger = logging.getLogger(__name__)
@@ -458,6 +475,7 @@ def get_school_stats(request, pk):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_view(timeout=300, tags=['schools', 'students'])
 def get_schools_overview(request):
     """
     Get overview statistics for all schools
@@ -623,21 +641,15 @@ class FeeSummaryView(APIView):
             return Response({"error": "Month parameter is required"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            # Aggregate fee data by school for the specified month
-            fee_summary = Fee.objects.filter(month=month).values('school_id').annotate(
-                total_fee=Sum('total_fee'),
-                paid_amount=Sum('paid_amount'),
-                balance_due=Sum('balance_due')
-            )
+            # Per-school totals from the precomputed rollups (students.fee_rollups)
+            fee_summary = fee_rollup_totals(month)
 
             # Fetch school names
-            schools = School.objects.all()
-            school_map = {school.id: school.name for school in schools}
+            school_map = dict(School.objects.filter(id__in=fee_summary).values_list('id', 'name'))
 
             # Prepare response data
             result = []
-            for entry in fee_summary:
-                school_id = entry['school_id']
+            for school_id, entry in fee_summary.items():
                 school_name = school_map.get(school_id, f"School {school_id}")
                 result.append({
                     'school_id': school_id,
@@ -661,7 +673,6 @@ logger = logging.getLogger(__name__)
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def get_students(request):
-    print(f"🔍 Backend Request: School={request.GET.get('school', '')}, Class={request.GET.get('class', '')}")
     user = request.user
 
     if request.method == 'POST':
@@ -682,18 +693,11 @@ def get_students(request):
                 except School.DoesNotExist:
                     return Response({"error": "Invalid school ID"}, status=400)
 
-                # ─────── Generate reg_num exactly as before (server-side) ───────
-                school_code = ''.join(word[0].upper() for word in school.name.strip().split())
-                year = datetime.now().year % 100
-                existing_count = Student.objects.filter(school=school).count() + 1
-                reg_num = f"{year:02d}-KK-{school_code}-{existing_count:03d}"
-
-                while Student.objects.filter(reg_num=reg_num).exists() or CustomUser.objects.filter(username=reg_num).exists():
-                    existing_count += 1
-                    reg_num = f"{year:02d}-KK-{school_code}-{existing_count:03d}"
-
                 # ─────── Atomic: Create User + Student together ───────
                 with transaction.atomic():
+                    # Generated server-side, same format as before (students.reg_numbers)
+                    reg_num = allocate_reg_nums(school, 1)[0]
+
                     requested_subtype = str(data.get("student_subtype") or '').strip().upper()
                     valid_subtypes = {choice[0] for choice in StudentSubtype.choices}
                     student_subtype = requested_subtype if requested_subtype in valid_subtypes else DEFAULT_STUDENT_SUBTYPE
@@ -734,6 +738,7 @@ def get_students(request):
                 return Response({"error": str(e)}, status=400)
     
     elif request.method == 'GET':  # ✅ Handle fetching students
+        # Cursor-paginated, filterable and projectable: GET /api/v2/students/
         school_name = request.GET.get("school", "")
         student_class = request.GET.get("class", "")
 
@@ -741,113 +746,176 @@ def get_students(request):
         page = request.GET.get("page", None)
         page_size = int(request.GET.get("page_size", 50))
 
-        print(f"🔍 Backend Request: School={school_name}, Class={student_class}, User={user.username}, Role={user.role}")
-
         try:
-            # Base queryset with select_related to prevent N+1 queries
-            # This fetches school and user in a single query instead of 500+ queries
-            base_queryset = Student.objects.select_related("school", "user")
-
             if user.role == "Admin":
-                students = base_queryset.filter(status="Active")
+                students = Student.objects.filter(status="Active")
 
             elif user.role == "Teacher":
                 # Teacher can access only their assigned schools
-                assigned_school_names = user.assigned_schools.values_list("name", flat=True)
-                assigned_school_ids   = user.assigned_schools.values_list("id", flat=True)
-
-                print(f"Teacher {user.username} → Assigned schools: {list(assigned_school_names)}")
+                assigned_school_ids = list(user.assigned_schools.values_list("id", flat=True))
 
                 # CASE 1: Frontend sends a specific school name → validate it
                 if school_name:
-                    if school_name not in assigned_school_names:
-                        print(f"Unauthorized attempt: {user.username} tried to access {school_name}")
+                    if not user.assigned_schools.filter(name=school_name).exists():
+                        logger.warning(f"Unauthorized attempt: {user.username} tried to access {school_name}")
                         return Response([])  # silently return empty (security)
 
                     # Filter by the requested school name
-                    students = base_queryset.filter(school__name=school_name, status="Active")
+                    students = Student.objects.filter(school__name=school_name, status="Active")
 
                 # CASE 2: No school_name sent → AUTO-FILTER to teacher's schools
                 else:
                     if not assigned_school_ids:
-                        print(f"Teacher {user.username} has no assigned schools")
                         return Response([])
-
-                    print(f"Auto-filtering to teacher's assigned schools: {list(assigned_school_names)}")
-                    students = base_queryset.filter(school_id__in=assigned_school_ids, status="Active")
+                    students = Student.objects.filter(school_id__in=assigned_school_ids, status="Active")
 
                 # Apply class filter if provided
                 if student_class:
                     students = students.filter(student_class=student_class)
 
             else:
-                print("❌ Unauthorized access attempt by:", user.username)
+                logger.warning(f"Unauthorized student list request by {user.username}")
                 return Response({"error": "Unauthorized"}, status=403)
 
-            # Order by name for consistent results
-            students = students.order_by("name")
-
-            # Get total count before pagination (single COUNT query)
-            total_count = students.count()
-            print(f"✅ Found {total_count} students for {user.username}")
+            # Only the response columns, school name and login joined in (students.student_listing)
+            rows = project(students.order_by("name"))
 
-            # Apply pagination if requested
+            # Return paginated response if pagination was requested
             if page is not None:
                 from django.core.paginator import Paginator, EmptyPage
-                paginator = Paginator(students, page_size)
+                paginator = Paginator(rows, page_size)
                 try:
-                    page_obj = paginator.page(int(page))
-                    students = page_obj.object_list
+                    page_rows = paginator.page(int(page)).object_list
                 except EmptyPage:
-                    students = []
-
-            # Convert to list (evaluates queryset once)
-            student_list = list(students)
-
-            student_data = [
-                {
-                    "id": student.id,
-                    "reg_num": student.reg_num,
-                    "name": student.name,
-                    "school": student.school.name if student.school else "Unknown",
-                    "student_class": student.student_class,
-                    "monthly_fee": student.monthly_fee,
-                    "phone": student.phone,
-                    "status": student.status,
-                    # Additional fields for student details modal
-                    "gender": student.gender,
-                    "date_of_birth": student.date_of_birth.isoformat() if student.date_of_birth else None,
-                    "date_of_registration": student.date_of_registration.isoformat() if student.date_of_registration else None,
-                    "address": student.address,
-                    # User account info for password reset
-                    "user_id": student.user.id if student.user else None,
-                    "username": student.user.username if student.user else None,
-                    "email": student.user.email if student.user else None,
-                }
-                for student in student_list
-            ]
-
-            print(f"✅ Returning {len(student_data)} students")
-
-            # Return paginated response if pagination was requested
-            if page is not None:
+                    page_rows = []
                 return Response({
-                    "results": student_data,
-                    "count": total_count,
+                    "results": as_legacy_items(page_rows),
+                    "count": paginator.count,
                     "page": int(page),
                     "page_size": page_size,
-                    "total_pages": (total_count + page_size - 1) // page_size,
+                    "total_pages": paginator.num_pages if paginator.count else 0,
                 })
 
             # Return simple list for backwards compatibility
-            return Response(student_data)
+            return Response(as_legacy_items(rows))
 
         except Exception as e:
-            print(f"❌ ERROR in get_students: {str(e)}")
+            logger.error(f"❌ ERROR in get_students: {str(e)}")
             return Response({"error": "Server error, check logs"}, status=500)
 
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def student_list_v2(request):
+    """
+    Cursor-paginated student list: {"next", "previous", "results"}.
+
+    Query params: school_id, school (name), class, subtype, status (default
+    Active, "all" for any), fields (comma-separated projection), shape=compact
+    (id, name, reg_num, student_class for dropdowns), sort (name, -name,
+    reg_num, -reg_num, created_at, -created_at), page_size, cursor.
+    See students.student_listing.
+
+    Permission: Admin (all schools) or Teacher (assigned schools)
+    """
+    try:
+        return list_students(request)
+    except StudentListingError as e:
+        return Response({"error": str(e)}, status=400)
+    except PermissionError:
+        return Response({"error": "Unauthorized"}, status=403)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_students_view(request):
+    """
+    Ranked student matches by partial name (typos tolerated), reg number or phone.
+
+    Query params: q (required), school_id, class, status (default Active,
+    "all" for any), limit (default 20, max 50). See students.search.
+
+    Permission: Admin (all schools) or Teacher (assigned schools)
+    """
+    query = (request.query_params.get("q") or "").strip()
+    if len(query) < 2:
+        return Response({"error": "q must be at least 2 characters"}, status=400)
+    students = visible_students(request.user)
+    if students is None:
+        return Response({"error": "Unauthorized"}, status=403)
+    try:
+        limit = int(request.query_params.get("limit", 20))
+    except ValueError:
+        return Response({"error": "limit must be a number"}, status=400)
+
+    params = {key: request.query_params.get(key) for key in ("school_id", "class", "status")}
+    results = search_students(filter_students(students, params), query, limit=limit)
+    return Response({"query": query, "count": len(results), "results": results})
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_students(request):
+    """
+    Create many students (and their logins) from a CSV or .xlsx upload.
+
+    Multipart body: file, school (default school ID for rows without a
+    school column), password (default password for rows without one),
+    allow_duplicates, dry_run, and report=csv to get the row errors as a
+    CSV download instead of the JSON report. See students.student_import
+    for the columns.
+
+    Invalid rows are skipped and listed per row and field; the rest are
+    imported. dry_run validates the whole file without writing.
+
+    Permission: Admin or Teacher only (teachers: assigned schools)
+    """
+    from django.http import HttpResponse
+    from .permissions import IsAdminOrTeacher
+
+    if not IsAdminOrTeacher().has_permission(request, None):
+        return Response({
+            "error": "Only administrators and teachers can import students."
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    upload = request.FILES.get("file")
+    if not upload:
+        return Response({"error": "file is required (.csv or .xlsx)."}, status=400)
+
+    def flag(name):
+        return str(request.data.get(name, '')).lower() in ('1', 'true', 'yes')
+
+    schools = School.objects.all()
+    if request.user.role != 'Admin':
+        schools = schools.filter(id__in=request.user.assigned_schools.values('id'))
+    schools = list(schools)
+
+    default_school = None
+    if request.data.get("school"):
+        default_school = next((school for school in schools if str(school.id) == str(request.data["school"])), None)
+        if default_school is None:
+            return Response({"error": "Invalid school ID"}, status=400)
+
+    try:
+        report = run_student_import(
+            upload,
+            schools=schools,
+            default_school=default_school,
+            default_password=request.data.get("password") or None,
+            allow_duplicates=flag("allow_duplicates"),
+            dry_run=flag("dry_run"),
+        )
+    except StudentImportError as e:
+        return Response({"error": str(e)}, status=400)
+
+    if request.data.get("report") == "csv":
+        response = HttpResponse(error_report_csv(report), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="student_import_errors.csv"'
+        return response
+    return Response(report, status=200 if report["dry_run"] or not report["created"] else 201)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_school_details(request):
@@ -998,11 +1066,14 @@ def students_per_school(request):
 @permission_classes([IsAuthenticated])
 def update_fees(request):
     """
-    Updates total_fee, status, and paid_amount in the Fee table
+    Updates total_fee, status, paid_amount and date_received in the Fee table.
+    All rows are checked first and saved together in one transaction; the
+    response has a result entry per submitted row (see students.fee_updates).
 
     Permission: Admin or Teacher only
     """
-    from .permissions import IsAdminOrTeacher, check_school_access
+    from .permissions import IsAdminOrTeacher
+    from .fee_updates import FORBIDDEN, INVALID, bulk_update_fees
 
     # Check permissions
     permission = IsAdminOrTeacher()
@@ -1013,86 +1084,25 @@ def update_fees(request):
 
     fees_data = request.data.get("fees", [])
 
-    if not fees_data:
-        print("❌ No fee data received in request")  # Debugging
+    if not fees_data or not isinstance(fees_data, list):
         return Response({"error": "No fee data received"}, status=400)
 
-    print(f"✅ Received {len(fees_data)} fee updates")  # Debugging
-    updated_fees = []
+    results, updated_fees = bulk_update_fees(request.user, fees_data)
 
-    for fee_data in fees_data:
-        try:
-            print(f"🔄 Processing fee ID: {fee_data['id']}")  # Debugging
-
-            # Fetch the fee record from the database
-            fee = Fee.objects.get(id=fee_data["id"])
+    failed = [result for result in results if result["status"] in (FORBIDDEN, INVALID)]
+    if failed:
+        # Nothing was saved; report the first problem plus every row's result
+        status_code = status.HTTP_403_FORBIDDEN if any(r["status"] == FORBIDDEN for r in failed) else status.HTTP_400_BAD_REQUEST
+        return Response({"error": failed[0]["error"], "results": results}, status=status_code)
 
-            # Check school access for teachers (ONSITE) or time-slot access (ONLINE)
-            from .permissions import check_timeslot_access
-            try:
-                fee_student = Student.objects.select_related('time_slot__teacher').get(id=fee.student_id)
-                is_online = fee_student.student_subtype == 'ONLINE'
-            except Student.DoesNotExist:
-                fee_student = None
-                is_online = False
-
-            if is_online:
-                if not check_timeslot_access(request.user, fee_student):
-                    return Response({
-                        "error": "You don't have permission to update fees for this online student."
-                    }, status=status.HTTP_403_FORBIDDEN)
-            else:
-                if fee.school_id and not check_school_access(request.user, fee.school_id):
-                    print(f"❌ Access denied for fee ID {fee.id} - user doesn't have access to school {fee.school_id}")
-                    return Response({
-                        "error": f"You don't have permission to update fees for this school."
-                    }, status=status.HTTP_403_FORBIDDEN)
-
-            # Update total_fee if present
-            if "total_fee" in fee_data:
-                fee.total_fee = Decimal(str(fee_data["total_fee"]))
-                print(f"🛠️ Updated total_fee to: {fee.total_fee}")
-
-            # Update paid_amount and recalculate balance_due
-            paid_amount = Decimal(str(fee_data.get("paid_amount", 0)))
-            if paid_amount > fee.total_fee:
-                print(f"❌ Paid amount {paid_amount} exceeds total fee {fee.total_fee} for fee ID {fee.id}")
-                return Response({"error": f"Paid amount {paid_amount} exceeds total fee {fee.total_fee} for fee ID {fee.id}"}, status=400)
-            
-            fee.paid_amount = paid_amount
-            fee.balance_due = fee.total_fee - fee.paid_amount
-
-            # Update status based on balance_due
-            fee.status = "Paid" if fee.balance_due == 0 else "Pending"
-
-            # Save the updated record
-            fee.save()
-
-            # Debugging logs
-            print(f"✅ Updated Fee ID: {fee.id} | Total Fee: {fee.total_fee} | Paid: {fee.paid_amount} | Status: {fee.status} | Balance Due: {fee.balance_due}")
-
-            # Collect updated fee for response
-            updated_fees.append({
-                "id": fee.id,
-                "total_fee": str(fee.total_fee),
-                "paid_amount": str(fee.paid_amount),
-                "balance_due": str(fee.balance_due),
-                "status": fee.status,
-                "student_name": fee.student_name,
-                "student_class": fee.student_class,
-                "month": fee.month,
-                "school": fee.school.name if fee.school else ""
-            })
-
-        except Fee.DoesNotExist:
-            print(f"❌ Fee ID {fee_data['id']} not found in database")  # Debugging
-            continue
+    return Response({
+        "message": "Fee records updated successfully!",
+        "fees": updated_fees,
+        "results": results,
+        "updated": len(updated_fees),
+    })
 
-        except Exception as e:
-            print(f"❌ Error updating fee ID {fee_data['id']}: {e}")  # Debugging
-            return Response({"error": str(e)}, status=500)
 
-    return Response({"message": "Fee records updated successfully!", "fees": updated_fees})
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def schools_list(request):
@@ -1109,50 +1119,23 @@ def schools_list(request):
 
 @api_view(['GET'])
 def get_fees(request):
-    fees = Fee.objects.all()
-
-    # Use school_id, class, and month filters
-    school_id = request.GET.get("school_id")
-    student_class = request.GET.get("class")
-    month = request.GET.get("month")
-    time_slot_id = request.GET.get("time_slot")
-
-    if school_id:
-        fees = fees.filter(school_id=school_id)
-    if student_class:
-        fees = fees.filter(student_class=student_class)
-    if month:
-        fees = fees.filter(month=month)
-
-    # Filter by time_slot: look up which student IDs belong to that time slot
-    if time_slot_id:
-        student_ids = list(
-            Student.objects.filter(time_slot_id=time_slot_id).values_list('id', flat=True)
-        )
-        fees = fees.filter(student_id__in=student_ids)
-
-    fee_list = [{
-        "id": fee.id,
-        "student_name": fee.student_name,
-        "school": fee.school,
-        "school": fee.school.name if fee.school else "",  # ✅ FIXED HERE
-        "student_class": fee.student_class,
-        "monthly_fee": fee.monthly_fee,
-        "month": fee.month,
-        "total_fee": fee.total_fee,
-        "paid_amount": fee.paid_amount,
-        "balance_due": fee.balance_due,
-        "payment_date": fee.payment_date,
-        "status": fee.status,
-        "student_id": fee.student_id
-    } for fee in fees]
-
-    return Response(fee_list)
+    """
+    Fee records, filtered by school_id, class, month, from_month/to_month,
+    time_slot and status. Supports fields=, sort=, keyset pages
+    (page_size=, cursor=) and stream=1; see students.fee_listing.
+    """
+    try:
+        result = list_fees(request.GET)
+    except FeeListingError as e:
+        return Response({"error": str(e)}, status=400)
+    if isinstance(result, StreamingHttpResponse):
+        return result
+    return Response(result)
 
 
 @api_view(['GET'])
 def fee_received_per_month(request):
-    data = Fee.objects.values('school', 'month').annotate(total_fee=Sum('paid_amount'))
+    data = Fee.objects.values('school', 'month', 'period').annotate(total_fee=Sum('paid_amount')).order_by('period', 'school')
     return Response(data)
 
 @api_view(['DELETE'])
@@ -1236,110 +1219,111 @@ def create_new_month_fees(request):
     if selected_month:
         month_str = selected_month
     else:
-        latest_fee = Fee.objects.filter(school_id=school_id).order_by('-id').first()
-        if latest_fee:
-            prev_month_date = datetime.strptime(latest_fee.month, "%b-%Y")
-            next_month = prev_month_date.month + 1
-            next_year = prev_month_date.year
-            if next_month > 12:
-                next_month = 1
-                next_year += 1
-            month_str = datetime(next_year, next_month, 1).strftime("%b-%Y")
+        latest_period = (
+            Fee.objects.filter(school_id=school_id, period__isnull=False)
+            .order_by('-period').values_list('period', flat=True).first()
+        )
+        if latest_period:
+            month_str = fee_month_label(latest_period + relativedelta(months=1))
         else:
             month_str = datetime.now().strftime("%b-%Y")
 
-    # Check for existing records
-    existing = Fee.objects.filter(school_id=school_id, month=month_str)
-    if existing.exists() and not force_overwrite:
+    # Build (or preview) the month's fees; see students.fee_generation
+    dry_run = request.data.get("dry_run", False)
+    result = generate_month_fees([school_instance.id], month_str, force_overwrite=force_overwrite, dry_run=dry_run)
+    school_result = result["schools"][0]
+
+    if school_result["status"] == fee_generation.EXISTS:
         return Response({
             "warning": f"Records for {month_str} already exist.",
             "action_required": "Set 'force_overwrite' to True to replace."
         }, status=409)
 
-    # Get active students
-    active_students = Student.objects.filter(status="Active", school_id=school_id)
-    student_count = active_students.count()
-    
-    if student_count == 0:
+    if school_result["status"] == fee_generation.NO_STUDENTS:
         return Response({
             "warning": f"No active students found for {school_instance.name}.",
             "records_created": 0
         }, status=200)
 
-    # 💰 PAYMENT MODE LOGIC - THIS IS THE NEW PART
-    payment_mode = school_instance.payment_mode
-    
-    # Validate subscription mode
-    if payment_mode == 'monthly_subscription':
-        if not school_instance.monthly_subscription_amount or school_instance.monthly_subscription_amount <= 0:
-            return Response({
-                "error": "School is in Monthly Subscription mode but subscription amount is not set or invalid.",
-                "action_required": "Set monthly_subscription_amount for this school."
-            }, status=400)
-        
-        # Calculate fee per student
-        subscription_amount = Decimal(str(school_instance.monthly_subscription_amount))
-        fee_per_student = (subscription_amount / student_count).quantize(
-            Decimal('0.01'), 
-            rounding=ROUND_HALF_UP
-        )
-        
-        # Calculate adjustment for rounding
-        total_before_adjustment = fee_per_student * student_count
-        adjustment = subscription_amount - total_before_adjustment
-    else:
-        # Per Student Mode
-        fee_per_student = None
-        adjustment = Decimal('0.00')
-
-    # Delete existing if overwrite
-    if force_overwrite:
-        existing.delete()
-
-    # Create fee records
-    now = datetime.now()
-    new_fees = []
-    adjustment_applied = False
-    
-    with transaction.atomic():
-        for student in active_students:
-            # Determine fee for this student
-            if payment_mode == 'monthly_subscription':
-                student_fee = fee_per_student
-                # Apply adjustment to first student
-                if not adjustment_applied and adjustment != 0:
-                    student_fee += adjustment
-                    adjustment_applied = True
-            else:
-                # Use individual student fee
-                student_fee = student.monthly_fee
-
-            new_fees.append(Fee(
-                student_id=student.id,
-                student_name=student.name,
-                student_class=student.student_class,
-                monthly_fee=student_fee,
-                month=month_str,
-                total_fee=student_fee,
-                paid_amount=Decimal('0.00'),
-                balance_due=student_fee,
-                payment_date=now.strftime("%Y-%m-15"),
-                status="Pending",
-                school=school_instance
-            ))
-        
-        Fee.objects.bulk_create(new_fees)
+    if school_result["status"] == fee_generation.INVALID_SUBSCRIPTION:
+        return Response({
+            "error": school_result["error"],
+            "action_required": "Set monthly_subscription_amount for this school."
+        }, status=400)
+
+    if dry_run:
+        return Response({
+            "message": f"Preview of fee records for {school_instance.name} - {month_str}",
+            "preview": school_result,
+            "month": month_str,
+        }, status=200)
 
     # Response
     return Response({
         "message": f"✅ Fee records created for {school_instance.name} - {month_str}",
-        "records_created": len(new_fees),
-        "payment_mode": payment_mode,
+        "records_created": result["records_created"],
+        "payment_mode": school_instance.payment_mode,
         "school_name": school_instance.name,
         "month": month_str,
     }, status=201)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def generate_fees(request):
+    """
+    Create one month's fee records for many schools at once.
+
+    Body: {"month": "Mar-2026", "school_ids": [1, 2] (default: every active
+    school the caller can access), "force_overwrite": false,
+    "missing_only": false, "dry_run": false}
+
+    Schools that cannot be generated are reported per school and do not stop
+    the others. dry_run returns the same per-school totals without writing.
+
+    Permission: Admin or Teacher only (teachers: assigned schools)
+    """
+    from .permissions import IsAdminOrTeacher
+
+    if not IsAdminOrTeacher().has_permission(request, None):
+        return Response({
+            "error": "Only administrators and teachers can create fee records."
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    month = request.data.get("month")
+    if not month or fee_period(month) is None:
+        return Response({"error": "month is required, e.g. 'Mar-2026'."}, status=400)
+
+    accessible = School.objects.filter(is_active=True)
+    if request.user.role != 'Admin':
+        accessible = accessible.filter(id__in=request.user.assigned_schools.values('id'))
+    accessible_ids = set(accessible.values_list('id', flat=True))
+
+    school_ids = request.data.get("school_ids")
+    if school_ids:
+        try:
+            school_ids = [int(school_id) for school_id in school_ids]
+        except (TypeError, ValueError):
+            return Response({"error": "school_ids must be a list of school IDs."}, status=400)
+        denied = [school_id for school_id in school_ids if school_id not in accessible_ids]
+        if denied and request.user.role != 'Admin':
+            return Response({
+                "error": "You don't have permission to create fees for these schools.",
+                "school_ids": denied,
+            }, status=status.HTTP_403_FORBIDDEN)
+    else:
+        school_ids = sorted(accessible_ids)
+
+    result = generate_month_fees(
+        school_ids,
+        fee_month_label(fee_period(month)),
+        force_overwrite=bool(request.data.get("force_overwrite", False)),
+        missing_only=bool(request.data.get("missing_only", False)),
+        dry_run=bool(request.data.get("dry_run", False)),
+    )
+    return Response(result, status=200 if result["dry_run"] else 201)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def upload_student_image(request):
@@ -1355,40 +1339,42 @@ def upload_student_image(request):
     if not student_id or not session_date:
         return Response({"error": "Student ID and Date are required"}, status=400)
 
+    try:
+        datetime.strptime(session_date, '%Y-%m-%d')
+    except ValueError:
+        return Response({"error": "Invalid date format. Use YYYY-MM-DD"}, status=400)
+
+    if not Student.objects.filter(id=student_id).exists():
+        return Response({"error": "Student not found"}, status=404)
+
     # Generate a unique filename
     ext = os.path.splitext(image.name)[1]  # Get file extension (.jpg, .png, etc.)
     unique_filename = f"{student_id}/{session_date}_{uuid.uuid4().hex}{ext}"
 
     try:
-        # Upload to Supabase Storage - use "student-images" bucket for progress images
-        STUDENT_IMAGES_BUCKET = "student-images"
-
+        # Upload to the "student-images" bucket (see students.image_storage)
         logger.info(f"Uploading image for student {student_id}, date {session_date}, filename: {unique_filename}")
-        logger.info(f"Using bucket: {STUDENT_IMAGES_BUCKET}")
 
-        response = supabase.storage.from_(STUDENT_IMAGES_BUCKET).upload(
-            unique_filename, image.read()
-        )
+        image_data = image.read()
+        response = get_image_storage().upload(unique_filename, image_data, image.content_type)
 
-        logger.info(f"Supabase upload response: {response}")
+        logger.info(f"Storage upload response: {response}")
 
         # Check for errors in response
         if isinstance(response, dict) and "error" in response:
-            logger.error(f"Supabase upload error: {response}")
+            logger.error(f"Storage upload error: {response}")
             return Response({"error": response["error"]["message"]}, status=500)
 
-        # Generate a signed URL (valid for 7 days)
-        signed_url_response = supabase.storage.from_(STUDENT_IMAGES_BUCKET).create_signed_url(
-            unique_filename, 604800  # 7 days in seconds
-        )
-
-        logger.info(f"Signed URL response: {signed_url_response}")
+        # Index the upload (path, date, size, dimensions) for listings and
+        # render the thumbnail/WebP variants on a worker
+        queue_student_image_variants(record_student_image(student_id, unique_filename, session_date, image_data))
 
-        if isinstance(signed_url_response, dict) and "error" in signed_url_response:
-            logger.error(f"Signed URL error: {signed_url_response}")
-            return Response({"error": signed_url_response["error"]["message"]}, status=500)
+        # Generate a signed URL (valid for 7 days)
+        image_url = sign_path(unique_filename)
+        if not image_url:
+            logger.error(f"Could not sign URL for {unique_filename}")
+            return Response({"error": "Failed to create image URL"}, status=500)
 
-        image_url = signed_url_response['signedURL']
         logger.info(f"Image uploaded successfully: {image_url}")
 
         # Initialize email result
@@ -1470,64 +1456,41 @@ def get_student_images(request):
         return Response({"error": "student_id is required"}, status=400)
 
     try:
-        # Get all images for the student from Supabase storage
-        folder_path = f"{student_id}/"
-        response = supabase.storage.from_("student-images").list(folder_path)
-
-        # Handle error response - response is a list when successful
-        if isinstance(response, dict) and "error" in response:
-            return Response({"error": response["error"]["message"]}, status=500)
-
-        if not response:
-            return Response({"images": [], "monthly_images": []})
-
-        # Determine filter pattern
+        # Determine date filter
         if session_date:
             # Fetch single day's image (original behavior)
-            filter_pattern = session_date
-        elif month:
-            # Fetch all images for the month
-            filter_pattern = month
+            start_date = end_date = datetime.strptime(session_date, '%Y-%m-%d').date()
         else:
-            # Default to current month
-            from datetime import datetime
-            filter_pattern = datetime.now().strftime('%Y-%m')
-
-        # Filter files matching the pattern
-        matching_files = [f for f in response if f.get('name', '').startswith(filter_pattern)]
+            # Fetch all images for the month (default: current month)
+            month_start = datetime.strptime(month, '%Y-%m').date() if month else datetime.now().date().replace(day=1)
+            start_date = month_start
+            end_date = (month_start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
 
-        # Sort by filename (date) descending (newest first)
-        matching_files.sort(key=lambda x: x.get('name', ''), reverse=True)
+        # Listing from the StudentImage table, URLs signed in one batch (newest first)
+        matching_images = get_student_images_with_urls(student_id, start_date, end_date)
 
-        # Generate signed URLs with date metadata
         images = []
         monthly_images = []
 
-        for file in matching_files:
-            filename = file.get('name', '')
-            signed_url_response = supabase.storage.from_("student-images").create_signed_url(
-                f"{folder_path}{filename}", 604800
-            )
-
-            # Extract date from filename (format: YYYY-MM-DD_uuid.jpg)
-            date_str = filename.split('_')[0] if '_' in filename else None
-
-            image_data = {
-                "url": signed_url_response.get('signedURL') or signed_url_response.get('signedUrl'),
-                "filename": filename,
-                "date": date_str,
-            }
-
-            monthly_images.append(image_data)
+        for image in matching_images:
+            monthly_images.append({
+                "url": image["url"],
+                "thumbnail_url": image["thumbnail_url"],  # None until variants are generated
+                "webp_url": image["webp_url"],
+                "filename": image["filename"],
+                "date": image["date"].isoformat(),
+            })
 
             # For backward compatibility - also add raw signed URL to images array
-            images.append(signed_url_response)
+            images.append({"signedURL": image["url"], "signedUrl": image["url"]})
 
         return Response({
             "images": images,  # Backward compatible format
             "monthly_images": monthly_images  # New format with date metadata
         })
 
+    except ValueError:
+        return Response({"error": "Invalid student_id, session_date (YYYY-MM-DD) or month (YYYY-MM)"}, status=400)
     except Exception as e:
         return Response({"error": str(e)}, status=500)
 
@@ -1978,128 +1941,28 @@ logger = logging.getLogger(__name__)
 # STUDENT DASHBOARD HELPER FUNCTIONS
 # ============================================
 
-def calculate_learning_streak(student):
+def calculate_learning_streak(student, stats=None):
     """
-    Calculate consecutive days of attendance (Present status).
-    Counts backwards from the most recent attendance date.
+    Consecutive Present sessions, counting back from the most recent one
+    to the latest Absent (sessions marked N/A don't break the streak).
     """
-    from datetime import timedelta
+    return (stats or stats_for(student)).learning_streak
 
-    attendances = Attendance.objects.filter(
-        student=student,
-        status='Present'
-    ).order_by('-session_date').values_list('session_date', flat=True)
-
-    if not attendances:
-        return 0
-
-    streak = 0
-    dates_list = list(attendances)
-
-    if not dates_list:
-        return 0
-
-    # Start from the most recent attendance
-    expected_date = dates_list[0]
-
-    for att_date in dates_list:
-        if att_date == expected_date:
-            streak += 1
-            expected_date = att_date - timedelta(days=1)
-        elif att_date < expected_date:
-            # Allow for gaps (weekends/holidays) - just count consecutive present days
-            streak += 1
-            expected_date = att_date - timedelta(days=1)
-        else:
-            break
 
-    return streak
-
-
-def calculate_monthly_attendance(student):
+def calculate_monthly_attendance(student, stats=None):
     """
     Calculate attendance percentage for the current month.
     Returns percentage (0-100).
     """
-    from django.utils import timezone
+    return monthly_percentage(stats or stats_for(student))
 
-    today = timezone.now().date()
-    first_of_month = today.replace(day=1)
 
-    total_days = Attendance.objects.filter(
-        student=student,
-        session_date__gte=first_of_month,
-        session_date__lte=today
-    ).count()
-
-    present_days = Attendance.objects.filter(
-        student=student,
-        session_date__gte=first_of_month,
-        session_date__lte=today,
-        status='Present'
-    ).count()
-
-    if total_days == 0:
-        return 0
-
-    return round((present_days / total_days) * 100)
-
-
-def get_weekly_attendance(student):
+def get_weekly_attendance(student, stats=None):
     """
     Get attendance data for the current week (Monday to Sunday).
     Returns dict with days_attended, total_school_days, and daily breakdown.
     """
-    from datetime import timedelta
-    from django.utils import timezone
-
-    today = timezone.now().date()
-    # Get Monday of current week
-    monday = today - timedelta(days=today.weekday())
-    sunday = monday + timedelta(days=6)
-
-    # Get school's assigned days
-    school = student.school
-    assigned_days = school.assigned_days if school.assigned_days else [0, 1, 2, 3, 4]  # Default Mon-Fri
-
-    # Get attendance records for this week
-    week_attendance = Attendance.objects.filter(
-        student=student,
-        session_date__gte=monday,
-        session_date__lte=today
-    ).values('session_date', 'status')
-
-    attendance_dict = {att['session_date']: att['status'] for att in week_attendance}
-
-    # Count days
-    days_attended = sum(1 for att in week_attendance if att['status'] == 'Present')
-
-    # Calculate total school days up to today
-    total_school_days = sum(
-        1 for i in range(min((today - monday).days + 1, 7))
-        if (monday + timedelta(days=i)).weekday() in assigned_days
-    )
-
-    # Build daily breakdown
-    day_names = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-    daily = []
-    for i in range(7):
-        day_date = monday + timedelta(days=i)
-        if day_date.weekday() in assigned_days:
-            status = attendance_dict.get(day_date, 'upcoming' if day_date > today else 'no_record')
-            daily.append({
-                'day': day_names[i],
-                'date': day_date.isoformat(),
-                'status': status,
-                'is_school_day': True
-            })
-
-    return {
-        'days_attended': days_attended,
-        'total_school_days': total_school_days,
-        'percentage': round((days_attended / total_school_days * 100) if total_school_days > 0 else 0),
-        'daily': daily
-    }
+    return weekly_attendance(stats or stats_for(student), student.school.assigned_days)
 
 
 def get_today_topics(student):
@@ -2182,62 +2045,25 @@ def get_next_class_info(student):
     }
 
 
-def count_activities_completed(student):
+def count_activities_completed(student, stats=None):
     """
     Count total attendance sessions marked as Present (activities completed).
     """
-    return Attendance.objects.filter(
-        student=student,
-        status='Present'
-    ).count()
+    return (stats or stats_for(student)).present_sessions
 
 
-def get_total_activities(student):
+def get_total_activities(student, stats=None):
     """
     Get total number of attendance records (all sessions).
     """
-    return Attendance.objects.filter(student=student).count()
+    return (stats or stats_for(student)).total_sessions
 
 
-def get_this_week_learning(student):
+def get_this_week_learning(student, stats=None):
     """
     Get learning topics for each day of the current week.
     """
-    from datetime import timedelta
-    from django.utils import timezone
-
-    today = timezone.now().date()
-    monday = today - timedelta(days=today.weekday())
-
-    week_learning = []
-    day_names = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-
-    for i in range(7):
-        day_date = monday + timedelta(days=i)
-
-        attendance = Attendance.objects.filter(
-            student=student,
-            session_date=day_date
-        ).select_related('lesson_plan').first()
-
-        topic = None
-        completed = False
-
-        if attendance:
-            completed = attendance.status == 'Present'
-            if attendance.lesson_plan and attendance.lesson_plan.planned_topic:
-                # Get first line of topic
-                topic = attendance.lesson_plan.planned_topic.split('\n')[0].strip()[:50]
-
-        if day_date <= today and day_date.weekday() in (student.school.assigned_days or [0, 1, 2, 3, 4]):
-            week_learning.append({
-                'day': day_names[i],
-                'date': day_date.isoformat(),
-                'topic': topic,
-                'completed': completed
-            })
-
-    return week_learning
+    return week_learning(stats or stats_for(student), student.school.assigned_days)
 
 
 def get_student_badges(student):
@@ -2311,6 +2137,10 @@ def my_student_data(request):
     except AttributeError:
         return Response({"error": "Student profile not found"}, status=404)
 
+    # Attendance figures come from one stats row (students.attendance_stats)
+    stats = stats_for(student)
+    badges = get_student_badges(student)
+
     # 3. Construct Data (Student.name is the single source of truth)
     data = {
         # --- FROM AUTH TABLE (students_customuser) ---
@@ -2336,17 +2166,17 @@ def my_student_data(request):
 
         # --- DASHBOARD DATA ---
         # Learning streak (consecutive present days)
-        "learning_streak": calculate_learning_streak(student),
+        "learning_streak": calculate_learning_streak(student, stats),
 
         # Attendance percentage this month
-        "attendance_percentage": calculate_monthly_attendance(student),
+        "attendance_percentage": calculate_monthly_attendance(student, stats),
 
         # Weekly attendance (for weekly goal card)
-        "weekly_attendance": get_weekly_attendance(student),
+        "weekly_attendance": get_weekly_attendance(student, stats),
 
         # Badges earned
-        "badges": get_student_badges(student),
-        "badges_count": len(get_student_badges(student)),
+        "badges": badges,
+        "badges_count": len(badges),
 
         # Today's topics learned
         "today_learned": get_today_topics(student),
@@ -2358,11 +2188,11 @@ def my_student_data(request):
         "next_class": get_next_class_info(student),
 
         # Activity progress (attendance sessions)
-        "activities_completed": count_activities_completed(student),
-        "total_activities": get_total_activities(student),
+        "activities_completed": count_activities_completed(student, stats),
+        "total_activities": get_total_activities(student, stats),
 
         # This week's learning breakdown
-        "this_week_learning": get_this_week_learning(student),
+        "this_week_learning": get_this_week_learning(student, stats),
 
         # --- LEGACY DATA (for backward compatibility) ---
         "fees": list(
@@ -2719,26 +2549,11 @@ def my_progress(request):
         # Convert to dict for easy lookup
         attendance_dict = {a.session_date: a for a in recent_attendance}
 
-        # Get images for the date range from Supabase
+        # Get images for the date range (newest image per date wins)
         images_dict = {}
         try:
-            folder_path = f"{student.id}/"
-            response = supabase.storage.from_("student-images").list(folder_path)
-
-            if isinstance(response, list):
-                for file in response:
-                    filename = file.get('name', '')
-                    if '_' in filename:
-                        date_str = filename.split('_')[0]
-                        try:
-                            file_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                            if start_date <= file_date <= target_date:
-                                signed_url = supabase.storage.from_("student-images").create_signed_url(
-                                    f"{folder_path}{filename}", 604800
-                                )
-                                images_dict[file_date] = signed_url.get('signedURL') or signed_url.get('signedUrl')
-                        except ValueError:
-                            continue
+            for image in get_student_images_with_urls(student.id, start_date, target_date):
+                images_dict.setdefault(image["date"], image)
         except Exception as e:
             logger.warning(f"Error fetching images for student {student.id}: {str(e)}")
 
@@ -2747,7 +2562,8 @@ def my_progress(request):
         for lesson in recent_lessons:
             single_date = lesson.session_date
             attendance = attendance_dict.get(single_date)
-            image_url = images_dict.get(single_date)
+            image = images_dict.get(single_date)
+            image_url = image["url"] if image else None
 
             # Get achieved topic - from attendance or lesson plan
             achieved_topic = ""
@@ -2768,6 +2584,7 @@ def my_progress(request):
                 "achieved_topic": achieved_topic,
                 "has_image": image_url is not None,
                 "image_url": image_url,
+                "thumbnail_url": image["thumbnail_url"] if image else None,
             })
 
         return Response({
@@ -2977,7 +2794,7 @@ def online_student_dashboard(request):
         # 11. Fees — last 10 fee records for this student
         fee_records = Fee.objects.filter(
             student_id=student.id
-        ).order_by('-month')[:10]
+        ).order_by(F('period').desc(nulls_last=True), '-id')[:10]
 
         fees = [
             {
@@ -3015,41 +2832,55 @@ def online_student_dashboard(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_fee_defaulters(request):
-    """Get students with unpaid fees for N consecutive months."""
-    from django.db.models import Count, Sum
-    from dateutil.relativedelta import relativedelta
-    from datetime import date
+    """
+    Students with all of the last N months (this month included) unpaid,
+    from the fee arrears index. unpaid_months and total_due count those
+    months only; oldest_unpaid_month, days_overdue and aging_bucket describe
+    the student's whole arrears.
 
-    months_threshold = int(request.query_params.get('months', 3))
-    school_id = request.query_params.get('school_id')
+    Query params: months (default 3), school_id, class, and bucket
+    (0-30 / 31-60 / 61-90 / 90+, days since the oldest unpaid month).
+    """
+    from datetime import date
 
-    # Get last N months
-    now = date.today()
-    month_strings = []
-    for i in range(months_threshold):
-        d = now - relativedelta(months=i)
-        month_strings.append(d.strftime('%b-%Y'))
-
-    query = Fee.objects.filter(
-        month__in=month_strings,
-        status__in=['Pending', 'Overdue'],
-        balance_due__gt=0
-    )
-    if school_id:
-        query = query.filter(school_id=school_id)
+    try:
+        months_threshold = int(request.query_params.get('months', 3))
+    except ValueError:
+        return Response({"error": "months must be a number"}, status=400)
+    current_period = date.today().replace(day=1)
+    month_strings = [
+        fee_month_label(current_period - relativedelta(months=i)) for i in range(months_threshold)
+    ]
+    first_period = current_period - relativedelta(months=max(months_threshold, 1) - 1)
 
-    defaulters = query.values(
-        'student_id', 'student_name', 'student_class', 'school__name'
-    ).annotate(
-        unpaid_months=Count('id'),
-        total_due=Sum('balance_due')
-    ).filter(
-        unpaid_months__gte=months_threshold
-    ).order_by('-total_due')
+    try:
+        rows = fee_defaulters(
+            school_id=request.query_params.get('school_id'),
+            student_class=request.query_params.get('class'),
+            min_months=months_threshold,
+            bucket=request.query_params.get('bucket'),
+            since=first_period,
+        )
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
 
+    defaulters = [
+        {
+            'student_id': row['student_id'],
+            'student_name': row['student_name'],
+            'student_class': row['student_class'],
+            'school__name': row['school__name'],
+            'unpaid_months': row['unpaid_months'],
+            'total_due': row['total_outstanding'],
+            'oldest_unpaid_month': row['oldest_unpaid_month'],
+            'days_overdue': row['days_overdue'],
+            'aging_bucket': row['aging_bucket'],
+        }
+        for row in rows
+    ]
     return Response({
-        "defaulters": list(defaulters),
-        "count": defaulters.count(),
+        "defaulters": defaulters,
+        "count": len(defaulters),
         "months_checked": months_threshold,
         "months": month_strings
     })
@@ -3058,9 +2889,7 @@ def get_fee_defaulters(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def compare_fee_months(request):
-    """Compare fee collection between two months."""
-    from django.db.models import Sum, Count, Q
-
+    """Compare fee collection between two months (from the fee collection rollups)."""
     month1 = request.query_params.get('month1')
     month2 = request.query_params.get('month2')
     school_id = request.query_params.get('school_id')
@@ -3069,17 +2898,16 @@ def compare_fee_months(request):
         return Response({"error": "Both month1 and month2 are required"}, status=400)
 
     def get_stats(month):
-        query = Fee.objects.filter(month=month)
-        if school_id:
-            query = query.filter(school_id=school_id)
-        stats = query.aggregate(
-            total_fee=Sum('total_fee'),
-            total_paid=Sum('paid_amount'),
-            total_balance=Sum('balance_due'),
-            total_records=Count('id'),
-            paid_count=Count('id', filter=Q(status='Paid')),
-            pending_count=Count('id', filter=Q(status__in=['Pending', 'Overdue']))
-        )
+        totals = fee_rollup_summary(month, school_id)
+        stats = {
+            'total_fee': totals['total_fee'],
+            'total_paid': totals['paid_amount'],
+            'total_balance': totals['balance_due'],
+            'total_records': totals['record_count'],
+            'paid_count': totals['paid_count'],
+            'pending_count': totals['pending_count'],
+            'active_students': totals['active_students'],
+        }
         stats['month'] = month
         total_fee = float(stats['total_fee'] or 0)
         total_paid = float(stats['total_paid'] or 0)
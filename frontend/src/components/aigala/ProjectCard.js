@@ -30,6 +30,7 @@ const ProjectCard = ({
         id,
         title,
         image_url,
+        thumbnail_url,
         student_name,
         student_class,
         student_photo,
@@ -83,7 +84,7 @@ const ProjectCard = ({
             <div style={styles.imageContainer}>
                 {!imageLoaded && <div style={styles.imagePlaceholder} />}
                 <img
-                    src={image_url}
+                    src={thumbnail_url || image_url}
                     alt={title}
                     style={{
                         ...styles.image,
@@ -186,7 +186,7 @@ const ProjectDetailModal = ({
                 <div style={styles.content}>
                     {/* Left: Image */}
                     <div style={styles.imageSection}>
-                        <img src={project.image_url} alt={project.title} style={styles.image} />
+                        <img src={project.webp_url || project.image_url} alt={project.title} style={styles.image} />
 
                         {/* Winner Badge Overlay */}
                         {winnerBadge && (
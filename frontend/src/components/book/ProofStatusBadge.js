@@ -99,7 +99,7 @@ const ProofStatusBadge = ({
       {proof.screenshot_url && (
         <div style={styles.thumbWrap}>
           <img
-            src={proof.screenshot_url}
+            src={proof.thumbnail_url || proof.screenshot_url}
             alt="Your submission"
             style={styles.thumbnail}
           />
@@ -555,6 +555,7 @@ const ReportsPage = () => {
           student_class: selectedClass,
           selectedImages: selectedImages,
           includeBackground: includeBackground,
+          stream: true,
         },
         {
           headers: getAuthHeaders(),
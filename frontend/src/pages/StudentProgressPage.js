@@ -305,7 +305,7 @@ const ImageGridItem = ({ img, index, onPreview, onDelete, isDeleting, onShowDele
       onKeyDown={(e) => e.key === 'Enter' && onPreview(img)}
     >
       <img
-        src={img.url}
+        src={img.thumbnail_url || img.url}
         alt={`Progress from ${img.date}`}
         style={{
           width: '100%',
@@ -1168,7 +1168,7 @@ useEffect(() => {
               ×
             </button>
             <img
-              src={selectedPreviewImage.url}
+              src={selectedPreviewImage.webp_url || selectedPreviewImage.url}
               alt={`Progress from ${selectedPreviewImage.date}`}
               style={styles.previewImage}
             />